@@ -17,3 +17,5 @@
 # You should have received a copy of the GNU General Public License along with
 # Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
 #
+
+from .project import Project  # noqa: F401
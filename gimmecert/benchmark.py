@@ -0,0 +1,426 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import concurrent.futures
+import datetime
+import multiprocessing
+import time
+
+import gimmecert.crypto
+import gimmecert.utils
+
+
+#: Key specifications measured by key generation benchmark - commonly
+#: used RSA key sizes, and all supported elliptic curves.
+KEY_SPECIFICATIONS = [('rsa', 2048), ('rsa', 3072), ('rsa', 4096)] + [('ecdsa', gimmecert.utils.CURVES[name]) for name in sorted(gimmecert.utils.CURVES)]
+
+
+def measure(function, count):
+    """
+    Measures average duration of calling the passed-in function.
+
+    :param function: Function to call. Function is called without any arguments.
+    :type function: callable
+
+    :param count: Number of times to call the function.
+    :type count: int
+
+    :returns: Average duration of a single call in seconds.
+    :rtype: float
+    """
+
+    start = time.perf_counter()
+
+    for _ in range(count):
+        function()
+
+    return (time.perf_counter() - start) / count
+
+
+def measure_for(function, duration):
+    """
+    Measures average duration of calling the passed-in function,
+    calling it repeatedly until the designated amount of time passes
+    (but at least once). Useful for operations with unpredictable
+    duration, like private key generation.
+
+    :param function: Function to call. Function is called without any arguments.
+    :type function: callable
+
+    :param duration: Minimum amount of time (in seconds) to spend measuring.
+    :type duration: float
+
+    :returns: Average duration of a single call in seconds.
+    :rtype: float
+    """
+
+    count = 0
+    start = time.perf_counter()
+
+    while True:
+        function()
+        count += 1
+
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            return elapsed / count
+
+
+def estimate_key_generation(key_specification, duration=0.2):
+    """
+    Estimates duration of generating a single private key on this machine.
+
+    :param key_specification: Key specification of private key.
+    :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+    :param duration: Minimum amount of time (in seconds) to spend measuring.
+    :type duration: float
+
+    :returns: Estimated duration in seconds.
+    :rtype: float
+    """
+
+    return measure_for(gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1]), duration)
+
+
+def estimate_renewal(issuer_private_key, issuer_certificate, duration=0.2):
+    """
+    Estimates duration of renewing (signing) a single end entity
+    certificate with the passed-in issuing CA on this machine.
+
+    :param issuer_private_key: Private key of the issuing CA.
+    :type issuer_private_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                              cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey
+
+    :param issuer_certificate: Certificate of the issuing CA.
+    :type issuer_certificate: cryptography.x509.Certificate
+
+    :param duration: Minimum amount of time (in seconds) to spend measuring.
+    :type duration: float
+
+    :returns: Estimated duration in seconds.
+    :rtype: float
+    """
+
+    # Issuing CA public key is good enough as stand-in for entity key.
+    public_key = issuer_certificate.public_key()
+    certificate = gimmecert.crypto.issue_server_certificate('benchmark', public_key, issuer_private_key, issuer_certificate)
+
+    return measure_for(lambda: gimmecert.crypto.renew_certificate(certificate, public_key, issuer_private_key, issuer_certificate), duration)
+
+
+def benchmark_issuance(key_specification, count):
+    """
+    Measures per-certificate duration of issuing end entity
+    certificates using each of the built-in issuance profiles. Every
+    profile is measured twice - once with certificate issuer being set-up
+    for each certificate, and once with a single certificate issuer
+    being reused for all certificates.
+
+    The difference between the two represents per-certificate
+    overhead avoided during bulk issuance.
+
+    :param key_specification: Key specification to use for the issuing CA and end entity keys.
+    :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+    :param count: Number of certificates to issue per measurement.
+    :type count: int
+
+    :returns: List of profile names with average per-certificate durations (in seconds) when using fresh and reused issuers.
+    :rtype: list[(str, float, float)]
+    """
+
+    key_generator = gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1])
+    issuer_private_key, issuer_certificate = gimmecert.crypto.generate_ca_hierarchy('Benchmark', 1, key_generator)[-1]
+    public_key = key_generator().public_key()
+
+    results = []
+
+    for profile in [gimmecert.crypto.SERVER_PROFILE, gimmecert.crypto.CLIENT_PROFILE, gimmecert.crypto.SERVER_CLIENT_PROFILE]:
+
+        def issue_with_fresh_issuer():
+            gimmecert.crypto.CertificateIssuer(profile, issuer_private_key, issuer_certificate)('benchmark', public_key)
+
+        issue_with_reused_issuer = gimmecert.crypto.CertificateIssuer(profile, issuer_private_key, issuer_certificate)
+
+        # Warm-up, so one-off costs (like backend initialisation) do
+        # not skew the first measurement.
+        issue_with_reused_issuer('benchmark', public_key)
+
+        results.append((profile.name,
+                        measure(issue_with_fresh_issuer, count),
+                        measure(lambda: issue_with_reused_issuer('benchmark', public_key), count)))
+
+    return results
+
+
+def measure_throughput(function, count, duration):
+    """
+    Measures number of calls per second of the passed-in function. The
+    function is called up to designated number of times, stopping
+    early once the designated amount of time passes (but is called at
+    least once).
+
+    :param function: Function to call. Function is called without any arguments.
+    :type function: callable
+
+    :param count: Maximum number of times to call the function.
+    :type count: int
+
+    :param duration: Maximum amount of time (in seconds) to spend measuring.
+    :type duration: float
+
+    :returns: Number of calls per second.
+    :rtype: float
+    """
+
+    calls, elapsed = call_repeatedly(function, count, duration)
+
+    return calls / elapsed
+
+
+def call_repeatedly(function, count, duration):
+    """
+    Calls the passed-in function up to designated number of times,
+    stopping early once the designated amount of time passes (but
+    calls it at least once).
+
+    :param function: Function to call. Function is called without any arguments.
+    :type function: callable
+
+    :param count: Maximum number of times to call the function.
+    :type count: int
+
+    :param duration: Maximum amount of time (in seconds) to spend calling the function.
+    :type duration: float
+
+    :returns: Number of calls, and time (in seconds) spent calling the function.
+    :rtype: (int, float)
+    """
+
+    calls = 0
+    start = time.perf_counter()
+
+    while True:
+        function()
+        calls += 1
+
+        elapsed = time.perf_counter() - start
+        if calls >= count or elapsed >= duration:
+            return calls, elapsed
+
+
+def key_generation_operation(key_specification):
+    """
+    Prepares private key generation operation for benchmarking.
+
+    :param key_specification: Key specification of generated private keys.
+    :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+    :returns: Function that generates a single private key when called.
+    :rtype: callable
+    """
+
+    return gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1])
+
+
+def signing_operation(key_specification):
+    """
+    Prepares certificate signing operation for benchmarking. Issuing
+    key is generated up-front.
+
+    :param key_specification: Key specification of the issuing key.
+    :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+    :returns: Function that issues (signs) a single certificate when called.
+    :rtype: callable
+    """
+
+    private_key = gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1])()
+    public_key = private_key.public_key()
+    dn = gimmecert.crypto.get_dn('benchmark')
+    not_before = datetime.datetime.utcnow()
+    not_after = not_before + datetime.timedelta(days=1)
+
+    return lambda: gimmecert.crypto.issue_certificate(dn, dn, private_key, public_key, not_before, not_after)
+
+
+def key_generation_throughput(key_specification, count, duration):
+    """
+    Measures number of private keys generated per second.
+
+    :param key_specification: Key specification of generated private keys.
+    :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+    :param count: Maximum number of keys to generate.
+    :type count: int
+
+    :param duration: Maximum amount of time (in seconds) to spend measuring.
+    :type duration: float
+
+    :returns: Number of private keys generated per second.
+    :rtype: float
+    """
+
+    return measure_throughput(key_generation_operation(key_specification), count, duration)
+
+
+def signing_throughput(key_specification, count, duration):
+    """
+    Measures number of certificates issued (signed) per second using
+    issuing key with the passed-in key specification.
+
+    :param key_specification: Key specification of the issuing key.
+    :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+    :param count: Maximum number of certificates to issue.
+    :type count: int
+
+    :param duration: Maximum amount of time (in seconds) to spend measuring.
+    :type duration: float
+
+    :returns: Number of certificates issued per second.
+    :rtype: float
+    """
+
+    return measure_throughput(signing_operation(key_specification), count, duration)
+
+
+def measure_in_worker(barrier, prepare, key_specification, count, duration):
+    """
+    Measures operation within a worker process, as part of parallel
+    throughput measurement. Operation is prepared first, and then the
+    worker waits for all the other workers before starting the
+    measurement, ensuring workers run in parallel.
+
+    :param barrier: Barrier shared by all the workers.
+    :type barrier: multiprocessing.managers.BarrierProxy
+
+    :param prepare: Function that prepares the operation. Called with key specification, and should return function that performs the operation.
+    :type prepare: callable
+
+    :param key_specification: Key specification passed-in to the prepare function.
+    :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+    :param count: Maximum number of operations to perform.
+    :type count: int
+
+    :param duration: Maximum amount of time (in seconds) to spend measuring.
+    :type duration: float
+
+    :returns: Number of performed operations, and wall-clock time (as seconds since epoch) when the measurement started and ended.
+    :rtype: (int, float, float)
+    """
+
+    function = prepare(key_specification)
+
+    barrier.wait()
+
+    start = time.time()
+    calls, _ = call_repeatedly(function, count, duration)
+
+    return calls, start, time.time()
+
+
+def parallel_throughput(executor, barrier, prepare, key_specification, count, duration, jobs):
+    """
+    Measures number of operations per second performed by multiple
+    worker processes running in parallel.
+
+    Throughput is calculated as total number of operations divided by
+    wall-clock time elapsed between the first worker starting and the
+    last worker finishing the measurement. Workers start measuring
+    only once all of them are ready, so a single worker cannot run
+    multiple measurements one after another.
+
+    :param executor: Executor with (at least) the designated number of worker processes.
+    :type executor: concurrent.futures.ProcessPoolExecutor
+
+    :param barrier: Barrier for the designated number of parties, shared by all the workers.
+    :type barrier: multiprocessing.managers.BarrierProxy
+
+    :param prepare: Function that prepares the operation (see measure_in_worker). Must be picklable.
+    :type prepare: callable
+
+    :param key_specification: Key specification passed-in to the prepare function.
+    :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+    :param count: Maximum number of operations to perform per worker process.
+    :type count: int
+
+    :param duration: Maximum amount of time (in seconds) to spend measuring.
+    :type duration: float
+
+    :param jobs: Number of worker processes to run in parallel.
+    :type jobs: int
+
+    :returns: Number of operations per second.
+    :rtype: float
+    """
+
+    results = list(executor.map(measure_in_worker, [barrier] * jobs, [prepare] * jobs, [key_specification] * jobs, [count] * jobs, [duration] * jobs))
+
+    calls = sum(calls for calls, _, _ in results)
+    elapsed = max(end for _, _, end in results) - min(start for _, start, _ in results)
+
+    return calls / elapsed
+
+
+def benchmark_keys(key_specifications, count, jobs, duration=1.0):
+    """
+    Measures throughput of private key generation and certificate
+    signing for each of the passed-in key specifications, both within
+    a single process, and with multiple worker processes running in
+    parallel.
+
+    Throughput with multiple worker processes is measured using
+    wall-clock time across all of the workers (see
+    parallel_throughput).
+
+    :param key_specifications: Key specifications to measure.
+    :type key_specifications: list[tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)]
+
+    :param count: Maximum number of operations to perform per measurement (and per worker process).
+    :type count: int
+
+    :param jobs: Number of worker processes to use for parallel measurements.
+    :type jobs: int
+
+    :param duration: Maximum amount of time (in seconds) to spend per measurement.
+    :type duration: float
+
+    :returns: List of key specifications with number of keys generated per second (single process, parallel), and number of signatures per
+        second (single process, parallel).
+    :rtype: list[(tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve), float, float, float, float)]
+    """
+
+    results = []
+
+    with multiprocessing.Manager() as manager, concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        barrier = manager.Barrier(jobs)
+
+        for key_specification in key_specifications:
+            results.append((key_specification,
+                            key_generation_throughput(key_specification, count, duration),
+                            parallel_throughput(executor, barrier, key_generation_operation, key_specification, count, duration, jobs),
+                            signing_throughput(key_specification, count, duration),
+                            parallel_throughput(executor, barrier, signing_operation, key_specification, count, duration, jobs)))
+
+    return results
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import concurrent.futures
+
+import cryptography.hazmat.backends
+import cryptography.hazmat.primitives.serialization
+
+import gimmecert.crypto
+import gimmecert.signing
+import gimmecert.utils
+
+
+def generate_private_key_pems(key_specification, count):
+    """
+    Generates a batch of private keys. Results are serialised, which
+    allows the function to be used with process pools.
+
+    :param key_specification: Key specification to use when generating private keys.
+    :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+    :param count: Number of private keys to generate.
+    :type count: int
+
+    :returns: List of private keys in OpenSSL-style PEM format.
+    :rtype: list[bytes]
+    """
+
+    key_generator = gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1])
+
+    return [gimmecert.utils.private_key_to_pem(key_generator()).encode() for _ in range(count)]
+
+
+def issue_client_certificates(issuer_private_key, issuer_certificate, names, key_specification, validity=None, backdate=None, public_key=None,
+                              jobs=1, key_pool=None):
+    """
+    Issues client certificates for a large number of names. Names are
+    processed in chunks. For every chunk, private keys are taken from
+    the key pool when available, with the remaining private keys being
+    generated by a pool of worker processes. Certificates are then
+    signed using a signing pool (see gimmecert.signing.SigningPool),
+    with each worker using its own copy of the issuing CA private
+    key. Worker processes are used only if there are enough names to
+    keep all of them busy, with smaller runs being issued within the
+    calling process.
+
+    Results are produced chunk by chunk, in the same order as the
+    passed-in names, so the caller can write them out as they are
+    issued.
+
+    :param issuer_private_key: Private key of the issuing CA.
+    :type issuer_private_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                              cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey
+
+    :param issuer_certificate: Certificate of the issuing CA.
+    :type issuer_certificate: cryptography.x509.Certificate
+
+    :param names: Names of client entities.
+    :type names: list[str]
+
+    :param key_specification: Key specification to use when generating private keys.
+    :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+    :param validity: Duration of certificate validity. Set to None (default) for one year.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) for 15 minutes.
+    :type backdate: datetime.timedelta or None
+
+    :param public_key: Public key to issue all certificates for. Set to None (default) to generate private key for each entity.
+    :type public_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey or
+                      cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePublicKey or None
+
+    :param jobs: Number of worker processes to use.
+    :type jobs: int
+
+    :param key_pool: Pool to take private keys from. Set to None (default) to generate all private keys.
+    :type key_pool: gimmecert.pool.KeyPool or None
+
+    :returns: Iterator over chunks of results, each result consisting out of entity name, private key (None if public key was passed-in), and
+        certificate.
+    :rtype: collections.abc.Iterator[list[(str, cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+        cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey or None, cryptography.x509.Certificate)]]
+    """
+
+    backend = cryptography.hazmat.backends.default_backend()
+    issuer = gimmecert.crypto.CertificateIssuer(gimmecert.crypto.CLIENT_PROFILE, issuer_private_key, issuer_certificate, validity, backdate)
+    key_generator = gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1])
+
+    # Chunks are large enough for every worker to get a couple of batches.
+    chunk_size = gimmecert.signing.MAX_BATCH_SIZE * jobs
+
+    if public_key is None and gimmecert.signing.use_worker_processes(len(names), jobs):
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+    else:
+        executor = None
+
+    def generate_private_keys(count):
+        """
+        Takes private keys from the key pool (as many as available),
+        and generates the rest.
+        """
+
+        private_keys = []
+
+        while key_pool is not None and len(private_keys) < count:
+            private_key = key_pool.take(key_specification)
+            if private_key is None:
+                break
+            private_keys.append(private_key)
+
+        missing = count - len(private_keys)
+
+        if executor is not None and gimmecert.signing.use_worker_processes(missing, jobs):
+            counts = [len(batch) for batch in gimmecert.signing.split_into_batches(range(missing), jobs)]
+            private_keys.extend(cryptography.hazmat.primitives.serialization.load_pem_private_key(private_key_pem, None, backend)
+                                for batch in executor.map(generate_private_key_pems, [key_specification] * len(counts), counts)
+                                for private_key_pem in batch)
+        else:
+            private_keys.extend(key_generator() for _ in range(missing))
+
+        return private_keys
+
+    try:
+        with gimmecert.signing.SigningPool(issuer_private_key, issuer_certificate, jobs) as signing_pool:
+            for i in range(0, len(names), chunk_size):
+                chunk = names[i:i + chunk_size]
+
+                if public_key is None:
+                    private_keys = generate_private_keys(len(chunk))
+                    public_keys = [private_key.public_key() for private_key in private_keys]
+                else:
+                    private_keys = [None] * len(chunk)
+                    public_keys = [public_key] * len(chunk)
+
+                certificates = signing_pool.sign([issuer.get_signing_parameters(name, entity_public_key)
+                                                  for name, entity_public_key in zip(chunk, public_keys)])
+
+                yield list(zip(chunk, private_keys, certificates))
+    finally:
+        if executor is not None:
+            executor.shutdown()
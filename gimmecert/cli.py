@@ -20,13 +20,16 @@
 
 
 import argparse
+import contextlib
+import datetime
 import os
 import sys
 
-from cryptography.hazmat.primitives.asymmetric import ec
-
+from .crypto import get_general_name
 from .decorators import subcommand_parser, get_subcommand_parser_setup_functions
-from .commands import client, help_, init, renew, server, status, usage, ExitCode
+from .utils import parse_duration, parse_key_specification
+from .commands import (bench, client, client_bulk, crl, export_p12, help_, init, issue, metrics, ocsp_serve, pool, reissue, renew, renew_plan, revoke,
+                       server, status, subca, sync, usage, verify, watch, ExitCode)
 
 
 ERROR_ARGUMENTS = 2
@@ -48,6 +51,17 @@ Examples:
     # Initialise the local CA hierarchy while generating secp256r1 ECDSA keys.
     gimmecert init --key-specification ecdsa:secp256r1
 
+    # Initialise project that uses CA hierarchy of another project.
+    gimmecert init --ca-from ../otherproject/
+
+    # Initialise project that uses named CA hierarchy from shared CA store (generated on first use).
+    gimmecert init --shared-ca development
+
+    # Issue sub-CA, and use it as issuing CA for project on another machine.
+    gimmecert subca worker1
+    gimmecert subca worker2 --output-archive - | ssh worker2 tar -xf - -C /srv/gimmecert/
+    ssh worker2 'cd /srv/myproject/ && gimmecert init --ca-from /srv/gimmecert/subca/worker2/'
+
     # Issue a TLS server certificate with only the server name in DNS subject alternative name.
     gimmecert server myserver
 
@@ -69,6 +83,15 @@ Examples:
     # Issue a TLS client certificate while generating 1024-bit RSA key.
     gimmecert client myclient --key-specification rsa:1024
 
+    # Issue 100000 client certificates for load testing, writing them only into a tar archive.
+    gimmecert client --count 100000 --name-template 'loadclient-{n:06d}' --output-archive loadclients.tar --archive-only
+
+    # Issue a certificate usable both as TLS server and TLS client certificate.
+    gimmecert issue --profile server-client mynode mynode.example.com
+
+    # Issue a certificate using custom profile from .gimmecert/profiles.json.
+    gimmecert issue --profile code-signing mysigner
+
     # Renew a TLS server certificate, preserving naming and private key.
     gimmecert renew server myserver
 
@@ -89,8 +112,65 @@ Examples:
     # Renew a TLS client certificate, generating a new private key using specified key algorithm/parameters.
     gimmecert renew client myclient --new-private-key --key-specification ecdsa:secp521r1
 
+    # Estimate how long renewing a TLS server certificate with a new ECDSA private key would take.
+    gimmecert renew --plan --new-private-key --key-specification ecdsa:secp256r1 server myserver
+
+    # Issue a short-lived TLS server certificate, valid for 15 minutes (backdated by 30 seconds).
+    gimmecert server myserver --validity 15m --backdate 30s
+
+    # Keep reissuing short-lived TLS server certificate every 5 minutes (same key and naming), until interrupted.
+    gimmecert reissue server myserver --validity 15m --interval 5m --count 0
+
     # Show information about CA hierarchy and issued certificates.
     gimmecert status
+
+    # Export server private key, certificate, and CA chain as unencrypted PKCS#12 bundle.
+    gimmecert export-p12 server myserver
+
+    # Export all client certificates as PKCS#12 bundles protected with password read from environment variable.
+    gimmecert export-p12 client --all --password-env P12_PASSWORD
+
+    # Incrementally synchronise issued artefacts into another directory, rewriting only changed files.
+    gimmecert sync --to /etc/myservices/ --layout '{type}/{name}/{kind}.pem'
+
+    # Watch a directory for server CSRs (NAME.csr.pem), and issue certificates (NAME.cert.pem) next to them.
+    gimmecert watch --inbox /srv/csr-inbox/ --type server
+
+    # Revoke a TLS server certificate, and issue full CRL.
+    gimmecert revoke server myserver
+    gimmecert crl
+
+    # Revoke a TLS server certificate, and remove its artefacts to issue a new one under the same name.
+    gimmecert revoke --remove-artefacts server myserver
+    gimmecert server myserver
+
+    # Revoke a TLS client certificate, and issue delta CRL on top of the last full CRL.
+    gimmecert revoke client myclient
+    gimmecert crl --delta
+
+    # Issue a TLS server certificate, and stream the artefacts (including CA chain) as tar archive into a container.
+    gimmecert server myserver --output-archive - | docker cp - mycontainer:/etc/ssl/gimmecert/
+
+    # Serve OCSP responses for issued certificates on localhost.
+    gimmecert ocsp-serve --port 8080
+
+    # Verify signatures, validity, and private keys of all issued certificates.
+    gimmecert verify --all
+
+    # Verify selected TLS server certificates, producing report in JSON format.
+    gimmecert verify --format json server myserver1 myserver2
+
+    # Export certificate expiry metrics for node exporter textfile collector (for example, from cron every minute).
+    gimmecert metrics --textfile /var/lib/node_exporter/textfile/gimmecert.prom
+
+    # Measure per-certificate overhead avoided by reusing prepared issuance profiles.
+    gimmecert bench issuance --key-specification ecdsa:secp256r1
+
+    # Measure key generation and signing throughput for common key specifications, using 4 worker processes in parallel.
+    gimmecert bench keys --jobs 4
+
+    # Keep pools of pre-generated 2048-bit RSA and secp256r1 ECDSA private keys filled, for use during issuance.
+    gimmecert pool daemon -k rsa:2048 -k ecdsa:secp256r1 --low-watermark 20 --high-watermark 100
 """
 
 
@@ -103,6 +183,16 @@ class ArgumentHelp:
                                   For RSA keys, use format rsa:BIT_LENGTH. For ECDSA keys, use format ecdsa:CURVE_NAME. \
                                   Supported curves: secp192r1, secp224r1, secp256k1, secp256r1, secp384r1, secp521r1.'''
 
+    output_archive = '''Additionally stream generated artefacts into a tar archive at specified path. Use dash (-) to write the archive to \
+                        standard output (informative messages are written to standard error instead).'''
+
+    duration_format = "Duration can be specified in seconds (s), minutes (m), hours (h), days (d), or weeks (w), for example 15m."
+
+    validity = "Validity of issued certificate(s). " + duration_format + " Default is one year."
+
+    backdate = "Duration by which the beginning of certificate(s) validity is backdated (to account for clock drift). " + \
+        duration_format + " Default is 15m."
+
 
 def key_specification(specification):
     """
@@ -118,31 +208,187 @@ def key_specification(specification):
     :raises ValueError: If passed-in specification is invalid.
     """
 
-    available_curves = {
-        "secp192r1": ec.SECP192R1,
-        "secp224r1": ec.SECP224R1,
-        "secp256k1": ec.SECP256K1,
-        "secp256r1": ec.SECP256R1,
-        "secp384r1": ec.SECP384R1,
-        "secp521r1": ec.SECP521R1,
-    }
+    return parse_key_specification(specification)
+
+
+def sync_layout(layout):
+    """
+    Verifies the passed-in synchronisation layout. This is a small
+    utility function for use with the Python argument parser.
+
+    Layout is a format string which must include the ``name`` and
+    ``kind`` fields, and may include the ``type`` field. Resulting
+    paths must be relative, and must not point outside of the target
+    directory.
+
+    :param layout: Layout for constructing artefact paths relative to target directory.
+    :type layout: str
+
+    :returns: Verified layout.
+    :rtype: str
+
+    :raises ValueError: If passed-in layout is invalid.
+    """
+
+    if '{name}' not in layout or '{kind}' not in layout:
+        raise ValueError("Layout must include both {name} and {kind} fields: '%s'" % layout)
 
     try:
-        algorithm, parameters = specification.split(":", 2)
-        algorithm = algorithm.lower()
-
-        if algorithm == "rsa":
-            parameters = int(parameters)
-        elif algorithm == "ecdsa":
-            parameters = str(parameters).lower()
-            parameters = available_curves[parameters]
-        else:
-            raise ValueError()
+        path = os.path.normpath(layout.format(type='server', name='name', kind='cert'))
+    except (KeyError, IndexError, ValueError):
+        raise ValueError("Invalid layout: '%s'" % layout)
+
+    if os.path.isabs(path) or path == os.pardir or path.startswith(os.pardir + os.sep):
+        raise ValueError("Layout must produce paths within target directory: '%s'" % layout)
 
-    except (ValueError, KeyError):
-        raise ValueError("Invalid key specification: '%s'" % specification)
+    return layout
+
+
+def directory_name(name):
+    """
+    Verifies the passed-in name that is used for naming a
+    directory (such as shared CA or sub-CA name). This is a small
+    utility function for use with the Python argument parser.
 
-    return algorithm, parameters
+    Names must not be empty or contain path separators.
+
+    :param name: Name to verify.
+    :type name: str
+
+    :returns: Verified name.
+    :rtype: str
+
+    :raises ValueError: If passed-in name is invalid.
+    """
+
+    if name in ('', os.curdir, os.pardir) or os.sep in name or (os.altsep and os.altsep in name):
+        raise ValueError("Invalid name: '%s'" % name)
+
+    return name
+
+
+def name_template(template):
+    """
+    Verifies the passed-in template for naming entities issued in
+    bulk. This is a small utility function for use with the Python
+    argument parser.
+
+    Template is a format string which must include the ``n`` field
+    (entity number), and must produce valid names.
+
+    :param template: Template for entity names, for example ``loadclient-{n:06d}``.
+    :type template: str
+
+    :returns: Verified template.
+    :rtype: str
+
+    :raises ValueError: If passed-in template is invalid.
+    """
+
+    try:
+        names = [template.format(n=n) for n in (1, 2)]
+    except (KeyError, IndexError, ValueError):
+        raise ValueError("Invalid name template: '%s'" % template)
+
+    if names[0] == names[1]:
+        raise ValueError("Name template must include the {n} field: '%s'" % template)
+
+    for name in names:
+        directory_name(name)
+
+    return template
+
+
+def entity_reference(reference):
+    """
+    Verifies and parses the passed-in reference to a server or client
+    entity. This is a small utility function for use with the Python
+    argument parser.
+
+    :param reference: Reference to entity in format ``TYPE/NAME``, for example ``client/myclient``.
+    :type reference: str
+
+    :returns: Entity type and name.
+    :rtype: (str, str)
+
+    :raises ValueError: If passed-in reference is invalid.
+    """
+
+    entity_type, _, name = reference.partition('/')
+
+    if entity_type not in ('server', 'client'):
+        raise ValueError("Entity type must be server or client: '%s'" % reference)
+
+    return entity_type, directory_name(name)
+
+
+def subject_alternative_name(name):
+    """
+    Verifies the passed-in subject alternative name. This is a small
+    utility function for use with the Python argument parser.
+
+    Names are treated as DNS names, unless prefixed with type
+    (``ip:``, ``uri:``, or ``email:``).
+
+    :param name: Name to verify.
+    :type name: str
+
+    :returns: Verified name.
+    :rtype: str
+
+    :raises ValueError: If passed-in name is invalid.
+    """
+
+    get_general_name(name)
+
+    return name
+
+
+def duration(value):
+    """
+    Verifies and parses the passed-in duration. This is a small
+    utility function for use with the Python argument parser.
+
+    Duration is specified as a non-negative integer, followed by an
+    optional unit - ``s`` (seconds, default), ``m`` (minutes), ``h``
+    (hours), ``d`` (days), or ``w`` (weeks).
+
+    :param value: Duration specification, for example ``15m``.
+    :type value: str
+
+    :returns: Parsed duration.
+    :rtype: datetime.timedelta
+
+    :raises ValueError: If passed-in duration is invalid.
+    """
+
+    return parse_duration(value)
+
+
+@contextlib.contextmanager
+def output_archive(path):
+    """
+    Opens output archive for writing. This is a small utility context
+    manager for use with commands that support streaming of artefacts
+    into archive.
+
+    If archive is written to standard output, informative messages
+    should be written to standard error instead.
+
+    :param path: Path to output archive. Use dash (-) for standard output. Set to None if no archive should be produced.
+    :type path: str or None
+
+    :returns: Binary stream for writing the archive (None if no archive should be produced), and stream for writing informative messages.
+    :rtype: (io.IOBase or None, io.IOBase)
+    """
+
+    if path is None:
+        yield None, sys.stdout
+    elif path == '-':
+        yield sys.stdout.buffer, sys.stderr
+    else:
+        with open(path, 'wb') as archive_file:
+            yield archive_file, sys.stdout
 
 
 @subcommand_parser
@@ -152,13 +398,26 @@ def setup_init_subcommand_parser(parser, subparsers):
     subparser.add_argument('--ca-hierarchy-depth', '-d', type=int, help="Depth of CA hierarchy to generate. Default is 1", default=1)
     subparser.add_argument('--key-specification', '-k', type=key_specification,
                            help=ArgumentHelp.key_specification_format + " Default is rsa:2048.", default="rsa:2048")
+    subparser.add_argument('--output-archive', '-o', type=str, default=None, help=ArgumentHelp.output_archive)
+    shared_ca_group = subparser.add_mutually_exclusive_group()
+    shared_ca_group.add_argument('--ca-from', '-f', type=str, default=None,
+                                 help='''Do not generate CA hierarchy, and use CA hierarchy from the specified project directory instead. \
+                                 CA naming, depth, and key specification options are ignored.''')
+    shared_ca_group.add_argument('--shared-ca', '-s', type=directory_name, default=None,
+                                 help='''Do not generate CA hierarchy, and use named CA hierarchy from shared CA store \
+                                 ($XDG_DATA_HOME/gimmecert) instead. Shared CA hierarchy is generated on first use, \
+                                 with CA base name defaulting to the passed-in name.''')
+    subparser.add_argument('--validity', type=duration, default=None, help=ArgumentHelp.validity)
+    subparser.add_argument('--backdate', type=duration, default=None, help=ArgumentHelp.backdate)
 
     def init_wrapper(args):
         project_directory = os.getcwd()
         if args.ca_base_name is None:
-            args.ca_base_name = os.path.basename(project_directory)
+            args.ca_base_name = args.shared_ca if args.shared_ca else os.path.basename(project_directory)
 
-        return init(sys.stdout, sys.stderr, project_directory, args.ca_base_name, args.ca_hierarchy_depth, args.key_specification)
+        with output_archive(args.output_archive) as (archive_stream, message_stream):
+            return init(message_stream, sys.stderr, project_directory, args.ca_base_name, args.ca_hierarchy_depth, args.key_specification, archive_stream,
+                        args.ca_from, args.shared_ca, args.validity, args.backdate)
 
     subparser.set_defaults(func=init_wrapper)
 
@@ -181,7 +440,9 @@ def setup_help_subcommand_parser(parser, subparsers):
 def setup_server_subcommand_parser(parser, subparsers):
     subparser = subparsers.add_parser('server', description='Issues server certificate.')
     subparser.add_argument('entity_name', help='Name of the server entity.')
-    subparser.add_argument('dns_name', nargs='*', help='Additional DNS names to include in subject alternative name.')
+    subparser.add_argument('dns_name', nargs='*', type=subject_alternative_name,
+                           help='''Additional names to include in subject alternative name. Names are included as DNS names, unless prefixed \
+    with ip:, uri:, or email:, for example ip:192.168.1.1 or uri:spiffe://example.com/myservice.''')
     key_specification_or_csr_group = subparser.add_mutually_exclusive_group()
     key_specification_or_csr_group.add_argument('--csr', '-c', type=str, default=None,
                                                 help='''Do not generate server private key locally, and use the passed-in \
@@ -189,11 +450,16 @@ def setup_server_subcommand_parser(parser, subparsers):
     key_specification_or_csr_group.add_argument('--key-specification', '-k', type=key_specification, default=None,
                                                 help=ArgumentHelp.key_specification_format +
                                                 " Default is to use same algorithm/parameters as used by CA hierarchy.")
+    subparser.add_argument('--output-archive', '-o', type=str, default=None, help=ArgumentHelp.output_archive)
+    subparser.add_argument('--validity', type=duration, default=None, help=ArgumentHelp.validity)
+    subparser.add_argument('--backdate', type=duration, default=None, help=ArgumentHelp.backdate)
 
     def server_wrapper(args):
         project_directory = os.getcwd()
 
-        return server(sys.stdout, sys.stderr, project_directory, args.entity_name, args.dns_name, args.csr, args.key_specification)
+        with output_archive(args.output_archive) as (archive_stream, message_stream):
+            return server(message_stream, sys.stderr, project_directory, args.entity_name, args.dns_name, args.csr, args.key_specification, archive_stream,
+                          args.validity, args.backdate)
 
     subparser.set_defaults(func=server_wrapper)
 
@@ -203,7 +469,7 @@ def setup_server_subcommand_parser(parser, subparsers):
 @subcommand_parser
 def setup_client_subcommand_parser(parser, subparsers):
     subparser = subparsers.add_parser('client', description='Issue client certificate.')
-    subparser.add_argument('entity_name', help='Name of the client entity.')
+    subparser.add_argument('entity_name', nargs='?', help='Name of the client entity. Must not be specified together with --count.')
     key_specification_or_csr_group = subparser.add_mutually_exclusive_group()
     key_specification_or_csr_group.add_argument('--csr', '-c', type=str, default=None,
                                                 help='''Do not generate client private key locally, and use the passed-in \
@@ -211,17 +477,111 @@ def setup_client_subcommand_parser(parser, subparsers):
     key_specification_or_csr_group.add_argument('--key-specification', '-k', type=key_specification, default=None,
                                                 help=ArgumentHelp.key_specification_format +
                                                 " Default is to use same algorithm/parameters as used by CA hierarchy.")
+    key_specification_or_csr_group.add_argument('--reuse-key-from', '-r', type=entity_reference, default=None, metavar='TYPE/NAME',
+                                                help='''Do not generate client private key, and reuse private key of an existing server or \
+    client entity instead (for example client/myclient). Private key file is hard-linked instead of copied.''')
+    subparser.add_argument('--output-archive', '-o', type=str, default=None, help=ArgumentHelp.output_archive)
+    subparser.add_argument('--validity', type=duration, default=None, help=ArgumentHelp.validity)
+    subparser.add_argument('--backdate', type=duration, default=None, help=ArgumentHelp.backdate)
+    subparser.add_argument('--count', '-N', type=int, default=None, help='''Issue designated number of client certificates in bulk (for \
+    example, for load testing), using parallel worker processes. Requires --name-template.''')
+    subparser.add_argument('--name-template', '-T', type=name_template, default=None, help='''Template for naming client entities issued \
+    in bulk. The {n} field is replaced with entity number (starting from 1), and can include format specification, for example \
+    loadclient-{n:06d}.''')
+    subparser.add_argument('--archive-only', '-A', action='store_true', help='''Write client certificates issued in bulk only into \
+    output archive, without storing them in project directory. Requires --output-archive.''')
+    subparser.add_argument('--jobs', '-j', type=int, default=None,
+                           help='Number of worker processes to use for bulk issuance. Default is one worker process per CPU.')
 
     def client_wrapper(args):
         project_directory = os.getcwd()
 
-        return client(sys.stdout, sys.stderr, project_directory, args.entity_name, args.csr, args.key_specification)
+        if args.count is None:
+            if args.entity_name is None:
+                subparser.error("the following arguments are required: entity_name")
+            if args.name_template is not None or args.archive_only or args.jobs is not None:
+                subparser.error("arguments --name-template/-T, --archive-only/-A, and --jobs/-j can be used only together with --count/-N")
+        else:
+            if args.entity_name is not None:
+                subparser.error("argument --count/-N: not allowed with argument entity_name")
+            if args.count < 1:
+                subparser.error("argument --count/-N: must be a positive integer")
+            if args.name_template is None:
+                subparser.error("argument --count/-N: requires argument --name-template/-T")
+            if args.csr is not None:
+                subparser.error("argument --count/-N: not allowed with argument --csr/-c")
+            if args.archive_only and args.output_archive is None:
+                subparser.error("argument --archive-only/-A: requires argument --output-archive/-o")
+            if args.jobs is not None and args.jobs < 1:
+                subparser.error("argument --jobs/-j: number of worker processes must be a positive integer")
+
+        with output_archive(args.output_archive) as (archive_stream, message_stream):
+            if args.count is not None:
+                return client_bulk(message_stream, sys.stderr, project_directory, args.name_template, args.count, args.key_specification,
+                                   archive_stream, args.validity, args.backdate, args.reuse_key_from, args.archive_only, args.jobs)
+
+            return client(message_stream, sys.stderr, project_directory, args.entity_name, args.csr, args.key_specification, archive_stream,
+                          args.validity, args.backdate, args.reuse_key_from)
 
     subparser.set_defaults(func=client_wrapper)
 
     return subparser
 
 
+@subcommand_parser
+def setup_issue_subcommand_parser(parser, subparsers):
+    subparser = subparsers.add_parser('issue', description='''Issues certificate using an issuance profile. Built-in profiles are server, client, \
+    and server-client. Custom profiles can be defined in .gimmecert/profiles.json.''')
+    subparser.add_argument('entity_name', help='Name of the entity.')
+    subparser.add_argument('extra_name', nargs='*', help='Additional names to include in subject alternative name (if profile includes one).')
+    subparser.add_argument('--profile', '-p', type=str, required=True, help='Issuance profile to use.')
+    key_specification_or_csr_group = subparser.add_mutually_exclusive_group()
+    key_specification_or_csr_group.add_argument('--csr', '-c', type=str, default=None,
+                                                help='''Do not generate private key locally, and use the passed-in \
+    certificate signing request (CSR) instead. Use dash (-) to read from standard input. Only the public key is taken from the CSR.''')
+    key_specification_or_csr_group.add_argument('--key-specification', '-k', type=key_specification, default=None,
+                                                help=ArgumentHelp.key_specification_format +
+                                                " Default is to use profile algorithm/parameters, or same algorithm/parameters as used by CA hierarchy.")
+    subparser.add_argument('--output-archive', '-o', type=str, default=None, help=ArgumentHelp.output_archive)
+    subparser.add_argument('--validity', type=duration, default=None,
+                           help="Validity of issued certificate. " + ArgumentHelp.duration_format + " Default is to use profile validity, or one year.")
+    subparser.add_argument('--backdate', type=duration, default=None, help=ArgumentHelp.backdate)
+
+    def issue_wrapper(args):
+        project_directory = os.getcwd()
+
+        with output_archive(args.output_archive) as (archive_stream, message_stream):
+            return issue(message_stream, sys.stderr, project_directory, args.profile, args.entity_name, args.extra_name, args.csr, args.key_specification,
+                         archive_stream, args.validity, args.backdate)
+
+    subparser.set_defaults(func=issue_wrapper)
+
+    return subparser
+
+
+@subcommand_parser
+def setup_subca_subcommand_parser(parser, subparsers):
+    subparser = subparsers.add_parser('subca', description='Issue intermediate CA (sub-CA) for use as issuing CA elsewhere.')
+    subparser.add_argument('name', type=directory_name, help='Name of the sub-CA.')
+    subparser.add_argument('--key-specification', '-k', type=key_specification, default=None,
+                           help=ArgumentHelp.key_specification_format + " Default is to use same algorithm/parameters as used by CA hierarchy.")
+    subparser.add_argument('--output-archive', '-o', type=str, default=None, help=ArgumentHelp.output_archive)
+    subparser.add_argument('--validity', type=duration, default=None,
+                           help=ArgumentHelp.validity + " Sub-CA validity never exceeds the issuing CA validity.")
+    subparser.add_argument('--backdate', type=duration, default=None, help=ArgumentHelp.backdate)
+
+    def subca_wrapper(args):
+        project_directory = os.getcwd()
+
+        with output_archive(args.output_archive) as (archive_stream, message_stream):
+            return subca(message_stream, sys.stderr, project_directory, args.name, args.key_specification, archive_stream,
+                         args.validity, args.backdate)
+
+    subparser.set_defaults(func=subca_wrapper)
+
+    return subparser
+
+
 @subcommand_parser
 def setup_renew_subcommand_parser(parser, subparsers):
     subparser = subparsers.add_parser('renew', description='Renews existing certificates.')
@@ -234,13 +594,14 @@ def setup_renew_subcommand_parser(parser, subparsers):
         """
 
         if csv:
-            return csv.split(",")
+            return [subject_alternative_name(name) for name in csv.split(",")]
 
         return []
 
     subparser.add_argument('--update-dns-names', '-u', dest="dns_names", default=None, type=csv_list,
                            help='''Replace the DNS subject alternative names with new values. \
-    Valid only for server certificate renewals. Multiple DNS names can be passed-in as comma-separated list. \
+    Valid only for server certificate renewals. Multiple DNS names can be passed-in as comma-separated list. Names can be prefixed with \
+    ip:, uri:, or email: to include them as other types of subject alternative names. \
     Passing-in an empty string will result in all additional DNS subject alternative names being removed. \
     The entity name is kept as DNS subject alternative name in either case.''')
 
@@ -254,33 +615,79 @@ def setup_renew_subcommand_parser(parser, subparsers):
 
     subparser.add_argument('--key-specification', '-k', type=key_specification,
                            help=ArgumentHelp.key_specification_format + " Default is to use same specification as used for current certificate.", default=None)
+    subparser.add_argument('--output-archive', '-o', type=str, default=None, help=ArgumentHelp.output_archive)
+    subparser.add_argument('--validity', type=duration, default=None, help=ArgumentHelp.validity)
+    subparser.add_argument('--backdate', type=duration, default=None, help=ArgumentHelp.backdate)
+    subparser.add_argument('--plan', '-P', action='store_true', help='''Do not renew anything, and instead show whether the entity would get \
+    a new private key, and how long the renewal is estimated to take on this machine.''')
 
     def renew_wrapper(args):
+        project_directory = os.getcwd()
+
         # This is a workaround for having the key specification option
         # be dependant on new private key option, since argparse
         # cannot provide such verification on its own.
         if args.key_specification and not args.new_private_key:
             subparser.error("argument --key-specification/-k: must be used with --new-private-key/-p")
 
-        project_directory = os.getcwd()
+        if args.plan:
+            for option, value in [("--csr/-c", args.csr), ("--update-dns-names/-u", args.dns_names), ("--output-archive/-o", args.output_archive)]:
+                if value is not None:
+                    subparser.error("argument --plan/-P: not allowed with argument %s" % option)
+
+            return renew_plan(sys.stdout, sys.stderr, project_directory, args.entity_type, args.entity_name, args.new_private_key,
+                              args.key_specification)
 
-        return renew(sys.stdout, sys.stderr, project_directory, args.entity_type, args.entity_name, args.new_private_key, args.csr, args.dns_names,
-                     args.key_specification)
+        with output_archive(args.output_archive) as (archive_stream, message_stream):
+            return renew(message_stream, sys.stderr, project_directory, args.entity_type, args.entity_name, args.new_private_key, args.csr, args.dns_names,
+                         args.key_specification, archive_stream, args.validity, args.backdate)
 
     subparser.set_defaults(func=renew_wrapper)
 
     return subparser
 
 
+@subcommand_parser
+def setup_reissue_subcommand_parser(parser, subparsers):
+    subparser = subparsers.add_parser('reissue', description='''Repeatedly reissues existing certificate, preserving naming, extensions, and \
+    private key. Meant for use with short-lived certificates.''')
+    subparser.add_argument('entity_type', help='Type of entity to reissue certificate for.', choices=['server', 'client'])
+    subparser.add_argument('entity_name', help='Name of the entity')
+    subparser.add_argument('--validity', type=duration, default=None, help=ArgumentHelp.validity)
+    subparser.add_argument('--backdate', type=duration, default=None, help=ArgumentHelp.backdate)
+    subparser.add_argument('--interval', '-i', type=duration, default=datetime.timedelta(0),
+                           help="Interval between reissues. " + ArgumentHelp.duration_format + " Default is to reissue without pausing.")
+    subparser.add_argument('--count', '-n', type=int, default=1, help="Number of times to reissue the certificate. Use 0 to reissue until interrupted. \
+    Default is 1.")
+
+    def reissue_wrapper(args):
+        if args.count < 0:
+            subparser.error("argument --count/-n: must not be negative")
+
+        project_directory = os.getcwd()
+
+        return reissue(sys.stdout, sys.stderr, project_directory, args.entity_type, args.entity_name, args.validity, args.backdate,
+                       args.interval.total_seconds(), args.count or None)
+
+    subparser.set_defaults(func=reissue_wrapper)
+
+    return subparser
+
+
 @subcommand_parser
 def setup_status_subcommand_parser(parser, subparsers):
 
     subparser = subparsers.add_parser(name="status", description="Shows status information about issued certificates.")
+    subparser.add_argument('--jobs', '-j', type=int, default=None,
+                           help='Number of worker threads to use for reading certificates. Default is to use one worker thread per CPU.')
 
     def status_wrapper(args):
+        if args.jobs is not None and args.jobs < 1:
+            subparser.error("argument --jobs/-j: number of worker threads must be a positive integer")
+
         project_directory = os.getcwd()
 
-        status(sys.stdout, sys.stderr, project_directory)
+        status(sys.stdout, sys.stderr, project_directory, args.jobs)
 
         return ExitCode.SUCCESS
 
@@ -289,6 +696,275 @@ def setup_status_subcommand_parser(parser, subparsers):
     return subparser
 
 
+@subcommand_parser
+def setup_export_p12_subcommand_parser(parser, subparsers):
+    subparser = subparsers.add_parser('export-p12', description='Exports private keys, certificates, and CA chain as PKCS#12 bundles.')
+    subparser.add_argument('entity_type', help='Type of entities to export.', choices=['server', 'client'])
+    subparser.add_argument('entity_name', nargs='*', help='Names of entities to export.')
+    subparser.add_argument('--all', '-a', action='store_true', help='Export all entities of specified type. Mutually exclusive with entity names.')
+    password_group = subparser.add_mutually_exclusive_group()
+    password_group.add_argument('--password', '-p', type=str, default=None,
+                                help='''Password for protecting the bundles. Password passed-in this way is visible to other users of the system \
+    (for example in process listing). Bundles are not encrypted if no password is specified.''')
+    password_group.add_argument('--password-file', '-P', type=str, default=None,
+                                help='Read password for protecting the bundles from the first line of specified file. Use "-" to read from standard input.')
+    password_group.add_argument('--password-env', '-E', type=str, default=None, metavar='VARIABLE',
+                                help='Read password for protecting the bundles from specified environment variable.')
+    subparser.add_argument('--output-archive', '-o', type=str, default=None, help=ArgumentHelp.output_archive)
+
+    def export_p12_wrapper(args):
+        # This is a workaround for validating dependencies between
+        # positional and optional arguments, since argparse cannot
+        # provide such verification on its own.
+        if args.all and args.entity_name:
+            subparser.error("argument --all/-a: not allowed with entity names")
+        elif not args.all and not args.entity_name:
+            subparser.error("at least one entity name or the --all/-a option must be specified")
+
+        if args.password_file == '-':
+            password = sys.stdin.readline().rstrip('\r\n')
+        elif args.password_file is not None:
+            try:
+                with open(args.password_file) as password_file:
+                    password = password_file.readline().rstrip('\r\n')
+            except OSError as e:
+                subparser.error("argument --password-file/-P: cannot read password from %s: %s" % (args.password_file, e.strerror))
+        elif args.password_env is not None:
+            password = os.environ.get(args.password_env)
+            if password is None:
+                subparser.error("argument --password-env/-E: environment variable %s is not set" % args.password_env)
+        else:
+            password = args.password
+
+        if password == "":
+            subparser.error("password must not be empty")
+
+        project_directory = os.getcwd()
+        entity_names = None if args.all else args.entity_name
+
+        with output_archive(args.output_archive) as (archive_stream, message_stream):
+            return export_p12(message_stream, sys.stderr, project_directory, args.entity_type, entity_names, password, archive_stream)
+
+    subparser.set_defaults(func=export_p12_wrapper)
+
+    return subparser
+
+
+@subcommand_parser
+def setup_sync_subcommand_parser(parser, subparsers):
+    subparser = subparsers.add_parser('sync', description='Incrementally synchronises issued artefacts into target directory.')
+    subparser.add_argument('--to', '-t', dest='target_directory', required=True, help='Target directory for synchronised artefacts.')
+    subparser.add_argument('--layout', '-l', type=sync_layout, default='{type}/{name}/{kind}.pem',
+                           help='''Layout of artefacts within target directory. Supported fields are {type} (entity type or profile name), \
+    {name} (entity name), and {kind} (key, csr, or cert). Default is {type}/{name}/{kind}.pem.''')
+
+    def sync_wrapper(args):
+        project_directory = os.getcwd()
+
+        return sync(sys.stdout, sys.stderr, project_directory, args.target_directory, args.layout)
+
+    subparser.set_defaults(func=sync_wrapper)
+
+    return subparser
+
+
+@subcommand_parser
+def setup_watch_subcommand_parser(parser, subparsers):
+    subparser = subparsers.add_parser('watch', description='Watches directory for CSRs, and issues certificates for them.')
+    subparser.add_argument('--inbox', '-i', dest='inbox_directory', required=True,
+                           help='Directory to watch for CSRs. CSRs must be named NAME.csr.pem. Certificates are written-out as NAME.cert.pem.')
+    subparser.add_argument('--type', '-t', dest='entity_type', required=True, choices=['server', 'client'], help='Type of certificates to issue.')
+    subparser.add_argument('--interval', '-n', type=float, default=1.0,
+                           help='Polling interval in seconds, used if inotify is not available. Default is 1 second.')
+    subparser.add_argument('--once', '-1', dest='run_once', action='store_true', help='Process pending CSRs once, and exit.')
+    subparser.add_argument('--jobs', '-j', type=int, default=None,
+                           help='Number of worker processes to use for signing certificates. Default is one worker process per CPU.')
+
+    def watch_wrapper(args):
+        if args.jobs is not None and args.jobs < 1:
+            subparser.error("argument --jobs/-j: number of worker processes must be a positive integer")
+
+        project_directory = os.getcwd()
+
+        return watch(sys.stdout, sys.stderr, project_directory, args.inbox_directory, args.entity_type, args.interval, args.run_once, args.jobs)
+
+    subparser.set_defaults(func=watch_wrapper)
+
+    return subparser
+
+
+@subcommand_parser
+def setup_revoke_subcommand_parser(parser, subparsers):
+    subparser = subparsers.add_parser('revoke', description='Revokes issued certificate.')
+    subparser.add_argument('entity_type', help='Type of entity to revoke.', choices=['server', 'client'])
+    subparser.add_argument('entity_name', help='Name of the entity')
+    subparser.add_argument('--remove-artefacts', '-r', action='store_true', help='''Remove entity private key, CSR, certificate, and PKCS#12 \
+    bundle, making it possible to issue new certificate under the same name. Default is to keep them.''')
+
+    def revoke_wrapper(args):
+        project_directory = os.getcwd()
+
+        return revoke(sys.stdout, sys.stderr, project_directory, args.entity_type, args.entity_name, args.remove_artefacts)
+
+    subparser.set_defaults(func=revoke_wrapper)
+
+    return subparser
+
+
+@subcommand_parser
+def setup_crl_subcommand_parser(parser, subparsers):
+    subparser = subparsers.add_parser('crl', description='Issues certificate revocation list for revoked certificates.')
+    subparser.add_argument('--delta', '-D', action='store_true', help='''Issue delta CRL, containing only certificates revoked since \
+    the last full CRL. Default is to issue full CRL.''')
+
+    def crl_wrapper(args):
+        project_directory = os.getcwd()
+
+        return crl(sys.stdout, sys.stderr, project_directory, args.delta)
+
+    subparser.set_defaults(func=crl_wrapper)
+
+    return subparser
+
+
+@subcommand_parser
+def setup_ocsp_serve_subcommand_parser(parser, subparsers):
+    subparser = subparsers.add_parser('ocsp-serve', description='Serves OCSP responses for issued certificates over HTTP.')
+    subparser.add_argument('--host', '-H', default='127.0.0.1', help='Address to listen on. Default is 127.0.0.1.')
+    subparser.add_argument('--port', '-P', type=int, default=8080, help='Port to listen on. Default is 8080.')
+    subparser.add_argument('--refresh-interval', '-r', type=int, default=300,
+                           help='''Interval (in seconds) at which the precomputed responses are refreshed. \
+    Responses are valid for twice the interval. Default is 300 seconds.''')
+
+    def ocsp_serve_wrapper(args):
+        project_directory = os.getcwd()
+
+        if args.refresh_interval <= 0:
+            subparser.error("argument --refresh-interval/-r: must be a positive number")
+
+        return ocsp_serve(sys.stdout, sys.stderr, project_directory, args.host, args.port, args.refresh_interval)
+
+    subparser.set_defaults(func=ocsp_serve_wrapper)
+
+    return subparser
+
+
+@subcommand_parser
+def setup_verify_subcommand_parser(parser, subparsers):
+    subparser = subparsers.add_parser('verify', description='Verifies signatures, validity, and private keys of issued certificates.')
+    subparser.add_argument('entity_type', nargs='?', help='Type of entities to verify.', choices=['server', 'client'])
+    subparser.add_argument('entity_name', nargs='*', help='Names of entities to verify.')
+    subparser.add_argument('--all', '-a', action='store_true',
+                           help='''Verify all entities of specified type. If no entity type is specified, verify all entities. \
+    Mutually exclusive with entity names.''')
+    subparser.add_argument('--format', '-f', choices=['text', 'json'], default='text', help='Format of verification report. Default is text.')
+    subparser.add_argument('--jobs', '-j', type=int, default=None,
+                           help='Number of worker processes to use for verification. Default is to use one worker process per CPU.')
+
+    def verify_wrapper(args):
+        # This is a workaround for validating dependencies between
+        # positional and optional arguments, since argparse cannot
+        # provide such verification on its own.
+        if args.all and args.entity_name:
+            subparser.error("argument --all/-a: not allowed with entity names")
+        elif not args.all and not args.entity_name:
+            subparser.error("at least one entity name or the --all/-a option must be specified")
+
+        if args.jobs is not None and args.jobs < 1:
+            subparser.error("argument --jobs/-j: number of worker processes must be a positive integer")
+
+        project_directory = os.getcwd()
+        entity_names = None if args.all else args.entity_name
+
+        return verify(sys.stdout, sys.stderr, project_directory, args.entity_type, entity_names, args.format, args.jobs)
+
+    subparser.set_defaults(func=verify_wrapper)
+
+    return subparser
+
+
+@subcommand_parser
+def setup_metrics_subcommand_parser(parser, subparsers):
+    subparser = subparsers.add_parser('metrics', description='Outputs metrics about issued certificates in Prometheus text exposition format.')
+    subparser.add_argument('--textfile', '-t', default=None,
+                           help='''Atomically write metrics into specified file (for use with node exporter textfile collector). \
+    Default is to write metrics to standard output.''')
+
+    def metrics_wrapper(args):
+        project_directory = os.getcwd()
+
+        return metrics(sys.stdout, sys.stderr, project_directory, args.textfile)
+
+    subparser.set_defaults(func=metrics_wrapper)
+
+    return subparser
+
+
+@subcommand_parser
+def setup_bench_subcommand_parser(parser, subparsers):
+    subparser = subparsers.add_parser('bench', description='Runs performance benchmarks.')
+    subparser.add_argument('target', help='''Benchmark to run. The issuance benchmark measures overhead avoided by reusing prepared issuance \
+    profiles. The keys benchmark measures private key generation and signing throughput.''', choices=['issuance', 'keys'])
+    subparser.add_argument('--key-specification', '-k', type=key_specification, default=None,
+                           help=ArgumentHelp.key_specification_format + ''' Default is rsa:2048 for the issuance benchmark, and all commonly used \
+    key specifications for the keys benchmark.''')
+    subparser.add_argument('--count', '-n', type=int, default=100, help='''Number of operations to perform per measurement. For the keys \
+    benchmark, this is the maximum number of operations, with every measurement being limited to one second as well. Default is 100.''')
+    subparser.add_argument('--jobs', '-j', type=int, default=None,
+                           help='Number of worker processes to use for parallel measurements (keys benchmark). Default is one worker process per CPU.')
+    subparser.add_argument('--format', '-f', choices=['text', 'json'], default='text', help='Format of benchmark results. Default is text.')
+
+    def bench_wrapper(args):
+        if args.count < 1:
+            subparser.error("argument --count/-n: must be a positive integer")
+
+        if args.jobs is not None and args.jobs < 1:
+            subparser.error("argument --jobs/-j: number of worker processes must be a positive integer")
+
+        return bench(sys.stdout, sys.stderr, args.target, args.key_specification, args.count, args.jobs, args.format)
+
+    subparser.set_defaults(func=bench_wrapper)
+
+    return subparser
+
+
+@subcommand_parser
+def setup_pool_subcommand_parser(parser, subparsers):
+    subparser = subparsers.add_parser('pool', description='Manages pool of pre-generated private keys, used when issuing and renewing certificates.')
+    subparser.add_argument('action', help='Action to perform. The daemon action keeps the key pools filled.', choices=['daemon'])
+    subparser.add_argument('--key-specification', '-k', type=key_specification, action='append', dest='key_specifications', default=None,
+                           help=ArgumentHelp.key_specification_format + ''' Can be specified multiple times to keep multiple pools filled. \
+    Default is to use same algorithm/parameters as used by CA hierarchy.''')
+    subparser.add_argument('--low-watermark', '-l', type=int, default=10, help='Pool level below which the pool gets refilled. Default is 10.')
+    subparser.add_argument('--high-watermark', '-H', type=int, default=50, help='Pool level up to which the pool gets refilled. Default is 50.')
+    subparser.add_argument('--jobs', '-j', type=int, default=None,
+                           help='Number of (low-priority) worker processes to use for generating private keys. Default is one worker process per CPU.')
+    subparser.add_argument('--interval', '-n', type=float, default=5.0, help='Interval at which pool levels are checked in seconds. Default is 5 seconds.')
+    subparser.add_argument('--once', '-1', dest='run_once', action='store_true', help='Refill the pools once, and exit.')
+
+    def pool_wrapper(args):
+        project_directory = os.getcwd()
+
+        if args.low_watermark < 1:
+            subparser.error("argument --low-watermark/-l: must be a positive integer")
+
+        if args.high_watermark < args.low_watermark:
+            subparser.error("argument --high-watermark/-H: must not be lower than low watermark")
+
+        if args.jobs is not None and args.jobs < 1:
+            subparser.error("argument --jobs/-j: number of worker processes must be a positive integer")
+
+        if args.interval <= 0:
+            subparser.error("argument --interval/-n: must be a positive number")
+
+        return pool(sys.stdout, sys.stderr, project_directory, args.action, args.key_specifications, args.low_watermark, args.high_watermark,
+                    args.jobs, args.interval, args.run_once)
+
+    subparser.set_defaults(func=pool_wrapper)
+
+    return subparser
+
+
 def get_parser():
     """
     Sets-up and returns a CLI argument parser.
@@ -18,13 +18,29 @@
 # Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import concurrent.futures
 import os
 import datetime
+import hashlib
+import json
 import sys
+import threading
+import time
 
+import gimmecert.benchmark
+import gimmecert.bulk
 import gimmecert.crypto
+import gimmecert.metrics
+import gimmecert.ocsp
+import gimmecert.pool
+import gimmecert.profiles
+import gimmecert.project
+import gimmecert.signing
+import gimmecert.status
 import gimmecert.storage
 import gimmecert.utils
+import gimmecert.verify
+import gimmecert.watch
 
 
 class ExitCode:
@@ -38,6 +54,7 @@ class ExitCode:
     ERROR_NOT_INITIALISED = 11
     ERROR_CERTIFICATE_ALREADY_ISSUED = 12
     ERROR_UNKNOWN_ENTITY = 13
+    ERROR_VERIFICATION_FAILED = 14
 
 
 class InvalidCommandInvocation(Exception):
@@ -47,11 +64,18 @@ class InvalidCommandInvocation(Exception):
     pass
 
 
-def init(stdout, stderr, project_directory, ca_base_name, ca_hierarchy_depth, key_specification):
+def init(stdout, stderr, project_directory, ca_base_name, ca_hierarchy_depth, key_specification, output_archive=None, ca_from=None, shared_ca=None,
+         validity=None, backdate=None):
     """
     Initialises the necessary directory and CA hierarchies for use in
     the specified directory.
 
+    Instead of generating a new CA hierarchy, the project can reuse
+    CA hierarchy from another project (ca_from), or a named CA
+    hierarchy from the shared CA store (shared_ca). Shared CA
+    hierarchies are generated (using the passed-in CA naming, depth,
+    and key specification) on first use, and reused afterwards.
+
     :param stdout: Output stream where the informative messages should be written-out.
     :type stdout: io.IOBase
 
@@ -70,40 +94,62 @@ def init(stdout, stderr, project_directory, ca_base_name, ca_hierarchy_depth, ke
     :param key_specification: Key specification to use when generating private keys for the hierarchy.
     :type key_specification: tuple(str, int)
 
+    :param output_archive: Binary output stream where generated artefacts should be streamed as tar archive. Set to None (default) to skip.
+    :type output_archive: io.IOBase or None
+
+    :param ca_from: Path to another project or sub-CA directory whose CA hierarchy should be used. Set to None (default) to generate new CA hierarchy.
+    :type ca_from: str or None
+
+    :param shared_ca: Name of CA hierarchy from shared CA store that should be used. Set to None (default) to generate new CA hierarchy.
+    :type shared_ca: str or None
+
+    :param validity: Duration of CA certificates validity. Set to None (default) for one year. Ignored if CA hierarchy is not generated.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which beginning of CA certificates validity is backdated. Set to None (default) for 15 minutes.
+    :type backdate: datetime.timedelta or None
+
     :returns: Status code, one from gimmecert.commands.ExitCode.
     :rtype: int
     """
 
-    # Set-up various paths.
-    base_directory = os.path.join(project_directory, '.gimmecert')
-    ca_directory = os.path.join(base_directory, 'ca')
+    if ca_from is not None and shared_ca is not None:
+        raise InvalidCommandInvocation("Only one of ca_from and shared_ca can be specified.")
 
-    if os.path.exists(base_directory):
+    if gimmecert.storage.is_initialised(project_directory):
         print("CA hierarchy has already been initialised.", file=stderr)
         return ExitCode.ERROR_ALREADY_INITIALISED
 
-    # Initialise the directory.
-    gimmecert.storage.initialise_storage(project_directory)
+    if shared_ca is not None:
+        ca_from = os.path.join(gimmecert.storage.get_ca_store_directory(), shared_ca)
 
-    # Generate the CA hierarchy.
-    key_generator = gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1])
-    ca_hierarchy = gimmecert.crypto.generate_ca_hierarchy(ca_base_name, ca_hierarchy_depth, key_generator)
+        if not gimmecert.storage.is_initialised(ca_from):
+            os.makedirs(ca_from, exist_ok=True)
+            gimmecert.project.Project.initialise(ca_from, ca_base_name, ca_hierarchy_depth, key_specification, validity=validity, backdate=backdate)
+            print("Shared CA hierarchy %s initialised in %s." % (shared_ca, ca_from), file=stdout)
 
-    # Output the CA private keys and certificates.
-    for level, (private_key, certificate) in enumerate(ca_hierarchy, 1):
-        private_key_path = os.path.join(ca_directory, 'level%d.key.pem' % level)
-        certificate_path = os.path.join(ca_directory, 'level%d.cert.pem' % level)
-        gimmecert.storage.write_private_key(private_key, private_key_path)
-        gimmecert.storage.write_certificate(certificate, certificate_path)
-
-    # Output the certificate chain.
-    full_chain = [certificate for _, certificate in ca_hierarchy]
-    full_chain_path = os.path.join(ca_directory, 'chain-full.cert.pem')
-    gimmecert.storage.write_certificate_chain(full_chain, full_chain_path)
-
-    print("CA hierarchy initialised using %s keys. Generated artefacts:" % str(key_generator), file=stdout)
-    for level in range(1, ca_hierarchy_depth+1):
-        print("    CA Level %d private key: .gimmecert/ca/level%d.key.pem" % (level, level), file=stdout)
+    if ca_from is not None and gimmecert.storage.get_ca_directory(ca_from) is None:
+        print("No CA hierarchy has been initialised in %s." % ca_from, file=stderr)
+        return ExitCode.ERROR_ARGUMENTS
+
+    archive = gimmecert.storage.TarArchive(output_archive) if output_archive else None
+
+    project = gimmecert.project.Project.initialise(project_directory, ca_base_name, ca_hierarchy_depth, key_specification, archive, ca_from,
+                                                   validity, backdate)
+
+    if archive:
+        archive.close()
+
+    if ca_from is not None:
+        print("CA hierarchy from %s used by project. Available artefacts:" % os.path.realpath(ca_from), file=stdout)
+    else:
+        key_generator = gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1])
+        print("CA hierarchy initialised using %s keys. Generated artefacts:" % str(key_generator), file=stdout)
+
+    # Private keys of parent CAs are not available when using sub-CA.
+    for level, (private_key, _) in enumerate(project.ca_hierarchy, 1):
+        if private_key is not None:
+            print("    CA Level %d private key: .gimmecert/ca/level%d.key.pem" % (level, level), file=stdout)
         print("    CA Level %d certificate: .gimmecert/ca/level%d.cert.pem" % (level, level), file=stdout)
 
     print("    Full certificate chain: .gimmecert/ca/chain-full.cert.pem", file=stdout)
@@ -111,7 +157,8 @@ def init(stdout, stderr, project_directory, ca_base_name, ca_hierarchy_depth, ke
     return ExitCode.SUCCESS
 
 
-def server(stdout, stderr, project_directory, entity_name, extra_dns_names, custom_csr_path, key_specification):
+def server(stdout, stderr, project_directory, entity_name, extra_dns_names, custom_csr_path, key_specification, output_archive=None, validity=None,
+           backdate=None):
     """
     Issues a server certificate using the CA hierarchy initialised
     within the specified directory.
@@ -135,7 +182,8 @@ def server(stdout, stderr, project_directory, entity_name, extra_dns_names, cust
     :param entity_name: Name of the server entity. Name will be used in subject DN and DNS subject alternative name.
     :type entity_name: str
 
-    :param extra_dns_names: List of additional DNS names to include in the subject alternative name.
+    :param extra_dns_names: List of additional names to include in the subject alternative name. Names are included as DNS names, unless prefixed
+                            with type (``ip:``, ``uri:``, or ``email:``).
     :type extra_dns_names: list[str]
 
     :param custom_csr_path: Path to custom certificate signing request to use for issuing server certificate. Set to None or "" to generate private key.
@@ -146,6 +194,16 @@ def server(stdout, stderr, project_directory, entity_name, extra_dns_names, cust
                               default to issuing CA hiearchy algorithm and parameters.
     :type key_specification: tuple(str, int) or None
 
+    :param output_archive: Binary output stream where generated artefacts (including CA chain) should be streamed as tar archive. Set to None (default)
+                           to skip.
+    :type output_archive: io.IOBase or None
+
+    :param validity: Duration of certificate validity. Set to None (default) for one year.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) for 15 minutes.
+    :type backdate: datetime.timedelta or None
+
     :returns: Status code, one from gimmecert.commands.ExitCode.
     :rtype: int
     """
@@ -165,38 +223,31 @@ def server(stdout, stderr, project_directory, entity_name, extra_dns_names, cust
         print("Refusing to overwrite existing data. Certificate has already been issued for server %s." % entity_name, file=stderr)
         return ExitCode.ERROR_CERTIFICATE_ALREADY_ISSUED
 
-    # Grab the issuing CA private key and certificate.
-    ca_hierarchy = gimmecert.storage.read_ca_hierarchy(os.path.join(project_directory, '.gimmecert', 'ca'))
-    issuer_private_key, issuer_certificate = ca_hierarchy[-1]
+    # Ensure subject alternative names are valid.
+    try:
+        for name in extra_dns_names or []:
+            gimmecert.crypto.get_general_name(name)
+    except ValueError as e:
+        print(e, file=stderr)
+        return ExitCode.ERROR_ARGUMENTS
 
-    # Grab the private key or CSR, and extract public key.
+    # Grab the CSR if one was passed-in. Private key is generated otherwise.
     if custom_csr_path == "-":
         csr_pem = gimmecert.utils.read_input(sys.stdin, stderr, "Please enter the CSR")
         csr = gimmecert.utils.csr_from_pem(csr_pem)
-        public_key = csr.public_key()
-        private_key = None
     elif custom_csr_path:
         csr = gimmecert.storage.read_csr(custom_csr_path)
-        public_key = csr.public_key()
-        private_key = None
     else:
-        if not key_specification:
-            key_specification = gimmecert.crypto.key_specification_from_public_key(issuer_private_key.public_key())
-        key_generator = gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1])
-        private_key = key_generator()
-        public_key = private_key.public_key()
         csr = None
 
-    # Issue the certificate.
-    certificate = gimmecert.crypto.issue_server_certificate(entity_name, public_key, issuer_private_key, issuer_certificate, extra_dns_names)
+    # Issue the certificate, and output CSR or private key depending on what has been passed-in.
+    archive = gimmecert.storage.TarArchive(output_archive) if output_archive else None
+    project = gimmecert.project.Project(project_directory, archive)
+    project.issue_server(entity_name, extra_dns_names, csr, key_specification, validity, backdate)
 
-    # Output CSR or private key depending on what has been passed-in.
-    if csr:
-        gimmecert.storage.write_csr(csr, csr_path)
-    else:
-        gimmecert.storage.write_private_key(private_key, private_key_path)
-
-    gimmecert.storage.write_certificate(certificate, certificate_path)
+    if archive:
+        archive.add_artefact([certificate for _, certificate in project.ca_hierarchy], 'ca/chain-full.cert.pem')
+        archive.close()
 
     # Show user information about generated artefacts.
     print("Server certificate issued.", file=stdout)
@@ -211,6 +262,101 @@ def server(stdout, stderr, project_directory, entity_name, extra_dns_names, cust
     return ExitCode.SUCCESS
 
 
+def issue(stdout, stderr, project_directory, profile_name, entity_name, extra_names, custom_csr_path, key_specification, output_archive=None, validity=None,
+          backdate=None):
+    """
+    Issues a certificate using the designated issuance profile and CA
+    hierarchy initialised within the specified directory. Profile can
+    be either one of the built-in profiles, or a custom profile
+    defined in project profile configuration (.gimmecert/profiles.json).
+
+    Artefacts are stored in a directory named after the profile. CSR
+    handling is the same as for the server and client commands.
+
+    :param stdout: Output stream where the informative messages should be written-out.
+    :type stdout: io.IOBase
+
+    :param stderr: Output stream where the error messages should be written-out.
+    :type stderr: io.IOBase
+
+    :param project_directory: Path to project directory under which the CA artifacats etc will be looked-up.
+    :type project_directory: str
+
+    :param profile_name: Name of issuance profile to use.
+    :type profile_name: str
+
+    :param entity_name: Name of the entity. Name will be used in subject DN (and subject alternative name if profile includes one).
+    :type entity_name: str
+
+    :param extra_names: List of additional names to include in the subject alternative name.
+    :type extra_names: list[str]
+
+    :param custom_csr_path: Path to custom certificate signing request to use for issuing certificate. Set to None or "" to generate private key.
+                            Always overrides passed-in key specification.
+    :type custom_csr_path: str or None
+
+    :param key_specification: Key specification to use when generating private key. Ignored if custom_csr_path is specified. Set to None to default to
+                              profile key specification, or issuing CA hiearchy algorithm and parameters if profile does not specify one.
+    :type key_specification: tuple(str, int) or None
+
+    :param output_archive: Binary output stream where generated artefacts (including CA chain) should be streamed as tar archive. Set to None (default)
+                           to skip.
+    :type output_archive: io.IOBase or None
+
+    :param validity: Duration of certificate validity. Set to None (default) to use profile validity, or one year if profile does not specify one.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) for 15 minutes.
+    :type backdate: datetime.timedelta or None
+
+    :returns: Status code, one from gimmecert.commands.ExitCode.
+    :rtype: int
+    """
+
+    if not gimmecert.storage.is_initialised(project_directory):
+        print("CA hierarchy must be initialised prior to issuing certificates. Run the gimmecert init command first.", file=stderr)
+        return ExitCode.ERROR_NOT_INITIALISED
+
+    archive = gimmecert.storage.TarArchive(output_archive) if output_archive else None
+    project = gimmecert.project.Project(project_directory, archive)
+
+    try:
+        project.get_profile(profile_name)
+    except (gimmecert.project.UnknownProfile, gimmecert.project.InvalidProfileConfiguration) as e:
+        print(e, file=stderr)
+        return ExitCode.ERROR_ARGUMENTS
+
+    # Grab the CSR if one was passed-in. Private key is generated otherwise.
+    if custom_csr_path == "-":
+        csr_pem = gimmecert.utils.read_input(sys.stdin, stderr, "Please enter the CSR")
+        csr = gimmecert.utils.csr_from_pem(csr_pem)
+    elif custom_csr_path:
+        csr = gimmecert.storage.read_csr(custom_csr_path)
+    else:
+        csr = None
+
+    try:
+        project.issue(profile_name, entity_name, extra_names, csr, key_specification, validity, backdate)
+    except gimmecert.project.CertificateAlreadyIssued:
+        print("Refusing to overwrite existing data. Certificate has already been issued for %s %s." % (profile_name, entity_name), file=stderr)
+        return ExitCode.ERROR_CERTIFICATE_ALREADY_ISSUED
+
+    if archive:
+        archive.add_artefact([certificate for _, certificate in project.ca_hierarchy], 'ca/chain-full.cert.pem')
+        archive.close()
+
+    print("Certificate issued using profile %s." % profile_name, file=stdout)
+
+    if csr:
+        print("CSR: .gimmecert/%s/%s.csr.pem" % (profile_name, entity_name), file=stdout)
+    else:
+        print("Private key: .gimmecert/%s/%s.key.pem" % (profile_name, entity_name), file=stdout)
+
+    print("Certificate: .gimmecert/%s/%s.cert.pem" % (profile_name, entity_name), file=stdout)
+
+    return ExitCode.SUCCESS
+
+
 def help_(stdout, stderr, parser):
     """
     Output help for the user.
@@ -255,13 +401,16 @@ def usage(stdout, stderr, parser):
     return ExitCode.SUCCESS
 
 
-def client(stdout, stderr, project_directory, entity_name, custom_csr_path, key_specification):
+def client(stdout, stderr, project_directory, entity_name, custom_csr_path, key_specification, output_archive=None, validity=None, backdate=None,
+           reuse_key_from=None):
     """
     Issues a client certificate using the CA hierarchy initialised
     within the specified directory.
 
     If custom CSR path is not passed-in, a private key will be
-    generated and stored.
+    generated and stored. Alternatively, private key of an existing
+    entity can be reused - the private key file is then hard-linked
+    (or symlinked), and issuance boils down to a single signature.
 
     If custom CSR is passed-in, no private key will be generated, and
     the CSR will be stored instead. Only the public key will be used
@@ -287,6 +436,19 @@ def client(stdout, stderr, project_directory, entity_name, custom_csr_path, key_
                               default to issuing CA hiearchy algorithm and parameters.
     :type key_specification: tuple(str, int) or None
 
+    :param output_archive: Binary output stream where generated artefacts (including CA chain) should be streamed as tar archive. Set to None (default)
+                           to skip.
+    :type output_archive: io.IOBase or None
+
+    :param validity: Duration of certificate validity. Set to None (default) for one year.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) for 15 minutes.
+    :type backdate: datetime.timedelta or None
+
+    :param reuse_key_from: Type and name of existing entity whose private key should be reused. Set to None (default) to generate a private key.
+    :type reuse_key_from: (str, str) or None
+
     :returns: Status code, one from gimmecert.commands.ExitCode.
     :rtype: int
     """
@@ -306,42 +468,40 @@ def client(stdout, stderr, project_directory, entity_name, custom_csr_path, key_
         print("Refusing to overwrite existing data. Certificate has already been issued for client %s." % entity_name, file=stderr)
         return ExitCode.ERROR_CERTIFICATE_ALREADY_ISSUED
 
-    # Grab the issuing CA private key and certificate.
-    ca_hierarchy = gimmecert.storage.read_ca_hierarchy(os.path.join(project_directory, '.gimmecert', 'ca'))
-    issuer_private_key, issuer_certificate = ca_hierarchy[-1]
-
-    # Either read public key from CSR, or generate a new private key.
+    # Either read CSR, or let a new private key be generated.
     if custom_csr_path == "-":
         csr_pem = gimmecert.utils.read_input(sys.stdin, stderr, "Please enter the CSR")
         csr = gimmecert.utils.csr_from_pem(csr_pem)
-        public_key = csr.public_key()
     elif custom_csr_path:
         csr = gimmecert.storage.read_csr(custom_csr_path)
-        public_key = csr.public_key()
     else:
-        if not key_specification:
-            key_specification = gimmecert.crypto.key_specification_from_public_key(issuer_private_key.public_key())
-        key_generator = gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1])
-        private_key = key_generator()
-        public_key = private_key.public_key()
+        csr = None
 
-    # Issue certificate using the passed-in information and
-    # appropriate public key.
-    certificate = gimmecert.crypto.issue_client_certificate(entity_name, public_key, issuer_private_key, issuer_certificate)
+    # Issue certificate using the passed-in information, and output
+    # CSR or private key depending on what was provided.
+    archive = gimmecert.storage.TarArchive(output_archive) if output_archive else None
+    project = gimmecert.project.Project(project_directory, archive)
 
-    # Output CSR or private key depending on what was provided.
-    if custom_csr_path:
-        gimmecert.storage.write_csr(csr, csr_path)
-    else:
-        gimmecert.storage.write_private_key(private_key, private_key_path)
+    try:
+        project.issue_client(entity_name, csr, key_specification, validity, backdate, reuse_key_from)
+    except gimmecert.project.UnknownEntity:
+        print("Cannot reuse private key. No existing certificate found for %s %s." % reuse_key_from, file=stderr)
+        return ExitCode.ERROR_UNKNOWN_ENTITY
+    except ValueError as e:
+        print(e, file=stderr)
+        return ExitCode.ERROR_ARGUMENTS
 
-    gimmecert.storage.write_certificate(certificate, certificate_path)
+    if archive:
+        archive.add_artefact([certificate for _, certificate in project.ca_hierarchy], 'ca/chain-full.cert.pem')
+        archive.close()
 
     # Show user information about generated artefacts.
     print("Client certificate issued.", file=stdout)
 
     if custom_csr_path:
         print("Client CSR: .gimmecert/client/%s.csr.pem" % entity_name, file=stdout)
+    elif reuse_key_from:
+        print("Client private key: .gimmecert/client/%s.key.pem (shared with %s %s)" % ((entity_name,) + reuse_key_from), file=stdout)
     else:
         print("Client private key: .gimmecert/client/%s.key.pem" % entity_name, file=stdout)
 
@@ -350,7 +510,213 @@ def client(stdout, stderr, project_directory, entity_name, custom_csr_path, key_
     return ExitCode.SUCCESS
 
 
-def renew(stdout, stderr, project_directory, entity_type, entity_name, generate_new_private_key, custom_csr_path, dns_names, key_specification):
+def client_bulk(stdout, stderr, project_directory, name_template, count, key_specification, output_archive=None, validity=None, backdate=None,
+                reuse_key_from=None, archive_only=False, jobs=None):
+    """
+    Issues a large number of client certificates (for example, for
+    load testing) using the CA hierarchy initialised within the
+    specified directory.
+
+    Entity names are produced from a template, by substituting the
+    ``n`` field with numbers from 1 to the number of certificates.
+
+    Private keys are taken from the project key pool when available.
+    Remaining private keys are generated and certificates signed in
+    parallel by a pool of worker processes, while the artefacts are
+    written-out in batches as the workers keep on issuing. Artefacts can be written
+    into output archive only, instead of creating (a large number of)
+    files in the project directory.
+
+    :param stdout: Output stream where the informative messages should be written-out.
+    :type stdout: io.IOBase
+
+    :param stderr: Output stream where the error messages should be written-out.
+    :type stderr: io.IOBase
+
+    :param project_directory: Path to project directory under which the CA artifacats etc will be looked-up.
+    :type project_directory: str
+
+    :param name_template: Template for entity names, for example ``loadclient-{n:06d}``.
+    :type name_template: str
+
+    :param count: Number of client certificates to issue.
+    :type count: int
+
+    :param key_specification: Key specification to use when generating private keys for the clients. Set to None to default to issuing CA
+                              hiearchy algorithm and parameters.
+    :type key_specification: tuple(str, int) or None
+
+    :param output_archive: Binary output stream where generated artefacts (including CA chain) should be streamed as tar archive. Set to None (default)
+                           to skip.
+    :type output_archive: io.IOBase or None
+
+    :param validity: Duration of certificate validity. Set to None (default) for one year.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) for 15 minutes.
+    :type backdate: datetime.timedelta or None
+
+    :param reuse_key_from: Type and name of existing entity whose private key should be reused by all clients. Set to None (default) to generate
+                           private key for each client.
+    :type reuse_key_from: (str, str) or None
+
+    :param archive_only: Write artefacts into output archive only, without storing them in project directory.
+    :type archive_only: bool
+
+    :param jobs: Number of worker processes to use. Set to None (default) to use one worker process per CPU.
+    :type jobs: int or None
+
+    :returns: Status code, one from gimmecert.commands.ExitCode.
+    :rtype: int
+    """
+
+    if not gimmecert.storage.is_initialised(project_directory):
+        print("CA hierarchy must be initialised prior to issuing client certificates. Run the gimmecert init command first.", file=stderr)
+        return ExitCode.ERROR_NOT_INITIALISED
+
+    archive = gimmecert.storage.TarArchive(output_archive) if output_archive else None
+
+    # Artefacts written to project storage are added to the archive
+    # by the storage itself.
+    project = gimmecert.project.Project(project_directory, None if archive_only else archive)
+    names = [name_template.format(n=n) for n in range(1, count + 1)]
+
+    # Single directory scan instead of checking for each name.
+    if not archive_only:
+        existing_names = project.get_artefacts('client')
+        for name in names:
+            if name in existing_names:
+                print("Refusing to overwrite existing data. Certificate has already been issued for client %s." % name, file=stderr)
+                return ExitCode.ERROR_CERTIFICATE_ALREADY_ISSUED
+
+    if reuse_key_from is not None:
+        try:
+            source_entity = project.get_entity(*reuse_key_from)
+        except gimmecert.project.UnknownEntity:
+            print("Cannot reuse private key. No existing certificate found for %s %s." % reuse_key_from, file=stderr)
+            return ExitCode.ERROR_UNKNOWN_ENTITY
+
+        if source_entity.private_key is None:
+            print("Cannot reuse private key of %s %s, since its certificate has been issued using a CSR." % reuse_key_from, file=stderr)
+            return ExitCode.ERROR_ARGUMENTS
+
+        public_key = source_entity.certificate.public_key()
+
+        # Shared private key is needed only when it cannot be linked to.
+        if archive_only:
+            shared_private_key_pem = gimmecert.utils.private_key_to_pem(source_entity.private_key).encode()
+    else:
+        public_key = None
+
+    batches = gimmecert.bulk.issue_client_certificates(project.issuer_private_key, project.issuer_certificate, names,
+                                                       key_specification or project.key_specification, validity, backdate, public_key,
+                                                       jobs or os.cpu_count() or 1, project.key_pool)
+
+    for batch in batches:
+        for name, private_key, certificate in batch:
+            private_key_name, certificate_name = 'client/%s.key.pem' % name, 'client/%s.cert.pem' % name
+
+            if archive_only:
+                if private_key is None:
+                    archive.add(shared_private_key_pem, private_key_name)
+                else:
+                    archive.add_artefact(private_key, private_key_name)
+                archive.add_artefact(certificate, certificate_name)
+            else:
+                if private_key is None:
+                    project.storage.link(source_entity.private_key_name, private_key_name)
+                else:
+                    project.storage.write(private_key, private_key_name)
+                project.storage.write(certificate, certificate_name)
+
+    if archive:
+        archive.add_artefact([certificate for _, certificate in project.ca_hierarchy], 'ca/chain-full.cert.pem')
+        archive.close()
+
+    if archive_only:
+        print("%d client certificates issued into output archive." % count, file=stdout)
+    else:
+        print("%d client certificates issued." % count, file=stdout)
+        print("Client private keys: .gimmecert/client/%s.key.pem" % name_template, file=stdout)
+        print("Client certificates: .gimmecert/client/%s.cert.pem" % name_template, file=stdout)
+
+    return ExitCode.SUCCESS
+
+
+def subca(stdout, stderr, project_directory, name, key_specification, output_archive=None, validity=None, backdate=None):
+    """
+    Issues an intermediate CA (sub-CA) using the CA hierarchy
+    initialised within the specified directory.
+
+    Sub-CA artefacts are stored within a dedicated directory, laid-out
+    in the same way as the project CA directory. Only the sub-CA
+    private key is stored within it (parent CAs are represented by
+    their certificates), and the directory can be used as issuing CA
+    by other projects (see init command).
+
+    :param stdout: Output stream where the informative messages should be written-out.
+    :type stdout: io.IOBase
+
+    :param stderr: Output stream where the error messages should be written-out.
+    :type stderr: io.IOBase
+
+    :param project_directory: Path to project directory under which the CA artifacats etc will be looked-up.
+    :type project_directory: str
+
+    :param name: Name of the sub-CA. Name will be used in subject DN, and for naming the sub-CA directory.
+    :type name: str
+
+    :param key_specification: Key specification to use when generating private key for the sub-CA. Set to None to default to issuing CA hiearchy
+                              algorithm and parameters.
+    :type key_specification: tuple(str, int) or None
+
+    :param output_archive: Binary output stream where generated artefacts should be streamed as tar archive. Set to None (default) to skip.
+    :type output_archive: io.IOBase or None
+
+    :param validity: Duration of sub-CA certificate validity. Set to None (default) for one year. Never exceeds issuing CA validity.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which beginning of sub-CA certificate validity is backdated. Set to None (default) for 15 minutes.
+    :type backdate: datetime.timedelta or None
+
+    :returns: Status code, one from gimmecert.commands.ExitCode.
+    :rtype: int
+    """
+
+    subca_directory = os.path.join(project_directory, '.gimmecert', 'subca', name)
+
+    # Ensure hierarchy is initialised.
+    if not gimmecert.storage.is_initialised(project_directory):
+        print("CA hierarchy must be initialised prior to issuing sub-CAs. Run the gimmecert init command first.", file=stderr)
+        return ExitCode.ERROR_NOT_INITIALISED
+
+    # Ensure artefacts do not exist already.
+    if os.path.exists(subca_directory):
+        print("Refusing to overwrite existing data. Sub-CA %s has already been issued." % name, file=stderr)
+        return ExitCode.ERROR_CERTIFICATE_ALREADY_ISSUED
+
+    archive = gimmecert.storage.TarArchive(output_archive) if output_archive else None
+    project = gimmecert.project.Project(project_directory, archive)
+    subca_hierarchy = project.issue_subca(name, key_specification, validity, backdate)
+
+    if archive:
+        archive.close()
+
+    level = len(subca_hierarchy)
+
+    # Show user information about generated artefacts.
+    print("Sub-CA issued. Generated artefacts:", file=stdout)
+    print("    Sub-CA private key: .gimmecert/subca/%s/level%d.key.pem" % (name, level), file=stdout)
+    print("    Sub-CA certificate: .gimmecert/subca/%s/level%d.cert.pem" % (name, level), file=stdout)
+    print("    Full certificate chain: .gimmecert/subca/%s/chain-full.cert.pem" % name, file=stdout)
+    print("", file=stdout)
+    print("Copy the sub-CA directory to target machine, and use it as issuing CA with: gimmecert init --ca-from PATH_TO_SUBCA_DIRECTORY", file=stdout)
+
+    return ExitCode.SUCCESS
+
+
+def renew(stdout, stderr, project_directory, entity_type, entity_name, generate_new_private_key, custom_csr_path, dns_names, key_specification,
+          output_archive=None, validity=None, backdate=None):
     """
     Renews existing certificate, while optionally generating a new
     private key in the process. Naming and extensions are preserved.
@@ -376,14 +742,25 @@ def renew(stdout, stderr, project_directory, entity_type, entity_name, generate_
     :param custom_csr_path: Path to custom CSR for issuing client certificate. Cannot be used together with generate_new_private_key.
     :type custom_csr_path: str or None
 
-    :param dns_names: List of additional DNS names to use as replacement when renewing a server certificate. To remove additional DNS names,
-        set the value to empty list. To keep the existing DNS names, set the value to None. Valid only for server certificates.
+    :param dns_names: List of additional names to use as replacement when renewing a server certificate. Names can be prefixed with type (``ip:``,
+        ``uri:``, or ``email:``). To remove additional names, set the value to empty list. To keep the existing names, set the value to None. Valid
+        only for server certificates.
     :type dns_names: list[str] or None
 
     :param key_specification: Key specification to use when generating new private key. Ignored if custom_csr_path is specified. Set to None to
                               default to same algorithm and parameters currently used for the entity.
     :type key_specification: tuple(str, int) or None
 
+    :param output_archive: Binary output stream where generated artefacts (including CA chain) should be streamed as tar archive. Set to None (default)
+                           to skip.
+    :type output_archive: io.IOBase or None
+
+    :param validity: Duration of certificate validity. Set to None (default) for one year.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) for 15 minutes.
+    :type backdate: datetime.timedelta or None
+
     :returns: Status code, one from gimmecert.commands.ExitCode.
     :rtype: int
     """
@@ -412,58 +789,35 @@ def renew(stdout, stderr, project_directory, entity_type, entity_name, generate_
 
         return ExitCode.ERROR_UNKNOWN_ENTITY
 
-    # Grab the signing CA private key and certificate.
-    ca_hierarchy = gimmecert.storage.read_ca_hierarchy(os.path.join(project_directory, '.gimmecert', 'ca'))
-    issuer_private_key, issuer_certificate = ca_hierarchy[-1]
-
-    # Information will be extracted from the old certificate.
-    old_certificate = gimmecert.storage.read_certificate(certificate_path)
-
-    # Generate new private key and use its public key for new
-    # certificate. Otherwise just reuse existing public key in
-    # certificate.
-    if generate_new_private_key:
-
-        # Use key specification identical to the old key.
-        if not key_specification:
-            key_specification = gimmecert.crypto.key_specification_from_public_key(old_certificate.public_key())
+    # Ensure subject alternative names are valid.
+    try:
+        for name in dns_names or []:
+            gimmecert.crypto.get_general_name(name)
+    except ValueError as e:
+        print(e, file=stderr)
+        return ExitCode.ERROR_ARGUMENTS
 
-        key_generator = gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1])
-        private_key = key_generator()
-        gimmecert.storage.write_private_key(private_key, private_key_path)
-        public_key = private_key.public_key()
-    elif custom_csr_path == '-':
+    # Grab the CSR if one was passed-in.
+    if custom_csr_path == '-':
         csr_pem = gimmecert.utils.read_input(sys.stdin, stderr, "Please enter the CSR")
         csr = gimmecert.utils.csr_from_pem(csr_pem)
-        gimmecert.storage.write_csr(csr, csr_path)
-        public_key = csr.public_key()
     elif custom_csr_path:
         csr = gimmecert.storage.read_csr(custom_csr_path)
-        gimmecert.storage.write_csr(csr, csr_path)
-        public_key = csr.public_key()
     else:
-        public_key = old_certificate.public_key()
+        csr = None
 
-    # Issue and write out the new certificate.
-    if entity_type == 'server' and dns_names is not None:
-        certificate = gimmecert.crypto.issue_server_certificate(entity_name, public_key, issuer_private_key, issuer_certificate, dns_names)
-    else:
-        certificate = gimmecert.crypto.renew_certificate(old_certificate, public_key, issuer_private_key, issuer_certificate)
-    gimmecert.storage.write_certificate(certificate, certificate_path)
+    # Private key gets replaced with CSR, and vice-versa.
+    private_key_replaced_with_csr = bool(custom_csr_path) and os.path.exists(private_key_path)
+    csr_replaced_with_private_key = generate_new_private_key and os.path.exists(csr_path)
 
-    # Replace private key with CSR.
-    if custom_csr_path and os.path.exists(private_key_path):
-        os.remove(private_key_path)
-        private_key_replaced_with_csr = True
-    else:
-        private_key_replaced_with_csr = False
+    # Issue and write out the new certificate.
+    archive = gimmecert.storage.TarArchive(output_archive) if output_archive else None
+    project = gimmecert.project.Project(project_directory, archive)
+    project.renew(entity_type, entity_name, generate_new_private_key, csr, dns_names, key_specification, validity, backdate)
 
-    # Replace CSR with private key.
-    if generate_new_private_key and os.path.exists(csr_path):
-        os.remove(csr_path)
-        csr_replaced_with_private_key = True
-    else:
-        csr_replaced_with_private_key = False
+    if archive:
+        archive.add_artefact([certificate for _, certificate in project.ca_hierarchy], 'ca/chain-full.cert.pem')
+        archive.close()
 
     # Type of artefacts reported depending on whether the private key
     # or CSR are present.
@@ -505,10 +859,16 @@ def renew(stdout, stderr, project_directory, entity_type, entity_name, generate_
     return ExitCode.SUCCESS
 
 
-def status(stdout, stderr, project_directory):
+def renew_plan(stdout, stderr, project_directory, entity_type, entity_name, generate_new_private_key, key_specification):
     """
-    Displays information about initialised hierarchy and issued
-    certificates in project directory.
+    Outputs renewal plan for existing certificate without renewing
+    anything. The plan shows whether the private key (or CSR) would be
+    kept or replaced, and an estimate of how long the renewal would
+    take on this machine (based on a short benchmark of private key
+    generation and certificate signing).
+
+    Accepts the same combination of parameters as the renew command,
+    so the plan always describes a renewal that can be carried out.
 
     :param stdout: Output stream where the informative messages should be written-out.
     :type stdout: io.IOBase
@@ -516,147 +876,1202 @@ def status(stdout, stderr, project_directory):
     :param stderr: Output stream where the error messages should be written-out.
     :type stderr: io.IOBase
 
-    :param project_directory: Path to project directory under which the artefacts are looked-up.
+    :param project_directory: Path to project directory under which the CA artifacats etc will be looked-up.
     :type project_directory: str
 
+    :param entity_type: Type of entity. Currently supported values are ``server`` and ``client``.
+    :type entity_type: str
+
+    :param entity_name: Name of entity. Name should refer to entity for which a certificate has already been issued.
+    :type entity_name: str
+
+    :param generate_new_private_key: Specify if a new private key would be generated.
+    :type generate_new_private_key: bool
+
+    :param key_specification: Key specification to use for new private key. Valid only if generating new private key. Set to None to
+                              default to same algorithm and parameters currently used for the entity.
+    :type key_specification: tuple(str, int) or None
+
     :returns: Status code, one from gimmecert.commands.ExitCode.
     :rtype: int
     """
 
-    now = datetime.datetime.now()
+    if key_specification and not generate_new_private_key:
+        raise InvalidCommandInvocation("Key specification can be used only when generating new private key.")
 
     if not gimmecert.storage.is_initialised(project_directory):
-        print("CA hierarchy has not been initialised in current directory.", file=stdout)
+        print("No CA hierarchy has been initialised yet. Run the gimmecert init command and issue some certificates first.", file=stderr)
         return ExitCode.ERROR_NOT_INITIALISED
 
-    def get_section_title(title):
-        """
-        Small helper function that produces section title surrounded by
-        separators for better visibility.
-        """
-
-        return "%s\n%s\n%s" % ("-" * len(title), title, "-" * len(title))
+    project = gimmecert.project.Project(project_directory)
 
-    print(get_section_title("CA hierarchy"), file=stdout)
+    try:
+        entity = project.get_entity(entity_type, entity_name)
+    except gimmecert.project.UnknownEntity:
+        print("Cannot renew certificate. No existing certificate found for %s %s." % (entity_type, entity_name), file=stderr)
+        return ExitCode.ERROR_UNKNOWN_ENTITY
 
-    ca_hierarchy = gimmecert.storage.read_ca_hierarchy(os.path.join(project_directory, '.gimmecert', 'ca'))
+    current_key_specification = gimmecert.crypto.key_specification_from_public_key(entity.certificate.public_key())
+    current_key_algorithm = gimmecert.crypto.KeyGenerator(*current_key_specification)
 
-    # Derive key specification from the issuing CA certificate.
-    key_specification = gimmecert.crypto.key_specification_from_public_key(ca_hierarchy[-1][1].public_key())
-    key_algorithm = gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1])
-    print("", file=stdout)  # Separator
-    print("Default key algorithm: %s" % key_algorithm, file=stdout)
+    if generate_new_private_key:
+        new_key_specification = key_specification or current_key_specification
+        action = "new private key (%s -> %s)" % (current_key_algorithm, gimmecert.crypto.KeyGenerator(*new_key_specification))
+    elif project.storage.exists(entity.csr_name):
+        new_key_specification = None
+        action = "keep CSR (%s)" % current_key_algorithm
+    else:
+        new_key_specification = None
+        action = "keep private key (%s)" % current_key_algorithm
 
-    for i, (_, certificate) in enumerate(ca_hierarchy, 1):
-        # Separator.
-        print("", file=stdout)
+    signing_duration = gimmecert.benchmark.estimate_renewal(project.issuer_private_key, project.issuer_certificate)
+    key_generation_duration = gimmecert.benchmark.estimate_key_generation(new_key_specification) if new_key_specification else 0
 
-        if i == len(ca_hierarchy):
-            print(gimmecert.utils.dn_to_str(certificate.subject) + " [END ENTITY ISSUING CA]", file=stdout)
-        else:
-            print(gimmecert.utils.dn_to_str(certificate.subject), file=stdout)
+    print("Renewal plan for %s %s: %s" % (entity_type, entity_name, action), file=stdout)
+    print("Certificate signing: %s" % gimmecert.utils.duration_to_str(signing_duration), file=stdout)
 
-        if certificate.not_valid_before > now:
-            validity_status = " [NOT VALID YET]"
-        elif certificate.not_valid_after < now:
-            validity_status = " [EXPIRED]"
-        else:
-            validity_status = ""
+    if new_key_specification:
+        print("Private key generation: %s" % gimmecert.utils.duration_to_str(key_generation_duration), file=stdout)
 
-        print("    Validity: %s%s" % (gimmecert.utils.date_range_to_str(certificate.not_valid_before,
-                                                                        certificate.not_valid_after),
-                                      validity_status), file=stdout)
-        print("    Certificate: .gimmecert/ca/level%d.cert.pem" % i, file=stdout)
+    print("Estimated duration: %s" % gimmecert.utils.duration_to_str(signing_duration + key_generation_duration), file=stdout)
 
-    # Separator.
-    print("", file=stdout)
+    return ExitCode.SUCCESS
 
-    print("Full certificate chain: .gimmecert/ca/chain-full.cert.pem", file=stdout)
 
-    # Section separator.
-    print("\n", file=stdout)
+def reissue(stdout, stderr, project_directory, entity_type, entity_name, validity, backdate, interval, count):
+    """
+    Repeatedly reissues existing certificate, preserving naming,
+    extensions, and public key. Meant for use with short-lived
+    certificates that need to be reissued constantly.
 
-    print(get_section_title("Server certificates"), file=stdout)
+    Certificate content is prepared only once, and reused for all
+    reissues (no keys are generated, and no extensions are
+    recreated), leaving signing as the only expensive operation.
 
-    certificate_files = sorted([c for c in os.listdir(os.path.join(project_directory, '.gimmecert', 'server')) if c.endswith('.cert.pem')])
+    :param stdout: Output stream where the informative messages should be written-out.
+    :type stdout: io.IOBase
 
-    if certificate_files:
-        for certificate_file in certificate_files:
-            certificate = gimmecert.storage.read_certificate(os.path.join(project_directory, '.gimmecert', 'server', certificate_file))
-            private_key_path = os.path.join(project_directory, '.gimmecert', 'server', certificate_file.replace('.cert.pem', '.key.pem'))
-            csr_path = os.path.join(project_directory, '.gimmecert', 'server', certificate_file.replace('.cert.pem', '.csr.pem'))
-            key_algorithm = str(gimmecert.crypto.KeyGenerator(*gimmecert.crypto.key_specification_from_public_key(certificate.public_key())))
+    :param stderr: Output stream where the error messages should be written-out.
+    :type stderr: io.IOBase
 
-            # Separator.
-            print("", file=stdout)
+    :param project_directory: Path to project directory under which the CA artifacats etc will be looked-up.
+    :type project_directory: str
 
-            if certificate.not_valid_before > now:
-                validity_status = " [NOT VALID YET]"
-            elif certificate.not_valid_after < now:
-                validity_status = " [EXPIRED]"
-            else:
-                validity_status = ""
+    :param entity_type: Type of entity. Currently supported values are ``server`` and ``client``.
+    :type entity_type: str
 
-            print(gimmecert.utils.dn_to_str(certificate.subject), file=stdout)
-            print("    Validity: %s%s" % (gimmecert.utils.date_range_to_str(certificate.not_valid_before,
-                                                                            certificate.not_valid_after),
-                                          validity_status), file=stdout)
-            print("    DNS: %s" % ", ".join(gimmecert.utils.get_dns_names(certificate)), file=stdout)
-
-            print("    Key algorithm: %s" % key_algorithm, file=stdout)
-            if os.path.exists(private_key_path):
-                print("    Private key: .gimmecert/server/%s" % certificate_file.replace('.cert.pem', '.key.pem'), file=stdout)
-            elif os.path.exists(csr_path):
-                print("    CSR: .gimmecert/server/%s" % certificate_file.replace('.cert.pem', '.csr.pem'), file=stdout)
-
-            print("    Certificate: .gimmecert/server/%s" % certificate_file, file=stdout)
-    else:
+    :param entity_name: Name of entity. Name should refer to entity for which a certificate has already been issued.
+    :type entity_name: str
+
+    :param validity: Duration of certificate validity. Set to None for one year.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which beginning of certificate validity is backdated. Set to None for 15 minutes.
+    :type backdate: datetime.timedelta or None
+
+    :param interval: Interval between reissues in seconds. Set to zero to reissue without pausing.
+    :type interval: float
+
+    :param count: Number of times to reissue the certificate. Set to None to keep reissuing until interrupted.
+    :type count: int or None
+
+    :returns: Status code, one from gimmecert.commands.ExitCode.
+    :rtype: int
+    """
+
+    if not gimmecert.storage.is_initialised(project_directory):
+        print("No CA hierarchy has been initialised yet. Run the gimmecert init command and issue some certificates first.", file=stderr)
+        return ExitCode.ERROR_NOT_INITIALISED
+
+    project = gimmecert.project.Project(project_directory)
+
+    try:
+        reissue_certificate = project.get_reissuer(entity_type, entity_name, validity, backdate)
+    except gimmecert.project.UnknownEntity:
+        print("Cannot reissue certificate. No existing certificate found for %s %s." % (entity_type, entity_name), file=stderr)
+        return ExitCode.ERROR_UNKNOWN_ENTITY
+
+    if count is None:
+        print("Reissuing certificate for %s %s every %g seconds. Press Ctrl-C to stop." % (entity_type, entity_name, interval), file=stdout, flush=True)
+
+    reissued = 0
+    entity = None
+
+    try:
+        while count is None or reissued < count:
+            if reissued and interval:
+                time.sleep(interval)
+
+            entity = reissue_certificate()
+            reissued += 1
+    except KeyboardInterrupt:
+        pass
+
+    print("Reissued certificate for %s %s %d times." % (entity_type, entity_name, reissued), file=stdout)
+
+    if entity is not None:
+        print("%s certificate: .gimmecert/%s/%s.cert.pem (valid until %s UTC)" %
+              (entity_type.title(), entity_type, entity_name, entity.certificate.not_valid_after), file=stdout)
+
+    return ExitCode.SUCCESS
+
+
+def status(stdout, stderr, project_directory, jobs=None):
+    """
+    Displays information about initialised hierarchy and issued
+    certificates in project directory.
+
+    Entity certificates are parsed in parallel using a thread pool.
+
+    :param stdout: Output stream where the informative messages should be written-out.
+    :type stdout: io.IOBase
+
+    :param stderr: Output stream where the error messages should be written-out.
+    :type stderr: io.IOBase
+
+    :param project_directory: Path to project directory under which the artefacts are looked-up.
+    :type project_directory: str
+
+    :param jobs: Number of worker threads to use for parsing entity certificates. Set to None (default) to use one worker per CPU.
+    :type jobs: int or None
+
+    :returns: Status code, one from gimmecert.commands.ExitCode.
+    :rtype: int
+    """
+
+    now = datetime.datetime.now()
+
+    if not gimmecert.storage.is_initialised(project_directory):
+        print("CA hierarchy has not been initialised in current directory.", file=stdout)
+        return ExitCode.ERROR_NOT_INITIALISED
+
+    def get_section_title(title):
+        """
+        Small helper function that produces section title surrounded by
+        separators for better visibility.
+        """
+
+        return "%s\n%s\n%s" % ("-" * len(title), title, "-" * len(title))
+
+    print(get_section_title("CA hierarchy"), file=stdout)
+
+    ca_hierarchy = gimmecert.storage.read_ca_hierarchy(os.path.join(project_directory, '.gimmecert', 'ca'))
+
+    # Derive key specification from the issuing CA certificate.
+    key_specification = gimmecert.crypto.key_specification_from_public_key(ca_hierarchy[-1][1].public_key())
+    key_algorithm = gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1])
+    print("", file=stdout)  # Separator
+    print("Default key algorithm: %s" % key_algorithm, file=stdout)
+
+    for i, (_, certificate) in enumerate(ca_hierarchy, 1):
         # Separator.
         print("", file=stdout)
-        print("No server certificates have been issued.", file=stdout)
+
+        if i == len(ca_hierarchy):
+            print(gimmecert.utils.dn_to_str(certificate.subject) + " [END ENTITY ISSUING CA]", file=stdout)
+        else:
+            print(gimmecert.utils.dn_to_str(certificate.subject), file=stdout)
+
+        if certificate.not_valid_before > now:
+            validity_status = " [NOT VALID YET]"
+        elif certificate.not_valid_after < now:
+            validity_status = " [EXPIRED]"
+        else:
+            validity_status = ""
+
+        print("    Validity: %s%s" % (gimmecert.utils.date_range_to_str(certificate.not_valid_before,
+                                                                        certificate.not_valid_after),
+                                      validity_status), file=stdout)
+        print("    Certificate: .gimmecert/ca/level%d.cert.pem" % i, file=stdout)
+
+    # Separator.
+    print("", file=stdout)
+
+    print("Full certificate chain: .gimmecert/ca/chain-full.cert.pem", file=stdout)
 
     # Section separator.
     print("\n", file=stdout)
 
-    print(get_section_title("Client certificates"), file=stdout)
+    records = gimmecert.status.collect_entity_records(project_directory, ['server', 'client'], jobs)
 
-    certificate_files = sorted([c for c in os.listdir(os.path.join(project_directory, '.gimmecert', 'client')) if c.endswith('.cert.pem')])
+    for entity_type in ['server', 'client']:
+        print(get_section_title("%s certificates" % entity_type.title()), file=stdout)
 
-    if certificate_files:
-        for certificate_file in certificate_files:
-            certificate = gimmecert.storage.read_certificate(os.path.join(project_directory, '.gimmecert', 'client', certificate_file))
-            private_key_path = os.path.join(project_directory, '.gimmecert', 'client', certificate_file.replace('.cert.pem', '.key.pem'))
-            csr_path = os.path.join(project_directory, '.gimmecert', 'client', certificate_file.replace('.cert.pem', '.csr.pem'))
-            key_algorithm = str(gimmecert.crypto.KeyGenerator(*gimmecert.crypto.key_specification_from_public_key(certificate.public_key())))
+        entity_records = [record for record in records if record.entity_type == entity_type]
 
+        for record in entity_records:
             # Separator.
             print("", file=stdout)
 
-            if certificate.not_valid_before > now:
+            if record.not_valid_before > now:
                 validity_status = " [NOT VALID YET]"
-            elif certificate.not_valid_after < now:
+            elif record.not_valid_after < now:
                 validity_status = " [EXPIRED]"
             else:
                 validity_status = ""
 
-            print(gimmecert.utils.dn_to_str(certificate.subject), file=stdout)
-            print("    Validity: %s%s" % (gimmecert.utils.date_range_to_str(certificate.not_valid_before,
-                                                                            certificate.not_valid_after),
-                                          validity_status), file=stdout)
+            print(record.subject, file=stdout)
+            print("    Validity: %s%s" % (gimmecert.utils.date_range_to_str(record.not_valid_before, record.not_valid_after), validity_status), file=stdout)
 
-            print("    Key algorithm: %s" % key_algorithm, file=stdout)
-            if os.path.exists(private_key_path):
-                print("    Private key: .gimmecert/client/%s" % certificate_file.replace('.cert.pem', '.key.pem'), file=stdout)
-            elif os.path.exists(csr_path):
-                print("    CSR: .gimmecert/client/%s" % certificate_file.replace('.cert.pem', '.csr.pem'), file=stdout)
+            if entity_type == 'server':
+                print("    DNS: %s" % ", ".join(record.subject_alternative_names['dns']), file=stdout)
 
-            print("    Certificate: .gimmecert/client/%s" % certificate_file, file=stdout)
-    else:
-        # Separator.
-        print("", file=stdout)
-        print("No client certificates have been issued.", file=stdout)
+            for name_type, label in [('ip', 'IP'), ('uri', 'URI'), ('email', 'E-mail')]:
+                if record.subject_alternative_names[name_type]:
+                    print("    %s: %s" % (label, ", ".join(record.subject_alternative_names[name_type])), file=stdout)
+
+            print("    Key algorithm: %s" % record.key_algorithm, file=stdout)
+            if record.private_key_file:
+                print("    Private key: .gimmecert/%s" % record.private_key_file, file=stdout)
+            elif record.csr_file:
+                print("    CSR: .gimmecert/%s" % record.csr_file, file=stdout)
+
+            print("    Certificate: .gimmecert/%s" % record.certificate_file, file=stdout)
+
+        if not entity_records:
+            # Separator.
+            print("", file=stdout)
+            print("No %s certificates have been issued." % entity_type, file=stdout)
+
+        if entity_type == 'server':
+            # Section separator.
+            print("\n", file=stdout)
 
     # Separator. Helps separate terminal prompt from final line of output.
     print("", file=stdout)
 
     return ExitCode.SUCCESS
+
+
+def export_p12(stdout, stderr, project_directory, entity_type, entity_names, password, output_archive=None):
+    """
+    Exports private keys, certificates, and CA chain of issued
+    entities as PKCS#12 bundles. CA hierarchy is read only once,
+    regardless of number of exported entities.
+
+    Bundles are written alongside the existing entity artefacts, using
+    naming convention ``NAME.p12``. For entities issued via CSR, the
+    bundle will include only the certificate and CA chain.
+
+    :param stdout: Output stream where the informative messages should be written-out.
+    :type stdout: io.IOBase
+
+    :param stderr: Output stream where the error messages should be written-out.
+    :type stderr: io.IOBase
+
+    :param project_directory: Path to project directory under which the CA artifacats etc will be looked-up.
+    :type project_directory: str
+
+    :param entity_type: Type of entities to export. Currently supported values are ``server`` and ``client``.
+    :type entity_type: str
+
+    :param entity_names: Names of entities to export. Set to None to export all entities of specified type.
+    :type entity_names: list[str] or None
+
+    :param password: Password for protecting the bundles. Set to None to produce unencrypted bundles.
+    :type password: str or None
+
+    :param output_archive: Binary output stream where bundles should be streamed as tar archive. Set to None (default) to skip.
+    :type output_archive: io.IOBase or None
+
+    :returns: Status code, one from gimmecert.commands.ExitCode.
+    :rtype: int
+    """
+
+    entity_directory = os.path.join(project_directory, '.gimmecert', entity_type)
+
+    if not gimmecert.storage.is_initialised(project_directory):
+        print("No CA hierarchy has been initialised yet. Run the gimmecert init command and issue some certificates first.", file=stderr)
+        return ExitCode.ERROR_NOT_INITIALISED
+
+    artefacts = gimmecert.storage.scan_entity_artefacts(entity_directory)
+
+    if entity_names is None:
+        entity_names = sorted(name for name, kinds in artefacts.items() if 'cert' in kinds)
+
+    # Ensure all entities exist before exporting anything.
+    for entity_name in entity_names:
+        if 'cert' not in artefacts.get(entity_name, ()):
+            print("Cannot export certificate. No existing certificate found for %s %s." % (entity_type, entity_name), file=stderr)
+            return ExitCode.ERROR_UNKNOWN_ENTITY
+
+    # Chain is stored starting with the issuing CA.
+    ca_hierarchy = gimmecert.storage.read_ca_hierarchy(os.path.join(project_directory, '.gimmecert', 'ca'))
+    ca_chain = [certificate for _, certificate in reversed(ca_hierarchy)]
+
+    archive = gimmecert.storage.TarArchive(output_archive) if output_archive else None
+
+    for entity_name in entity_names:
+        private_key_path = os.path.join(entity_directory, '%s.key.pem' % entity_name)
+        certificate_path = os.path.join(entity_directory, '%s.cert.pem' % entity_name)
+        pkcs12_path = os.path.join(entity_directory, '%s.p12' % entity_name)
+
+        certificate = gimmecert.storage.read_certificate(certificate_path)
+
+        if 'key' in artefacts[entity_name]:
+            private_key = gimmecert.storage.read_private_key(private_key_path)
+        else:
+            private_key = None
+
+        pkcs12_bundle = gimmecert.crypto.serialize_pkcs12(entity_name, private_key, certificate, ca_chain, password)
+        gimmecert.storage.write_pkcs12(pkcs12_bundle, pkcs12_path)
+
+        if archive:
+            archive.add(pkcs12_bundle, '%s/%s.p12' % (entity_type, entity_name))
+
+        if private_key:
+            print("{entity_type_titled} PKCS#12 bundle: .gimmecert/{entity_type}/{entity_name}.p12"
+                  .format(entity_type_titled=entity_type.title(), entity_type=entity_type, entity_name=entity_name),
+                  file=stdout)
+        else:
+            print("{entity_type_titled} PKCS#12 bundle (no private key): .gimmecert/{entity_type}/{entity_name}.p12"
+                  .format(entity_type_titled=entity_type.title(), entity_type=entity_type, entity_name=entity_name),
+                  file=stdout)
+
+    if archive:
+        archive.close()
+
+    if not entity_names:
+        print("No %s certificates have been issued." % entity_type, file=stdout)
+
+    return ExitCode.SUCCESS
+
+
+def sync(stdout, stderr, project_directory, target_directory, layout):
+    """
+    Incrementally synchronises issued artefacts (private keys, CSRs,
+    and certificates) of all entity types, including ones issued using
+    custom profiles, into target directory.
+
+    Content of synchronised files is tracked in a manifest stored
+    within the target directory (``.gimmecert-sync.json``). Only files
+    whose content has changed since the last synchronisation are
+    rewritten (using atomic replace). Artefacts which no longer exist
+    in the project directory (for example, a CSR replaced by private
+    key during renewal) are removed from the target directory, along
+    with directories left empty by the removal.
+
+    Source files whose size and modification time have not changed
+    since the last synchronisation are not read at all.
+
+    :param stdout: Output stream where the informative messages should be written-out.
+    :type stdout: io.IOBase
+
+    :param stderr: Output stream where the error messages should be written-out.
+    :type stderr: io.IOBase
+
+    :param project_directory: Path to project directory under which the artefacts are looked-up.
+    :type project_directory: str
+
+    :param target_directory: Path to directory where the artefacts should be synchronised to.
+    :type target_directory: str
+
+    :param layout: Layout (format string) used for constructing artefact paths relative to target directory. Supports the following
+        fields: ``type`` (entity type, such as ``server``, ``client``, or profile name), ``name`` (entity name), and ``kind`` (``key``,
+        ``csr``, or ``cert``).
+    :type layout: str
+
+    :returns: Status code, one from gimmecert.commands.ExitCode.
+    :rtype: int
+    """
+
+    if not gimmecert.storage.is_initialised(project_directory):
+        print("No CA hierarchy has been initialised yet. Run the gimmecert init command and issue some certificates first.", file=stderr)
+        return ExitCode.ERROR_NOT_INITIALISED
+
+    manifest_path = os.path.join(target_directory, '.gimmecert-sync.json')
+    old_manifest = gimmecert.storage.read_sync_manifest(manifest_path)
+    new_manifest = {}
+
+    updated, unchanged, removed = [], 0, []
+
+    for entity_type in gimmecert.profiles.get_entity_types(project_directory):
+        entity_directory = os.path.join(project_directory, '.gimmecert', entity_type)
+
+        for file_name in sorted(os.listdir(entity_directory)):
+            for kind in ['key', 'csr', 'cert']:
+                if file_name.endswith('.%s.pem' % kind):
+                    entity_name = file_name[:-len('.%s.pem' % kind)]
+                    break
+            else:
+                continue
+
+            source_path = os.path.join(entity_directory, file_name)
+            relative_target_path = os.path.normpath(layout.format(type=entity_type, name=entity_name, kind=kind))
+            target_path = os.path.join(target_directory, relative_target_path)
+
+            source_stat = os.stat(source_path)
+            entry = old_manifest.get(relative_target_path)
+            target_exists = os.path.exists(target_path)
+
+            # Skip reading the source if it has not been touched since
+            # last synchronisation.
+            if (entry and target_exists and
+                    entry['mtime_ns'] == source_stat.st_mtime_ns and entry['size'] == source_stat.st_size):
+                new_manifest[relative_target_path] = entry
+                unchanged += 1
+                continue
+
+            with open(source_path, 'rb') as source_file:
+                content = source_file.read()
+            content_hash = hashlib.sha256(content).hexdigest()
+
+            if not (entry and target_exists and entry['sha256'] == content_hash):
+                gimmecert.storage.write_file_atomically(content, target_path)
+                updated.append(relative_target_path)
+            else:
+                unchanged += 1
+
+            new_manifest[relative_target_path] = {
+                'sha256': content_hash,
+                'mtime_ns': source_stat.st_mtime_ns,
+                'size': source_stat.st_size,
+            }
+
+    # Drop artefacts that are no longer present in the project.
+    for relative_target_path in sorted(set(old_manifest) - set(new_manifest)):
+        target_path = os.path.join(target_directory, relative_target_path)
+        if os.path.exists(target_path):
+            os.remove(target_path)
+        removed.append(relative_target_path)
+
+        # Prune directories left empty, stopping at target directory.
+        directory = os.path.dirname(relative_target_path)
+        while directory:
+            try:
+                os.rmdir(os.path.join(target_directory, directory))
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+
+    gimmecert.storage.write_sync_manifest(new_manifest, manifest_path)
+
+    print("Synchronised artefacts to %s: %d updated, %d unchanged, %d removed." % (target_directory, len(updated), unchanged, len(removed)),
+          file=stdout)
+
+    for relative_target_path in updated:
+        print("    Updated: %s" % relative_target_path, file=stdout)
+
+    for relative_target_path in removed:
+        print("    Removed: %s" % relative_target_path, file=stdout)
+
+    return ExitCode.SUCCESS
+
+
+def watch(stdout, stderr, project_directory, inbox_directory, entity_type, interval, run_once, jobs=None):
+    """
+    Watches the inbox directory for certificate signing requests, and
+    issues certificates for them using the issuing CA of the project.
+
+    CSRs are expected to be named ``NAME.csr.pem``. Resulting
+    certificates are written alongside them as ``NAME.cert.pem``. Only
+    the public key is taken from the CSR - naming is based on the file
+    name. A CSR is considered pending if it has no corresponding
+    certificate, or if it is newer than the certificate.
+
+    The issuing CA is loaded only once. Changes in inbox directory are
+    detected using inotify when available (falling back to periodic
+    polling otherwise), and all pending CSRs are processed in a single
+    batch every time a change is detected. Certificates within a batch
+    can be signed in parallel by a pool of worker processes, each
+    holding its own copy of the issuing CA private key.
+
+    :param stdout: Output stream where the informative messages should be written-out.
+    :type stdout: io.IOBase
+
+    :param stderr: Output stream where the error messages should be written-out.
+    :type stderr: io.IOBase
+
+    :param project_directory: Path to project directory under which the CA artifacats etc will be looked-up.
+    :type project_directory: str
+
+    :param inbox_directory: Path to directory that should be watched for CSRs.
+    :type inbox_directory: str
+
+    :param entity_type: Type of certificates to issue. Currently supported values are ``server`` and ``client``.
+    :type entity_type: str
+
+    :param interval: Polling interval (or maximum wait time for inotify events) in seconds.
+    :type interval: float
+
+    :param run_once: Process pending CSRs once, and return instead of watching the inbox.
+    :type run_once: bool
+
+    :param jobs: Number of worker processes to use for signing certificates. Set to None (default) to use one worker process per CPU.
+    :type jobs: int or None
+
+    :returns: Status code, one from gimmecert.commands.ExitCode.
+    :rtype: int
+    """
+
+    if not gimmecert.storage.is_initialised(project_directory):
+        print("CA hierarchy must be initialised prior to issuing %s certificates. Run the gimmecert init command first." % entity_type, file=stderr)
+        return ExitCode.ERROR_NOT_INITIALISED
+
+    if not os.path.isdir(inbox_directory):
+        print("Inbox directory does not exist: %s" % inbox_directory, file=stderr)
+        return ExitCode.ERROR_ARGUMENTS
+
+    ca_hierarchy = gimmecert.storage.read_ca_hierarchy(os.path.join(project_directory, '.gimmecert', 'ca'))
+    issuer_private_key, issuer_certificate = ca_hierarchy[-1]
+
+    profile = gimmecert.crypto.SERVER_PROFILE if entity_type == 'server' else gimmecert.crypto.CLIENT_PROFILE
+    issuer = gimmecert.crypto.CertificateIssuer(profile, issuer_private_key, issuer_certificate)
+
+    # Keep track of invalid CSRs, and retry them only once they change.
+    failed_csrs = {}
+
+    def process_inbox():
+        """
+        Issues certificates for all pending CSRs in the inbox.
+        """
+
+        entity_names = []
+        requests = []
+
+        for entity_name in gimmecert.watch.get_pending_csr_names(inbox_directory):
+            csr_path = os.path.join(inbox_directory, '%s.csr.pem' % entity_name)
+
+            # CSR could have been removed or renamed in the meantime.
+            try:
+                csr_mtime = os.stat(csr_path).st_mtime_ns
+            except OSError:
+                continue
+
+            if failed_csrs.get(entity_name) == csr_mtime:
+                continue
+
+            try:
+                csr = gimmecert.storage.read_csr(csr_path)
+            except (OSError, ValueError):
+                failed_csrs[entity_name] = csr_mtime
+                print("Failed to read CSR: %s" % csr_path, file=stderr)
+                continue
+
+            failed_csrs.pop(entity_name, None)
+
+            entity_names.append(entity_name)
+            requests.append(issuer.get_signing_parameters(entity_name, csr.public_key()))
+
+        # Worker processes are kept around only while processing the
+        # batch, so none are left idling between changes.
+        with gimmecert.signing.SigningPool(issuer_private_key, issuer_certificate, jobs) as signing_pool:
+            certificates = signing_pool.sign(requests)
+
+        for entity_name, certificate in zip(entity_names, certificates):
+            certificate_path = os.path.join(inbox_directory, '%s.cert.pem' % entity_name)
+
+            # Write atomically, since consumers may be polling for the
+            # certificate.
+            gimmecert.storage.write_file_atomically(gimmecert.utils.certificate_to_pem(certificate).encode(), certificate_path)
+
+            print("%s certificate issued: %s" % (entity_type.title(), certificate_path), file=stdout, flush=True)
+
+    if run_once:
+        process_inbox()
+        return ExitCode.SUCCESS
+
+    watcher = gimmecert.watch.get_directory_watcher(inbox_directory, interval)
+    print("Watching %s for %s CSRs (%s). Press Ctrl-C to stop." % (inbox_directory, entity_type, watcher), file=stdout, flush=True)
+
+    try:
+        # Process anything that arrived before the watch was set-up.
+        process_inbox()
+
+        while True:
+            if watcher.wait():
+                process_inbox()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+    return ExitCode.SUCCESS
+
+
+def revoke(stdout, stderr, project_directory, entity_type, entity_name, remove_artefacts=False):
+    """
+    Revokes an issued certificate. Serial number of the certificate is
+    recorded in the revocation journal (for inclusion in CRLs), and
+    revoked certificate is archived as
+    ``.gimmecert/crl/revoked/SERIAL.cert.pem`` (for use by OCSP
+    responder). Revoking already revoked certificate does not produce
+    additional journal entries.
+
+    Entity artefacts are kept, unless their removal is requested
+    (making it possible to issue a new certificate under the same
+    name).
+
+    :param stdout: Output stream where the informative messages should be written-out.
+    :type stdout: io.IOBase
+
+    :param stderr: Output stream where the error messages should be written-out.
+    :type stderr: io.IOBase
+
+    :param project_directory: Path to project directory under which the CA artifacats etc will be looked-up.
+    :type project_directory: str
+
+    :param entity_type: Type of entity. Currently supported values are ``server`` and ``client``.
+    :type entity_type: str
+
+    :param entity_name: Name of entity. Name should refer to entity for which a certificate has already been issued.
+    :type entity_name: str
+
+    :param remove_artefacts: Specify if entity artefacts (private key, CSR, certificate, and PKCS#12 bundle) should be removed.
+    :type remove_artefacts: bool
+
+    :returns: Status code, one from gimmecert.commands.ExitCode.
+    :rtype: int
+    """
+
+    entity_directory = os.path.join(project_directory, '.gimmecert', entity_type)
+    certificate_path = os.path.join(entity_directory, '%s.cert.pem' % entity_name)
+    crl_directory = os.path.join(project_directory, '.gimmecert', 'crl')
+
+    if not gimmecert.storage.is_initialised(project_directory):
+        print("No CA hierarchy has been initialised yet. Run the gimmecert init command and issue some certificates first.", file=stderr)
+        return ExitCode.ERROR_NOT_INITIALISED
+
+    if not os.path.exists(certificate_path):
+        print("Cannot revoke certificate. No existing certificate found for %s %s." % (entity_type, entity_name), file=stderr)
+        return ExitCode.ERROR_UNKNOWN_ENTITY
+
+    certificate = gimmecert.storage.read_certificate(certificate_path)
+    revocation_date = datetime.datetime.utcnow().replace(microsecond=0)
+    revocation_journal_path = os.path.join(crl_directory, 'revocations.log')
+    revoked_serial_numbers = {serial_number for serial_number, _, _, _ in gimmecert.storage.read_revocations(revocation_journal_path)}
+
+    if certificate.serial_number in revoked_serial_numbers:
+        print("Certificate for %s %s (serial number %x) has already been revoked." % (entity_type, entity_name, certificate.serial_number), file=stdout)
+    else:
+        # Revoked certificates are kept around for producing OCSP responses.
+        os.makedirs(os.path.join(crl_directory, 'revoked'), exist_ok=True)
+        gimmecert.storage.write_certificate(certificate, os.path.join(crl_directory, 'revoked', '%x.cert.pem' % certificate.serial_number))
+        gimmecert.storage.append_revocation(revocation_journal_path, certificate.serial_number, revocation_date, entity_type, entity_name)
+
+        print("Revoked certificate for %s %s (serial number %x)." % (entity_type, entity_name, certificate.serial_number), file=stdout)
+        print("Run the gimmecert crl command to issue updated CRL.", file=stdout)
+
+    if remove_artefacts:
+        for extension in ['key.pem', 'csr.pem', 'cert.pem', 'p12']:
+            artefact_path = os.path.join(entity_directory, '%s.%s' % (entity_name, extension))
+            if os.path.exists(artefact_path):
+                os.remove(artefact_path)
+
+        print("Removed artefacts of %s %s." % (entity_type, entity_name), file=stdout)
+
+    return ExitCode.SUCCESS
+
+
+def crl(stdout, stderr, project_directory, delta):
+    """
+    Issues a certificate revocation list (CRL) using the issuing CA,
+    based on the revocation journal.
+
+    Full CRLs include all revoked certificates, and are valid for 7
+    days. Delta CRLs include only the certificates revoked since the
+    last full CRL, and are valid for 1 day. This way large revocation
+    sets do not need to be re-signed for every change.
+
+    Full CRL is stored as ``.gimmecert/crl/crl-full.pem``, while delta
+    CRL is stored as ``.gimmecert/crl/crl-delta.pem``.
+
+    :param stdout: Output stream where the informative messages should be written-out.
+    :type stdout: io.IOBase
+
+    :param stderr: Output stream where the error messages should be written-out.
+    :type stderr: io.IOBase
+
+    :param project_directory: Path to project directory under which the CA artifacats etc will be looked-up.
+    :type project_directory: str
+
+    :param delta: Issue delta CRL instead of full CRL. Full CRL must have been issued already.
+    :type delta: bool
+
+    :returns: Status code, one from gimmecert.commands.ExitCode.
+    :rtype: int
+    """
+
+    crl_directory = os.path.join(project_directory, '.gimmecert', 'crl')
+    crl_state_path = os.path.join(crl_directory, 'state.json')
+
+    if not gimmecert.storage.is_initialised(project_directory):
+        print("No CA hierarchy has been initialised yet. Run the gimmecert init command first.", file=stderr)
+        return ExitCode.ERROR_NOT_INITIALISED
+
+    crl_state = gimmecert.storage.read_crl_state(crl_state_path)
+
+    if delta and crl_state['base_crl_number'] is None:
+        print("Cannot issue delta CRL. Full CRL must be issued first.", file=stderr)
+        return ExitCode.ERROR_ARGUMENTS
+
+    ca_hierarchy = gimmecert.storage.read_ca_hierarchy(os.path.join(project_directory, '.gimmecert', 'ca'))
+    issuer_private_key, issuer_certificate = ca_hierarchy[-1]
+
+    revocations = gimmecert.storage.read_revocations(os.path.join(crl_directory, 'revocations.log'))
+    last_update = datetime.datetime.utcnow().replace(microsecond=0)
+    crl_number = crl_state['crl_number'] + 1
+
+    if delta:
+        revoked_certificates = [(serial_number, revocation_date) for serial_number, revocation_date, _, _ in
+                                revocations[crl_state['base_revocation_count']:]]
+        next_update = last_update + datetime.timedelta(days=1)
+        crl_path = os.path.join(crl_directory, 'crl-delta.pem')
+        base_crl_number = crl_state['base_crl_number']
+    else:
+        revoked_certificates = [(serial_number, revocation_date) for serial_number, revocation_date, _, _ in revocations]
+        next_update = last_update + datetime.timedelta(days=7)
+        crl_path = os.path.join(crl_directory, 'crl-full.pem')
+        base_crl_number = None
+
+    issued_crl = gimmecert.crypto.issue_crl(revoked_certificates, issuer_private_key, issuer_certificate,
+                                            crl_number, last_update, next_update, base_crl_number)
+    gimmecert.storage.write_crl(issued_crl, crl_path)
+
+    crl_state['crl_number'] = crl_number
+    if not delta:
+        crl_state['base_crl_number'] = crl_number
+        crl_state['base_revocation_count'] = len(revocations)
+    gimmecert.storage.write_crl_state(crl_state, crl_state_path)
+
+    if delta:
+        print("Delta CRL number %d (base CRL number %d) issued with %d revoked certificates." % (crl_number, base_crl_number, len(revoked_certificates)),
+              file=stdout)
+        print("Delta CRL: .gimmecert/crl/crl-delta.pem", file=stdout)
+    else:
+        print("Full CRL number %d issued with %d revoked certificates." % (crl_number, len(revoked_certificates)), file=stdout)
+        print("Full CRL: .gimmecert/crl/crl-full.pem", file=stdout)
+
+    return ExitCode.SUCCESS
+
+
+def ocsp_serve(stdout, stderr, project_directory, host, port, refresh_interval):
+    """
+    Serves OCSP responses for certificates issued within the project
+    over HTTP.
+
+    Responses are signed by the issuing CA. They are precomputed for
+    all issued and revoked certificates, and refreshed periodically
+    (picking-up newly issued and revoked certificates in the
+    process). Serving requests does not involve signing operations.
+
+    :param stdout: Output stream where the informative messages should be written-out.
+    :type stdout: io.IOBase
+
+    :param stderr: Output stream where the error messages should be written-out.
+    :type stderr: io.IOBase
+
+    :param project_directory: Path to project directory under which the CA artifacats etc will be looked-up.
+    :type project_directory: str
+
+    :param host: Address to listen on.
+    :type host: str
+
+    :param port: Port to listen on.
+    :type port: int
+
+    :param refresh_interval: Interval (in seconds) at which the responses are refreshed. Responses are valid for twice the interval.
+    :type refresh_interval: int
+
+    :returns: Status code, one from gimmecert.commands.ExitCode.
+    :rtype: int
+    """
+
+    if not gimmecert.storage.is_initialised(project_directory):
+        print("No CA hierarchy has been initialised yet. Run the gimmecert init command and issue some certificates first.", file=stderr)
+        return ExitCode.ERROR_NOT_INITIALISED
+
+    responder = gimmecert.ocsp.OCSPResponder(project_directory, refresh_interval)
+    http_server = gimmecert.ocsp.ThreadingHTTPServer((host, port), gimmecert.ocsp.get_request_handler(responder))
+    stop_refresh = threading.Event()
+
+    def refresh_responses():
+        """
+        Periodically refreshes the precomputed responses.
+        """
+
+        while not stop_refresh.wait(refresh_interval):
+            # Keep serving (and retrying) on failure, for example if
+            # certificate got revoked in the middle of the refresh.
+            try:
+                responder.refresh()
+            except Exception as e:
+                print("Failed to refresh OCSP responses: %s" % e, file=stderr, flush=True)
+
+    refresher = threading.Thread(target=refresh_responses, daemon=True)
+    refresher.start()
+
+    print("Serving OCSP responses for %d certificates on http://%s:%d/ (refreshed every %d seconds). Press Ctrl-C to stop." %
+          (len(responder), host, http_server.server_address[1], refresh_interval), file=stdout, flush=True)
+
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_refresh.set()
+        http_server.server_close()
+
+    return ExitCode.SUCCESS
+
+
+def verify(stdout, stderr, project_directory, entity_type, entity_names, output_format, jobs):
+    """
+    Verifies the CA hierarchy and issued certificates. For every
+    certificate, the command verifies the signature (against the
+    issuing CA in the current CA hierarchy), the validity period, and
+    pairing with the private key (if the entity has one).
+
+    CA hierarchy is read only once. Entity artefacts are verified in
+    parallel using a pool of worker processes.
+
+    :param stdout: Output stream where the informative messages should be written-out.
+    :type stdout: io.IOBase
+
+    :param stderr: Output stream where the error messages should be written-out.
+    :type stderr: io.IOBase
+
+    :param project_directory: Path to project directory under which the CA artifacats etc will be looked-up.
+    :type project_directory: str
+
+    :param entity_type: Type of entities to verify. Supported values are ``server`` and ``client``. Set to None to verify entities of all types.
+    :type entity_type: str or None
+
+    :param entity_names: Names of entities to verify. Set to None to verify all entities of specified type(s).
+    :type entity_names: list[str] or None
+
+    :param output_format: Format of the report. Supported values are ``text`` and ``json``.
+    :type output_format: str
+
+    :param jobs: Number of worker processes to use for verification. Set to None to use one worker per CPU.
+    :type jobs: int or None
+
+    :returns: Status code, one from gimmecert.commands.ExitCode.
+    :rtype: int
+    """
+
+    now = datetime.datetime.utcnow()
+
+    if not gimmecert.storage.is_initialised(project_directory):
+        print("No CA hierarchy has been initialised yet. Run the gimmecert init command and issue some certificates first.", file=stderr)
+        return ExitCode.ERROR_NOT_INITIALISED
+
+    entities = []
+    artefacts = {}
+
+    for current_entity_type in [entity_type] if entity_type else ['server', 'client']:
+        artefacts[current_entity_type] = gimmecert.storage.scan_entity_artefacts(os.path.join(project_directory, '.gimmecert', current_entity_type))
+
+        if entity_names is None:
+            current_entity_names = sorted(name for name, kinds in artefacts[current_entity_type].items() if 'cert' in kinds)
+        else:
+            current_entity_names = entity_names
+
+        for entity_name in current_entity_names:
+            if 'cert' not in artefacts[current_entity_type].get(entity_name, ()):
+                print("Cannot verify certificate. No existing certificate found for %s %s." % (current_entity_type, entity_name), file=stderr)
+                return ExitCode.ERROR_UNKNOWN_ENTITY
+
+            entities.append((current_entity_type, entity_name))
+
+    ca_hierarchy = gimmecert.storage.read_ca_hierarchy(os.path.join(project_directory, '.gimmecert', 'ca'))
+    failures = []
+
+    # Root CA certificate is self-signed.
+    issuer_certificate = ca_hierarchy[0][1]
+    for level, (private_key, certificate) in enumerate(ca_hierarchy, 1):
+        for check, message in gimmecert.verify.verify_certificate(certificate, issuer_certificate, private_key, now):
+            failures.append({"entity_type": "ca", "entity_name": "level%d" % level, "check": check, "message": message})
+        issuer_certificate = certificate
+
+    issuer_certificate_pem = gimmecert.utils.certificate_to_pem(ca_hierarchy[-1][1]).encode()
+    certificates_pem = []
+    private_keys_pem = []
+
+    for current_entity_type, entity_name in entities:
+        entity_directory = os.path.join(project_directory, '.gimmecert', current_entity_type)
+        private_key_path = os.path.join(entity_directory, '%s.key.pem' % entity_name)
+
+        with open(os.path.join(entity_directory, '%s.cert.pem' % entity_name), 'rb') as certificate_file:
+            certificates_pem.append(certificate_file.read())
+
+        if 'key' in artefacts[current_entity_type][entity_name]:
+            with open(private_key_path, 'rb') as private_key_file:
+                private_keys_pem.append(private_key_file.read())
+        else:
+            private_keys_pem.append(None)
+
+    verify_arguments = (
+        [e[0] for e in entities],
+        [e[1] for e in entities],
+        certificates_pem,
+        private_keys_pem,
+        [issuer_certificate_pem] * len(entities),
+        [now] * len(entities),
+    )
+
+    # Avoid the overhead of starting worker processes if they would not be of any use.
+    if jobs == 1 or len(entities) < 2:
+        results = map(gimmecert.verify.verify_entity, *verify_arguments)
+        for entity_failures in results:
+            failures.extend(entity_failures)
+    else:
+        jobs = jobs or os.cpu_count() or 1
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunk_size = max(1, len(entities) // (jobs * 4))
+            for entity_failures in executor.map(gimmecert.verify.verify_entity, *verify_arguments, chunksize=chunk_size):
+                failures.extend(entity_failures)
+
+    verified_count = len(ca_hierarchy) + len(entities)
+
+    if output_format == "json":
+        print(json.dumps({"verified": verified_count, "failures": failures}, indent=2, sort_keys=True), file=stdout)
+    elif failures:
+        print("Verified %d certificates, %d problems found:" % (verified_count, len(failures)), file=stdout)
+        print("", file=stdout)
+        for failure in failures:
+            print("{entity_type} {entity_name} [{check}]: {message}".format(**failure), file=stdout)
+    else:
+        print("Verified %d certificates, no problems found." % verified_count, file=stdout)
+
+    if failures:
+        return ExitCode.ERROR_VERIFICATION_FAILED
+
+    return ExitCode.SUCCESS
+
+
+def metrics(stdout, stderr, project_directory, textfile):
+    """
+    Outputs metrics about issued certificates (end of validity of
+    every entity and CA certificate, and number of certificates by
+    entity type and key algorithm) in Prometheus text exposition
+    format.
+
+    Metrics are derived from cached certificate information (see the
+    status command), so the command can be run frequently even for
+    large projects.
+
+    :param stdout: Output stream where the informative messages should be written-out.
+    :type stdout: io.IOBase
+
+    :param stderr: Output stream where the error messages should be written-out.
+    :type stderr: io.IOBase
+
+    :param project_directory: Path to project directory under which the artefacts are looked-up.
+    :type project_directory: str
+
+    :param textfile: Path to file where the metrics should be written (atomically, for use with node exporter textfile collector). Set to
+        None to write metrics to standard output instead.
+    :type textfile: str or None
+
+    :returns: Status code, one from gimmecert.commands.ExitCode.
+    :rtype: int
+    """
+
+    if not gimmecert.storage.is_initialised(project_directory):
+        print("No CA hierarchy has been initialised yet. Run the gimmecert init command and issue some certificates first.", file=stderr)
+        return ExitCode.ERROR_NOT_INITIALISED
+
+    content = gimmecert.metrics.collect_metrics(project_directory)
+
+    if textfile is None:
+        print(content, end='', file=stdout)
+    else:
+        gimmecert.storage.write_file_atomically(content.encode(), textfile)
+
+    return ExitCode.SUCCESS
+
+
+def bench(stdout, stderr, target, key_specification, count, jobs=None, output_format='text'):
+    """
+    Runs performance benchmark, and outputs the results.
+
+    Currently supported targets are:
+
+    - ``issuance``, measuring per-certificate duration of issuing
+      certificates using built-in issuance profiles, with and without
+      reusing the prepared certificate issuer.
+    - ``keys``, measuring number of private keys generated per second
+      and number of certificates signed per second for commonly used
+      key specifications, both in a single process and using multiple
+      worker processes. Useful for sizing key pools and choosing the
+      level of parallelism.
+
+    :param stdout: Output stream where the informative messages should be written-out.
+    :type stdout: io.IOBase
+
+    :param stderr: Output stream where the error messages should be written-out.
+    :type stderr: io.IOBase
+
+    :param target: Benchmark to run.
+    :type target: str
+
+    :param key_specification: Key specification to use for keys used in the benchmark. For ``issuance`` target, defaults to 2048-bit RSA if
+        set to None. For ``keys`` target, only the passed-in key specification is measured, or all commonly used key specifications if set to
+        None.
+    :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve) or None
+
+    :param count: Number of operations to perform per measurement. For ``keys`` target, this is the maximum number of operations per
+        measurement (and per worker process), with every measurement being limited to one second as well.
+    :type count: int
+
+    :param jobs: Number of worker processes to use for parallel measurements (``keys`` target only). Set to None (default) to use one
+        worker process per CPU.
+    :type jobs: int or None
+
+    :param output_format: Format of the results, ``text`` (default) or ``json``.
+    :type output_format: str
+
+    :returns: Status code, one from gimmecert.commands.ExitCode.
+    :rtype: int
+    """
+
+    if target == 'keys':
+        return _bench_keys(stdout, key_specification, count, jobs or os.cpu_count() or 1, output_format)
+
+    key_specification = key_specification or ("rsa", 2048)
+    key_algorithm = gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1])
+
+    if output_format == 'text':
+        print("Measuring certificate issuance with %s issuing CA, %d certificates per measurement." % (key_algorithm, count), file=stdout, flush=True)
+        print("", file=stdout)
+
+    results = gimmecert.benchmark.benchmark_issuance(key_specification, count)
+
+    if output_format == 'json':
+        report = {
+            "key_specification": gimmecert.utils.key_specification_to_str(key_specification),
+            "count": count,
+            "results": [{"profile": profile_name, "fresh_issuer_seconds": fresh, "reused_issuer_seconds": reused}
+                        for profile_name, fresh, reused in results],
+        }
+        print(json.dumps(report, indent=2, sort_keys=True), file=stdout)
+        return ExitCode.SUCCESS
+
+    row_format = "%-15s %15s %15s %20s"
+    print(row_format % ("Profile", "Fresh issuer", "Reused issuer", "Overhead avoided"), file=stdout)
+
+    for profile_name, fresh, reused in results:
+        print(row_format % (profile_name,
+                            "%.3f ms" % (fresh * 1000),
+                            "%.3f ms" % (reused * 1000),
+                            "%.3f ms (%.1f%%)" % ((fresh - reused) * 1000, (fresh - reused) / fresh * 100)), file=stdout)
+
+    return ExitCode.SUCCESS
+
+
+def _bench_keys(stdout, key_specification, count, jobs, output_format):
+    """
+    Helper function for running the ``keys`` benchmark. See bench for
+    details.
+    """
+
+    key_specifications = [key_specification] if key_specification else gimmecert.benchmark.KEY_SPECIFICATIONS
+
+    if output_format == 'text':
+        print("Measuring key generation and signing throughput, using 1 and %d worker process(es)." % jobs, file=stdout, flush=True)
+        print("", file=stdout)
+
+    results = gimmecert.benchmark.benchmark_keys(key_specifications, count, jobs)
+
+    if output_format == 'json':
+        report = {
+            "jobs": jobs,
+            "results": [{"key_specification": gimmecert.utils.key_specification_to_str(spec),
+                         "keys_per_second": {"single": keys_single, "parallel": keys_parallel},
+                         "signatures_per_second": {"single": signatures_single, "parallel": signatures_parallel}}
+                        for spec, keys_single, keys_parallel, signatures_single, signatures_parallel in results],
+        }
+        print(json.dumps(report, indent=2, sort_keys=True), file=stdout)
+        return ExitCode.SUCCESS
+
+    row_format = "%-18s %12s %12s %16s %16s"
+    print(row_format % ("Key specification", "Keys/s (1)", "Keys/s (%d)" % jobs, "Signatures/s (1)", "Signatures/s (%d)" % jobs), file=stdout)
+
+    for spec, keys_single, keys_parallel, signatures_single, signatures_parallel in results:
+        print(row_format % (gimmecert.utils.key_specification_to_str(spec),
+                            "%.1f" % keys_single, "%.1f" % keys_parallel, "%.1f" % signatures_single, "%.1f" % signatures_parallel), file=stdout)
+
+    return ExitCode.SUCCESS
+
+
+def pool(stdout, stderr, project_directory, action, key_specifications, low_watermark, high_watermark, jobs, interval, run_once):
+    """
+    Manages pool of pre-generated private keys, used when issuing and
+    renewing certificates instead of generating private keys on demand.
+
+    Currently supported actions are:
+
+    - ``daemon``, keeping the pools for designated key specifications
+      filled. Levels are checked periodically, and once a pool level
+      drops below the low watermark, the pool is refilled up to the
+      high watermark. Keys are generated using a pool of worker
+      processes running with lowered priority.
+
+    :param stdout: Output stream where the informative messages should be written-out.
+    :type stdout: io.IOBase
+
+    :param stderr: Output stream where the error messages should be written-out.
+    :type stderr: io.IOBase
+
+    :param project_directory: Path to project directory under which the CA artifacats etc will be looked-up.
+    :type project_directory: str
+
+    :param action: Action to perform.
+    :type action: str
+
+    :param key_specifications: Key specifications of pools to keep filled. Set to None or empty list to use CA hierarchy key specification.
+    :type key_specifications: list[tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)] or None
+
+    :param low_watermark: Pool level below which the pool gets refilled.
+    :type low_watermark: int
+
+    :param high_watermark: Pool level up to which the pool gets refilled.
+    :type high_watermark: int
+
+    :param jobs: Number of worker processes to use for generating private keys. Set to None to use one worker process per CPU.
+    :type jobs: int or None
+
+    :param interval: Interval (in seconds) at which pool levels are checked.
+    :type interval: float
+
+    :param run_once: Refill the pools once, and return instead of keeping them filled.
+    :type run_once: bool
+
+    :returns: Status code, one from gimmecert.commands.ExitCode.
+    :rtype: int
+    """
+
+    if not gimmecert.storage.is_initialised(project_directory):
+        print("CA hierarchy must be initialised prior to filling the key pool. Run the gimmecert init command first.", file=stderr)
+        return ExitCode.ERROR_NOT_INITIALISED
+
+    project = gimmecert.project.Project(project_directory)
+    key_specifications = key_specifications or [project.key_specification]
+
+    def refill():
+        """
+        Refills the pools, reporting the number of generated keys.
+        """
+
+        for key_specification, count in gimmecert.pool.refill(project.key_pool, key_specifications, low_watermark, high_watermark,
+                                                              jobs or os.cpu_count() or 1):
+            print("Generated %d %s private key(s), pool level is %d." % (count, gimmecert.crypto.KeyGenerator(*key_specification),
+                                                                         project.key_pool.level(key_specification)), file=stdout, flush=True)
+
+    if run_once:
+        refill()
+        return ExitCode.SUCCESS
+
+    print("Keeping key pool filled with %s keys (%d-%d keys per pool, checking every %g seconds). Press Ctrl-C to stop." %
+          (", ".join(str(gimmecert.crypto.KeyGenerator(*spec)) for spec in key_specifications), low_watermark, high_watermark, interval),
+          file=stdout, flush=True)
+
+    try:
+        while True:
+            refill()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+    return ExitCode.SUCCESS
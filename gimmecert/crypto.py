@@ -19,8 +19,12 @@
 #
 
 import datetime
+import ipaddress
 
+import cryptography.exceptions
+import cryptography.hazmat.primitives.asymmetric.padding
 import cryptography.hazmat.primitives.asymmetric.rsa
+import cryptography.hazmat.primitives.serialization.pkcs12
 import cryptography.x509
 from dateutil.relativedelta import relativedelta
 
@@ -113,25 +117,37 @@ def get_dn(name):
     return dn
 
 
-def get_validity_range():
+def get_validity_range(validity=None, backdate=None):
     """
-    Returns validity range usable for issuing certificates. The time
-    range between beginning and end is one year.
+    Returns validity range usable for issuing certificates. By
+    default, the time range between beginning and end is one year.
 
-    The beginning will be current time minus 15 minutes (useful in
-    case of drifting clocks), while ending will be one year ahead of
-    15 minutes - for total duration of 1 year and 15 minutes.
+    The beginning will by default be current time minus 15 minutes
+    (useful in case of drifting clocks), while ending will be one year
+    ahead of 15 minutes - for total duration of 1 year and 15 minutes.
 
     Resulting beginning and ending dates have precision of up to a
     second (microseconds are discarded).
 
+    :param validity: Duration of validity, counting from current time. Set to None (default) for one year.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which the beginning is moved into the past. Set to None (default) for 15 minutes.
+    :type backdate: datetime.timedelta or None
+
     :returns: (not_before, not_after) -- Tuple defining the time range.
     :rtype: (datetime.datetime, datetime.datetime)
     """
 
+    if validity is None:
+        validity = relativedelta(years=1)
+
+    if backdate is None:
+        backdate = datetime.timedelta(minutes=15)
+
     now = datetime.datetime.utcnow().replace(microsecond=0)
-    not_before = now - datetime.timedelta(minutes=15)
-    not_after = now + relativedelta(years=1)
+    not_before = now - backdate
+    not_after = now + validity
 
     return not_before, not_after
 
@@ -190,7 +206,7 @@ def issue_certificate(issuer_dn, subject_dn, signing_key, public_key, not_before
     return certificate
 
 
-def generate_ca_hierarchy(base_name, depth, key_generator):
+def generate_ca_hierarchy(base_name, depth, key_generator, validity=None, backdate=None):
     """
     Generates CA hierarchy with specified depth, using the provided
     naming as basis for the DNs.
@@ -202,6 +218,12 @@ def generate_ca_hierarchy(base_name, depth, key_generator):
     :type key_generator: callable[[], cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
                                       cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey]
 
+    :param validity: Duration of CA certificates validity. Set to None (default) to use default validity. See get_validity_range for details.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which beginning of CA certificates validity is backdated. Set to None (default) to use default backdating.
+    :type backdate: datetime.timedelta or None
+
     :returns: List of CA private key and certificate pairs, starting with the level 1 (root) CA, and ending with the leaf CA.
     :rtype: list[(cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
                   cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey, cryptography.x509.Certificate)]
@@ -209,7 +231,7 @@ def generate_ca_hierarchy(base_name, depth, key_generator):
 
     hierarchy = []
 
-    not_before, not_after = get_validity_range()
+    not_before, not_after = get_validity_range(validity, backdate)
 
     extensions = [
         (cryptography.x509.BasicConstraints(ca=True, path_length=None), True)
@@ -237,7 +259,309 @@ def generate_ca_hierarchy(base_name, depth, key_generator):
     return hierarchy
 
 
-def issue_server_certificate(name, public_key, issuer_private_key, issuer_certificate, extra_dns_names=None):
+#: Supported types of subject alternative names, and corresponding general name classes.
+SUBJECT_ALTERNATIVE_NAME_TYPES = {
+    'dns': cryptography.x509.DNSName,
+    'ip': cryptography.x509.IPAddress,
+    'uri': cryptography.x509.UniformResourceIdentifier,
+    'email': cryptography.x509.RFC822Name,
+}
+
+
+def get_general_name(name, default_type='dns'):
+    """
+    Converts name into general name object for use in subject
+    alternative name. Type of name can be specified using one of the
+    prefixes ``dns:``, ``ip:``, ``uri:``, or ``email:``, for example
+    ``ip:192.168.1.1`` or ``uri:spiffe://example.com/myservice``.
+
+    :param name: Name, optionally prefixed with type.
+    :type name: str
+
+    :param default_type: Type of name to assume if name is not prefixed. One of the keys from SUBJECT_ALTERNATIVE_NAME_TYPES.
+    :type default_type: str
+
+    :returns: General name.
+    :rtype: cryptography.x509.GeneralName
+
+    :raises ValueError: If name is invalid for its type (for example, invalid IP address).
+    """
+
+    name_type, separator, value = name.partition(':')
+
+    if separator and name_type.lower() in SUBJECT_ALTERNATIVE_NAME_TYPES:
+        name_type = name_type.lower()
+    else:
+        name_type, value = default_type, name
+
+    if not value:
+        raise ValueError("Invalid subject alternative name: '%s'" % name)
+
+    if name_type == 'ip':
+        try:
+            value = ipaddress.ip_address(value)
+        except ValueError:
+            raise ValueError("Invalid IP address: '%s'" % value)
+
+    return SUBJECT_ALTERNATIVE_NAME_TYPES[name_type](value)
+
+
+class IssuanceProfile:
+    """
+    Describes a kind of end entity certificates (such as TLS server or
+    client certificates) in terms of extensions that should be
+    included in them.
+
+    All extension objects are constructed once, during instance
+    initialisation, and shared by all certificates issued using the
+    profile. Profiles are immutable, and can be safely reused for
+    (bulk) issuance of any number of certificates.
+    """
+
+    def __init__(self, name, key_usages, extended_key_usages, subject_alternative_name_type=None, validity=None, key_specification=None):
+        """
+        Initialises an instance.
+
+        :param name: Name of the profile.
+        :type name: str
+
+        :param key_usages: Key usages to allow. Names correspond to cryptography.x509.KeyUsage arguments, for example ``digital_signature``.
+        :type key_usages: list[str]
+
+        :param extended_key_usages: Extended key usages to include. Set to empty list to omit the extended key usage extension altogether.
+        :type extended_key_usages: list[cryptography.x509.ObjectIdentifier]
+
+        :param subject_alternative_name_type: Type of subject alternative names to include entity name (and unprefixed additional names) as. See
+                                              SUBJECT_ALTERNATIVE_NAME_TYPES for supported values. Set to None (default) to omit the subject alternative
+                                              name extension.
+        :type subject_alternative_name_type: str or None
+
+        :param validity: Default validity of certificates issued using the profile. Set to None (default) for one year.
+        :type validity: datetime.timedelta or None
+
+        :param key_specification: Default key specification to use when generating private keys. Set to None (default) to use the CA hierarchy one.
+        :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve) or None
+
+        :raises ValueError: If unknown key usage or subject alternative name type has been passed-in.
+        """
+
+        known_key_usages = ['digital_signature', 'content_commitment', 'key_encipherment', 'data_encipherment', 'key_agreement',
+                            'key_cert_sign', 'crl_sign', 'encipher_only', 'decipher_only']
+
+        unknown_key_usages = set(key_usages) - set(known_key_usages)
+        if unknown_key_usages:
+            raise ValueError("Unknown key usage(s): %s" % ", ".join(sorted(unknown_key_usages)))
+
+        extensions = [
+            (cryptography.x509.BasicConstraints(ca=False, path_length=None), True),
+            (cryptography.x509.KeyUsage(**{key_usage: key_usage in key_usages for key_usage in known_key_usages}), True),
+        ]
+
+        if subject_alternative_name_type is not None and subject_alternative_name_type not in SUBJECT_ALTERNATIVE_NAME_TYPES:
+            raise ValueError("Unknown subject alternative name type: %s" % subject_alternative_name_type)
+
+        if extended_key_usages:
+            extensions.append((cryptography.x509.ExtendedKeyUsage(extended_key_usages), True))
+
+        self.name = name
+        self.extensions = tuple(extensions)
+        self.subject_alternative_name_type = subject_alternative_name_type
+        self.validity = validity
+        self.key_specification = key_specification
+
+    def __repr__(self):
+        return "<IssuanceProfile: %s>" % self.name
+
+
+#: Profile for issuing TLS server certificates.
+SERVER_PROFILE = IssuanceProfile('server', ['digital_signature', 'key_encipherment'],
+                                 [cryptography.x509.oid.ExtendedKeyUsageOID.SERVER_AUTH], subject_alternative_name_type='dns')
+
+#: Profile for issuing TLS client certificates.
+CLIENT_PROFILE = IssuanceProfile('client', ['digital_signature', 'key_encipherment'],
+                                 [cryptography.x509.oid.ExtendedKeyUsageOID.CLIENT_AUTH])
+
+#: Profile for issuing certificates usable both as TLS server and TLS client certificates.
+SERVER_CLIENT_PROFILE = IssuanceProfile('server-client', ['digital_signature', 'key_encipherment'],
+                                        [cryptography.x509.oid.ExtendedKeyUsageOID.SERVER_AUTH, cryptography.x509.oid.ExtendedKeyUsageOID.CLIENT_AUTH],
+                                        subject_alternative_name_type='dns')
+
+
+def get_capped_validity_range(issuer_certificate, validity=None, backdate=None):
+    """
+    Returns validity range usable for issuing certificates by the
+    passed-in issuer. Validity range is calculated in the same way as
+    with get_validity_range, but will not exceed the issuer validity.
+
+    :param issuer_certificate: Certificate of certificate issuer.
+    :type issuer_certificate: cryptography.x509.Certificate
+
+    :param validity: Duration of validity, counting from current time. Set to None (default) for one year.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which the beginning is moved into the past. Set to None (default) for 15 minutes.
+    :type backdate: datetime.timedelta or None
+
+    :returns: (not_before, not_after) -- Tuple defining the time range.
+    :rtype: (datetime.datetime, datetime.datetime)
+    """
+
+    not_before, not_after = get_validity_range(validity, backdate)
+
+    if not_before < issuer_certificate.not_valid_before:
+        not_before = issuer_certificate.not_valid_before
+
+    if not_after > issuer_certificate.not_valid_after:
+        not_after = issuer_certificate.not_valid_after
+
+    return not_before, not_after
+
+
+class CertificateIssuer:
+    """
+    Issues end entity certificates using the passed-in issuance
+    profile and issuer.
+
+    Certificate builder state shared by all certificates (issuer DN
+    and profile extensions) is prepared once, during instance
+    initialisation. Validity range is recalculated at most once per
+    second (which is the precision of validity dates anyway). This
+    keeps the per-certificate overhead to setting-up the subject,
+    public key, and serial number, and signing, making the instances
+    suitable for bulk issuance.
+
+    Certificate validity will not exceed the CA validity.
+    """
+
+    def __init__(self, profile, issuer_private_key, issuer_certificate, validity=None, backdate=None):
+        """
+        Initialises an instance.
+
+        :param profile: Issuance profile to use.
+        :type profile: IssuanceProfile
+
+        :param issuer_private_key: Private key of the issuer to use for signing the certificate structure.
+        :type issuer_private_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                                  cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey
+
+        :param issuer_certificate: Certificate of certificate issuer. Naming and validity constraints will be applied based on its content.
+        :type issuer_certificate: cryptography.x509.Certificate
+
+        :param validity: Duration of certificate validity. Set to None (default) to use profile validity (or default validity, if profile does not
+                         specify one). See get_validity_range for details.
+        :type validity: datetime.timedelta or None
+
+        :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) to use default backdating.
+        :type backdate: datetime.timedelta or None
+        """
+
+        builder = cryptography.x509.CertificateBuilder()
+        builder = builder.issuer_name(issuer_certificate.subject)
+
+        for extension, critical in profile.extensions:
+            builder = builder.add_extension(extension, critical=critical)
+
+        self.profile = profile
+        self._builder = builder
+        self._issuer_private_key = issuer_private_key
+        self._issuer_certificate = issuer_certificate
+        self._validity = validity if validity is not None else profile.validity
+        self._backdate = backdate
+        self._validity_range_calculated_at = None
+        self._validity_range = None
+        self._algorithm = cryptography.hazmat.primitives.hashes.SHA256()
+        self._backend = cryptography.hazmat.backends.default_backend()
+
+    def _get_validity_range(self):
+        """
+        Returns validity range for issued certificate, recalculating
+        it only if at least a second has passed since last calculation.
+        """
+
+        now = datetime.datetime.utcnow().replace(microsecond=0)
+
+        if now != self._validity_range_calculated_at:
+            self._validity_range = get_capped_validity_range(self._issuer_certificate, self._validity, self._backdate)
+            self._validity_range_calculated_at = now
+
+        return self._validity_range
+
+    def __call__(self, name, public_key, extra_names=None):
+        """
+        Issues a certificate. The resulting certificate will use the
+        passed-in name for subject DN (and subject alternative name, if
+        required by profile).
+
+        :param name: Name of the end entity. Name will be part of subject DN CN field.
+        :type name: str
+
+        :param public_key: Public key of the end entity.
+        :type public_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey or
+                          cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePublicKey
+
+        :param extra_names: Additional names to include in subject alternative name. Names can be prefixed with type (see get_general_name). Ignored if
+                            profile does not include subject alternative name.
+        :type extra_names: list[str] or None
+
+        :raises ValueError: If any of the additional names is invalid.
+
+        :returns: Certificate issued by designated issuer.
+        :rtype: cryptography.x509.Certificate
+        """
+
+        not_before, not_after = self._get_validity_range()
+
+        builder = self._builder.subject_name(get_dn(name))
+        builder = builder.public_key(public_key)
+        builder = builder.not_valid_before(not_before)
+        builder = builder.not_valid_after(not_after)
+        builder = builder.serial_number(cryptography.x509.random_serial_number())
+
+        if self.profile.subject_alternative_name_type:
+            name_type = self.profile.subject_alternative_name_type
+            general_names = [get_general_name(entry, name_type) for entry in [name] + list(extra_names or [])]
+            builder = builder.add_extension(cryptography.x509.SubjectAlternativeName(general_names), critical=False)
+
+        return builder.sign(private_key=self._issuer_private_key, algorithm=self._algorithm, backend=self._backend)
+
+    def get_signing_parameters(self, name, public_key, extra_names=None):
+        """
+        Produces the to-be-signed content of a certificate, without
+        signing it. Resulting parameters can be signed by a separate
+        process using issuing CA private key (see
+        gimmecert.signing.SigningPool).
+
+        :param name: Name of the end entity. Name will be part of subject DN CN field.
+        :type name: str
+
+        :param public_key: Public key of the end entity.
+        :type public_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey or
+                          cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePublicKey
+
+        :param extra_names: Additional names to include in subject alternative name. Names can be prefixed with type (see get_general_name). Ignored if
+                            profile does not include subject alternative name.
+        :type extra_names: list[str] or None
+
+        :raises ValueError: If any of the additional names is invalid.
+
+        :returns: Subject DN, public key, list of (extension, criticality) pairs, and beginning and end of validity.
+        :rtype: (cryptography.x509.Name, cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey or
+                cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePublicKey, list[(cryptography.x509.Extension, bool)], datetime.datetime,
+                datetime.datetime)
+        """
+
+        not_before, not_after = self._get_validity_range()
+        extensions = list(self.profile.extensions)
+
+        if self.profile.subject_alternative_name_type:
+            name_type = self.profile.subject_alternative_name_type
+            general_names = [get_general_name(entry, name_type) for entry in [name] + list(extra_names or [])]
+            extensions.append((cryptography.x509.SubjectAlternativeName(general_names), False))
+
+        return get_dn(name), public_key, extensions, not_before, not_after
+
+
+def issue_server_certificate(name, public_key, issuer_private_key, issuer_certificate, extra_dns_names=None, validity=None, backdate=None):
     """
     Issues a server certificate. The resulting certificate will use
     the passed-in name for subject DN, as well as DNS subject
@@ -263,51 +587,26 @@ def issue_server_certificate(name, public_key, issuer_private_key, issuer_certif
     :param issuer_certificate: Certificate of certificate issuer. Naming and validity constraints will be applied based on its content.
     :type issuer_certificate: cryptography.x509.Certificate
 
-    :param extra_dns_names: Additional DNS names to include in subject alternative name. Set to None (default) to not include anything.
+    :param extra_dns_names: Additional names to include in subject alternative name. Names are included as DNS names, unless prefixed with type
+                            (``ip:``, ``uri:``, or ``email:``). Set to None (default) to not include anything.
     :type extra_dns_names: list[str] or None
 
+    :param validity: Duration of certificate validity. Set to None (default) to use default validity. See get_validity_range for details.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) to use default backdating.
+    :type backdate: datetime.timedelta or None
+
     :returns: Server certificate issued by designated issuer.
     :rtype: cryptography.x509.Certificate
     """
 
-    dns_names = [name]
-
-    if extra_dns_names is not None:
-        dns_names.extend(extra_dns_names)
-
-    dn = get_dn(name)
-    not_before, not_after = get_validity_range()
-    extensions = [
-        (cryptography.x509.BasicConstraints(ca=False, path_length=None), True),
-        (
-            cryptography.x509.KeyUsage(
-                digital_signature=True,
-                key_encipherment=True,
-                content_commitment=False,
-                data_encipherment=False,
-                key_agreement=False,
-                key_cert_sign=False,
-                crl_sign=False,
-                encipher_only=False,
-                decipher_only=False
-            ), True
-        ),
-        (cryptography.x509.ExtendedKeyUsage([cryptography.x509.oid.ExtendedKeyUsageOID.SERVER_AUTH]), True),
-        (cryptography.x509.SubjectAlternativeName([cryptography.x509.DNSName(dns_name) for dns_name in dns_names]), False)
-    ]
-
-    if not_before < issuer_certificate.not_valid_before:
-        not_before = issuer_certificate.not_valid_before
-
-    if not_after > issuer_certificate.not_valid_after:
-        not_after = issuer_certificate.not_valid_after
-
-    certificate = issue_certificate(issuer_certificate.subject, dn, issuer_private_key, public_key, not_before, not_after, extensions)
+    issue = CertificateIssuer(SERVER_PROFILE, issuer_private_key, issuer_certificate, validity, backdate)
 
-    return certificate
+    return issue(name, public_key, extra_dns_names)
 
 
-def issue_client_certificate(name, public_key, issuer_private_key, issuer_certificate):
+def issue_client_certificate(name, public_key, issuer_private_key, issuer_certificate, validity=None, backdate=None):
     """
     Issues a client certificate. The resulting certificate will use
     the passed-in name for subject DN.
@@ -332,42 +631,134 @@ def issue_client_certificate(name, public_key, issuer_private_key, issuer_certif
     :param issuer_certificate: Certificate of certificate issuer. Naming and validity constraints will be applied based on its content.
     :type issuer_certificate: cryptography.x509.Certificate
 
+    :param validity: Duration of certificate validity. Set to None (default) to use default validity. See get_validity_range for details.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) to use default backdating.
+    :type backdate: datetime.timedelta or None
+
     :returns: Client certificate issued by designated issuer.
     :rtype: cryptography.x509.Certificate
     """
 
+    issue = CertificateIssuer(CLIENT_PROFILE, issuer_private_key, issuer_certificate, validity, backdate)
+
+    return issue(name, public_key)
+
+
+def issue_sub_ca_certificate(name, public_key, issuer_private_key, issuer_certificate, validity=None, backdate=None):
+    """
+    Issues an intermediate (sub-)CA certificate. The resulting
+    certificate will use the passed-in name for subject DN.
+
+    Sub-CA certificate validity will not exceed the CA validity.
+
+    :param name: Name of the sub-CA. Name will be part of subject DN CN field.
+    :type name: str
+
+    :param public_key: Public key of the sub-CA.
+    :type public_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey or
+                      cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePublicKey
+
+    :param issuer_private_key: Private key of the issuer to use for signing the sub-CA certificate structure.
+    :type issuer_private_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                              cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey
+
+    :param issuer_certificate: Certificate of certificate issuer. Naming and validity constraints will be applied based on its content.
+    :type issuer_certificate: cryptography.x509.Certificate
+
+    :param validity: Duration of certificate validity. Set to None (default) to use default validity. See get_validity_range for details.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) to use default backdating.
+    :type backdate: datetime.timedelta or None
+
+    :returns: Sub-CA certificate issued by designated issuer.
+    :rtype: cryptography.x509.Certificate
+    """
+
     dn = get_dn(name)
-    not_before, not_after = get_validity_range()
+    not_before, not_after = get_capped_validity_range(issuer_certificate, validity, backdate)
     extensions = [
-        (cryptography.x509.BasicConstraints(ca=False, path_length=None), True),
-        (
-            cryptography.x509.KeyUsage(
-                digital_signature=True,
-                key_encipherment=True,
-                content_commitment=False,
-                data_encipherment=False,
-                key_agreement=False,
-                key_cert_sign=False,
-                crl_sign=False,
-                encipher_only=False,
-                decipher_only=False
-            ), True
-        ),
-        (cryptography.x509.ExtendedKeyUsage([cryptography.x509.oid.ExtendedKeyUsageOID.CLIENT_AUTH]), True),
+        (cryptography.x509.BasicConstraints(ca=True, path_length=None), True)
     ]
 
-    if not_before < issuer_certificate.not_valid_before:
-        not_before = issuer_certificate.not_valid_before
-
-    if not_after > issuer_certificate.not_valid_after:
-        not_after = issuer_certificate.not_valid_after
-
     certificate = issue_certificate(issuer_certificate.subject, dn, issuer_private_key, public_key, not_before, not_after, extensions)
 
     return certificate
 
 
-def renew_certificate(old_certificate, public_key, issuer_private_key, issuer_certificate):
+class CertificateReissuer:
+    """
+    Reissues certificate repeatedly, preserving issuer and subject DNs,
+    public key, as well as extensions from the template certificate.
+
+    All of the certificate content (except validity and serial number)
+    is prepared only once, during instance initialisation. This makes
+    reissuing the same certificate over and over again (for example
+    when dealing with short-lived certificates) limited only by the
+    cost of signing.
+
+    Certificate validity will not exceed the CA validity.
+    """
+
+    def __init__(self, certificate, public_key, issuer_private_key, issuer_certificate, validity=None, backdate=None):
+        """
+        Initialises an instance.
+
+        :param certificate: Template certificate to take the naming and extensions from.
+        :type certificate: cryptography.x509.Certificate
+
+        :param public_key: Public key to use in reissued certificates.
+        :type public_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey or
+                          cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePublicKey
+
+        :param issuer_private_key: Private key of the issuer to use for signing the certificate structure.
+        :type issuer_private_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                                  cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey
+
+        :param issuer_certificate: Certificate of certificate issuer. Naming and validity constraints will be applied based on its content.
+        :type issuer_certificate: cryptography.x509.Certificate
+
+        :param validity: Duration of certificate validity. Set to None (default) to use default validity. See get_validity_range for details.
+        :type validity: datetime.timedelta or None
+
+        :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) to use default backdating.
+        :type backdate: datetime.timedelta or None
+        """
+
+        builder = cryptography.x509.CertificateBuilder()
+        builder = builder.subject_name(certificate.subject)
+        builder = builder.issuer_name(issuer_certificate.subject)
+        builder = builder.public_key(public_key)
+
+        for extension in certificate.extensions:
+            builder = builder.add_extension(extension.value, critical=extension.critical)
+
+        self._builder = builder
+        self._issuer_private_key = issuer_private_key
+        self._issuer_certificate = issuer_certificate
+        self._validity = validity
+        self._backdate = backdate
+        self._algorithm = cryptography.hazmat.primitives.hashes.SHA256()
+        self._backend = cryptography.hazmat.backends.default_backend()
+
+    def __call__(self):
+        """
+        Reissues the certificate.
+
+        :returns: New certificate.
+        :rtype: cryptography.x509.Certificate
+        """
+
+        not_before, not_after = get_capped_validity_range(self._issuer_certificate, self._validity, self._backdate)
+
+        builder = self._builder.not_valid_before(not_before).not_valid_after(not_after).serial_number(cryptography.x509.random_serial_number())
+
+        return builder.sign(private_key=self._issuer_private_key, algorithm=self._algorithm, backend=self._backend)
+
+
+def renew_certificate(old_certificate, public_key, issuer_private_key, issuer_certificate, validity=None, backdate=None):
     """
     Renews an existing certificate, while preserving issuer and
     subject DNs, as well as extensions from the old certificate.
@@ -386,27 +777,19 @@ def renew_certificate(old_certificate, public_key, issuer_private_key, issuer_ce
     :param issuer_certificate: Certificate of certificate issuer. Naming and validity constraints will be applied based on its content.
     :type issuer_certificate: cryptography.x509.Certificate
 
+    :param validity: Duration of certificate validity. Set to None (default) to use default validity. See get_validity_range for details.
+    :type validity: datetime.timedelta or None
+
+    :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) to use default backdating.
+    :type backdate: datetime.timedelta or None
+
     :returns: New certificate, which preserves naming, extensions, and public key of the old one.
     :rtype: cryptography.x509.Certificate
     """
 
-    not_before, not_after = get_validity_range()
-
-    if not_before < issuer_certificate.not_valid_before:
-        not_before = issuer_certificate.not_valid_before
-
-    if not_after > issuer_certificate.not_valid_after:
-        not_after = issuer_certificate.not_valid_after
-
-    new_certificate = issue_certificate(issuer_certificate.subject,
-                                        old_certificate.subject,
-                                        issuer_private_key,
-                                        public_key,
-                                        not_before,
-                                        not_after,
-                                        [(e.value, e.critical) for e in old_certificate.extensions])
+    reissue = CertificateReissuer(old_certificate, public_key, issuer_private_key, issuer_certificate, validity, backdate)
 
-    return new_certificate
+    return reissue()
 
 
 def generate_csr(name, private_key):
@@ -463,3 +846,165 @@ def key_specification_from_public_key(public_key):
         return "ecdsa", type(public_key.curve)
 
     raise ValueError("Unsupported public key instance passed-in: \"%s\" (%s)" % (str(public_key), type(public_key)))
+
+
+def serialize_pkcs12(name, private_key, certificate, ca_chain, password=None):
+    """
+    Serializes the passed-in private key, certificate, and CA chain
+    into a PKCS#12 bundle.
+
+    If no password is passed-in, the bundle content is not encrypted
+    at all, making it very cheap to produce (useful for quick exports
+    in test environments). Otherwise the strongest encryption
+    supported by the Cryptography library is used, with
+    correspondingly higher key derivation cost.
+
+    :param name: Friendly name to store in the bundle.
+    :type name: str
+
+    :param private_key: Private key to include in the bundle. Set to None to produce bundle without private key.
+    :type private_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                       cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey or None
+
+    :param certificate: Certificate to include in the bundle.
+    :type certificate: cryptography.x509.Certificate
+
+    :param ca_chain: List of CA certificates to include in the bundle, starting with the issuing CA.
+    :type ca_chain: list[cryptography.x509.Certificate]
+
+    :param password: Password to use for protecting the bundle. Set to None to produce unencrypted bundle.
+    :type password: str or None
+
+    :returns: PKCS#12 bundle in DER format.
+    :rtype: bytes
+    """
+
+    if password is None:
+        encryption_algorithm = cryptography.hazmat.primitives.serialization.NoEncryption()
+    else:
+        encryption_algorithm = cryptography.hazmat.primitives.serialization.BestAvailableEncryption(password.encode())
+
+    pkcs12_bundle = cryptography.hazmat.primitives.serialization.pkcs12.serialize_key_and_certificates(
+        name.encode(),
+        private_key,
+        certificate,
+        ca_chain,
+        encryption_algorithm
+    )
+
+    return pkcs12_bundle
+
+
+def issue_crl(revoked_certificates, issuer_private_key, issuer_certificate, crl_number, last_update, next_update, base_crl_number=None):
+    """
+    Issues a certificate revocation list (CRL).
+
+    If base CRL number is passed-in, the resulting CRL will be a delta
+    CRL, designating changes on top of the base CRL.
+
+    :param revoked_certificates: List of revoked certificate serial numbers and their revocation dates.
+    :type revoked_certificates: list[(int, datetime.datetime)]
+
+    :param issuer_private_key: Private key of the issuer to use for signing the CRL.
+    :type issuer_private_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                              cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey
+
+    :param issuer_certificate: Certificate of CRL issuer.
+    :type issuer_certificate: cryptography.x509.Certificate
+
+    :param crl_number: Sequence number of the CRL.
+    :type crl_number: int
+
+    :param last_update: Issuance date of the CRL.
+    :type last_update: datetime.datetime
+
+    :param next_update: Date by which the next CRL will be issued.
+    :type next_update: datetime.datetime
+
+    :param base_crl_number: Sequence number of base CRL for issuing delta CRL. Set to None (default) to issue a full CRL.
+    :type base_crl_number: int or None
+
+    :returns: Issued CRL.
+    :rtype: cryptography.x509.CertificateRevocationList
+    """
+
+    builder = cryptography.x509.CertificateRevocationListBuilder()
+    builder = builder.issuer_name(issuer_certificate.subject)
+    builder = builder.last_update(last_update)
+    builder = builder.next_update(next_update)
+    builder = builder.add_extension(cryptography.x509.CRLNumber(crl_number), critical=False)
+
+    if base_crl_number is not None:
+        builder = builder.add_extension(cryptography.x509.DeltaCRLIndicator(base_crl_number), critical=True)
+
+    for serial_number, revocation_date in revoked_certificates:
+        revoked_certificate = cryptography.x509.RevokedCertificateBuilder().serial_number(serial_number).revocation_date(revocation_date).build(
+            cryptography.hazmat.backends.default_backend()
+        )
+        builder = builder.add_revoked_certificate(revoked_certificate)
+
+    crl = builder.sign(
+        private_key=issuer_private_key,
+        algorithm=cryptography.hazmat.primitives.hashes.SHA256(),
+        backend=cryptography.hazmat.backends.default_backend()
+    )
+
+    return crl
+
+
+def verify_certificate_signature(certificate, issuer_certificate):
+    """
+    Verifies that certificate has been issued and signed by the
+    designated issuer.
+
+    :param certificate: Certificate to verify.
+    :type certificate: cryptography.x509.Certificate
+
+    :param issuer_certificate: Certificate of (supposed) certificate issuer.
+    :type issuer_certificate: cryptography.x509.Certificate
+
+    :returns: True if certificate issuer DN matches the issuer subject DN, and the signature is valid, False otherwise.
+    :rtype: bool
+    """
+
+    if certificate.issuer != issuer_certificate.subject:
+        return False
+
+    public_key = issuer_certificate.public_key()
+
+    try:
+        if isinstance(public_key, cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey):
+            public_key.verify(certificate.signature,
+                              certificate.tbs_certificate_bytes,
+                              cryptography.hazmat.primitives.asymmetric.padding.PKCS1v15(),
+                              certificate.signature_hash_algorithm)
+        else:
+            public_key.verify(certificate.signature,
+                              certificate.tbs_certificate_bytes,
+                              cryptography.hazmat.primitives.asymmetric.ec.ECDSA(certificate.signature_hash_algorithm))
+    except cryptography.exceptions.InvalidSignature:
+        return False
+
+    return True
+
+
+def public_keys_match(public_key1, public_key2):
+    """
+    Checks if the two passed-in public keys are identical.
+
+    :param public_key1: First public key.
+    :type public_key1: cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey or
+                       cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePublicKey
+
+    :param public_key2: Second public key.
+    :type public_key2: cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey or
+                       cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePublicKey
+
+    :returns: True if public keys are identical, False otherwise.
+    :rtype: bool
+    """
+
+    encoding = cryptography.hazmat.primitives.serialization.Encoding.DER
+    public_format = cryptography.hazmat.primitives.serialization.PublicFormat.SubjectPublicKeyInfo
+
+    return public_key1.public_bytes(encoding, public_format) == public_key2.public_bytes(encoding, public_format)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import calendar
+import collections
+import os
+
+import gimmecert.status
+import gimmecert.storage
+import gimmecert.utils
+
+
+#: Metric descriptions, in order in which the metrics are output.
+METRICS = collections.OrderedDict([
+    ('gimmecert_certificate_not_after_timestamp_seconds', ('gauge', 'End of certificate validity, as Unix timestamp.')),
+    ('gimmecert_certificates', ('gauge', 'Number of issued certificates.')),
+    ('gimmecert_ca_not_after_timestamp_seconds', ('gauge', 'End of CA certificate validity, as Unix timestamp.')),
+])
+
+
+def escape_label_value(value):
+    """
+    Escapes label value for use in Prometheus text exposition format.
+
+    :param value: Label value.
+    :type value: str
+
+    :returns: Escaped label value.
+    :rtype: str
+    """
+
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_sample(name, labels, value):
+    """
+    Formats a single metric sample in Prometheus text exposition format.
+
+    :param name: Metric name.
+    :type name: str
+
+    :param labels: Label names and values.
+    :type labels: list[(str, str)]
+
+    :param value: Sample value.
+    :type value: int
+
+    :returns: Formatted sample.
+    :rtype: str
+    """
+
+    return '%s{%s} %d' % (name, ','.join('%s="%s"' % (label, escape_label_value(label_value)) for label, label_value in labels), value)
+
+
+def get_timestamp(date):
+    """
+    Converts date in UTC into Unix timestamp.
+
+    :param date: Date in UTC.
+    :type date: datetime.datetime
+
+    :returns: Unix timestamp.
+    :rtype: int
+    """
+
+    return calendar.timegm(date.utctimetuple())
+
+
+def collect_metrics(project_directory):
+    """
+    Collects metrics about certificates issued within a project, and
+    formats them in Prometheus text exposition format (as used by the
+    node exporter textfile collector).
+
+    Entity information is collected through the status pipeline, which
+    means that only new or changed certificates get parsed.
+
+    :param project_directory: Path to project directory.
+    :type project_directory: str
+
+    :returns: Metrics in Prometheus text exposition format.
+    :rtype: str
+    """
+
+    samples = collections.OrderedDict((name, []) for name in METRICS)
+    counts = collections.Counter()
+
+    for record in gimmecert.status.collect_entity_records(project_directory, ['server', 'client']):
+        samples['gimmecert_certificate_not_after_timestamp_seconds'].append(
+            format_sample('gimmecert_certificate_not_after_timestamp_seconds', [('type', record.entity_type), ('name', record.name)],
+                          get_timestamp(record.not_valid_after)))
+        counts[(record.entity_type, record.key_algorithm)] += 1
+
+    for (entity_type, key_algorithm), count in sorted(counts.items()):
+        samples['gimmecert_certificates'].append(
+            format_sample('gimmecert_certificates', [('type', entity_type), ('key_algorithm', key_algorithm)], count))
+
+    # CA private keys are not needed, so only certificates get read.
+    ca_directory = os.path.join(project_directory, '.gimmecert', 'ca')
+    level = 1
+    while os.path.exists(os.path.join(ca_directory, 'level%d.cert.pem' % level)):
+        certificate = gimmecert.storage.read_certificate(os.path.join(ca_directory, 'level%d.cert.pem' % level))
+        samples['gimmecert_ca_not_after_timestamp_seconds'].append(
+            format_sample('gimmecert_ca_not_after_timestamp_seconds', [('level', str(level)), ('subject', gimmecert.utils.dn_to_str(certificate.subject))],
+                          get_timestamp(certificate.not_valid_after)))
+        level += 1
+
+    lines = []
+
+    for name, (metric_type, description) in METRICS.items():
+        lines.append('# HELP %s %s' % (name, description))
+        lines.append('# TYPE %s %s' % (name, metric_type))
+        lines.extend(samples[name])
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import base64
+import datetime
+import http.server
+import os
+import socketserver
+import threading
+import urllib.parse
+
+import cryptography.hazmat.primitives.hashes
+import cryptography.hazmat.primitives.serialization
+import cryptography.x509
+import cryptography.x509.ocsp
+
+import gimmecert.storage
+
+
+class OCSPResponder:
+    """
+    Produces OCSP responses for certificates issued within a project.
+
+    Signed responses are precomputed for all known certificates, and
+    cached until the next refresh. Serving a request therefore does
+    not involve any signing operations, unless the request uses an
+    unusual hash algorithm for certificate identification (in which
+    case the response is computed once, and cached until the next
+    refresh).
+
+    Since the responses are precomputed, nonces in requests are
+    ignored (as permitted by the lightweight OCSP profile in RFC 5019).
+    """
+
+    def __init__(self, project_directory, refresh_interval):
+        """
+        Initialises an instance, and precomputes the responses.
+
+        :param project_directory: Path to project directory under which the artefacts are looked-up.
+        :type project_directory: str
+
+        :param refresh_interval: Interval (in seconds) at which the responses should be refreshed. Responses are valid for twice the interval.
+        :type refresh_interval: int
+        """
+
+        self._project_directory = project_directory
+        self._refresh_interval = refresh_interval
+
+        ca_hierarchy = gimmecert.storage.read_ca_hierarchy(os.path.join(project_directory, '.gimmecert', 'ca'))
+        self._issuer_private_key, self._issuer_certificate = ca_hierarchy[-1]
+
+        # Certificates, issuer hashes, and responses are published
+        # together as a single tuple, so requests never see a mix of
+        # old and new state. Lock protects lazy additions to issuer
+        # hashes and responses made while serving requests.
+        self._state = ({}, {}, {})
+        self._lock = threading.Lock()
+
+        self.refresh()
+
+    def _get_issuer_hashes(self, algorithm):
+        """
+        Calculates issuer name and key hashes used in OCSP requests.
+
+        :param algorithm: Hash algorithm used for calculating the hashes.
+        :type algorithm: cryptography.hazmat.primitives.hashes.HashAlgorithm
+
+        :returns: Issuer name and key hash.
+        :rtype: (bytes, bytes)
+        """
+
+        request = cryptography.x509.ocsp.OCSPRequestBuilder().add_certificate(self._issuer_certificate, self._issuer_certificate, algorithm).build()
+
+        return request.issuer_name_hash, request.issuer_key_hash
+
+    def _load_certificates(self):
+        """
+        Loads all issued and revoked certificates from the project.
+
+        :returns: Mapping between certificate serial numbers and certificates with their revocation dates (None for valid certificates).
+        :rtype: dict[int, (cryptography.x509.Certificate, datetime.datetime or None)]
+        """
+
+        certificates = {}
+        base_directory = os.path.join(self._project_directory, '.gimmecert')
+
+        for entity_type in ['server', 'client']:
+            entity_directory = os.path.join(base_directory, entity_type)
+            for file_name in os.listdir(entity_directory):
+                if file_name.endswith('.cert.pem'):
+                    certificate = gimmecert.storage.read_certificate(os.path.join(entity_directory, file_name))
+                    certificates[certificate.serial_number] = (certificate, None)
+
+        revoked_directory = os.path.join(base_directory, 'crl', 'revoked')
+        revocations = gimmecert.storage.read_revocations(os.path.join(base_directory, 'crl', 'revocations.log'))
+
+        for serial_number, revocation_date, _, _ in revocations:
+            revoked_certificate_path = os.path.join(revoked_directory, '%x.cert.pem' % serial_number)
+            if os.path.exists(revoked_certificate_path):
+                certificates[serial_number] = (gimmecert.storage.read_certificate(revoked_certificate_path), revocation_date)
+
+        return certificates
+
+    def _build_response(self, certificate, revocation_date, algorithm):
+        """
+        Builds signed OCSP response for designated certificate.
+
+        :param certificate: Certificate to build the response for.
+        :type certificate: cryptography.x509.Certificate
+
+        :param revocation_date: Revocation date of certificate. Set to None for valid certificates.
+        :type revocation_date: datetime.datetime or None
+
+        :param algorithm: Hash algorithm used for identifying the certificate.
+        :type algorithm: cryptography.hazmat.primitives.hashes.HashAlgorithm
+
+        :returns: OCSP response in DER format.
+        :rtype: bytes
+        """
+
+        this_update = datetime.datetime.utcnow().replace(microsecond=0)
+        next_update = this_update + datetime.timedelta(seconds=2 * self._refresh_interval)
+
+        if revocation_date is None:
+            certificate_status = cryptography.x509.ocsp.OCSPCertStatus.GOOD
+        else:
+            certificate_status = cryptography.x509.ocsp.OCSPCertStatus.REVOKED
+
+        builder = cryptography.x509.ocsp.OCSPResponseBuilder()
+        builder = builder.add_response(
+            cert=certificate,
+            issuer=self._issuer_certificate,
+            algorithm=algorithm,
+            cert_status=certificate_status,
+            this_update=this_update,
+            next_update=next_update,
+            revocation_time=revocation_date,
+            revocation_reason=None
+        )
+        builder = builder.responder_id(cryptography.x509.ocsp.OCSPResponderEncoding.HASH, self._issuer_certificate)
+
+        response = builder.sign(self._issuer_private_key, cryptography.hazmat.primitives.hashes.SHA256())
+
+        return response.public_bytes(cryptography.hazmat.primitives.serialization.Encoding.DER)
+
+    def refresh(self):
+        """
+        Reloads certificates from the project, and precomputes the
+        responses for them (using SHA1 for certificate identification,
+        which is used by most of the clients).
+
+        Newly computed responses replace the existing ones (together
+        with the certificates) only once all of them are ready, so
+        requests can be served from consistent state while the refresh
+        is in progress.
+        """
+
+        certificates = self._load_certificates()
+        algorithm = cryptography.hazmat.primitives.hashes.SHA1()
+
+        issuer_hashes = {
+            algorithm.name: self._get_issuer_hashes(algorithm),
+        }
+
+        responses = {(serial_number, algorithm.name): self._build_response(certificate, revocation_date, algorithm)
+                     for serial_number, (certificate, revocation_date) in certificates.items()}
+
+        self._state = (certificates, issuer_hashes, responses)
+
+    def __len__(self):
+        """
+        Returns number of certificates for which the responder is authoritative.
+
+        :returns: Number of certificates.
+        :rtype: int
+        """
+
+        return len(self._state[0])
+
+    def respond(self, request_der):
+        """
+        Produces response for the passed-in OCSP request.
+
+        :param request_der: OCSP request in DER format.
+        :type request_der: bytes
+
+        :returns: OCSP response in DER format.
+        :rtype: bytes
+        """
+
+        try:
+            request = cryptography.x509.ocsp.load_der_ocsp_request(request_der)
+            serial_number = request.serial_number
+            algorithm = request.hash_algorithm
+        except ValueError:
+            response = cryptography.x509.ocsp.OCSPResponseBuilder.build_unsuccessful(cryptography.x509.ocsp.OCSPResponseStatus.MALFORMED_REQUEST)
+            return response.public_bytes(cryptography.hazmat.primitives.serialization.Encoding.DER)
+
+        # Use the same state throughout, even if refresh happens in the meantime.
+        certificates, issuer_hashes, responses = self._state
+
+        issuer_hash = issuer_hashes.get(algorithm.name)
+        if issuer_hash is None:
+            issuer_hash = self._get_issuer_hashes(algorithm)
+            with self._lock:
+                issuer_hashes[algorithm.name] = issuer_hash
+
+        # Only certificates issued by the issuing CA are known to the responder.
+        if (request.issuer_name_hash, request.issuer_key_hash) != issuer_hash or serial_number not in certificates:
+            response = cryptography.x509.ocsp.OCSPResponseBuilder.build_unsuccessful(cryptography.x509.ocsp.OCSPResponseStatus.UNAUTHORIZED)
+            return response.public_bytes(cryptography.hazmat.primitives.serialization.Encoding.DER)
+
+        response = responses.get((serial_number, algorithm.name))
+        if response:
+            return response
+
+        certificate, revocation_date = certificates[serial_number]
+        response = self._build_response(certificate, revocation_date, algorithm)
+        with self._lock:
+            response = responses.setdefault((serial_number, algorithm.name), response)
+
+        return response
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """
+    HTTP server that handles each request in a separate thread.
+    """
+
+    daemon_threads = True
+
+
+def get_request_handler(responder):
+    """
+    Creates HTTP request handler class for serving OCSP responses
+    using the passed-in responder. Both GET and POST requests are
+    supported (as specified in RFC 6960).
+
+    :param responder: OCSP responder to use for producing the responses.
+    :type responder: OCSPResponder
+
+    :returns: HTTP request handler class.
+    :rtype: type
+    """
+
+    class OCSPRequestHandler(http.server.BaseHTTPRequestHandler):
+        """
+        Serves OCSP responses over HTTP.
+        """
+
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            try:
+                request_der = base64.b64decode(urllib.parse.unquote(self.path.lstrip('/')))
+            except ValueError:
+                request_der = b''
+
+            self._send_response(responder.respond(request_der))
+
+        def do_POST(self):
+            content_length = int(self.headers.get('Content-Length', 0))
+            request_der = self.rfile.read(content_length)
+
+            self._send_response(responder.respond(request_der))
+
+        def _send_response(self, response_der):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/ocsp-response')
+            self.send_header('Content-Length', str(len(response_der)))
+            self.end_headers()
+            self.wfile.write(response_der)
+
+        def log_message(self, format, *args):
+            # Logging every request would severely limit the throughput.
+            pass
+
+    return OCSPRequestHandler
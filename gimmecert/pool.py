@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import concurrent.futures
+import os
+import uuid
+
+import gimmecert.crypto
+import gimmecert.storage
+import gimmecert.utils
+
+
+#: Niceness increment applied to worker processes refilling the pool.
+WORKER_NICENESS = 19
+
+# Set once the (worker) process priority has been lowered, since the
+# niceness increment is cumulative.
+_priority_lowered = False
+
+
+def get_pool_name(key_specification):
+    """
+    Derives name of the pool (directory) holding private keys with the
+    passed-in key specification.
+
+    :param key_specification: Key specification of pooled private keys.
+    :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+    :returns: Pool name, for example ``rsa-2048`` or ``ecdsa-secp256r1``.
+    :rtype: str
+    """
+
+    return gimmecert.utils.key_specification_to_str(key_specification).replace(':', '-')
+
+
+class KeyPool:
+    """
+    Pool of pre-generated private keys, kept in the project directory
+    (``.gimmecert/pool/``). Keys are grouped into per key specification
+    directories, with each key stored in a separate file.
+
+    Keys are added atomically (so partially written keys are never
+    taken), and taken by renaming them first, so each key is handed out
+    only once, even with multiple processes using the same pool.
+    """
+
+    def __init__(self, directory):
+        """
+        Initialises an instance.
+
+        :param directory: Path to directory holding the pool.
+        :type directory: str
+        """
+
+        self.directory = directory
+
+    def get_directory(self, key_specification):
+        """
+        Returns path to directory holding private keys with the
+        passed-in key specification.
+
+        :param key_specification: Key specification of pooled private keys.
+        :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+        :returns: Path to directory.
+        :rtype: str
+        """
+
+        return os.path.join(self.directory, get_pool_name(key_specification))
+
+    def level(self, key_specification):
+        """
+        Counts available private keys with the passed-in key specification.
+
+        :param key_specification: Key specification of pooled private keys.
+        :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+        :returns: Number of available private keys.
+        :rtype: int
+        """
+
+        try:
+            return sum(1 for entry in os.scandir(self.get_directory(key_specification)) if entry.name.endswith('.key.pem'))
+        except FileNotFoundError:
+            return 0
+
+    def add(self, private_key, key_specification):
+        """
+        Adds private key to the pool.
+
+        :param private_key: Private key to add.
+        :type private_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                           cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey
+
+        :param key_specification: Key specification of the private key.
+        :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+        """
+
+        path = os.path.join(self.get_directory(key_specification), '%s.key.pem' % uuid.uuid4().hex)
+
+        gimmecert.storage.write_file_atomically(gimmecert.utils.private_key_to_pem(private_key).encode(), path)
+
+    def take(self, key_specification):
+        """
+        Takes private key with the passed-in key specification out of
+        the pool.
+
+        :param key_specification: Key specification of the private key.
+        :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+        :returns: Private key, or None if the pool is empty.
+        :rtype: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey or None
+        """
+
+        try:
+            entries = list(os.scandir(self.get_directory(key_specification)))
+        except FileNotFoundError:
+            return None
+
+        for entry in entries:
+            if not entry.name.endswith('.key.pem'):
+                continue
+
+            claimed_path = entry.path[:-len('.key.pem')] + '.claimed'
+
+            # Key has been taken by someone else in the meantime.
+            try:
+                os.rename(entry.path, claimed_path)
+            except FileNotFoundError:
+                continue
+
+            try:
+                return gimmecert.storage.read_private_key(claimed_path)
+            finally:
+                os.remove(claimed_path)
+
+        return None
+
+
+def refill_key(directory, key_specification):
+    """
+    Generates a private key, and adds it to the pool. Meant to be run
+    within worker processes - the priority of calling process is
+    lowered on first invocation, so refilling the pool does not slow
+    down issuance running at the same time.
+
+    :param directory: Path to directory holding the pool.
+    :type directory: str
+
+    :param key_specification: Key specification of the private key.
+    :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+    """
+
+    global _priority_lowered
+
+    if not _priority_lowered and hasattr(os, 'nice'):
+        os.nice(WORKER_NICENESS)
+        _priority_lowered = True
+
+    KeyPool(directory).add(gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1])(), key_specification)
+
+
+def refill(pool, key_specifications, low_watermark, high_watermark, jobs):
+    """
+    Refills pools for the passed-in key specifications. Pools are
+    refilled only once their level drops below the low watermark, and
+    are then refilled up to the high watermark. This way keys get
+    generated in batches, instead of one at a time as they get taken.
+
+    Worker processes are started only for the duration of the refill,
+    so no processes are kept around while the pools are full.
+
+    :param pool: Key pool to refill.
+    :type pool: KeyPool
+
+    :param key_specifications: Key specifications of pools to refill.
+    :type key_specifications: list[tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)]
+
+    :param low_watermark: Level below which pools get refilled.
+    :type low_watermark: int
+
+    :param high_watermark: Level up to which pools get refilled.
+    :type high_watermark: int
+
+    :param jobs: Number of worker processes to use for generating the keys.
+    :type jobs: int
+
+    :returns: List of key specifications with number of keys generated for each of them.
+    :rtype: list[(tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve), int)]
+    """
+
+    shortfalls = []
+
+    for key_specification in key_specifications:
+        level = pool.level(key_specification)
+
+        if level < low_watermark:
+            shortfalls.append((key_specification, high_watermark - level))
+
+    if not shortfalls:
+        return shortfalls
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs, sum(count for _, count in shortfalls))) as executor:
+        futures = [executor.submit(refill_key, pool.directory, key_specification)
+                   for key_specification, count in shortfalls for _ in range(count)]
+
+        # Propagate any errors from the workers.
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
+
+    return shortfalls
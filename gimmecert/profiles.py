@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import os
+
+import cryptography.x509
+
+import gimmecert.crypto
+import gimmecert.utils
+
+
+#: Built-in issuance profiles, available in every project.
+BUILTIN_PROFILES = {profile.name: profile for profile in [gimmecert.crypto.SERVER_PROFILE,
+                                                          gimmecert.crypto.CLIENT_PROFILE,
+                                                          gimmecert.crypto.SERVER_CLIENT_PROFILE]}
+
+#: Names of directories used by the project for other purposes. Custom profiles must not use these names.
+RESERVED_NAMES = ['cache', 'ca', 'crl', 'pool', 'subca']
+
+#: Extended key usages that can be referred to by name in profile definitions.
+EXTENDED_KEY_USAGES = {
+    'server_auth': cryptography.x509.oid.ExtendedKeyUsageOID.SERVER_AUTH,
+    'client_auth': cryptography.x509.oid.ExtendedKeyUsageOID.CLIENT_AUTH,
+    'code_signing': cryptography.x509.oid.ExtendedKeyUsageOID.CODE_SIGNING,
+    'email_protection': cryptography.x509.oid.ExtendedKeyUsageOID.EMAIL_PROTECTION,
+    'time_stamping': cryptography.x509.oid.ExtendedKeyUsageOID.TIME_STAMPING,
+    'ocsp_signing': cryptography.x509.oid.ExtendedKeyUsageOID.OCSP_SIGNING,
+}
+
+# Compiled profiles, keyed by path to profile configuration file.
+_compiled_profiles = {}
+
+
+def parse_profile(name, definition):
+    """
+    Compiles profile definition into an issuance profile.
+
+    Profile definition is a dictionary with the following keys:
+
+    - ``key_usages`` (required), list of key usages, for example
+      ``digital_signature``.
+    - ``extended_key_usages``, list of extended key usages. Either
+      names (see EXTENDED_KEY_USAGES) or dotted OID strings can be
+      used.
+    - ``subject_alternative_names``, type of subject alternative
+      names (``dns`` or ``email``) to include entity name (and
+      additional names) as.
+    - ``validity``, default validity, for example ``90d``.
+    - ``key_specification``, default key specification, for example
+      ``ecdsa:secp256r1``.
+
+    :param name: Profile name.
+    :type name: str
+
+    :param definition: Profile definition.
+    :type definition: dict
+
+    :returns: Issuance profile.
+    :rtype: gimmecert.crypto.IssuanceProfile
+
+    :raises ValueError: If profile name or definition is invalid.
+    """
+
+    if name in BUILTIN_PROFILES or name in RESERVED_NAMES:
+        raise ValueError("Profile name is reserved: %s" % name)
+
+    if name in ('', os.curdir, os.pardir) or os.sep in name or (os.altsep and os.altsep in name):
+        raise ValueError("Invalid profile name: '%s'" % name)
+
+    if not isinstance(definition, dict):
+        raise ValueError("Profile %s: definition must be an object" % name)
+
+    unknown_keys = set(definition) - {'key_usages', 'extended_key_usages', 'subject_alternative_names', 'validity', 'key_specification'}
+    if unknown_keys:
+        raise ValueError("Profile %s: unknown option(s): %s" % (name, ", ".join(sorted(unknown_keys))))
+
+    if 'key_usages' not in definition:
+        raise ValueError("Profile %s: key_usages must be specified" % name)
+
+    try:
+        extended_key_usages = []
+        for extended_key_usage in definition.get('extended_key_usages', []):
+            if extended_key_usage in EXTENDED_KEY_USAGES:
+                extended_key_usages.append(EXTENDED_KEY_USAGES[extended_key_usage])
+            else:
+                extended_key_usages.append(cryptography.x509.ObjectIdentifier(extended_key_usage))
+
+        validity = definition.get('validity')
+        if validity is not None:
+            validity = gimmecert.utils.parse_duration(validity)
+
+        key_specification = definition.get('key_specification')
+        if key_specification is not None:
+            key_specification = gimmecert.utils.parse_key_specification(key_specification)
+
+        return gimmecert.crypto.IssuanceProfile(name, definition['key_usages'], extended_key_usages, definition.get('subject_alternative_names'),
+                                                validity, key_specification)
+    except (ValueError, TypeError, AttributeError) as e:
+        raise ValueError("Profile %s: %s" % (name, e))
+
+
+def parse_profiles(content):
+    """
+    Compiles profile definitions from profile configuration. Profile
+    configuration is a JSON object, mapping profile names to profile
+    definitions (see parse_profile for details).
+
+    :param content: Profile configuration.
+    :type content: str
+
+    :returns: Mapping between profile names and issuance profiles.
+    :rtype: dict[str, gimmecert.crypto.IssuanceProfile]
+
+    :raises ValueError: If profile configuration is invalid.
+    """
+
+    definitions = json.loads(content)
+
+    if not isinstance(definitions, dict):
+        raise ValueError("Profile configuration must be an object")
+
+    return {name: parse_profile(name, definition) for name, definition in definitions.items()}
+
+
+def get_entity_types(project_directory):
+    """
+    Returns entity types for which artefact directories exist within
+    the project. Entity types include built-in profiles (``server``,
+    ``client``, etc), and custom profiles that have been used for
+    issuing certificates. Directories reserved for other purposes
+    (see RESERVED_NAMES) are skipped.
+
+    :param project_directory: Path to project directory.
+    :type project_directory: str
+
+    :returns: Sorted list of entity types.
+    :rtype: list[str]
+    """
+
+    base_directory = os.path.join(project_directory, '.gimmecert')
+
+    return sorted(entry.name for entry in os.scandir(base_directory) if entry.is_dir() and entry.name not in RESERVED_NAMES)
+
+
+def load_profiles(path):
+    """
+    Loads and compiles profiles from profile configuration file.
+
+    Compiled profiles are cached for the lifetime of the process, and
+    recompiled only if the configuration file changes. Issuance
+    profiles (and certificate issuers derived from them) are therefore
+    prepared only once, even when opening the project repeatedly.
+
+    :param path: Path to profile configuration file.
+    :type path: str
+
+    :returns: Mapping between profile names and issuance profiles. Empty mapping is returned if configuration file does not exist.
+    :rtype: dict[str, gimmecert.crypto.IssuanceProfile]
+
+    :raises ValueError: If profile configuration is invalid.
+    """
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return {}
+
+    file_state = (stat.st_mtime_ns, stat.st_size)
+
+    if path in _compiled_profiles and _compiled_profiles[path][0] == file_state:
+        return _compiled_profiles[path][1]
+
+    with open(path, 'r') as profiles_file:
+        profiles = parse_profiles(profiles_file.read())
+
+    _compiled_profiles[path] = (file_state, profiles)
+
+    return profiles
@@ -0,0 +1,929 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import datetime
+import os
+
+import gimmecert.crypto
+import gimmecert.pool
+import gimmecert.profiles
+import gimmecert.storage
+
+
+class ProjectError(Exception):
+    """
+    Base exception for errors raised while working with a project.
+    """
+
+    pass
+
+
+class ProjectAlreadyInitialised(ProjectError):
+    """
+    Raised when trying to initialise an already initialised project.
+    """
+
+    pass
+
+
+class ProjectNotInitialised(ProjectError):
+    """
+    Raised when trying to open a project that has not been initialised.
+    """
+
+    pass
+
+
+class CertificateAlreadyIssued(ProjectError):
+    """
+    Raised when trying to issue a certificate for an entity that already has one.
+    """
+
+    pass
+
+
+class UnknownEntity(ProjectError):
+    """
+    Raised when referring to an entity for which no certificate has been issued.
+    """
+
+    pass
+
+
+class UnknownProfile(ProjectError):
+    """
+    Raised when referring to an issuance profile that has not been defined.
+    """
+
+    pass
+
+
+class InvalidProfileConfiguration(ProjectError):
+    """
+    Raised when project profile configuration cannot be parsed.
+    """
+
+    pass
+
+
+class Entity:
+    """
+    Server or client entity with issued certificate.
+
+    Private key and CSR are read from storage on first access (unless
+    they were passed-in during instance initialisation). Artefact
+    paths are set to None for entities of ephemeral projects.
+    """
+
+    def __init__(self, storage, entity_type, name, certificate, private_key=None, csr=None):
+        """
+        Initialises an instance.
+
+        :param storage: Storage where entity artefacts are kept.
+        :type storage: gimmecert.storage.FilesystemStorage or gimmecert.storage.MemoryStorage
+
+        :param entity_type: Type of entity, ``server`` or ``client``.
+        :type entity_type: str
+
+        :param name: Name of entity.
+        :type name: str
+
+        :param certificate: Entity certificate.
+        :type certificate: cryptography.x509.Certificate
+
+        :param private_key: Entity private key. Set to None to read it from storage on first access.
+        :type private_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                           cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey or None
+
+        :param csr: Entity CSR. Set to None to read it from storage on first access.
+        :type csr: cryptography.x509.CertificateSigningRequest or None
+        """
+
+        self.entity_type = entity_type
+        self.name = name
+        self.certificate = certificate
+
+        self.private_key_name = '%s/%s.key.pem' % (entity_type, name)
+        self.csr_name = '%s/%s.csr.pem' % (entity_type, name)
+        self.certificate_name = '%s/%s.cert.pem' % (entity_type, name)
+
+        self.private_key_path = storage.get_path(self.private_key_name)
+        self.csr_path = storage.get_path(self.csr_name)
+        self.certificate_path = storage.get_path(self.certificate_name)
+
+        self._storage = storage
+        self._private_key = private_key
+        self._csr = csr
+
+    def __repr__(self):
+        return "<Entity %s %s>" % (self.entity_type, self.name)
+
+    @property
+    def private_key(self):
+        """
+        Entity private key, or None if certificate has been issued using a CSR.
+        """
+
+        if self._private_key is None and self._storage.exists(self.private_key_name):
+            self._private_key = self._storage.read(self.private_key_name)
+
+        return self._private_key
+
+    @property
+    def csr(self):
+        """
+        Entity CSR, or None if entity has a private key.
+        """
+
+        if self._csr is None and self._storage.exists(self.csr_name):
+            self._csr = self._storage.read(self.csr_name)
+
+        return self._csr
+
+    def get_validity_status(self, now=None):
+        """
+        Returns validity status of entity certificate.
+
+        :param now: Point in time for which to determine the status. Set to None to use current (UTC) time.
+        :type now: datetime.datetime or None
+
+        :returns: One of ``valid``, ``expired``, and ``not-valid-yet``.
+        :rtype: str
+        """
+
+        if now is None:
+            now = datetime.datetime.utcnow()
+
+        if self.certificate.not_valid_before > now:
+            return "not-valid-yet"
+        elif self.certificate.not_valid_after < now:
+            return "expired"
+
+        return "valid"
+
+
+class ProjectStatus:
+    """
+    Information about CA hierarchy and certificates issued within a
+    project.
+
+    :ivar ca_certificates: CA certificates, starting with the level 1 (root) CA, and ending with the issuing CA.
+    :ivar key_specification: Default key specification used for generating private keys.
+    :ivar servers: Server entities, sorted by name.
+    :ivar clients: Client entities, sorted by name.
+    """
+
+    def __init__(self, ca_certificates, key_specification, servers, clients):
+        self.ca_certificates = ca_certificates
+        self.key_specification = key_specification
+        self.servers = servers
+        self.clients = clients
+
+
+class Project:
+    """
+    Provides access to an initialised project for use from Python
+    code. Projects are normally stored on disk, but ephemeral projects
+    (kept only in memory) can be created as well.
+
+    The CA hierarchy is read and parsed only once (when the project
+    is opened), making it possible to issue a large number of
+    certificates without re-reading the CA hierarchy for each of
+    them. Methods raise exceptions (derived from ProjectError) instead
+    of producing output and returning status codes.
+
+    Example::
+
+        project = gimmecert.Project.initialise('/tmp/myproject')
+        server = project.issue_server('myserver', ['myserver.example.com'])
+        print(server.certificate_path)
+
+        # Nothing gets written to disk.
+        project = gimmecert.Project.ephemeral()
+        client = project.issue_client('myclient')
+        print(client.certificate, client.private_key)
+    """
+
+    def __init__(self, project_directory, archive=None):
+        """
+        Opens an already initialised project.
+
+        :param project_directory: Path to project directory.
+        :type project_directory: str
+
+        :param archive: Archive to add all newly written artefacts to. Set to None (default) to only store them in project directory.
+        :type archive: gimmecert.storage.TarArchive or None
+
+        :raises ProjectNotInitialised: If CA hierarchy has not been initialised in project directory.
+        """
+
+        storage = gimmecert.storage.FilesystemStorage(project_directory)
+
+        if not storage.is_initialised():
+            raise ProjectNotInitialised("CA hierarchy has not been initialised in %s." % project_directory)
+
+        self._open(self._wrap_storage(storage, archive), storage.read_ca_hierarchy())
+
+    @staticmethod
+    def _wrap_storage(storage, archive):
+        """
+        Helper method for wrapping storage so written artefacts are added to archive as well.
+        """
+
+        if archive is None:
+            return storage
+
+        return gimmecert.storage.ArchivingStorage(storage, archive)
+
+    def _open(self, storage, ca_hierarchy):
+        """
+        Helper method for setting-up the instance with already loaded CA hierarchy.
+        """
+
+        self.storage = storage
+        self.directory = storage.project_directory
+        self.ca_hierarchy = ca_hierarchy
+        self.issuer_private_key, self.issuer_certificate = ca_hierarchy[-1]
+        self.key_specification = gimmecert.crypto.key_specification_from_public_key(self.issuer_certificate.public_key())
+        self._issuers = {}
+        self._artefacts = {}
+
+        pool_directory = storage.get_path('pool')
+        self.key_pool = gimmecert.pool.KeyPool(pool_directory) if pool_directory is not None else None
+
+    @classmethod
+    def initialise(cls, project_directory, ca_base_name=None, ca_hierarchy_depth=1, key_specification=("rsa", 2048), archive=None, ca_from=None,
+                   validity=None, backdate=None):
+        """
+        Initialises the directory structure and CA hierarchy in
+        project directory, and opens the project.
+
+        If another project (or sub-CA directory) is passed-in via
+        ca_from, no CA hierarchy is generated. Instead, the project CA
+        directory becomes a reference (symbolic link) to the CA
+        hierarchy of the other project, and CA naming, depth, key
+        specification, and validity are ignored.
+
+        :param project_directory: Path to project directory.
+        :type project_directory: str
+
+        :param ca_base_name: Base name to use for constructing CA subject DNs. Set to None to use the project directory base name.
+        :type ca_base_name: str or None
+
+        :param ca_hierarchy_depth: Number of CAs in the hierarchy.
+        :type ca_hierarchy_depth: int
+
+        :param key_specification: Key specification to use when generating private keys for the hierarchy.
+        :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+        :param archive: Archive to add all newly written artefacts to. Set to None (default) to only store them in project directory.
+        :type archive: gimmecert.storage.TarArchive or None
+
+        :param ca_from: Path to another project or sub-CA directory whose CA hierarchy should be used. Set to None (default) to generate new CA hierarchy.
+        :type ca_from: str or None
+
+        :param validity: Duration of CA certificates validity. Set to None (default) for one year.
+        :type validity: datetime.timedelta or None
+
+        :param backdate: Duration by which beginning of CA certificates validity is backdated. Set to None (default) for 15 minutes.
+        :type backdate: datetime.timedelta or None
+
+        :returns: Initialised project.
+        :rtype: Project
+
+        :raises ProjectAlreadyInitialised: If project directory has already been initialised.
+        :raises ProjectNotInitialised: If project to use CA hierarchy from has not been initialised.
+        """
+
+        storage = gimmecert.storage.FilesystemStorage(project_directory)
+
+        if storage.is_initialised():
+            raise ProjectAlreadyInitialised("CA hierarchy has already been initialised in %s." % project_directory)
+
+        if ca_from is not None:
+            ca_directory = gimmecert.storage.get_ca_directory(ca_from)
+
+            if ca_directory is None:
+                raise ProjectNotInitialised("CA hierarchy has not been initialised in %s." % ca_from)
+
+            storage.initialise(ca_directory)
+
+            project = cls.__new__(cls)
+            project._open(cls._wrap_storage(storage, archive), storage.read_ca_hierarchy())
+
+            return project
+
+        if ca_base_name is None:
+            ca_base_name = os.path.basename(os.path.abspath(project_directory))
+
+        return cls._initialise(cls._wrap_storage(storage, archive), ca_base_name, ca_hierarchy_depth, key_specification, validity, backdate)
+
+    @classmethod
+    def ephemeral(cls, ca_base_name="Gimmecert", ca_hierarchy_depth=1, key_specification=("rsa", 2048), archive=None, validity=None, backdate=None):
+        """
+        Initialises an ephemeral project. Ephemeral projects keep all
+        artefacts in memory, and do not perform any filesystem
+        operations. Artefact paths of issued entities are set to None.
+
+        :param ca_base_name: Base name to use for constructing CA subject DNs.
+        :type ca_base_name: str
+
+        :param ca_hierarchy_depth: Number of CAs in the hierarchy.
+        :type ca_hierarchy_depth: int
+
+        :param key_specification: Key specification to use when generating private keys for the hierarchy.
+        :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+        :param archive: Archive to add all newly generated artefacts to. Set to None (default) to keep them only in memory.
+        :type archive: gimmecert.storage.TarArchive or None
+
+        :param validity: Duration of CA certificates validity. Set to None (default) for one year.
+        :type validity: datetime.timedelta or None
+
+        :param backdate: Duration by which beginning of CA certificates validity is backdated. Set to None (default) for 15 minutes.
+        :type backdate: datetime.timedelta or None
+
+        :returns: Initialised ephemeral project.
+        :rtype: Project
+        """
+
+        return cls._initialise(cls._wrap_storage(gimmecert.storage.MemoryStorage(), archive), ca_base_name, ca_hierarchy_depth, key_specification,
+                               validity, backdate)
+
+    @classmethod
+    def _initialise(cls, storage, ca_base_name, ca_hierarchy_depth, key_specification, validity=None, backdate=None):
+        """
+        Helper method for initialising the passed-in storage with new
+        CA hierarchy, and opening the project.
+        """
+
+        storage.initialise()
+
+        key_generator = gimmecert.crypto.KeyGenerator(key_specification[0], key_specification[1])
+        ca_hierarchy = gimmecert.crypto.generate_ca_hierarchy(ca_base_name, ca_hierarchy_depth, key_generator, validity, backdate)
+
+        for level, (private_key, certificate) in enumerate(ca_hierarchy, 1):
+            storage.write(private_key, 'ca/level%d.key.pem' % level)
+            storage.write(certificate, 'ca/level%d.cert.pem' % level)
+
+        storage.write([certificate for _, certificate in ca_hierarchy], 'ca/chain-full.cert.pem')
+
+        # Avoid reading back just generated CA hierarchy.
+        project = cls.__new__(cls)
+        project._open(storage, ca_hierarchy)
+
+        return project
+
+    def _get_public_key(self, csr, key_specification):
+        """
+        Helper method for obtaining public key for issuing a new
+        certificate, either from CSR or from newly generated private
+        key.
+
+        :returns: Public key, and generated private key (None if CSR was passed-in).
+        """
+
+        if csr is not None:
+            return csr.public_key(), None
+
+        private_key = self._generate_private_key(key_specification or self.key_specification)
+
+        return private_key.public_key(), private_key
+
+    def _generate_private_key(self, key_specification):
+        """
+        Helper method for obtaining a new private key. Keys are taken
+        from the project key pool (see gimmecert.pool) when available,
+        and generated on demand otherwise.
+
+        :returns: Private key.
+        """
+
+        private_key = self.key_pool.take(key_specification) if self.key_pool is not None else None
+
+        if private_key is None:
+            private_key = gimmecert.crypto.KeyGenerator(*key_specification)()
+
+        return private_key
+
+    def _issue(self, entity_type, name, csr, key_specification, issue_function, reuse_key_from=None):
+        """
+        Helper method implementing common logic for issuing server and
+        client certificates.
+        """
+
+        if reuse_key_from is not None and (csr is not None or key_specification is not None):
+            raise ValueError("Private key cannot be reused when passing-in CSR or key specification.")
+
+        entity = Entity(self.storage, entity_type, name, None)
+
+        artefacts = self._artefacts.get(entity_type)
+
+        if artefacts is not None:
+            already_issued = name in artefacts
+        else:
+            already_issued = (self.storage.exists(entity.private_key_name) or self.storage.exists(entity.certificate_name) or
+                              self.storage.exists(entity.csr_name))
+
+        if already_issued:
+            raise CertificateAlreadyIssued("Certificate has already been issued for %s %s." % (entity_type, name))
+
+        if reuse_key_from is not None:
+            source_entity = self.get_entity(*reuse_key_from)
+
+            if not self.storage.exists(source_entity.private_key_name):
+                raise ValueError("Cannot reuse private key of %s %s, since its certificate has been issued using a CSR." % reuse_key_from)
+
+            # Certificate is always issued for the current private key,
+            # making it a (cheaper) stand-in for reading the key.
+            public_key, private_key = source_entity.certificate.public_key(), None
+        else:
+            public_key, private_key = self._get_public_key(csr, key_specification)
+
+        certificate = issue_function(public_key)
+
+        if csr is not None:
+            self.storage.write(csr, entity.csr_name)
+            entity._csr = csr
+        elif reuse_key_from is not None:
+            self.storage.link(source_entity.private_key_name, entity.private_key_name)
+        else:
+            self.storage.write(private_key, entity.private_key_name)
+            entity._private_key = private_key
+
+        self.storage.write(certificate, entity.certificate_name)
+        entity.certificate = certificate
+
+        if artefacts is not None:
+            artefacts[name] = {'csr' if csr is not None else 'key', 'cert'}
+
+        return entity
+
+    def get_issuer(self, profile, validity=None, backdate=None):
+        """
+        Retrieves certificate issuer for the passed-in issuance profile,
+        signing with the project's issuing CA.
+
+        Issuers are cached for the lifetime of the project instance,
+        so repeated issuance with the same profile and validity
+        settings reuses the already prepared certificate builder
+        state.
+
+        :param profile: Issuance profile to use.
+        :type profile: gimmecert.crypto.IssuanceProfile
+
+        :param validity: Duration of certificate validity. Set to None (default) for one year.
+        :type validity: datetime.timedelta or None
+
+        :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) for 15 minutes.
+        :type backdate: datetime.timedelta or None
+
+        :returns: Certificate issuer.
+        :rtype: gimmecert.crypto.CertificateIssuer
+        """
+
+        key = (profile, validity, backdate)
+
+        if key not in self._issuers:
+            self._issuers[key] = gimmecert.crypto.CertificateIssuer(profile, self.issuer_private_key, self.issuer_certificate, validity, backdate)
+
+        return self._issuers[key]
+
+    def get_profile(self, name):
+        """
+        Retrieves issuance profile. Built-in profiles (``server``,
+        ``client``, and ``server-client``) are always available, while
+        custom profiles are read from profile configuration file
+        (``.gimmecert/profiles.json``). Ephemeral projects support only
+        the built-in profiles.
+
+        :param name: Name of profile.
+        :type name: str
+
+        :returns: Issuance profile.
+        :rtype: gimmecert.crypto.IssuanceProfile
+
+        :raises UnknownProfile: If profile has not been defined.
+        :raises InvalidProfileConfiguration: If profile configuration file is invalid.
+        """
+
+        if name in gimmecert.profiles.BUILTIN_PROFILES:
+            return gimmecert.profiles.BUILTIN_PROFILES[name]
+
+        profiles_path = self.storage.get_path('profiles.json')
+
+        try:
+            profiles = gimmecert.profiles.load_profiles(profiles_path) if profiles_path else {}
+        except ValueError as e:
+            raise InvalidProfileConfiguration("Invalid profile configuration in %s: %s" % (profiles_path, e))
+
+        if name not in profiles:
+            raise UnknownProfile("Unknown profile: %s." % name)
+
+        return profiles[name]
+
+    def issue(self, profile_name, name, extra_names=None, csr=None, key_specification=None, validity=None, backdate=None):
+        """
+        Issues a certificate using the designated issuance profile.
+        Artefacts are stored in directory named after the profile, and
+        profile name is used as entity type.
+
+        :param profile_name: Name of issuance profile to use. See get_profile for details.
+        :type profile_name: str
+
+        :param name: Name of the entity.
+        :type name: str
+
+        :param extra_names: Additional names to include in the subject alternative name (if profile includes one).
+        :type extra_names: list[str] or None
+
+        :param csr: CSR to take the public key from. Set to None to generate a private key instead.
+        :type csr: cryptography.x509.CertificateSigningRequest or None
+
+        :param key_specification: Key specification to use when generating private key. Set to None to use the profile one (or CA hierarchy one if
+                                  profile does not specify it).
+        :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve) or None
+
+        :param validity: Duration of certificate validity. Set to None (default) to use the profile one (or one year if profile does not specify it).
+        :type validity: datetime.timedelta or None
+
+        :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) for 15 minutes.
+        :type backdate: datetime.timedelta or None
+
+        :returns: Issued entity.
+        :rtype: Entity
+
+        :raises UnknownProfile: If profile has not been defined.
+        :raises InvalidProfileConfiguration: If profile configuration file is invalid.
+        :raises CertificateAlreadyIssued: If certificate has already been issued for the entity.
+        """
+
+        profile = self.get_profile(profile_name)
+        issue_certificate = self.get_issuer(profile, validity, backdate)
+
+        def issue_function(public_key):
+            return issue_certificate(name, public_key, extra_names)
+
+        self.storage.create_directory(profile_name)
+
+        return self._issue(profile_name, name, csr, key_specification or profile.key_specification, issue_function)
+
+    def issue_server(self, name, extra_dns_names=None, csr=None, key_specification=None, validity=None, backdate=None):
+        """
+        Issues a server certificate. Entity name is used in subject DN
+        and DNS subject alternative name.
+
+        :param name: Name of the server entity.
+        :type name: str
+
+        :param extra_dns_names: Additional names to include in the subject alternative name. Names are included as DNS names, unless prefixed with
+                                type (``ip:``, ``uri:``, or ``email:``).
+        :type extra_dns_names: list[str] or None
+
+        :param csr: CSR to take the public key from. Set to None to generate a private key instead.
+        :type csr: cryptography.x509.CertificateSigningRequest or None
+
+        :param key_specification: Key specification to use when generating private key. Set to None to use the CA hierarchy one.
+        :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve) or None
+
+        :param validity: Duration of certificate validity. Set to None (default) for one year.
+        :type validity: datetime.timedelta or None
+
+        :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) for 15 minutes.
+        :type backdate: datetime.timedelta or None
+
+        :returns: Issued server entity.
+        :rtype: Entity
+
+        :raises CertificateAlreadyIssued: If certificate has already been issued for the server.
+        """
+
+        issue_certificate = self.get_issuer(gimmecert.crypto.SERVER_PROFILE, validity, backdate)
+
+        def issue_function(public_key):
+            return issue_certificate(name, public_key, extra_dns_names)
+
+        return self._issue('server', name, csr, key_specification, issue_function)
+
+    def issue_client(self, name, csr=None, key_specification=None, validity=None, backdate=None, reuse_key_from=None):
+        """
+        Issues a client certificate. Entity name is used in subject DN.
+
+        Private key of an existing entity can be reused instead of
+        generating a new one, making issuance cost a single signing
+        operation. The private key is shared (linked) between the
+        entities instead of being copied.
+
+        :param name: Name of the client entity.
+        :type name: str
+
+        :param csr: CSR to take the public key from. Set to None to generate a private key instead.
+        :type csr: cryptography.x509.CertificateSigningRequest or None
+
+        :param key_specification: Key specification to use when generating private key. Set to None to use the CA hierarchy one.
+        :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve) or None
+
+        :param validity: Duration of certificate validity. Set to None (default) for one year.
+        :type validity: datetime.timedelta or None
+
+        :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) for 15 minutes.
+        :type backdate: datetime.timedelta or None
+
+        :param reuse_key_from: Type and name of existing entity whose private key should be reused. Set to None (default) to generate a private key.
+        :type reuse_key_from: (str, str) or None
+
+        :returns: Issued client entity.
+        :rtype: Entity
+
+        :raises CertificateAlreadyIssued: If certificate has already been issued for the client.
+        :raises UnknownEntity: If entity whose private key should be reused does not exist.
+        :raises ValueError: If entity whose private key should be reused has no private key, or if conflicting parameters have been passed-in.
+        """
+
+        issue_certificate = self.get_issuer(gimmecert.crypto.CLIENT_PROFILE, validity, backdate)
+
+        def issue_function(public_key):
+            return issue_certificate(name, public_key)
+
+        return self._issue('client', name, csr, key_specification, issue_function, reuse_key_from)
+
+    def issue_subca(self, name, key_specification=None, validity=None, backdate=None):
+        """
+        Issues an intermediate CA (sub-CA) using the project issuing
+        CA. Sub-CA is stored in its own directory (``subca/NAME/``),
+        laid-out in the same way as project CA directory. Sub-CA
+        directory includes certificates of all parent CAs, but only
+        the sub-CA private key, making it possible to use it as
+        issuing CA elsewhere (see ca_from parameter of initialise).
+
+        Sub-CA subject DN is constructed using the same naming
+        convention as for the rest of the CA hierarchy (``NAME Level
+        N CA``).
+
+        :param name: Name of the sub-CA.
+        :type name: str
+
+        :param key_specification: Key specification to use when generating private key. Set to None to use the CA hierarchy one.
+        :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve) or None
+
+        :param validity: Duration of sub-CA certificate validity. Set to None (default) for one year. Never exceeds issuing CA validity.
+        :type validity: datetime.timedelta or None
+
+        :param backdate: Duration by which beginning of sub-CA certificate validity is backdated. Set to None (default) for 15 minutes.
+        :type backdate: datetime.timedelta or None
+
+        :returns: Sub-CA hierarchy, as list of private key/certificate pairs, starting with the level 1 CA. Private keys of parent CAs are set to None.
+        :rtype: list[(cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                      cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey or None, cryptography.x509.Certificate)]
+
+        :raises CertificateAlreadyIssued: If sub-CA with the same name has already been issued.
+        """
+
+        level = len(self.ca_hierarchy) + 1
+        directory = 'subca/%s' % name
+
+        if self.storage.exists('%s/level%d.key.pem' % (directory, level)) or self.storage.exists('%s/level%d.cert.pem' % (directory, level)):
+            raise CertificateAlreadyIssued("Sub-CA %s has already been issued." % name)
+
+        _, private_key = self._get_public_key(None, key_specification)
+        certificate = gimmecert.crypto.issue_sub_ca_certificate("%s Level %d CA" % (name, level), private_key.public_key(),
+                                                                self.issuer_private_key, self.issuer_certificate, validity, backdate)
+
+        ca_hierarchy = [(None, parent_certificate) for _, parent_certificate in self.ca_hierarchy] + [(private_key, certificate)]
+
+        self.storage.create_directory(directory)
+
+        for parent_level, (_, parent_certificate) in enumerate(self.ca_hierarchy, 1):
+            self.storage.write(parent_certificate, '%s/level%d.cert.pem' % (directory, parent_level))
+
+        self.storage.write(private_key, '%s/level%d.key.pem' % (directory, level))
+        self.storage.write(certificate, '%s/level%d.cert.pem' % (directory, level))
+        self.storage.write([ca_certificate for _, ca_certificate in ca_hierarchy], '%s/chain-full.cert.pem' % directory)
+
+        return ca_hierarchy
+
+    def get_entity(self, entity_type, name):
+        """
+        Retrieves an entity with issued certificate.
+
+        :param entity_type: Type of entity, ``server`` or ``client``.
+        :type entity_type: str
+
+        :param name: Name of entity.
+        :type name: str
+
+        :returns: Entity.
+        :rtype: Entity
+
+        :raises UnknownEntity: If no certificate has been issued for the entity.
+        """
+
+        entity = Entity(self.storage, entity_type, name, None)
+
+        if not self.storage.exists(entity.certificate_name):
+            raise UnknownEntity("No existing certificate found for %s %s." % (entity_type, name))
+
+        entity.certificate = self.storage.read(entity.certificate_name)
+
+        return entity
+
+    def renew(self, entity_type, name, new_private_key=False, csr=None, dns_names=None, key_specification=None, validity=None, backdate=None):
+        """
+        Renews certificate of an entity, preserving naming and
+        extensions. Private key is preserved as well, unless a new
+        private key or CSR are requested. Passing-in a CSR replaces
+        the entity private key with the CSR, while generating new
+        private key replaces the entity CSR with the private key.
+
+        :param entity_type: Type of entity, ``server`` or ``client``.
+        :type entity_type: str
+
+        :param name: Name of entity.
+        :type name: str
+
+        :param new_private_key: Specify if a new private key should be generated. Cannot be used together with csr.
+        :type new_private_key: bool
+
+        :param csr: CSR to take the public key from. Cannot be used together with new_private_key.
+        :type csr: cryptography.x509.CertificateSigningRequest or None
+
+        :param dns_names: Additional names to use as replacement when renewing a server certificate. Names can be prefixed with type (``ip:``,
+                          ``uri:``, or ``email:``). Set to None to keep existing ones.
+        :type dns_names: list[str] or None
+
+        :param key_specification: Key specification to use when generating new private key. Set to None to use the one from existing certificate.
+        :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve) or None
+
+        :param validity: Duration of certificate validity. Set to None (default) for one year.
+        :type validity: datetime.timedelta or None
+
+        :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) for 15 minutes.
+        :type backdate: datetime.timedelta or None
+
+        :returns: Renewed entity.
+        :rtype: Entity
+
+        :raises ValueError: If conflicting parameters or invalid names have been passed-in.
+        :raises UnknownEntity: If no certificate has been issued for the entity.
+        """
+
+        if new_private_key and csr is not None:
+            raise ValueError("Only one of the following two parameters should be specified: new_private_key, csr.")
+
+        if dns_names is not None and entity_type != "server":
+            raise ValueError("Updating DNS subject alternative names can be done only for server certificates.")
+
+        # Validate names before any of the artefacts get replaced.
+        for dns_name in dns_names or []:
+            gimmecert.crypto.get_general_name(dns_name)
+
+        entity = self.get_entity(entity_type, name)
+        old_certificate = entity.certificate
+
+        if new_private_key:
+            private_key = self._generate_private_key(key_specification or
+                                                     gimmecert.crypto.key_specification_from_public_key(old_certificate.public_key()))
+            self.storage.write(private_key, entity.private_key_name)
+            entity._private_key = private_key
+            public_key = private_key.public_key()
+        elif csr is not None:
+            self.storage.write(csr, entity.csr_name)
+            entity._csr = csr
+            public_key = csr.public_key()
+        else:
+            public_key = old_certificate.public_key()
+
+        if entity_type == 'server' and dns_names is not None:
+            certificate = self.get_issuer(gimmecert.crypto.SERVER_PROFILE, validity, backdate)(name, public_key, dns_names)
+        else:
+            certificate = gimmecert.crypto.renew_certificate(old_certificate, public_key, self.issuer_private_key, self.issuer_certificate,
+                                                             validity, backdate)
+
+        self.storage.write(certificate, entity.certificate_name)
+        entity.certificate = certificate
+
+        # Private key and CSR are mutually exclusive.
+        if csr is not None and self.storage.exists(entity.private_key_name):
+            self.storage.remove(entity.private_key_name)
+            entity._private_key = None
+
+        if new_private_key and self.storage.exists(entity.csr_name):
+            self.storage.remove(entity.csr_name)
+            entity._csr = None
+
+        if entity_type in self._artefacts:
+            if new_private_key:
+                self._artefacts[entity_type][name] = {'key', 'cert'}
+            elif csr is not None:
+                self._artefacts[entity_type][name] = {'csr', 'cert'}
+
+        return entity
+
+    def get_reissuer(self, entity_type, name, validity=None, backdate=None):
+        """
+        Prepares a function for repeated reissuing of entity
+        certificate, preserving naming, extensions, and public key.
+
+        Certificate content is prepared only once, making the
+        resulting function suitable for high-rate reissuing of
+        short-lived certificates. Each call reissues the certificate,
+        and stores it.
+
+        :param entity_type: Type of entity, ``server`` or ``client``.
+        :type entity_type: str
+
+        :param name: Name of entity.
+        :type name: str
+
+        :param validity: Duration of certificate validity. Set to None (default) for one year.
+        :type validity: datetime.timedelta or None
+
+        :param backdate: Duration by which beginning of certificate validity is backdated. Set to None (default) for 15 minutes.
+        :type backdate: datetime.timedelta or None
+
+        :returns: Function that reissues the certificate, and returns entity with updated certificate.
+        :rtype: callable[[], Entity]
+
+        :raises UnknownEntity: If no certificate has been issued for the entity.
+        """
+
+        entity = self.get_entity(entity_type, name)
+        reissue_certificate = gimmecert.crypto.CertificateReissuer(entity.certificate, entity.certificate.public_key(),
+                                                                   self.issuer_private_key, self.issuer_certificate, validity, backdate)
+
+        def reissue():
+            certificate = reissue_certificate()
+            self.storage.write(certificate, entity.certificate_name)
+            entity.certificate = certificate
+
+            return entity
+
+        return reissue
+
+    def get_artefacts(self, entity_type):
+        """
+        Retrieves artefacts present for entities of specified type.
+
+        Artefacts are discovered using a single scan of the storage,
+        and the result is kept for the lifetime of the instance (and
+        updated as entities get issued and renewed through it). This
+        allows bulk operations to avoid checking for presence of
+        individual artefacts. Changes made to the storage outside of
+        the instance are not picked up.
+
+        :param entity_type: Type of entity, for example ``server`` or ``client``.
+        :type entity_type: str
+
+        :returns: Mapping between entity names and kinds of artefacts present for them (``key``, ``csr``, ``cert``).
+        :rtype: dict[str, set[str]]
+        """
+
+        if entity_type not in self._artefacts:
+            self._artefacts[entity_type] = self.storage.scan(entity_type)
+
+        return self._artefacts[entity_type]
+
+    def get_entities(self, entity_type):
+        """
+        Retrieves all entities of specified type.
+
+        :param entity_type: Type of entity, ``server`` or ``client``.
+        :type entity_type: str
+
+        :returns: Entities with issued certificates, sorted by name.
+        :rtype: list[Entity]
+        """
+
+        artefacts = self.get_artefacts(entity_type)
+
+        return [self.get_entity(entity_type, name) for name in sorted(artefacts) if 'cert' in artefacts[name]]
+
+    def status(self):
+        """
+        Retrieves information about CA hierarchy and issued certificates.
+
+        :returns: Project status.
+        :rtype: ProjectStatus
+        """
+
+        ca_certificates = [certificate for _, certificate in self.ca_hierarchy]
+
+        return ProjectStatus(ca_certificates, self.key_specification, self.get_entities('server'), self.get_entities('client'))
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import multiprocessing
+import os
+
+import cryptography.hazmat.backends
+import cryptography.hazmat.primitives.serialization
+import cryptography.x509
+
+import gimmecert.crypto
+import gimmecert.utils
+
+
+#: Maximum number of items processed by a worker process in one go.
+MAX_BATCH_SIZE = 100
+
+#: Minimum number of items processed by a worker process in one
+#: go. Worker processes are not used unless there is at least this
+#: much work for each of them.
+MIN_BATCH_SIZE = 10
+
+# Private key and DN of the issuing CA, set-up once per worker process
+# (see initialise_worker).
+_signing_key = None
+_issuer_dn = None
+
+
+def use_worker_processes(count, jobs):
+    """
+    Checks if it is worth starting worker processes for processing the
+    designated number of items.
+
+    :param count: Number of items to process.
+    :type count: int
+
+    :param jobs: Number of worker processes that would be used.
+    :type jobs: int
+
+    :returns: True if there is enough work for all worker processes, False otherwise.
+    :rtype: bool
+    """
+
+    return jobs > 1 and count >= jobs * MIN_BATCH_SIZE
+
+
+def split_into_batches(items, jobs):
+    """
+    Splits items into batches for processing by worker processes.
+    Batches are kept small enough for the work to be spread evenly
+    across the workers.
+
+    :param items: Items to split.
+    :type items: list or range
+
+    :param jobs: Number of worker processes.
+    :type jobs: int
+
+    :returns: List of batches.
+    :rtype: list
+    """
+
+    batch_size = max(MIN_BATCH_SIZE, min(MAX_BATCH_SIZE, len(items) // (jobs * 4)))
+
+    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+
+def initialise_worker(issuer_private_key_pem, issuer_dn):
+    """
+    Sets-up worker process for signing certificates. Invoked once when
+    the worker process is started, so the issuing CA private key is
+    passed-in and deserialised only once per worker.
+
+    :param issuer_private_key_pem: Private key of the issuing CA in OpenSSL-style PEM format.
+    :type issuer_private_key_pem: bytes
+
+    :param issuer_dn: Issuer DN to use in signed certificates.
+    :type issuer_dn: cryptography.x509.Name
+    """
+
+    global _signing_key, _issuer_dn
+
+    _signing_key = cryptography.hazmat.primitives.serialization.load_pem_private_key(issuer_private_key_pem, None,
+                                                                                     cryptography.hazmat.backends.default_backend())
+    _issuer_dn = issuer_dn
+
+
+def sign_batch(requests):
+    """
+    Signs a batch of certificates within a worker process set-up with
+    initialise_worker. Arguments and results are serialised, which
+    allows the function to be used with process pools.
+
+    :param requests: List of to-be-signed certificate contents, each consisting out of subject DN, public key in DER format, list of
+        (extension, criticality) pairs, and beginning and end of validity.
+    :type requests: list[(cryptography.x509.Name, bytes, list[(cryptography.x509.Extension, bool)], datetime.datetime, datetime.datetime)]
+
+    :returns: List of signed certificates in DER format.
+    :rtype: list[bytes]
+    """
+
+    backend = cryptography.hazmat.backends.default_backend()
+
+    certificates = []
+
+    for subject_dn, public_key_der, extensions, not_before, not_after in requests:
+        public_key = cryptography.hazmat.primitives.serialization.load_der_public_key(public_key_der, backend)
+        certificate = gimmecert.crypto.issue_certificate(_issuer_dn, subject_dn, _signing_key, public_key, not_before, not_after, extensions)
+        certificates.append(certificate.public_bytes(cryptography.hazmat.primitives.serialization.Encoding.DER))
+
+    return certificates
+
+
+class SigningPool:
+    """
+    Pool of worker processes signing certificates with the private key
+    of the issuing CA. Every worker deserialises the private key once,
+    when it is started, and then only receives the to-be-signed
+    certificate contents (see
+    gimmecert.crypto.CertificateIssuer.get_signing_parameters), which
+    allows signing of large number of certificates to make use of all
+    CPUs.
+
+    Worker processes are started on first use, and are kept around
+    until the pool is closed. Certificates are signed within the
+    calling process instead unless there is enough work for all of the
+    workers.
+    """
+
+    def __init__(self, issuer_private_key, issuer_certificate, jobs=None):
+        """
+        Initialises an instance.
+
+        :param issuer_private_key: Private key of the issuing CA.
+        :type issuer_private_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                                  cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey
+
+        :param issuer_certificate: Certificate of the issuing CA.
+        :type issuer_certificate: cryptography.x509.Certificate
+
+        :param jobs: Number of worker processes to use. Set to None (default) to use one worker process per CPU.
+        :type jobs: int or None
+        """
+
+        self.jobs = jobs or os.cpu_count() or 1
+        self._issuer_private_key = issuer_private_key
+        self._issuer_dn = issuer_certificate.subject
+        self._workers = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def sign(self, requests):
+        """
+        Signs certificates.
+
+        :param requests: List of to-be-signed certificate contents, as returned by gimmecert.crypto.CertificateIssuer.get_signing_parameters.
+        :type requests: list[(cryptography.x509.Name, cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey or
+            cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePublicKey, list[(cryptography.x509.Extension, bool)], datetime.datetime,
+            datetime.datetime)]
+
+        :returns: Signed certificates, in the same order as passed-in requests.
+        :rtype: list[cryptography.x509.Certificate]
+        """
+
+        # Avoid the overhead of starting worker processes (and
+        # serialisation) if they would not be of any use.
+        if not use_worker_processes(len(requests), self.jobs):
+            return [gimmecert.crypto.issue_certificate(self._issuer_dn, subject_dn, self._issuer_private_key, public_key, not_before, not_after,
+                                                       extensions)
+                    for subject_dn, public_key, extensions, not_before, not_after in requests]
+
+        if self._workers is None:
+            issuer_private_key_pem = gimmecert.utils.private_key_to_pem(self._issuer_private_key).encode()
+            self._workers = multiprocessing.Pool(self.jobs, initialise_worker, (issuer_private_key_pem, self._issuer_dn))
+
+        serialised_requests = [(subject_dn,
+                                public_key.public_bytes(cryptography.hazmat.primitives.serialization.Encoding.DER,
+                                                        cryptography.hazmat.primitives.serialization.PublicFormat.SubjectPublicKeyInfo),
+                                extensions, not_before, not_after)
+                               for subject_dn, public_key, extensions, not_before, not_after in requests]
+
+        results = self._workers.map(sign_batch, split_into_batches(serialised_requests, self.jobs))
+
+        backend = cryptography.hazmat.backends.default_backend()
+
+        return [cryptography.x509.load_der_x509_certificate(certificate_der, backend) for batch in results for certificate_der in batch]
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+
+        if self._workers is not None:
+            self._workers.close()
+            self._workers.join()
+            self._workers = None
@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import concurrent.futures
+import datetime
+import os
+import time
+
+import gimmecert.crypto
+import gimmecert.storage
+import gimmecert.utils
+
+
+#: Version of status cache format. Caches using different format are discarded.
+STATUS_CACHE_VERSION = 1
+
+#: Files modified less than this many seconds ago are not cached, since
+#: they could get modified again without any change in their stat
+#: information (due to limited timestamp granularity of file systems).
+STATUS_CACHE_RACY_INTERVAL = 2
+
+# Validity dates are cached as number of seconds since epoch (they
+# are far cheaper to convert back than date strings).
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+class EntityRecord:
+    """
+    Status information about an entity, derived from its certificate
+    and artefacts present in project directory.
+
+    :ivar entity_type: Type of entity.
+    :ivar name: Name of entity.
+    :ivar subject: Certificate subject DN in string form.
+    :ivar not_valid_before: Beginning of certificate validity.
+    :ivar not_valid_after: End of certificate validity.
+    :ivar subject_alternative_names: Subject alternative names in certificate, keyed by type (``dns``, ``ip``, ``uri``, ``email``).
+    :ivar key_algorithm: Human-readable description of certificate key algorithm.
+    :ivar private_key_file: Name of entity private key file relative to project directory, or None if there is no private key.
+    :ivar csr_file: Name of entity CSR file relative to project directory, or None if there is no CSR.
+    :ivar certificate_file: Name of entity certificate file relative to project directory.
+    """
+
+    def __init__(self, entity_type, name, subject, not_valid_before, not_valid_after, subject_alternative_names, key_algorithm,
+                 private_key_file, csr_file, certificate_file):
+        self.entity_type = entity_type
+        self.name = name
+        self.subject = subject
+        self.not_valid_before = not_valid_before
+        self.not_valid_after = not_valid_after
+        self.subject_alternative_names = subject_alternative_names
+        self.key_algorithm = key_algorithm
+        self.private_key_file = private_key_file
+        self.csr_file = csr_file
+        self.certificate_file = certificate_file
+
+    def __repr__(self):
+        return "<EntityRecord %s %s>" % (self.entity_type, self.name)
+
+
+def summarise_certificate(certificate_path):
+    """
+    Parses certificate, and derives fields shown in project status.
+
+    :param certificate_path: Path to certificate.
+    :type certificate_path: str
+
+    :returns: Subject DN in string form, beginning and end of validity, subject alternative names keyed by type, and key algorithm description.
+    :rtype: (str, datetime.datetime, datetime.datetime, dict[str, list[str]], str)
+    """
+
+    certificate = gimmecert.storage.read_certificate(certificate_path)
+
+    subject_alternative_names = {name_type: gimmecert.utils.get_subject_alternative_names(certificate, name_type)
+                                 for name_type in gimmecert.crypto.SUBJECT_ALTERNATIVE_NAME_TYPES}
+    key_algorithm = str(gimmecert.crypto.KeyGenerator(*gimmecert.crypto.key_specification_from_public_key(certificate.public_key())))
+
+    return (gimmecert.utils.dn_to_str(certificate.subject), certificate.not_valid_before, certificate.not_valid_after, subject_alternative_names,
+            key_algorithm)
+
+
+class StatusCache:
+    """
+    Caches information derived from entity certificates between runs,
+    so only new or changed certificates need to be parsed when showing
+    project status.
+
+    Entries are keyed by certificate path relative to the ``.gimmecert``
+    directory, and are considered valid for as long as the inode,
+    modification time, and size of the certificate file remain the
+    same.
+    """
+
+    def __init__(self, path):
+        """
+        Initialises an instance, loading the existing cache. Missing,
+        unreadable, or outdated caches are treated as empty.
+
+        :param path: Path to status cache file.
+        :type path: str
+        """
+
+        self._path = path
+
+        try:
+            content = gimmecert.storage.read_status_cache(path)
+        except (OSError, ValueError):
+            content = {}
+
+        if isinstance(content, dict) and content.get('version') == STATUS_CACHE_VERSION:
+            self._entries = content.get('entries', {})
+        else:
+            self._entries = {}
+
+        self._used_entries = {}
+        self._modified = False
+
+    def get(self, certificate_path, key):
+        """
+        Retrieves cached fields derived from a certificate, provided
+        the certificate has not changed since they were cached.
+
+        :param certificate_path: Path to certificate.
+        :type certificate_path: str
+
+        :param key: Key under which the information is cached (certificate path relative to ``.gimmecert`` directory).
+        :type key: str
+
+        :returns: Same as summarise_certificate, or None if certificate is not cached (or has changed).
+        :rtype: (str, datetime.datetime, datetime.datetime, dict[str, list[str]], str) or None
+        """
+
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        stat = os.stat(certificate_path)
+
+        if entry['file_state'] != [stat.st_ino, stat.st_mtime_ns, stat.st_size]:
+            return None
+
+        self._used_entries[key] = entry
+
+        return (entry['subject'],
+                _EPOCH + datetime.timedelta(seconds=entry['not_valid_before']),
+                _EPOCH + datetime.timedelta(seconds=entry['not_valid_after']),
+                entry['subject_alternative_names'],
+                entry['key_algorithm'])
+
+    def summarise_certificate(self, certificate_path, key):
+        """
+        Parses certificate, and caches the derived fields shown in
+        project status.
+
+        :param certificate_path: Path to certificate.
+        :type certificate_path: str
+
+        :param key: Key under which the information is cached (certificate path relative to ``.gimmecert`` directory).
+        :type key: str
+
+        :returns: Same as summarise_certificate.
+        :rtype: (str, datetime.datetime, datetime.datetime, dict[str, list[str]], str)
+        """
+
+        # Stat before reading, so a concurrent change results in
+        # (harmless) cache miss on next run.
+        stat = os.stat(certificate_path)
+
+        summary = summarise_certificate(certificate_path)
+        subject, not_valid_before, not_valid_after, subject_alternative_names, key_algorithm = summary
+
+        if stat.st_mtime < time.time() - STATUS_CACHE_RACY_INTERVAL:
+            self._used_entries[key] = {
+                'file_state': [stat.st_ino, stat.st_mtime_ns, stat.st_size],
+                'subject': subject,
+                'not_valid_before': int((not_valid_before - _EPOCH).total_seconds()),
+                'not_valid_after': int((not_valid_after - _EPOCH).total_seconds()),
+                'subject_alternative_names': subject_alternative_names,
+                'key_algorithm': key_algorithm,
+            }
+            self._modified = True
+
+        return summary
+
+    def save(self, entity_types):
+        """
+        Writes the cache out if it has changed. For the scanned entity
+        types, only entries used since the cache was loaded are kept,
+        which drops entries for removed certificates. Entries for all
+        other entity types are kept as they are.
+
+        Failure to write the cache (for example due to read-only
+        project directory) is ignored.
+
+        :param entity_types: Types of entities that have been scanned.
+        :type entity_types: list[str]
+        """
+
+        entries = {key: entry for key, entry in self._entries.items() if key.split('/', 1)[0] not in entity_types}
+        entries.update(self._used_entries)
+
+        if not self._modified and entries.keys() == self._entries.keys():
+            return
+
+        try:
+            gimmecert.storage.write_status_cache({'version': STATUS_CACHE_VERSION, 'entries': entries}, self._path)
+        except OSError:
+            pass
+
+
+def get_entity_record(project_directory, entity_type, name, summary=None, artefacts=None):
+    """
+    Produces status record for an entity.
+
+    :param project_directory: Path to project directory.
+    :type project_directory: str
+
+    :param entity_type: Type of entity.
+    :type entity_type: str
+
+    :param name: Name of entity.
+    :type name: str
+
+    :param summary: Fields derived from entity certificate (as returned by summarise_certificate). If None, certificate is parsed.
+    :type summary: (str, datetime.datetime, datetime.datetime, dict[str, list[str]], str) or None
+
+    :param artefacts: Kinds of artefacts present for entity (see gimmecert.storage.scan_entity_artefacts). If None, presence of private key
+        and CSR is checked for individually.
+    :type artefacts: set[str] or None
+
+    :returns: Entity status record.
+    :rtype: EntityRecord
+    """
+
+    base_directory = os.path.join(project_directory, '.gimmecert')
+
+    private_key_file = '%s/%s.key.pem' % (entity_type, name)
+    csr_file = '%s/%s.csr.pem' % (entity_type, name)
+    certificate_file = '%s/%s.cert.pem' % (entity_type, name)
+
+    if summary is None:
+        summary = summarise_certificate(os.path.join(base_directory, entity_type, '%s.cert.pem' % name))
+
+    subject, not_valid_before, not_valid_after, subject_alternative_names, key_algorithm = summary
+
+    if artefacts is None:
+        artefacts = {kind for kind in ['key', 'csr'] if os.path.exists(os.path.join(base_directory, entity_type, '%s.%s.pem' % (name, kind)))}
+
+    if 'key' in artefacts:
+        csr_file = None
+    elif 'csr' in artefacts:
+        private_key_file = None
+    else:
+        private_key_file = csr_file = None
+
+    return EntityRecord(entity_type, name, subject, not_valid_before, not_valid_after, subject_alternative_names, key_algorithm,
+                        private_key_file, csr_file, certificate_file)
+
+
+def collect_entity_records(project_directory, entity_types, jobs=None, use_cache=True):
+    """
+    Collects status records for all entities of designated types in a
+    single pass. Certificates are parsed using a thread pool (parsing
+    is performed by the cryptography backend, which does not hold the
+    GIL while doing so).
+
+    Information derived from certificates is cached in project
+    directory (``.gimmecert/cache/status.json``), and only new or
+    changed certificates get parsed.
+
+    :param project_directory: Path to project directory.
+    :type project_directory: str
+
+    :param entity_types: Types of entities to collect records for.
+    :type entity_types: list[str]
+
+    :param jobs: Number of worker threads to use for parsing certificates. Set to None (default) to use one worker per CPU.
+    :type jobs: int or None
+
+    :param use_cache: Specify whether status cache should be used and updated.
+    :type use_cache: bool
+
+    :returns: Entity records, sorted by entity type (in the order they were passed-in), and then by name.
+    :rtype: list[EntityRecord]
+    """
+
+    entities = []
+    artefacts = {}
+
+    # Single scan per directory discovers both the entities and their
+    # private keys/CSRs.
+    for entity_type in entity_types:
+        artefacts[entity_type] = gimmecert.storage.scan_entity_artefacts(os.path.join(project_directory, '.gimmecert', entity_type))
+        entities.extend((entity_type, name) for name in sorted(artefacts[entity_type]) if 'cert' in artefacts[entity_type][name])
+
+    cache = StatusCache(os.path.join(project_directory, '.gimmecert', 'cache', 'status.json')) if use_cache else None
+
+    def get_certificate_path(entity):
+        return os.path.join(project_directory, '.gimmecert', entity[0], '%s.cert.pem' % entity[1])
+
+    def summarise(entity):
+        if cache is None:
+            return summarise_certificate(get_certificate_path(entity))
+        return cache.summarise_certificate(get_certificate_path(entity), '%s/%s.cert.pem' % entity)
+
+    # Cache lookups are cheap, so only the certificates that actually
+    # need to be parsed get handed off to worker threads.
+    if cache is None:
+        summaries = {}
+    else:
+        summaries = {entity: cache.get(get_certificate_path(entity), '%s/%s.cert.pem' % entity) for entity in entities}
+
+    missing = [entity for entity in entities if summaries.get(entity) is None]
+
+    # Avoid the overhead of starting worker threads if they would not be of any use.
+    if jobs == 1 or len(missing) < 2:
+        summaries.update((entity, summarise(entity)) for entity in missing)
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+            summaries.update(zip(missing, executor.map(summarise, missing)))
+
+    if cache is not None:
+        cache.save(entity_types)
+
+    return [get_entity_record(project_directory, entity_type, name, summaries[(entity_type, name)], artefacts[entity_type][name])
+            for entity_type, name in entities]
@@ -19,7 +19,14 @@
 #
 
 
+import collections
+import datetime
+import io
+import json
 import os
+import tarfile
+import tempfile
+import time
 
 import cryptography.x509
 import cryptography.hazmat.primitives.serialization
@@ -27,7 +34,15 @@ import cryptography.hazmat.primitives.serialization
 import gimmecert.utils
 
 
-def initialise_storage(project_directory):
+#: Kinds of entity artefacts, mapped to their file name suffixes.
+ENTITY_ARTEFACT_SUFFIXES = collections.OrderedDict([
+    ('key', '.key.pem'),
+    ('csr', '.csr.pem'),
+    ('cert', '.cert.pem'),
+])
+
+
+def initialise_storage(project_directory, ca_directory=None):
     """
     Initialises certificate storage in the given project directory.
 
@@ -38,16 +53,45 @@ def initialise_storage(project_directory):
     - .gimmcert/
     - .gimmcert/ca/
 
+    If CA directory is passed-in, ``.gimmecert/ca/`` is created as a
+    symbolic link to it instead, making it possible to share a single
+    CA hierarchy between multiple projects.
+
     :param project_directory: Path to directory under which the storage should be initialised.
     :type project_directory: str
+
+    :param ca_directory: Path to existing directory with CA hierarchy. Set to None (default) to create an empty CA directory.
+    :type ca_directory: str or None
     """
 
     os.mkdir(os.path.join(project_directory, '.gimmecert'))
-    os.mkdir(os.path.join(project_directory, '.gimmecert', 'ca'))
+
+    if ca_directory is None:
+        os.mkdir(os.path.join(project_directory, '.gimmecert', 'ca'))
+    else:
+        os.symlink(os.path.realpath(ca_directory), os.path.join(project_directory, '.gimmecert', 'ca'), target_is_directory=True)
+
     os.mkdir(os.path.join(project_directory, '.gimmecert', 'server'))
     os.mkdir(os.path.join(project_directory, '.gimmecert', 'client'))
 
 
+def get_ca_store_directory():
+    """
+    Returns path to directory holding shared CA hierarchies. The
+    directory is located under the XDG data directory
+    (``$XDG_DATA_HOME/gimmecert``, defaulting to
+    ``~/.local/share/gimmecert``). Each shared CA hierarchy is stored
+    as a separate project within the directory.
+
+    :returns: Path to CA store directory.
+    :rtype: str
+    """
+
+    data_directory = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+
+    return os.path.join(data_directory, 'gimmecert')
+
+
 def write_private_key(private_key, path):
     """
     Writes the passed-in private key to designated path in
@@ -135,19 +179,25 @@ def read_ca_hierarchy(ca_directory):
     Only private key and certificate files that conform to naming
     pattern 'levelN.key.pem' and 'levelN.cert.pem' will be read.
 
+    Private keys are allowed to be missing for all CAs except the last
+    one (as is the case with sub-CA directories, which include only
+    certificates of the parent CAs). Private key is set to None for
+    such CAs.
+
     :param ca_directory: Path to directory containing the CA artifacts (private keys and certificates).
     :type ca_directory: str
 
     :returns: List of private key/certificate pairs, starting with the level 1 CA and moving down the chain to leaf CA.
     :rtype: list[(cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
-                  cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey, cryptography.x509.Certificate)]
+                  cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey or None, cryptography.x509.Certificate)]
     """
 
     ca_hierarchy = []
 
     level = 1
-    while os.path.exists(os.path.join(ca_directory, "level%d.key.pem" % level)) and os.path.exists(os.path.join(ca_directory, "level%d.cert.pem" % level)):
-        private_key = read_private_key(os.path.join(ca_directory, 'level%d.key.pem' % level))
+    while os.path.exists(os.path.join(ca_directory, "level%d.cert.pem" % level)):
+        private_key_path = os.path.join(ca_directory, 'level%d.key.pem' % level)
+        private_key = read_private_key(private_key_path) if os.path.exists(private_key_path) else None
         certificate = read_certificate(os.path.join(ca_directory, 'level%d.cert.pem' % level))
         ca_hierarchy.append((private_key, certificate))
         level = level + 1
@@ -155,6 +205,29 @@ def read_ca_hierarchy(ca_directory):
     return ca_hierarchy
 
 
+def get_ca_directory(path):
+    """
+    Locates directory with CA hierarchy at the passed-in path. The
+    path can point either to an initialised project directory, or
+    directly to a directory with CA hierarchy (such as sub-CA
+    directory).
+
+    :param path: Path to project directory or directory with CA hierarchy.
+    :type path: str
+
+    :returns: Path to directory with CA hierarchy, or None if no CA hierarchy could be found.
+    :rtype: str or None
+    """
+
+    if is_initialised(path):
+        return os.path.join(path, '.gimmecert', 'ca')
+
+    if os.path.exists(os.path.join(path, 'level1.cert.pem')):
+        return path
+
+    return None
+
+
 def read_private_key(private_key_path):
     """
     Reads RSA private key from the designated path. The key should be
@@ -237,3 +310,776 @@ def read_csr(csr_path):
         )
 
     return csr
+
+
+def write_pkcs12(pkcs12_bundle, path):
+    """
+    Writes the passed-in PKCS#12 bundle to designated path. Bundle
+    may contain private key, so permissions are restricted to the
+    owner.
+
+    :param pkcs12_bundle: PKCS#12 bundle in DER format.
+    :type pkcs12_bundle: bytes
+
+    :param path: File path where the bundle should be written.
+    :type path: str
+    """
+
+    file_descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+
+    # Permissions of existing file are not changed by os.open.
+    os.chmod(path, 0o600)
+
+    with os.fdopen(file_descriptor, 'wb') as pkcs12_file:
+        pkcs12_file.write(pkcs12_bundle)
+
+
+def scan_entity_artefacts(directory):
+    """
+    Discovers entity artefacts (private keys, CSRs, and certificates)
+    within a directory using a single directory scan, without
+    checking for presence of individual files.
+
+    :param directory: Path to directory to scan.
+    :type directory: str
+
+    :returns: Mapping between entity names and kinds of artefacts present for them (``key``, ``csr``, ``cert``). Empty mapping is returned if
+        directory does not exist.
+    :rtype: dict[str, set[str]]
+    """
+
+    artefacts = {}
+
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return artefacts
+
+    for entry in entries:
+        for kind, suffix in ENTITY_ARTEFACT_SUFFIXES.items():
+            if entry.name.endswith(suffix):
+                artefacts.setdefault(entry.name[:-len(suffix)], set()).add(kind)
+                break
+
+    return artefacts
+
+
+def write_file_atomically(content, path):
+    """
+    Writes the passed-in content to designated path, atomically
+    replacing the existing file (if any). Parent directories are
+    created if necessary.
+
+    Content is first written to a temporary file within the same
+    directory, which is then renamed to the designated path. This
+    ensures that readers never see a partially written file.
+
+    :param content: Content to write.
+    :type content: bytes
+
+    :param path: File path where the content should be written.
+    :type path: str
+    """
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix='.gimmecert-')
+
+    try:
+        with os.fdopen(file_descriptor, 'wb') as temporary_file:
+            temporary_file.write(content)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def read_sync_manifest(manifest_path):
+    """
+    Reads synchronisation manifest from the designated path. The
+    manifest keeps track of files written out during synchronisation
+    of artefacts to target directory.
+
+    :param manifest_path: Path to manifest file.
+    :type manifest_path: str
+
+    :returns: Manifest entries, mapping target file paths (relative to target directory) to information about synchronised content. Empty
+        dictionary is returned if manifest does not exist.
+    :rtype: dict[str, dict]
+    """
+
+    if not os.path.exists(manifest_path):
+        return {}
+
+    with open(manifest_path, 'r') as manifest_file:
+        manifest = json.load(manifest_file)
+
+    return manifest
+
+
+def write_sync_manifest(manifest, manifest_path):
+    """
+    Atomically writes synchronisation manifest to the designated path.
+
+    :param manifest: Manifest entries, mapping target file paths (relative to target directory) to information about synchronised content.
+    :type manifest: dict[str, dict]
+
+    :param manifest_path: Path to manifest file.
+    :type manifest_path: str
+    """
+
+    write_file_atomically(json.dumps(manifest, indent=2, sort_keys=True).encode(), manifest_path)
+
+
+def read_status_cache(status_cache_path):
+    """
+    Reads status cache from the designated path. The cache keeps track
+    of information derived from entity certificates, so unchanged
+    certificates do not need to be parsed again when showing project
+    status.
+
+    :param status_cache_path: Path to status cache file.
+    :type status_cache_path: str
+
+    :returns: Status cache content. Empty dictionary is returned if cache does not exist.
+    :rtype: dict
+    """
+
+    if not os.path.exists(status_cache_path):
+        return {}
+
+    with open(status_cache_path, 'r') as status_cache_file:
+        status_cache = json.load(status_cache_file)
+
+    return status_cache
+
+
+def write_status_cache(status_cache, status_cache_path):
+    """
+    Atomically writes status cache to the designated path. Parent
+    directory is created if necessary.
+
+    :param status_cache: Status cache content.
+    :type status_cache: dict
+
+    :param status_cache_path: Path to status cache file.
+    :type status_cache_path: str
+    """
+
+    write_file_atomically(json.dumps(status_cache, sort_keys=True, separators=(',', ':')).encode(), status_cache_path)
+
+
+def append_revocation(revocation_journal_path, serial_number, revocation_date, entity_type, entity_name):
+    """
+    Appends a revoked certificate to the revocation journal. The
+    journal is a plain-text file, with one line per revoked
+    certificate, in format ``SERIAL DATE TYPE NAME`` (serial number is
+    in hexadecimal format, date is in ISO 8601 format).
+
+    :param revocation_journal_path: Path to the revocation journal. Created if it does not exist.
+    :type revocation_journal_path: str
+
+    :param serial_number: Serial number of revoked certificate.
+    :type serial_number: int
+
+    :param revocation_date: Date of revocation in UTC.
+    :type revocation_date: datetime.datetime
+
+    :param entity_type: Type of entity the certificate belonged to.
+    :type entity_type: str
+
+    :param entity_name: Name of entity the certificate belonged to.
+    :type entity_name: str
+    """
+
+    with open(revocation_journal_path, 'a') as revocation_journal_file:
+        revocation_journal_file.write("%x %s %s %s\n" % (serial_number, revocation_date.strftime("%Y-%m-%dT%H:%M:%S"), entity_type, entity_name))
+
+
+def read_revocations(revocation_journal_path):
+    """
+    Reads revoked certificates from the revocation journal, in order
+    of revocation.
+
+    :param revocation_journal_path: Path to the revocation journal.
+    :type revocation_journal_path: str
+
+    :returns: List of revoked certificates, with their serial number, revocation date, entity type, and entity name. Empty list is
+        returned if journal does not exist.
+    :rtype: list[(int, datetime.datetime, str, str)]
+    """
+
+    revocations = []
+
+    if not os.path.exists(revocation_journal_path):
+        return revocations
+
+    with open(revocation_journal_path, 'r') as revocation_journal_file:
+        for line in revocation_journal_file:
+            serial_number, revocation_date, entity_type, entity_name = line.rstrip('\n').split(' ', 3)
+            revocations.append((int(serial_number, 16), datetime.datetime.strptime(revocation_date, "%Y-%m-%dT%H:%M:%S"), entity_type, entity_name))
+
+    return revocations
+
+
+def read_crl_state(crl_state_path):
+    """
+    Reads CRL issuance state from the designated path. State keeps
+    track of last issued CRL number, last issued full (base) CRL
+    number, and number of revocation journal entries covered by the
+    base CRL.
+
+    :param crl_state_path: Path to CRL state file.
+    :type crl_state_path: str
+
+    :returns: CRL issuance state. If state file does not exist, state with no issued CRLs is returned.
+    :rtype: dict[str, int or None]
+    """
+
+    if not os.path.exists(crl_state_path):
+        return {'crl_number': 0, 'base_crl_number': None, 'base_revocation_count': 0}
+
+    with open(crl_state_path, 'r') as crl_state_file:
+        crl_state = json.load(crl_state_file)
+
+    return crl_state
+
+
+def write_crl_state(crl_state, crl_state_path):
+    """
+    Atomically writes CRL issuance state to the designated path.
+
+    :param crl_state: CRL issuance state.
+    :type crl_state: dict[str, int or None]
+
+    :param crl_state_path: Path to CRL state file.
+    :type crl_state_path: str
+    """
+
+    write_file_atomically(json.dumps(crl_state, indent=2, sort_keys=True).encode(), crl_state_path)
+
+
+def write_crl(crl, path):
+    """
+    Writes the passed-in certificate revocation list to designated
+    path in OpenSSL-style PEM format.
+
+    :param crl: CRL that should be written-out.
+    :type crl: cryptography.x509.CertificateRevocationList
+
+    :param path: File path where the CRL should be written.
+    :type path: str
+    """
+
+    crl_pem = crl.public_bytes(encoding=cryptography.hazmat.primitives.serialization.Encoding.PEM)
+
+    write_file_atomically(crl_pem, path)
+
+
+class FilesystemStorage:
+    """
+    Stores project artefacts as files under the ``.gimmecert``
+    directory within the project directory.
+
+    Artefacts are referred to using names relative to the
+    ``.gimmecert`` directory (for example ``server/myserver.cert.pem``),
+    and are (de)serialised based on their suffix.
+    """
+
+    def __init__(self, project_directory):
+        """
+        Initialises an instance.
+
+        :param project_directory: Path to project directory.
+        :type project_directory: str
+        """
+
+        self.project_directory = project_directory
+
+    def get_path(self, name):
+        """
+        Returns path to an artefact.
+
+        :param name: Name of artefact.
+        :type name: str
+
+        :returns: Path to artefact file.
+        :rtype: str
+        """
+
+        return os.path.join(self.project_directory, '.gimmecert', *name.split('/'))
+
+    def initialise(self, ca_directory=None):
+        """
+        Initialises the storage. See initialise_storage for details.
+        """
+
+        initialise_storage(self.project_directory, ca_directory)
+
+    def is_initialised(self):
+        """
+        Checks if storage has been initialised.
+
+        :returns: True if storage has been initialised, False otherwise.
+        :rtype: bool
+        """
+
+        return is_initialised(self.project_directory)
+
+    def exists(self, name):
+        """
+        Checks if an artefact exists.
+
+        :param name: Name of artefact.
+        :type name: str
+
+        :returns: True if artefact exists, False otherwise.
+        :rtype: bool
+        """
+
+        return os.path.exists(self.get_path(name))
+
+    def read(self, name):
+        """
+        Reads an artefact. Supported artefacts are private keys
+        (``.key.pem``), certificates (``.cert.pem``), and CSRs
+        (``.csr.pem``).
+
+        :param name: Name of artefact.
+        :type name: str
+
+        :returns: Artefact object.
+        :rtype: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey or
+                cryptography.x509.Certificate or cryptography.x509.CertificateSigningRequest
+        """
+
+        if name.endswith('.key.pem'):
+            return read_private_key(self.get_path(name))
+        elif name.endswith('.csr.pem'):
+            return read_csr(self.get_path(name))
+
+        return read_certificate(self.get_path(name))
+
+    def write(self, artefact, name):
+        """
+        Writes an artefact. Supported artefacts are private keys
+        (``.key.pem``), certificates and certificate chains
+        (``.cert.pem``), and CSRs (``.csr.pem``).
+
+        :param artefact: Artefact object. Certificate chains are passed-in as lists of certificates.
+        :type artefact: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                        cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey or
+                        cryptography.x509.Certificate or cryptography.x509.CertificateSigningRequest or
+                        list[cryptography.x509.Certificate]
+
+        :param name: Name of artefact.
+        :type name: str
+        """
+
+        if name.endswith('.key.pem'):
+            # Private key may be shared with other entities (see link),
+            # so it must be replaced instead of being modified in place.
+            if os.path.lexists(self.get_path(name)):
+                os.remove(self.get_path(name))
+            write_private_key(artefact, self.get_path(name))
+        elif name.endswith('.csr.pem'):
+            write_csr(artefact, self.get_path(name))
+        elif isinstance(artefact, list):
+            write_certificate_chain(artefact, self.get_path(name))
+        else:
+            write_certificate(artefact, self.get_path(name))
+
+    def link(self, source_name, name):
+        """
+        Makes an existing artefact available under another name as
+        well, without copying it. Hard link is used if possible,
+        falling back to a (relative) symbolic link otherwise.
+
+        :param source_name: Name of existing artefact.
+        :type source_name: str
+
+        :param name: Name under which the artefact should be available.
+        :type name: str
+        """
+
+        source_path, path = self.get_path(source_name), self.get_path(name)
+
+        try:
+            os.link(source_path, path)
+        except OSError:
+            os.symlink(os.path.relpath(source_path, os.path.dirname(path)), path)
+
+    def remove(self, name):
+        """
+        Removes an artefact.
+
+        :param name: Name of artefact.
+        :type name: str
+        """
+
+        os.remove(self.get_path(name))
+
+    def list(self, directory, suffix):
+        """
+        Lists artefacts within a directory.
+
+        :param directory: Directory to list, for example ``server``.
+        :type directory: str
+
+        :param suffix: Suffix of artefacts to list, for example ``.cert.pem``.
+        :type suffix: str
+
+        :returns: Sorted list of artefact names without the directory and suffix.
+        :rtype: list[str]
+        """
+
+        return sorted(f[:-len(suffix)] for f in os.listdir(self.get_path(directory)) if f.endswith(suffix))
+
+    def scan(self, directory):
+        """
+        Discovers entity artefacts within a directory. See
+        scan_entity_artefacts for details.
+
+        :param directory: Directory to scan, for example ``server``.
+        :type directory: str
+
+        :returns: Mapping between entity names and kinds of artefacts present for them (``key``, ``csr``, ``cert``).
+        :rtype: dict[str, set[str]]
+        """
+
+        return scan_entity_artefacts(self.get_path(directory))
+
+    def create_directory(self, name):
+        """
+        Creates a directory for storing artefacts (including any
+        missing parent directories).
+
+        :param name: Name of directory, for example ``subca/myca``.
+        :type name: str
+        """
+
+        os.makedirs(self.get_path(name), exist_ok=True)
+
+    def read_ca_hierarchy(self):
+        """
+        Reads CA hierarchy. See read_ca_hierarchy for details.
+        """
+
+        return read_ca_hierarchy(self.get_path('ca'))
+
+
+class MemoryStorage:
+    """
+    Keeps project artefacts in memory (as objects), without performing
+    any filesystem operations. Provides same interface as
+    FilesystemStorage, with artefacts having no paths.
+    """
+
+    def __init__(self):
+        """
+        Initialises an instance.
+        """
+
+        self.project_directory = None
+        self._artefacts = None
+
+    def get_path(self, name):
+        """
+        Returns None, since artefacts are not stored in files.
+        """
+
+        return None
+
+    def initialise(self):
+        """
+        Initialises the storage.
+        """
+
+        self._artefacts = {}
+
+    def is_initialised(self):
+        """
+        Checks if storage has been initialised.
+
+        :returns: True if storage has been initialised, False otherwise.
+        :rtype: bool
+        """
+
+        return self._artefacts is not None
+
+    def exists(self, name):
+        """
+        Checks if an artefact exists.
+
+        :param name: Name of artefact.
+        :type name: str
+
+        :returns: True if artefact exists, False otherwise.
+        :rtype: bool
+        """
+
+        return name in self._artefacts
+
+    def read(self, name):
+        """
+        Reads an artefact.
+
+        :param name: Name of artefact.
+        :type name: str
+
+        :returns: Artefact object.
+        :rtype: object
+
+        :raises KeyError: If artefact does not exist.
+        """
+
+        return self._artefacts[name]
+
+    def write(self, artefact, name):
+        """
+        Writes an artefact.
+
+        :param artefact: Artefact object.
+        :type artefact: object
+
+        :param name: Name of artefact.
+        :type name: str
+        """
+
+        self._artefacts[name] = artefact
+
+    def link(self, source_name, name):
+        """
+        Makes an existing artefact available under another name as
+        well, without copying it.
+
+        :param source_name: Name of existing artefact.
+        :type source_name: str
+
+        :param name: Name under which the artefact should be available.
+        :type name: str
+        """
+
+        self._artefacts[name] = self._artefacts[source_name]
+
+    def remove(self, name):
+        """
+        Removes an artefact.
+
+        :param name: Name of artefact.
+        :type name: str
+        """
+
+        del self._artefacts[name]
+
+    def list(self, directory, suffix):
+        """
+        Lists artefacts within a directory.
+
+        :param directory: Directory to list, for example ``server``.
+        :type directory: str
+
+        :param suffix: Suffix of artefacts to list, for example ``.cert.pem``.
+        :type suffix: str
+
+        :returns: Sorted list of artefact names without the directory and suffix.
+        :rtype: list[str]
+        """
+
+        prefix = directory + '/'
+
+        return sorted(n[len(prefix):-len(suffix)] for n in self._artefacts if n.startswith(prefix) and n.endswith(suffix))
+
+    def scan(self, directory):
+        """
+        Discovers entity artefacts within a directory.
+
+        :param directory: Directory to scan, for example ``server``.
+        :type directory: str
+
+        :returns: Mapping between entity names and kinds of artefacts present for them (``key``, ``csr``, ``cert``).
+        :rtype: dict[str, set[str]]
+        """
+
+        prefix = directory + '/'
+        artefacts = {}
+
+        for name in self._artefacts:
+            if not name.startswith(prefix) or '/' in name[len(prefix):]:
+                continue
+
+            for kind, suffix in ENTITY_ARTEFACT_SUFFIXES.items():
+                if name.endswith(suffix):
+                    artefacts.setdefault(name[len(prefix):-len(suffix)], set()).add(kind)
+                    break
+
+        return artefacts
+
+    def create_directory(self, name):
+        """
+        Does nothing, since artefacts are not stored in files.
+        """
+
+        pass
+
+    def read_ca_hierarchy(self):
+        """
+        Reads CA hierarchy.
+
+        :returns: List of private key/certificate pairs, starting with the level 1 CA and moving down the chain to leaf CA.
+        :rtype: list[(cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                      cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey, cryptography.x509.Certificate)]
+        """
+
+        ca_hierarchy = []
+
+        level = 1
+        while self.exists('ca/level%d.key.pem' % level) and self.exists('ca/level%d.cert.pem' % level):
+            ca_hierarchy.append((self.read('ca/level%d.key.pem' % level), self.read('ca/level%d.cert.pem' % level)))
+            level = level + 1
+
+        return ca_hierarchy
+
+
+def artefact_to_pem(artefact, name):
+    """
+    Serialises an artefact into OpenSSL-style PEM format. Type of
+    artefact is determined based on its name, in the same way as
+    within the storage backends.
+
+    :param artefact: Artefact object. Certificate chains are passed-in as lists of certificates.
+    :type artefact: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                    cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey or
+                    cryptography.x509.Certificate or cryptography.x509.CertificateSigningRequest or
+                    list[cryptography.x509.Certificate]
+
+    :param name: Name of artefact.
+    :type name: str
+
+    :returns: Artefact in OpenSSL-style PEM format.
+    :rtype: str
+    """
+
+    if name.endswith('.key.pem'):
+        return gimmecert.utils.private_key_to_pem(artefact)
+    elif name.endswith('.csr.pem'):
+        return gimmecert.utils.csr_to_pem(artefact)
+    elif isinstance(artefact, list):
+        return "\n".join([gimmecert.utils.certificate_to_pem(certificate) for certificate in artefact])
+
+    return gimmecert.utils.certificate_to_pem(artefact)
+
+
+class TarArchive:
+    """
+    Streams artefacts into a tar archive as they are added, without
+    creating any intermediate files. Private keys and PKCS#12 bundles
+    are added with permissions restricted to the owner.
+    """
+
+    def __init__(self, stream):
+        """
+        Initialises an instance.
+
+        :param stream: Binary output stream where the archive should be written-out. Stream is not closed together with the archive.
+        :type stream: io.IOBase
+        """
+
+        self._stream = stream
+        self._tar = tarfile.open(fileobj=stream, mode='w|')
+
+    def add(self, content, name):
+        """
+        Adds file to archive.
+
+        :param content: Content of file.
+        :type content: bytes
+
+        :param name: Name of file within the archive.
+        :type name: str
+        """
+
+        info = tarfile.TarInfo(name)
+        info.size = len(content)
+        info.mtime = int(time.time())
+        info.mode = 0o600 if name.endswith('.key.pem') or name.endswith('.p12') else 0o644
+
+        self._tar.addfile(info, io.BytesIO(content))
+
+    def add_artefact(self, artefact, name):
+        """
+        Adds artefact to archive in OpenSSL-style PEM format. See
+        artefact_to_pem for supported artefacts.
+
+        :param artefact: Artefact object.
+        :type artefact: object
+
+        :param name: Name of artefact, used as file name within the archive.
+        :type name: str
+        """
+
+        self.add(artefact_to_pem(artefact, name).encode(), name)
+
+    def close(self):
+        """
+        Finalises the archive, and flushes the output stream.
+        """
+
+        self._tar.close()
+        self._stream.flush()
+
+
+class ArchivingStorage:
+    """
+    Wraps another storage backend, adding every artefact written to
+    the wrapped storage into an archive as well. All other operations
+    are passed-through to the wrapped storage.
+    """
+
+    def __init__(self, storage, archive):
+        """
+        Initialises an instance.
+
+        :param storage: Storage backend to wrap.
+        :type storage: FilesystemStorage or MemoryStorage
+
+        :param archive: Archive to add the written artefacts to.
+        :type archive: TarArchive
+        """
+
+        self._storage = storage
+        self._archive = archive
+
+    def __getattr__(self, name):
+        return getattr(self._storage, name)
+
+    def write(self, artefact, name):
+        """
+        Writes an artefact to wrapped storage, and adds it to the archive.
+
+        :param artefact: Artefact object.
+        :type artefact: object
+
+        :param name: Name of artefact.
+        :type name: str
+        """
+
+        self._storage.write(artefact, name)
+        self._archive.add_artefact(artefact, name)
+
+    def link(self, source_name, name):
+        """
+        Links an artefact in wrapped storage, and adds it to the
+        archive under the new name.
+
+        :param source_name: Name of existing artefact.
+        :type source_name: str
+
+        :param name: Name under which the artefact should be available.
+        :type name: str
+        """
+
+        self._storage.link(source_name, name)
+        self._archive.add_artefact(self._storage.read(name), name)
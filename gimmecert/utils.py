@@ -19,7 +19,24 @@
 #
 
 
+import datetime
+import re
+
 import cryptography.hazmat
+from cryptography.hazmat.primitives.asymmetric import ec
+
+import gimmecert.crypto
+
+
+#: Elliptic curves supported in key specifications, mapped by name.
+CURVES = {
+    "secp192r1": ec.SECP192R1,
+    "secp224r1": ec.SECP224R1,
+    "secp256k1": ec.SECP256K1,
+    "secp256r1": ec.SECP256R1,
+    "secp384r1": ec.SECP384R1,
+    "secp521r1": ec.SECP521R1,
+}
 
 
 class UnsupportedField(Exception):
@@ -46,6 +63,44 @@ def certificate_to_pem(certificate):
     return certificate_pem.decode()
 
 
+def private_key_to_pem(private_key):
+    """
+    Converts private key object to OpenSSL-style PEM format. The
+    private key is serialised without any encryption.
+
+    :param private_key: Private key that should be converted to OpenSSL-style PEM format.
+    :type private_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                       cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey
+
+    :returns: Private key in OpenSSL-style PEM format.
+    :rtype: str
+    """
+
+    private_key_pem = private_key.private_bytes(
+        encoding=cryptography.hazmat.primitives.serialization.Encoding.PEM,
+        format=cryptography.hazmat.primitives.serialization.PrivateFormat.TraditionalOpenSSL,
+        encryption_algorithm=cryptography.hazmat.primitives.serialization.NoEncryption()
+    )
+
+    return private_key_pem.decode()
+
+
+def csr_to_pem(csr):
+    """
+    Converts CSR object to OpenSSL-style PEM format.
+
+    :param csr: CSR that should be converted to OpenSSL-style PEM format.
+    :type csr: cryptography.x509.CertificateSigningRequest
+
+    :returns: CSR in OpenSSL-style PEM format.
+    :rtype: str
+    """
+
+    csr_pem = csr.public_bytes(encoding=cryptography.hazmat.primitives.serialization.Encoding.PEM)
+
+    return csr_pem.decode()
+
+
 def dn_to_str(dn):
     """
     Converts passed-in DN to a human-readable OpenSSL-style string
@@ -93,6 +148,31 @@ def date_range_to_str(start, end):
     return "%s - %s" % (start.strftime(date_format), end.strftime(date_format))
 
 
+def duration_to_str(seconds):
+    """
+    Converts the provided duration into a human-readable string.
+
+    :param seconds: Duration in seconds.
+    :type seconds: float
+
+    :returns: String representation of duration, for example ``0.25ms``, ``2.5s``, ``2m 5s``, or ``1h 30m``.
+    :rtype: str
+    """
+
+    if seconds < 1:
+        return "%.2fms" % (seconds * 1000)
+
+    if seconds < 60:
+        return "%.1fs" % seconds
+
+    seconds = int(round(seconds))
+
+    if seconds < 60 * 60:
+        return "%dm %ds" % (seconds // 60, seconds % 60)
+
+    return "%dh %dm" % (seconds // 3600, seconds % 3600 // 60)
+
+
 def get_dns_names(certificate):
     """
     Retrieves list of DNS subject alternative names from certificate.
@@ -113,6 +193,29 @@ def get_dns_names(certificate):
     return dns_names
 
 
+def get_subject_alternative_names(certificate, name_type):
+    """
+    Retrieves list of subject alternative names of designated type from
+    certificate.
+
+    :param certificate: Certificate to process.
+    :type certificate: cryptography.x509.Certificate
+
+    :param name_type: Type of subject alternative names to retrieve. See gimmecert.crypto.SUBJECT_ALTERNATIVE_NAME_TYPES for supported values.
+    :type name_type: str
+
+    :returns: List of subject alternative names (in string form) extracted from the certificate.
+    :rtype: list[str]
+    """
+
+    try:
+        subject_alternative_name = certificate.extensions.get_extension_for_class(cryptography.x509.SubjectAlternativeName).value
+    except cryptography.x509.extensions.ExtensionNotFound:
+        return []
+
+    return [str(name) for name in subject_alternative_name.get_values_for_type(gimmecert.crypto.SUBJECT_ALTERNATIVE_NAME_TYPES[name_type])]
+
+
 def read_input(input_stream, prompt_stream, prompt):
     """
     Reads input from the passed-in input stream until Ctrl-D sequence
@@ -161,3 +264,87 @@ def csr_from_pem(csr_pem):
     )
 
     return csr
+
+
+def parse_key_specification(specification):
+    """
+    Parses the passed-in key specification.
+
+    :param specification: Key specification. Currently supported formats are: "rsa:KEY_SIZE" and "ecdsa:CURVE_NAME".
+    :type specification: str
+
+    :returns: Parsed key algorithm and parameter(s) for the algorithm. For RSA, parameter is the RSA key size.
+    :rtype: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+    :raises ValueError: If passed-in specification is invalid.
+    """
+
+    try:
+        algorithm, parameters = specification.split(":", 2)
+        algorithm = algorithm.lower()
+
+        if algorithm == "rsa":
+            parameters = int(parameters)
+        elif algorithm == "ecdsa":
+            parameters = str(parameters).lower()
+            parameters = CURVES[parameters]
+        else:
+            raise ValueError()
+
+    except (ValueError, KeyError):
+        raise ValueError("Invalid key specification: '%s'" % specification)
+
+    return algorithm, parameters
+
+
+def key_specification_to_str(key_specification):
+    """
+    Converts key specification into string, in format accepted by
+    parse_key_specification.
+
+    :param key_specification: Key specification.
+    :type key_specification: tuple(str, int or cryptography.hazmat.primitives.asymmetric.ec.EllipticCurve)
+
+    :returns: Key specification string, for example ``rsa:2048`` or ``ecdsa:secp256r1``.
+    :rtype: str
+    """
+
+    algorithm, parameters = key_specification
+
+    if algorithm == "rsa":
+        return "rsa:%d" % parameters
+
+    return "ecdsa:%s" % parameters.name
+
+
+def parse_duration(value):
+    """
+    Parses the passed-in duration.
+
+    Duration is specified as a non-negative integer, followed by an
+    optional unit - ``s`` (seconds, default), ``m`` (minutes), ``h``
+    (hours), ``d`` (days), or ``w`` (weeks).
+
+    :param value: Duration specification, for example ``15m``.
+    :type value: str
+
+    :returns: Parsed duration.
+    :rtype: datetime.timedelta
+
+    :raises ValueError: If passed-in duration is invalid.
+    """
+
+    units = {
+        's': 1,
+        'm': 60,
+        'h': 60 * 60,
+        'd': 24 * 60 * 60,
+        'w': 7 * 24 * 60 * 60,
+    }
+
+    match = re.fullmatch(r'(\d+)([smhdw]?)', value.strip().lower())
+
+    if not match:
+        raise ValueError("Invalid duration: '%s'" % value)
+
+    return datetime.timedelta(seconds=int(match.group(1)) * units[match.group(2) or 's'])
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import functools
+
+import cryptography.hazmat.backends
+import cryptography.hazmat.primitives.serialization
+import cryptography.x509
+
+import gimmecert.crypto
+import gimmecert.utils
+
+
+def verify_certificate(certificate, issuer_certificate, private_key, now):
+    """
+    Verifies certificate signature, validity, and pairing with the
+    private key.
+
+    :param certificate: Certificate to verify.
+    :type certificate: cryptography.x509.Certificate
+
+    :param issuer_certificate: Certificate of the issuer that should have signed the certificate.
+    :type issuer_certificate: cryptography.x509.Certificate
+
+    :param private_key: Private key that should belong to certificate. Set to None to skip the check.
+    :type private_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey or
+                       cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey or None
+
+    :param now: Point in time at which the certificate should be valid.
+    :type now: datetime.datetime
+
+    :returns: List of failed checks and messages describing the failures. Empty list if verification passed.
+    :rtype: list[(str, str)]
+    """
+
+    failures = []
+
+    if not gimmecert.crypto.verify_certificate_signature(certificate, issuer_certificate):
+        failures.append(("signature", "Certificate has not been signed by %s." % gimmecert.utils.dn_to_str(issuer_certificate.subject)))
+
+    if certificate.not_valid_before > now:
+        failures.append(("validity", "Certificate is not valid yet (valid from %s)." % certificate.not_valid_before))
+    elif certificate.not_valid_after < now:
+        failures.append(("validity", "Certificate has expired (valid until %s)." % certificate.not_valid_after))
+
+    if private_key is not None and not gimmecert.crypto.public_keys_match(private_key.public_key(), certificate.public_key()):
+        failures.append(("private-key", "Private key does not match the certificate public key."))
+
+    return failures
+
+
+@functools.lru_cache(maxsize=None)
+def load_issuer_certificate(issuer_certificate_pem):
+    """
+    Loads issuer certificate from PEM. Parsed certificates are cached,
+    since all entities are normally verified against the same issuer.
+
+    :param issuer_certificate_pem: Issuer certificate in OpenSSL-compatible PEM format.
+    :type issuer_certificate_pem: bytes
+
+    :returns: Issuer certificate.
+    :rtype: cryptography.x509.Certificate
+    """
+
+    return cryptography.x509.load_pem_x509_certificate(issuer_certificate_pem, cryptography.hazmat.backends.default_backend())
+
+
+def verify_entity(entity_type, entity_name, certificate_pem, private_key_pem, issuer_certificate_pem, now):
+    """
+    Verifies certificate of an entity. Artefacts are passed-in
+    serialised, which allows the function to be used with process
+    pools (parsing and signature verification is then performed by
+    the worker processes).
+
+    :param entity_type: Type of entity.
+    :type entity_type: str
+
+    :param entity_name: Name of entity.
+    :type entity_name: str
+
+    :param certificate_pem: Entity certificate in OpenSSL-compatible PEM format.
+    :type certificate_pem: bytes
+
+    :param private_key_pem: Entity private key in OpenSSL-compatible PEM format. Set to None if entity has no private key.
+    :type private_key_pem: bytes or None
+
+    :param issuer_certificate_pem: Issuer certificate in OpenSSL-compatible PEM format.
+    :type issuer_certificate_pem: bytes
+
+    :param now: Point in time at which the certificate should be valid.
+    :type now: datetime.datetime
+
+    :returns: List of failures, each failure being described with entity type, entity name, failed check, and message.
+    :rtype: list[dict[str, str]]
+    """
+
+    def failure(check, message):
+        return {"entity_type": entity_type, "entity_name": entity_name, "check": check, "message": message}
+
+    issuer_certificate = load_issuer_certificate(issuer_certificate_pem)
+
+    try:
+        certificate = cryptography.x509.load_pem_x509_certificate(certificate_pem, cryptography.hazmat.backends.default_backend())
+    except ValueError:
+        return [failure("certificate", "Certificate could not be parsed.")]
+
+    if private_key_pem is None:
+        private_key = None
+    else:
+        try:
+            private_key = cryptography.hazmat.primitives.serialization.load_pem_private_key(
+                private_key_pem,
+                None,
+                cryptography.hazmat.backends.default_backend()
+            )
+        except ValueError:
+            return [failure("private-key", "Private key could not be parsed.")]
+
+    return [failure(check, message) for check, message in verify_certificate(certificate, issuer_certificate, private_key, now)]
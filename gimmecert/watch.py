@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import ctypes
+import ctypes.util
+import os
+import select
+import time
+
+
+class PollingWatcher:
+    """
+    Directory watcher that simply waits for the polling interval to
+    pass. Used as fallback on platforms where inotify is not
+    available.
+    """
+
+    def __init__(self, path, interval):
+        """
+        Initialises an instance.
+
+        :param path: Path to directory to watch.
+        :type path: str
+
+        :param interval: Polling interval in seconds.
+        :type interval: float
+        """
+
+        self._path = path
+        self._interval = interval
+
+    def __str__(self):
+        """
+        Returns human-readable description of watcher.
+
+        :returns: Description of watcher.
+        :rtype: str
+        """
+
+        return "polling every %g seconds" % self._interval
+
+    def wait(self):
+        """
+        Waits for possible changes in watched directory.
+
+        :returns: True, since changes cannot be ruled out.
+        :rtype: bool
+        """
+
+        time.sleep(self._interval)
+
+        return True
+
+    def close(self):
+        """
+        Releases resources held by the watcher.
+        """
+
+        pass
+
+
+class InotifyWatcher:
+    """
+    Directory watcher that uses the Linux inotify interface for
+    detecting files written to or moved into the watched directory.
+
+    Only completed writes (file closed after writing) and files moved
+    into directory are reported, which avoids picking-up partially
+    written files.
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+
+    def __init__(self, path, interval):
+        """
+        Initialises an instance.
+
+        :param path: Path to directory to watch.
+        :type path: str
+
+        :param interval: Maximum time to wait for events in seconds.
+        :type interval: float
+
+        :raises OSError: If inotify is not available, or directory cannot be watched.
+        """
+
+        self._path = path
+        self._interval = interval
+
+        libc_name = ctypes.util.find_library('c')
+        if libc_name is None:
+            raise OSError("C library is not available.")
+
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("Inotify is not supported on this platform.")
+
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "Failed to initialise inotify.")
+
+        watch_descriptor = libc.inotify_add_watch(self._fd, os.fsencode(path), self.IN_CLOSE_WRITE | self.IN_MOVED_TO)
+        if watch_descriptor < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, "Failed to watch directory.", path)
+
+    def __str__(self):
+        """
+        Returns human-readable description of watcher.
+
+        :returns: Description of watcher.
+        :rtype: str
+        """
+
+        return "inotify"
+
+    def wait(self):
+        """
+        Waits for changes in watched directory. All pending events are
+        drained at once, so a burst of changes results in a single
+        wake-up.
+
+        :returns: True if changes were detected, False if the waiting timed out.
+        :rtype: bool
+        """
+
+        ready, _, _ = select.select([self._fd], [], [], self._interval)
+
+        if not ready:
+            return False
+
+        while True:
+            try:
+                if not os.read(self._fd, 65536):
+                    break
+            except BlockingIOError:
+                break
+
+        return True
+
+    def close(self):
+        """
+        Releases resources held by the watcher.
+        """
+
+        os.close(self._fd)
+
+
+def get_directory_watcher(path, interval):
+    """
+    Creates directory watcher best suited for current platform. The
+    inotify-based watcher is used if available, with polling used as
+    fallback.
+
+    :param path: Path to directory to watch.
+    :type path: str
+
+    :param interval: Polling interval (or maximum wait time for events) in seconds.
+    :type interval: float
+
+    :returns: Directory watcher.
+    :rtype: InotifyWatcher or PollingWatcher
+    """
+
+    try:
+        return InotifyWatcher(path, interval)
+    except (OSError, AttributeError):
+        return PollingWatcher(path, interval)
+
+
+def get_pending_csr_names(directory):
+    """
+    Scans the directory for CSRs that do not have corresponding
+    certificates, or that are newer than corresponding
+    certificates. CSRs are expected to follow naming convention
+    ``NAME.csr.pem``, while certificates are named ``NAME.cert.pem``.
+
+    :param directory: Path to directory to scan.
+    :type directory: str
+
+    :returns: Sorted list of names of entities with pending CSRs.
+    :rtype: list[str]
+    """
+
+    csr_mtimes = {}
+    certificate_mtimes = {}
+
+    for entry in os.scandir(directory):
+        # Files can be removed while scanning (for example, by
+        # services picking-up their certificates).
+        try:
+            if entry.name.endswith('.csr.pem'):
+                csr_mtimes[entry.name[:-len('.csr.pem')]] = entry.stat().st_mtime_ns
+            elif entry.name.endswith('.cert.pem'):
+                certificate_mtimes[entry.name[:-len('.cert.pem')]] = entry.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+
+    return sorted(name for name, mtime in csr_mtimes.items() if name not in certificate_mtimes or certificate_mtimes[name] < mtime)
@@ -23,6 +23,7 @@ import collections
 import io
 
 import gimmecert
+import gimmecert.commands
 import gimmecert.crypto
 import gimmecert.storage
 
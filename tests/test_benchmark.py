@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import threading
+
+from cryptography.hazmat.primitives.asymmetric import ec
+
+import gimmecert.benchmark
+
+from unittest import mock
+
+
+def test_parallel_throughput_uses_wall_clock_time_across_workers():
+    executor = mock.Mock()
+    # Two workers that ended up running one after another.
+    executor.map.return_value = iter([(10, 100.0, 101.0), (10, 101.0, 102.0)])
+
+    throughput = gimmecert.benchmark.parallel_throughput(executor, mock.Mock(), gimmecert.benchmark.key_generation_operation,
+                                                         ('ecdsa', ec.SECP256R1), 10, 1.0, 2)
+
+    assert throughput == 10.0
+
+
+def test_measure_in_worker_waits_for_other_workers_before_measuring():
+    barrier = mock.Mock()
+    prepare = mock.Mock()
+    prepare.return_value.side_effect = lambda: barrier.wait.assert_called_once_with()
+
+    calls, start, end = gimmecert.benchmark.measure_in_worker(barrier, prepare, ('ecdsa', ec.SECP256R1), 3, 10.0)
+
+    prepare.assert_called_once_with(('ecdsa', ec.SECP256R1))
+    assert calls == 3
+    assert start <= end
+
+
+def test_measure_in_worker_performs_prepared_operation():
+    calls, start, end = gimmecert.benchmark.measure_in_worker(threading.Barrier(1), gimmecert.benchmark.signing_operation, ('ecdsa', ec.SECP256R1),
+                                                              2, 10.0)
+
+    assert calls == 2
+    assert start <= end
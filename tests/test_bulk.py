@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import datetime
+import multiprocessing
+
+import cryptography.hazmat.primitives.serialization
+import cryptography.x509
+from cryptography.hazmat.primitives.asymmetric import ec
+
+import gimmecert.bulk
+import gimmecert.crypto
+import gimmecert.pool
+
+from unittest import mock
+
+
+def get_issuer():
+    return gimmecert.crypto.generate_ca_hierarchy('My Project', 1, gimmecert.crypto.KeyGenerator('ecdsa', ec.SECP256R1))[-1]
+
+
+def test_generate_private_key_pems_generates_private_keys_with_requested_specification():
+    private_key_pems = gimmecert.bulk.generate_private_key_pems(('ecdsa', ec.SECP384R1), 3)
+
+    private_keys = [cryptography.hazmat.primitives.serialization.load_pem_private_key(private_key_pem, None) for private_key_pem in private_key_pems]
+
+    assert len(private_keys) == 3
+    assert all(isinstance(private_key.curve, ec.SECP384R1) for private_key in private_keys)
+
+
+def test_issue_client_certificates_generates_private_keys_and_issues_certificates():
+    issuer_private_key, issuer_certificate = get_issuer()
+
+    batches = list(gimmecert.bulk.issue_client_certificates(issuer_private_key, issuer_certificate, ['myclient1', 'myclient2'],
+                                                            ('ecdsa', ec.SECP384R1), datetime.timedelta(days=7)))
+
+    results = [result for batch in batches for result in batch]
+
+    assert [name for name, _, _ in results] == ['myclient1', 'myclient2']
+
+    for name, private_key, certificate in results:
+        assert isinstance(private_key.curve, ec.SECP384R1)
+        assert gimmecert.crypto.public_keys_match(private_key.public_key(), certificate.public_key())
+        assert certificate.subject == gimmecert.crypto.get_dn(name)
+        assert certificate.issuer == issuer_certificate.subject
+        assert gimmecert.crypto.verify_certificate_signature(certificate, issuer_certificate)
+        assert certificate.not_valid_after - certificate.not_valid_before == datetime.timedelta(days=7, minutes=15)
+        assert certificate.extensions.get_extension_for_class(cryptography.x509.ExtendedKeyUsage).value == \
+            cryptography.x509.ExtendedKeyUsage([cryptography.x509.oid.ExtendedKeyUsageOID.CLIENT_AUTH])
+
+
+def test_issue_client_certificates_reuses_passed_in_public_key():
+    issuer_private_key, issuer_certificate = get_issuer()
+    public_key = gimmecert.crypto.KeyGenerator('ecdsa', ec.SECP256R1)().public_key()
+
+    batches = list(gimmecert.bulk.issue_client_certificates(issuer_private_key, issuer_certificate, ['myclient1', 'myclient2'],
+                                                            ('ecdsa', ec.SECP256R1), public_key=public_key))
+
+    results = [result for batch in batches for result in batch]
+
+    assert [name for name, _, _ in results] == ['myclient1', 'myclient2']
+    assert all(private_key is None for _, private_key, _ in results)
+    assert all(gimmecert.crypto.public_keys_match(public_key, certificate.public_key()) for _, _, certificate in results)
+
+
+def test_issue_client_certificates_takes_private_keys_from_key_pool(tmpdir):
+    issuer_private_key, issuer_certificate = get_issuer()
+    key_pool = gimmecert.pool.KeyPool(tmpdir.strpath)
+    pooled_private_key = gimmecert.crypto.KeyGenerator('ecdsa', ec.SECP256R1)()
+    key_pool.add(pooled_private_key, ('ecdsa', ec.SECP256R1))
+
+    batches = list(gimmecert.bulk.issue_client_certificates(issuer_private_key, issuer_certificate, ['myclient1', 'myclient2'],
+                                                            ('ecdsa', ec.SECP256R1), key_pool=key_pool))
+
+    results = [result for batch in batches for result in batch]
+
+    assert key_pool.level(('ecdsa', ec.SECP256R1)) == 0
+    assert gimmecert.crypto.public_keys_match(results[0][1].public_key(), pooled_private_key.public_key())
+    assert not gimmecert.crypto.public_keys_match(results[1][1].public_key(), pooled_private_key.public_key())
+    assert all(gimmecert.crypto.public_keys_match(private_key.public_key(), certificate.public_key()) for _, private_key, certificate in results)
+
+
+@mock.patch('multiprocessing.Pool')
+@mock.patch('concurrent.futures.ProcessPoolExecutor')
+def test_issue_client_certificates_does_not_start_worker_processes_for_small_runs(mock_executor, mock_pool):
+    issuer_private_key, issuer_certificate = get_issuer()
+    names = ['myclient%d' % n for n in range(1, 6)]
+
+    batches = list(gimmecert.bulk.issue_client_certificates(issuer_private_key, issuer_certificate, names, ('ecdsa', ec.SECP256R1), jobs=2))
+
+    assert [name for batch in batches for name, _, _ in batch] == names
+    mock_executor.assert_not_called()
+    mock_pool.assert_not_called()
+
+
+def test_issue_client_certificates_produces_results_in_order_using_worker_processes():
+    issuer_private_key, issuer_certificate = get_issuer()
+    names = ['myclient%d' % n for n in range(1, 251)]
+
+    with mock.patch('multiprocessing.Pool', wraps=multiprocessing.Pool) as mock_pool:
+        batches = list(gimmecert.bulk.issue_client_certificates(issuer_private_key, issuer_certificate, names, ('ecdsa', ec.SECP256R1), jobs=2))
+
+    results = [result for batch in batches for result in batch]
+
+    assert mock_pool.call_count == 1
+    assert len(batches) > 1
+    assert all(gimmecert.crypto.verify_certificate_signature(certificate, issuer_certificate) for _, _, certificate in results)
+    assert [name for name, _, _ in results] == names
+    assert len({certificate.serial_number for _, _, certificate in results}) == len(names)
+    assert all(gimmecert.crypto.public_keys_match(private_key.public_key(), certificate.public_key()) for _, private_key, certificate in results)
@@ -20,6 +20,8 @@
 
 
 import argparse
+import datetime
+import io
 import sys
 
 import gimmecert.cli
@@ -187,7 +189,20 @@ def test_setup_subcommand_parser_sets_function_callback(setup_subcommand_parser)
         gimmecert.cli.setup_server_subcommand_parser,
         gimmecert.cli.setup_client_subcommand_parser,
         gimmecert.cli.setup_renew_subcommand_parser,
-        gimmecert.cli.setup_status_subcommand_parser
+        gimmecert.cli.setup_status_subcommand_parser,
+        gimmecert.cli.setup_export_p12_subcommand_parser,
+        gimmecert.cli.setup_sync_subcommand_parser,
+        gimmecert.cli.setup_watch_subcommand_parser,
+        gimmecert.cli.setup_revoke_subcommand_parser,
+        gimmecert.cli.setup_crl_subcommand_parser,
+        gimmecert.cli.setup_ocsp_serve_subcommand_parser,
+        gimmecert.cli.setup_verify_subcommand_parser,
+        gimmecert.cli.setup_subca_subcommand_parser,
+        gimmecert.cli.setup_reissue_subcommand_parser,
+        gimmecert.cli.setup_bench_subcommand_parser,
+        gimmecert.cli.setup_issue_subcommand_parser,
+        gimmecert.cli.setup_metrics_subcommand_parser,
+        gimmecert.cli.setup_pool_subcommand_parser,
     ]
 )
 def test_setup_subcommand_parser_registered(setup_subcommand_parser):
@@ -254,6 +269,10 @@ VALID_CLI_INVOCATIONS = [
                               "myserver1.example.com", "myserver2.example.com",
                               "myserver3.example.com", "myserver4.example.com"]),
 
+    # server, prefixed subject alternative names, no options
+    ("gimmecert.cli.server", ["gimmecert", "server", "myserver",
+                              "ip:192.168.1.1", "ip:2001:db8::1", "uri:spiffe://example.com/myserver", "email:ops@example.com"]),
+
     # server, CSR long and short option
     ("gimmecert.cli.server", ["gimmecert", "server", "--csr", "myserver.csr.pem", "myserver"]),
     ("gimmecert.cli.server", ["gimmecert", "server", "-c", "myserver.csr.pem", "myserver"]),
@@ -333,6 +352,148 @@ VALID_CLI_INVOCATIONS = [
 
     # status, no options
     ("gimmecert.cli.status", ["gimmecert", "status"]),
+
+    # status, number of jobs long and short option
+    ("gimmecert.cli.status", ["gimmecert", "status", "--jobs", "4"]),
+    ("gimmecert.cli.status", ["gimmecert", "status", "-j", "1"]),
+
+    # export-p12, entity names and all entities
+    ("gimmecert.cli.export_p12", ["gimmecert", "export-p12", "server", "myserver"]),
+    ("gimmecert.cli.export_p12", ["gimmecert", "export-p12", "client", "myclient1", "myclient2"]),
+    ("gimmecert.cli.export_p12", ["gimmecert", "export-p12", "server", "--all"]),
+    ("gimmecert.cli.export_p12", ["gimmecert", "export-p12", "client", "-a"]),
+
+    # export-p12, password long and short option
+    ("gimmecert.cli.export_p12", ["gimmecert", "export-p12", "--password", "mypassword", "server", "myserver"]),
+    ("gimmecert.cli.export_p12", ["gimmecert", "export-p12", "-p", "mypassword", "server", "myserver"]),
+
+
+    # sync, target directory and layout long and short option
+    ("gimmecert.cli.sync", ["gimmecert", "sync", "--to", "/tmp/target"]),
+    ("gimmecert.cli.sync", ["gimmecert", "sync", "-t", "/tmp/target"]),
+    ("gimmecert.cli.sync", ["gimmecert", "sync", "--to", "/tmp/target", "--layout", "{type}/{name}/{kind}.pem"]),
+    ("gimmecert.cli.sync", ["gimmecert", "sync", "--to", "/tmp/target", "-l", "{name}.{kind}.pem"]),
+
+
+    # watch, inbox, type, interval, once, and number of jobs long and short options
+    ("gimmecert.cli.watch", ["gimmecert", "watch", "--inbox", "/tmp/inbox", "--type", "server"]),
+    ("gimmecert.cli.watch", ["gimmecert", "watch", "-i", "/tmp/inbox", "-t", "client"]),
+    ("gimmecert.cli.watch", ["gimmecert", "watch", "-i", "/tmp/inbox", "-t", "server", "--interval", "0.5"]),
+    ("gimmecert.cli.watch", ["gimmecert", "watch", "-i", "/tmp/inbox", "-t", "server", "-n", "5"]),
+    ("gimmecert.cli.watch", ["gimmecert", "watch", "-i", "/tmp/inbox", "-t", "server", "--once"]),
+    ("gimmecert.cli.watch", ["gimmecert", "watch", "-i", "/tmp/inbox", "-t", "server", "-1"]),
+    ("gimmecert.cli.watch", ["gimmecert", "watch", "-i", "/tmp/inbox", "-t", "server", "--jobs", "4"]),
+    ("gimmecert.cli.watch", ["gimmecert", "watch", "-i", "/tmp/inbox", "-t", "server", "-j", "4"]),
+
+
+    # revoke, no options
+    ("gimmecert.cli.revoke", ["gimmecert", "revoke", "server", "myserver"]),
+    ("gimmecert.cli.revoke", ["gimmecert", "revoke", "client", "myclient"]),
+    ("gimmecert.cli.revoke", ["gimmecert", "revoke", "--remove-artefacts", "server", "myserver"]),
+    ("gimmecert.cli.revoke", ["gimmecert", "revoke", "-r", "client", "myclient"]),
+
+    # crl, no options, and delta long and short option
+    ("gimmecert.cli.crl", ["gimmecert", "crl"]),
+    ("gimmecert.cli.crl", ["gimmecert", "crl", "--delta"]),
+    ("gimmecert.cli.crl", ["gimmecert", "crl", "-D"]),
+
+
+    # ocsp-serve, no options, and host, port, and refresh interval long and short options
+    ("gimmecert.cli.ocsp_serve", ["gimmecert", "ocsp-serve"]),
+    ("gimmecert.cli.ocsp_serve", ["gimmecert", "ocsp-serve", "--host", "0.0.0.0", "--port", "8888", "--refresh-interval", "60"]),
+    ("gimmecert.cli.ocsp_serve", ["gimmecert", "ocsp-serve", "-H", "0.0.0.0", "-P", "8888", "-r", "60"]),
+
+
+    # verify, all entities, all entities of type, or listed entities, with long and short options
+    ("gimmecert.cli.verify", ["gimmecert", "verify", "--all"]),
+    ("gimmecert.cli.verify", ["gimmecert", "verify", "-a"]),
+    ("gimmecert.cli.verify", ["gimmecert", "verify", "--all", "server"]),
+    ("gimmecert.cli.verify", ["gimmecert", "verify", "server", "myserver1", "myserver2"]),
+    ("gimmecert.cli.verify", ["gimmecert", "verify", "--format", "json", "--jobs", "4", "client", "myclient"]),
+    ("gimmecert.cli.verify", ["gimmecert", "verify", "-f", "text", "-j", "1", "-a"]),
+
+
+    # output archive, long and short options
+    ("gimmecert.cli.init", ["gimmecert", "init", "--output-archive", "-"]),
+    ("gimmecert.cli.init", ["gimmecert", "init", "-o", "ca.tar"]),
+    ("gimmecert.cli.server", ["gimmecert", "server", "--output-archive", "-", "myserver"]),
+    ("gimmecert.cli.server", ["gimmecert", "server", "-o", "myserver.tar", "myserver"]),
+    ("gimmecert.cli.client", ["gimmecert", "client", "--output-archive", "-", "myclient"]),
+    ("gimmecert.cli.client", ["gimmecert", "client", "-o", "myclient.tar", "myclient"]),
+    ("gimmecert.cli.renew", ["gimmecert", "renew", "--output-archive", "-", "server", "myserver"]),
+    ("gimmecert.cli.renew", ["gimmecert", "renew", "-o", "myclient.tar", "client", "myclient"]),
+    ("gimmecert.cli.export_p12", ["gimmecert", "export-p12", "--output-archive", "-", "server", "myserver"]),
+    ("gimmecert.cli.export_p12", ["gimmecert", "export-p12", "-o", "bundles.tar", "--all", "client"]),
+
+    # init, shared CA hierarchy
+    ("gimmecert.cli.init", ["gimmecert", "init", "--ca-from", "/tmp/otherproject"]),
+    ("gimmecert.cli.init", ["gimmecert", "init", "-f", "/tmp/otherproject"]),
+    ("gimmecert.cli.init", ["gimmecert", "init", "--shared-ca", "development"]),
+    ("gimmecert.cli.init", ["gimmecert", "init", "-s", "development"]),
+
+    # subca, no options
+    ("gimmecert.cli.subca", ["gimmecert", "subca", "worker1"]),
+
+    # subca, key specification
+    ("gimmecert.cli.subca", ["gimmecert", "subca", "--key-specification", "ecdsa:secp256r1", "worker1"]),
+    ("gimmecert.cli.subca", ["gimmecert", "subca", "-k", "rsa:4096", "worker1"]),
+
+    # subca, output archive
+    ("gimmecert.cli.subca", ["gimmecert", "subca", "--output-archive", "-", "worker1"]),
+
+    # init, server, client, renew, validity and backdate
+    ("gimmecert.cli.init", ["gimmecert", "init", "--validity", "2d", "--backdate", "1h"]),
+    ("gimmecert.cli.server", ["gimmecert", "server", "--validity", "15m", "--backdate", "30s", "myserver"]),
+    ("gimmecert.cli.client", ["gimmecert", "client", "--validity", "15m", "--backdate", "0", "myclient"]),
+    ("gimmecert.cli.subca", ["gimmecert", "subca", "--validity", "30d", "--backdate", "1m", "worker1"]),
+    ("gimmecert.cli.renew", ["gimmecert", "renew", "--validity", "1w", "server", "myserver"]),
+
+    # reissue, no options
+    ("gimmecert.cli.reissue", ["gimmecert", "reissue", "server", "myserver"]),
+    ("gimmecert.cli.reissue", ["gimmecert", "reissue", "client", "myclient"]),
+
+    # reissue, all options
+    ("gimmecert.cli.reissue", ["gimmecert", "reissue", "--validity", "15m", "--backdate", "30s", "--interval", "5m", "--count", "0", "server", "myserver"]),
+    ("gimmecert.cli.reissue", ["gimmecert", "reissue", "-i", "10", "-n", "1000", "client", "myclient"]),
+
+    # bench, with and without options
+    ("gimmecert.cli.bench", ["gimmecert", "bench", "issuance"]),
+    ("gimmecert.cli.bench", ["gimmecert", "bench", "--key-specification", "ecdsa:secp384r1", "--count", "10", "issuance"]),
+    ("gimmecert.cli.bench", ["gimmecert", "bench", "-k", "rsa:1024", "-n", "1", "issuance"]),
+    ("gimmecert.cli.bench", ["gimmecert", "bench", "keys"]),
+    ("gimmecert.cli.bench", ["gimmecert", "bench", "--jobs", "2", "--format", "json", "--key-specification", "ecdsa:secp256r1", "keys"]),
+    ("gimmecert.cli.bench", ["gimmecert", "bench", "-j", "1", "-f", "text", "-n", "10", "keys"]),
+
+    # issue, with and without options
+    ("gimmecert.cli.issue", ["gimmecert", "issue", "--profile", "server-client", "mynode"]),
+    ("gimmecert.cli.issue", ["gimmecert", "issue", "-p", "email", "alice@example.com", "alice@example.org"]),
+    ("gimmecert.cli.issue", ["gimmecert", "issue", "-p", "signing", "--csr", "/tmp/mysigner.csr.pem", "--validity", "30d", "mysigner"]),
+    ("gimmecert.cli.issue", ["gimmecert", "issue", "-p", "signing", "-k", "ecdsa:secp256r1", "-o", "-", "--backdate", "1m", "mysigner"]),
+
+    # metrics, with and without textfile
+    ("gimmecert.cli.metrics", ["gimmecert", "metrics"]),
+    ("gimmecert.cli.metrics", ["gimmecert", "metrics", "--textfile", "gimmecert.prom"]),
+    ("gimmecert.cli.metrics", ["gimmecert", "metrics", "-t", "gimmecert.prom"]),
+
+    # renew, plan with or without new private key
+    ("gimmecert.cli.renew_plan", ["gimmecert", "renew", "--plan", "server", "myserver"]),
+    ("gimmecert.cli.renew_plan", ["gimmecert", "renew", "-P", "-p", "client", "myclient"]),
+    ("gimmecert.cli.renew_plan", ["gimmecert", "renew", "--plan", "-p", "-k", "ecdsa:secp256r1", "server", "myserver"]),
+
+    # pool, with and without options
+    ("gimmecert.cli.pool", ["gimmecert", "pool", "daemon"]),
+    ("gimmecert.cli.pool", ["gimmecert", "pool", "daemon", "-k", "rsa:2048", "-k", "ecdsa:secp256r1", "-l", "5", "-H", "5", "-j", "2", "-n", "0.5", "-1"]),
+    ("gimmecert.cli.pool", ["gimmecert", "pool", "daemon", "--key-specification", "rsa:3072", "--low-watermark", "1", "--high-watermark", "10",
+                            "--jobs", "1", "--interval", "10", "--once"]),
+
+    # client, reusing private key
+    ("gimmecert.cli.client", ["gimmecert", "client", "--reuse-key-from", "server/myserver", "myclient"]),
+    ("gimmecert.cli.client", ["gimmecert", "client", "-r", "client/myclient1", "myclient2"]),
+
+    # client, bulk issuance
+    ("gimmecert.cli.client_bulk", ["gimmecert", "client", "--count", "10", "--name-template", "loadclient-{n:06d}"]),
+    ("gimmecert.cli.client_bulk", ["gimmecert", "client", "-N", "10", "-T", "client{n}", "-k", "ecdsa:secp256r1", "-j", "2"]),
+    ("gimmecert.cli.client_bulk", ["gimmecert", "client", "-N", "10", "-T", "client{n}", "-r", "client/myclient", "-o", "clients.tar", "-A"]),
 ]
 
 
@@ -373,6 +534,8 @@ def test_parser_commands_and_options_are_available(tmpdir, command_function, cli
 INVALID_CLI_INVOCATIONS = [
     # missing mandatory positional arguments
     ("gimmecert.cli.server", ["gimmecert", "server"]),
+    ("gimmecert.cli.server", ["gimmecert", "server", "myserver", "ip:192.168.1.300"]),
+    ("gimmecert.cli.renew", ["gimmecert", "renew", "--update-dns-names", "myservice.local,ip:myservice", "server", "myserver"]),
     ("gimmecert.cli.client", ["gimmecert", "client"]),
     ("gimmecert.cli.renew", ["gimmecert", "renew"]),
     ("gimmecert.cli.renew", ["gimmecert", "renew", "server"]),
@@ -414,6 +577,151 @@ INVALID_CLI_INVOCATIONS = [
     # renew, both key specification and csr specified at the same time
     ("gimmecert.cli.renew", ["gimmecert", "renew", "server", "--key-specification", "rsa:1024", "--csr", "myserver.csr.pem", "myserver"]),
     ("gimmecert.cli.renew", ["gimmecert", "renew", "client", "--key-specification", "rsa:1024", "--csr", "myclient.csr.pem", "myclient"]),
+
+    # export-p12, missing entity names or all entities option, or both specified at the same time
+    ("gimmecert.cli.export_p12", ["gimmecert", "export-p12", "server"]),
+    ("gimmecert.cli.export_p12", ["gimmecert", "export-p12", "server", "--all", "myserver"]),
+
+    # export-p12, multiple password sources, empty password, unset password environment variable, or unreadable password file
+    ("gimmecert.cli.export_p12", ["gimmecert", "export-p12", "--password", "mypassword", "--password-env", "P12_PASSWORD", "server", "myserver"]),
+    ("gimmecert.cli.export_p12", ["gimmecert", "export-p12", "-p", "mypassword", "-P", "password.txt", "server", "myserver"]),
+    ("gimmecert.cli.export_p12", ["gimmecert", "export-p12", "--password", "", "server", "myserver"]),
+    ("gimmecert.cli.export_p12", ["gimmecert", "export-p12", "--password-env", "GIMMECERT_TEST_UNSET_VARIABLE", "server", "myserver"]),
+    ("gimmecert.cli.export_p12", ["gimmecert", "export-p12", "--password-file", "/nonexistent/password.txt", "server", "myserver"]),
+
+
+    # sync, missing target directory, or invalid layout
+    ("gimmecert.cli.sync", ["gimmecert", "sync"]),
+    ("gimmecert.cli.sync", ["gimmecert", "sync", "--to", "/tmp/target", "--layout", "{type}/{name}.pem"]),
+    ("gimmecert.cli.sync", ["gimmecert", "sync", "--to", "/tmp/target", "--layout", "../{name}/{kind}.pem"]),
+
+
+    # watch, missing inbox or type, invalid type, interval, or number of jobs
+    ("gimmecert.cli.watch", ["gimmecert", "watch", "--type", "server"]),
+    ("gimmecert.cli.watch", ["gimmecert", "watch", "--inbox", "/tmp/inbox"]),
+    ("gimmecert.cli.watch", ["gimmecert", "watch", "--inbox", "/tmp/inbox", "--type", "ca"]),
+    ("gimmecert.cli.watch", ["gimmecert", "watch", "--inbox", "/tmp/inbox", "--type", "server", "--interval", "soon"]),
+    ("gimmecert.cli.watch", ["gimmecert", "watch", "--inbox", "/tmp/inbox", "--type", "server", "--jobs", "0"]),
+    ("gimmecert.cli.watch", ["gimmecert", "watch", "--inbox", "/tmp/inbox", "--type", "server", "-j", "many"]),
+
+
+    # revoke, missing or invalid positional arguments
+    ("gimmecert.cli.revoke", ["gimmecert", "revoke"]),
+    ("gimmecert.cli.revoke", ["gimmecert", "revoke", "server"]),
+    ("gimmecert.cli.revoke", ["gimmecert", "revoke", "ca", "level1"]),
+
+
+    # ocsp-serve, invalid port or refresh interval
+    ("gimmecert.cli.ocsp_serve", ["gimmecert", "ocsp-serve", "--port", "http"]),
+    ("gimmecert.cli.ocsp_serve", ["gimmecert", "ocsp-serve", "--refresh-interval", "often"]),
+    ("gimmecert.cli.ocsp_serve", ["gimmecert", "ocsp-serve", "--refresh-interval", "0"]),
+    ("gimmecert.cli.ocsp_serve", ["gimmecert", "ocsp-serve", "-r", "-60"]),
+
+
+    # verify, no entities, entity names with --all, invalid entity type, format, or number of jobs
+    ("gimmecert.cli.verify", ["gimmecert", "verify"]),
+    ("gimmecert.cli.verify", ["gimmecert", "verify", "server"]),
+    ("gimmecert.cli.verify", ["gimmecert", "verify", "--all", "server", "myserver"]),
+    ("gimmecert.cli.verify", ["gimmecert", "verify", "myserver"]),
+    ("gimmecert.cli.verify", ["gimmecert", "verify", "--all", "--format", "xml"]),
+    ("gimmecert.cli.verify", ["gimmecert", "verify", "--all", "--jobs", "0"]),
+    ("gimmecert.cli.verify", ["gimmecert", "verify", "--all", "--jobs", "many"]),
+
+    # status, invalid number of jobs
+    ("gimmecert.cli.status", ["gimmecert", "status", "--jobs", "0"]),
+    ("gimmecert.cli.status", ["gimmecert", "status", "-j", "many"]),
+
+
+    # output archive, missing path
+    ("gimmecert.cli.server", ["gimmecert", "server", "myserver", "--output-archive"]),
+
+    # init, shared CA hierarchy
+    ("gimmecert.cli.init", ["gimmecert", "init", "--ca-from", "/tmp/otherproject", "--shared-ca", "development"]),
+    ("gimmecert.cli.init", ["gimmecert", "init", "--shared-ca", ""]),
+    ("gimmecert.cli.init", ["gimmecert", "init", "--shared-ca", ".."]),
+    ("gimmecert.cli.init", ["gimmecert", "init", "--shared-ca", "dev/ca"]),
+
+    # subca, missing or invalid name
+    ("gimmecert.cli.subca", ["gimmecert", "subca"]),
+    ("gimmecert.cli.subca", ["gimmecert", "subca", ""]),
+    ("gimmecert.cli.subca", ["gimmecert", "subca", "workers/worker1"]),
+
+    # subca, invalid key specification
+    ("gimmecert.cli.subca", ["gimmecert", "subca", "--key-specification", "rsa", "worker1"]),
+
+    # init, server, client, renew, invalid validity or backdate
+    ("gimmecert.cli.init", ["gimmecert", "init", "--validity", "15 minutes"]),
+    ("gimmecert.cli.server", ["gimmecert", "server", "--validity", "-15m", "myserver"]),
+    ("gimmecert.cli.client", ["gimmecert", "client", "--backdate", "m", "myclient"]),
+    ("gimmecert.cli.subca", ["gimmecert", "subca", "--validity", "30 days", "worker1"]),
+    ("gimmecert.cli.renew", ["gimmecert", "renew", "--validity", "1y", "server", "myserver"]),
+
+    # reissue, missing or invalid arguments
+    ("gimmecert.cli.reissue", ["gimmecert", "reissue"]),
+    ("gimmecert.cli.reissue", ["gimmecert", "reissue", "server"]),
+    ("gimmecert.cli.reissue", ["gimmecert", "reissue", "ca", "myca"]),
+    ("gimmecert.cli.reissue", ["gimmecert", "reissue", "--interval", "soon", "server", "myserver"]),
+    ("gimmecert.cli.reissue", ["gimmecert", "reissue", "--count", "-1", "server", "myserver"]),
+
+    # bench, missing or invalid target, key specification, or count
+    ("gimmecert.cli.bench", ["gimmecert", "bench"]),
+    ("gimmecert.cli.bench", ["gimmecert", "bench", "everything"]),
+    ("gimmecert.cli.bench", ["gimmecert", "bench", "-k", "dsa:1024", "issuance"]),
+    ("gimmecert.cli.bench", ["gimmecert", "bench", "--count", "0", "issuance"]),
+    ("gimmecert.cli.bench", ["gimmecert", "bench", "--jobs", "0", "keys"]),
+    ("gimmecert.cli.bench", ["gimmecert", "bench", "--format", "xml", "keys"]),
+
+    # issue, missing profile or entity name, both CSR and key specification
+    ("gimmecert.cli.issue", ["gimmecert", "issue", "mynode"]),
+    ("gimmecert.cli.issue", ["gimmecert", "issue", "--profile", "server-client"]),
+    ("gimmecert.cli.issue", ["gimmecert", "issue", "-p", "signing", "--csr", "my.csr.pem", "-k", "rsa:2048", "mysigner"]),
+
+    # metrics, missing textfile path, or unexpected positional argument
+    ("gimmecert.cli.metrics", ["gimmecert", "metrics", "--textfile"]),
+    ("gimmecert.cli.metrics", ["gimmecert", "metrics", "server"]),
+
+    # renew, multiple or no entity names, plan with multiple or no entity names, key specification without new private key, CSR, DNS
+    # names, or output archive
+    ("gimmecert.cli.renew", ["gimmecert", "renew", "server", "myserver1", "myserver2"]),
+    ("gimmecert.cli.renew", ["gimmecert", "renew", "-p", "client"]),
+    ("gimmecert.cli.renew_plan", ["gimmecert", "renew", "--plan", "server"]),
+    ("gimmecert.cli.renew_plan", ["gimmecert", "renew", "--plan", "-p", "client", "myclient1", "myclient2"]),
+    ("gimmecert.cli.renew_plan", ["gimmecert", "renew", "--plan", "-k", "ecdsa:secp256r1", "server", "myserver"]),
+    ("gimmecert.cli.renew_plan", ["gimmecert", "renew", "--plan", "--csr", "myserver.csr.pem", "server", "myserver"]),
+    ("gimmecert.cli.renew_plan", ["gimmecert", "renew", "--plan", "--update-dns-names", "myservice.local", "server", "myserver"]),
+    ("gimmecert.cli.renew_plan", ["gimmecert", "renew", "--plan", "--output-archive", "-", "server", "myserver"]),
+
+    # pool, missing or invalid action, key specification, watermarks, jobs, or interval
+    ("gimmecert.cli.pool", ["gimmecert", "pool"]),
+    ("gimmecert.cli.pool", ["gimmecert", "pool", "status"]),
+    ("gimmecert.cli.pool", ["gimmecert", "pool", "daemon", "-k", "dsa:1024"]),
+    ("gimmecert.cli.pool", ["gimmecert", "pool", "daemon", "--low-watermark", "0"]),
+    ("gimmecert.cli.pool", ["gimmecert", "pool", "daemon", "--low-watermark", "10", "--high-watermark", "5"]),
+    ("gimmecert.cli.pool", ["gimmecert", "pool", "daemon", "--jobs", "0"]),
+    ("gimmecert.cli.pool", ["gimmecert", "pool", "daemon", "--interval", "0"]),
+
+    # client, reusing private key with invalid reference, or together with CSR or key specification
+    ("gimmecert.cli.client", ["gimmecert", "client", "--reuse-key-from", "myserver", "myclient"]),
+    ("gimmecert.cli.client", ["gimmecert", "client", "--reuse-key-from", "ca/level1", "myclient"]),
+    ("gimmecert.cli.client", ["gimmecert", "client", "--reuse-key-from", "server/", "myclient"]),
+    ("gimmecert.cli.client", ["gimmecert", "client", "--reuse-key-from", "server/a/b", "myclient"]),
+    ("gimmecert.cli.client", ["gimmecert", "client", "--reuse-key-from", "server/myserver", "--csr", "myclient.csr.pem", "myclient"]),
+    ("gimmecert.cli.client", ["gimmecert", "client", "-r", "server/myserver", "-k", "rsa:2048", "myclient"]),
+
+    # client, invalid bulk issuance options
+    ("gimmecert.cli.client", ["gimmecert", "client"]),
+    ("gimmecert.cli.client_bulk", ["gimmecert", "client", "--count", "10"]),
+    ("gimmecert.cli.client_bulk", ["gimmecert", "client", "--count", "0", "--name-template", "client{n}"]),
+    ("gimmecert.cli.client_bulk", ["gimmecert", "client", "--count", "10", "--name-template", "client"]),
+    ("gimmecert.cli.client_bulk", ["gimmecert", "client", "--count", "10", "--name-template", "client{x}"]),
+    ("gimmecert.cli.client_bulk", ["gimmecert", "client", "--count", "10", "--name-template", "client/{n}"]),
+    ("gimmecert.cli.client_bulk", ["gimmecert", "client", "--count", "10", "--name-template", "client{n}", "myclient"]),
+    ("gimmecert.cli.client_bulk", ["gimmecert", "client", "--count", "10", "--name-template", "client{n}", "--csr", "client.csr.pem"]),
+    ("gimmecert.cli.client_bulk", ["gimmecert", "client", "--count", "10", "--name-template", "client{n}", "--archive-only"]),
+    ("gimmecert.cli.client_bulk", ["gimmecert", "client", "--count", "10", "--name-template", "client{n}", "--jobs", "0"]),
+    ("gimmecert.cli.client", ["gimmecert", "client", "--name-template", "client{n}", "myclient"]),
+    ("gimmecert.cli.client", ["gimmecert", "client", "--jobs", "2", "myclient"]),
+    ("gimmecert.cli.client", ["gimmecert", "client", "--output-archive", "client.tar", "--archive-only", "myclient"]),
 ]
 
 
@@ -448,7 +756,8 @@ def test_invalid_parser_commands_and_options_produce_error(tmpdir, command_funct
         assert e_info.value.code == gimmecert.commands.ExitCode.ERROR_ARGUMENTS
 
 
-@pytest.mark.parametrize("command", ["help", "init", "server", "client", "renew", "status"])
+@pytest.mark.parametrize("command", ["help", "init", "server", "client", "renew", "status", "export-p12", "sync", "watch", "revoke", "crl", "ocsp-serve",
+                                     "verify", "subca", "reissue", "bench", "issue", "metrics", "pool"])
 @pytest.mark.parametrize("help_option", ["--help", "-h"])
 def test_command_exists_and_accepts_help_flag(tmpdir, command, help_option):
     """
@@ -486,7 +795,7 @@ def test_init_command_invoked_with_correct_parameters_no_options(mock_init, tmpd
 
     gimmecert.cli.main()
 
-    mock_init.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, tmpdir.basename, default_depth, ('rsa', 2048))
+    mock_init.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, tmpdir.basename, default_depth, ('rsa', 2048), None, None, None, None, None)
 
 
 @mock.patch('sys.argv', ['gimmecert', 'init', '-b', 'My Project', '-k', 'rsa:4096'])
@@ -502,7 +811,7 @@ def test_init_command_invoked_with_correct_parameters_with_options(mock_init, tm
 
     gimmecert.cli.main()
 
-    mock_init.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'My Project', default_depth, ('rsa', 4096))
+    mock_init.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'My Project', default_depth, ('rsa', 4096), None, None, None, None, None)
 
 
 @mock.patch('sys.argv', ['gimmecert', 'server', 'myserver'])
@@ -516,7 +825,7 @@ def test_server_command_invoked_with_correct_parameters_without_extra_dns_names(
 
     gimmecert.cli.main()
 
-    mock_server.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'myserver', [], None, None)
+    mock_server.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'myserver', [], None, None, None, None, None)
 
 
 @mock.patch('sys.argv', ['gimmecert', 'server', '-k', 'rsa:1024', 'myserver', 'service.local', 'service.example.com'])
@@ -530,7 +839,8 @@ def test_server_command_invoked_with_correct_parameters_with_extra_dns_names_and
 
     gimmecert.cli.main()
 
-    mock_server.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'myserver', ['service.local', 'service.example.com'], None, ("rsa", 1024))
+    mock_server.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'myserver', ['service.local', 'service.example.com'], None, ("rsa", 1024),
+                                        None, None, None)
 
 
 @mock.patch('sys.argv', ['gimmecert', 'help'])
@@ -622,7 +932,7 @@ def test_client_command_invoked_with_correct_parameters(mock_client, tmpdir):
 
     gimmecert.cli.main()
 
-    mock_client.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'myclient', None, None)
+    mock_client.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'myclient', None, None, None, None, None, None)
 
 
 @mock.patch('sys.argv', ['gimmecert', 'renew', 'server', 'myserver'])
@@ -636,7 +946,7 @@ def test_renew_command_invoked_with_correct_parameters_for_server(mock_renew, tm
 
     gimmecert.cli.main()
 
-    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'server', 'myserver', False, None, None, None)
+    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'server', 'myserver', False, None, None, None, None, None, None)
 
 
 @mock.patch('sys.argv', ['gimmecert', 'renew', 'client', 'myclient'])
@@ -650,7 +960,7 @@ def test_renew_command_invoked_with_correct_parameters_for_client(mock_renew, tm
 
     gimmecert.cli.main()
 
-    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', 'myclient', False, None, None, None)
+    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', 'myclient', False, None, None, None, None, None, None)
 
 
 @mock.patch('sys.argv', ['gimmecert', 'renew', '--new-private-key', 'server', 'myserver'])
@@ -664,7 +974,7 @@ def test_renew_command_invoked_with_correct_parameters_for_server_with_new_priva
 
     gimmecert.cli.main()
 
-    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'server', 'myserver', True, None, None, None)
+    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'server', 'myserver', True, None, None, None, None, None, None)
 
 
 @mock.patch('sys.argv', ['gimmecert', 'renew', '--new-private-key', 'client', 'myclient'])
@@ -678,7 +988,7 @@ def test_renew_command_invoked_with_correct_parameters_for_client_with_new_priva
 
     gimmecert.cli.main()
 
-    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', 'myclient', True, None, None, None)
+    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', 'myclient', True, None, None, None, None, None, None)
 
 
 @mock.patch('sys.argv', ['gimmecert', 'renew', '--csr', 'mycustom.csr.pem', 'server', 'myserver'])
@@ -692,7 +1002,7 @@ def test_renew_command_invoked_with_correct_parameters_for_server_with_csr_optio
 
     gimmecert.cli.main()
 
-    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'server', 'myserver', False, 'mycustom.csr.pem', None, None)
+    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'server', 'myserver', False, 'mycustom.csr.pem', None, None, None, None, None)
 
 
 @mock.patch('sys.argv', ['gimmecert', 'renew', '--csr', 'mycustom.csr.pem', 'client', 'myclient'])
@@ -706,7 +1016,7 @@ def test_renew_command_invoked_with_correct_parameters_for_client_with_csr_optio
 
     gimmecert.cli.main()
 
-    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', 'myclient', False, 'mycustom.csr.pem', None, None)
+    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', 'myclient', False, 'mycustom.csr.pem', None, None, None, None, None)
 
 
 @mock.patch('sys.argv', ['gimmecert', 'renew', '--update-dns-names', 'myservice1.example.com,myservice2.example.com', 'server', 'myserver'])
@@ -722,7 +1032,7 @@ def test_renew_command_invoked_with_correct_parameters_for_client_with_update_dn
 
     mock_renew.assert_called_once_with(sys.stdout, sys.stderr,
                                        tmpdir.strpath,
-                                       'server', 'myserver', False, None, ['myservice1.example.com', 'myservice2.example.com'], None)
+                                       'server', 'myserver', False, None, ['myservice1.example.com', 'myservice2.example.com'], None, None, None, None)
 
 
 @mock.patch('sys.argv', ['gimmecert', 'status'])
@@ -736,7 +1046,21 @@ def test_status_command_invoked_with_correct_parameters(mock_status, tmpdir):
 
     gimmecert.cli.main()
 
-    mock_status.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath)
+    mock_status.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, None)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'status', '--jobs', '3'])
+@mock.patch('gimmecert.cli.status')
+def test_status_command_invoked_with_correct_parameters_jobs(mock_status, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_status.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_status.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 3)
 
 
 @pytest.mark.parametrize("key_specification", [
@@ -788,7 +1112,7 @@ def test_client_command_invoked_with_correct_parameters_with_key_specification(m
 
     gimmecert.cli.main()
 
-    mock_client.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'myclient', None, ('rsa', 1024))
+    mock_client.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'myclient', None, ('rsa', 1024), None, None, None, None)
 
 
 @mock.patch('sys.argv', ['gimmecert', 'renew', '--new-private-key', '--key-specification', 'rsa:1024', 'server', 'myserver'])
@@ -802,7 +1126,7 @@ def test_renew_command_invoked_with_correct_parameters_for_server_with_new_priva
 
     gimmecert.cli.main()
 
-    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'server', 'myserver', True, None, None, ('rsa', 1024))
+    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'server', 'myserver', True, None, None, ('rsa', 1024), None, None, None)
 
 
 @mock.patch('sys.argv', ['gimmecert', 'renew', '--new-private-key', '--key-specification', 'rsa:1024', 'client', 'myclient'])
@@ -816,4 +1140,655 @@ def test_renew_command_invoked_with_correct_parameters_for_client_with_new_priva
 
     gimmecert.cli.main()
 
-    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', 'myclient', True, None, None, ('rsa', 1024))
+    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', 'myclient', True, None, None, ('rsa', 1024), None, None, None)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'export-p12', 'server', 'myserver1', 'myserver2'])
+@mock.patch('gimmecert.cli.export_p12')
+def test_export_p12_command_invoked_with_correct_parameters_for_entity_names(mock_export_p12, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_export_p12.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_export_p12.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'server', ['myserver1', 'myserver2'], None, None)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'export-p12', 'client', '--all', '--password', 'mypassword'])
+@mock.patch('gimmecert.cli.export_p12')
+def test_export_p12_command_invoked_with_correct_parameters_for_all_entities_with_password(mock_export_p12, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_export_p12.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_export_p12.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', None, 'mypassword', None)
+
+
+@mock.patch('gimmecert.cli.export_p12')
+def test_export_p12_command_reads_password_from_file(mock_export_p12, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+    tmpdir.join('password.txt').write('mypassword\nignored\n')
+
+    mock_export_p12.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    with mock.patch('sys.argv', ['gimmecert', 'export-p12', 'client', 'myclient', '--password-file', 'password.txt']):
+        gimmecert.cli.main()
+
+    mock_export_p12.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', ['myclient'], 'mypassword', None)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'export-p12', 'client', 'myclient', '-P', '-'])
+@mock.patch('sys.stdin', io.StringIO('mypassword\n'))
+@mock.patch('gimmecert.cli.export_p12')
+def test_export_p12_command_reads_password_from_standard_input(mock_export_p12, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_export_p12.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_export_p12.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', ['myclient'], 'mypassword', None)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'export-p12', 'client', 'myclient', '--password-env', 'P12_PASSWORD'])
+@mock.patch.dict('os.environ', {'P12_PASSWORD': 'mypassword'})
+@mock.patch('gimmecert.cli.export_p12')
+def test_export_p12_command_reads_password_from_environment_variable(mock_export_p12, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_export_p12.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_export_p12.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', ['myclient'], 'mypassword', None)
+
+
+@pytest.mark.parametrize("layout", [
+    "",
+    "{name}.pem",
+    "{kind}.pem",
+    "{name}/{kind}/{unknown}.pem",
+    "{name}/{kind}/{0}.pem",
+    "/{name}/{kind}.pem",
+    "../{name}/{kind}.pem",
+    "{type}/../../{name}.{kind}.pem",
+])
+def test_sync_layout_raises_exception_for_invalid_layout(layout):
+
+    with pytest.raises(ValueError):
+        gimmecert.cli.sync_layout(layout)
+
+
+@pytest.mark.parametrize("layout", [
+    "{type}/{name}/{kind}.pem",
+    "{name}.{kind}.pem",
+    "{name}/../{name}.{kind}.pem",
+])
+def test_sync_layout_returns_layout_for_valid_layout(layout):
+
+    assert gimmecert.cli.sync_layout(layout) == layout
+
+
+@mock.patch('sys.argv', ['gimmecert', 'sync', '--to', 'target'])
+@mock.patch('gimmecert.cli.sync')
+def test_sync_command_invoked_with_correct_parameters_no_options(mock_sync, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_sync.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_sync.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'target', '{type}/{name}/{kind}.pem')
+
+
+@mock.patch('sys.argv', ['gimmecert', 'sync', '--to', 'target', '--layout', '{name}.{kind}.pem'])
+@mock.patch('gimmecert.cli.sync')
+def test_sync_command_invoked_with_correct_parameters_with_layout(mock_sync, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_sync.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_sync.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'target', '{name}.{kind}.pem')
+
+
+@mock.patch('sys.argv', ['gimmecert', 'watch', '--inbox', 'inbox', '--type', 'client'])
+@mock.patch('gimmecert.cli.watch')
+def test_watch_command_invoked_with_correct_parameters_no_options(mock_watch, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_watch.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_watch.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'inbox', 'client', 1.0, False, None)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'watch', '--inbox', 'inbox', '--type', 'server', '--interval', '2.5', '--once', '--jobs', '4'])
+@mock.patch('gimmecert.cli.watch')
+def test_watch_command_invoked_with_correct_parameters_with_options(mock_watch, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_watch.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_watch.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'inbox', 'server', 2.5, True, 4)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'revoke', 'server', 'myserver'])
+@mock.patch('gimmecert.cli.revoke')
+def test_revoke_command_invoked_with_correct_parameters(mock_revoke, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_revoke.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_revoke.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'server', 'myserver', False)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'revoke', '--remove-artefacts', 'client', 'myclient'])
+@mock.patch('gimmecert.cli.revoke')
+def test_revoke_command_invoked_with_correct_parameters_with_remove_artefacts(mock_revoke, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_revoke.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_revoke.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', 'myclient', True)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'crl'])
+@mock.patch('gimmecert.cli.crl')
+def test_crl_command_invoked_with_correct_parameters_no_options(mock_crl, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_crl.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_crl.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, False)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'crl', '--delta'])
+@mock.patch('gimmecert.cli.crl')
+def test_crl_command_invoked_with_correct_parameters_with_delta(mock_crl, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_crl.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_crl.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, True)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'ocsp-serve'])
+@mock.patch('gimmecert.cli.ocsp_serve')
+def test_ocsp_serve_command_invoked_with_correct_parameters_no_options(mock_ocsp_serve, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_ocsp_serve.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_ocsp_serve.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, '127.0.0.1', 8080, 300)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'ocsp-serve', '--host', '0.0.0.0', '--port', '9999', '--refresh-interval', '30'])
+@mock.patch('gimmecert.cli.ocsp_serve')
+def test_ocsp_serve_command_invoked_with_correct_parameters_with_options(mock_ocsp_serve, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_ocsp_serve.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_ocsp_serve.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, '0.0.0.0', 9999, 30)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'verify', '--all'])
+@mock.patch('gimmecert.cli.verify')
+def test_verify_command_invoked_with_correct_parameters_all(mock_verify, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_verify.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_verify.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, None, None, 'text', None)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'verify', '--format', 'json', '--jobs', '3', 'client', 'myclient1', 'myclient2'])
+@mock.patch('gimmecert.cli.verify')
+def test_verify_command_invoked_with_correct_parameters_entity_names(mock_verify, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_verify.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_verify.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', ['myclient1', 'myclient2'], 'json', 3)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'server', '--output-archive', '-', 'myserver'])
+@mock.patch('gimmecert.cli.server')
+def test_server_command_invoked_with_correct_parameters_with_output_archive_on_stdout(mock_server, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_server.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    with mock.patch('sys.stdout', new=mock.Mock()) as mock_stdout:
+        gimmecert.cli.main()
+
+    # Informative messages should not end-up in the archive.
+    mock_server.assert_called_once_with(sys.stderr, sys.stderr, tmpdir.strpath, 'myserver', [], None, None, mock_stdout.buffer, None, None)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'client', '--output-archive', 'myclient.tar', 'myclient'])
+@mock.patch('gimmecert.cli.client')
+def test_client_command_invoked_with_correct_parameters_with_output_archive_file(mock_client, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    def client(stdout, stderr, project_directory, entity_name, custom_csr_path, key_specification, output_archive, validity, backdate, reuse_key_from):
+        output_archive.write(b"archive")
+        return gimmecert.commands.ExitCode.SUCCESS
+
+    mock_client.side_effect = client
+
+    gimmecert.cli.main()
+
+    mock_client.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'myclient', None, None, mock.ANY, None, None, None)
+    assert tmpdir.join('myclient.tar').read_binary() == b"archive"
+
+
+@mock.patch('sys.argv', ['gimmecert', 'init', '--ca-from', '/tmp/otherproject'])
+@mock.patch('gimmecert.cli.init')
+def test_init_command_invoked_with_correct_parameters_with_ca_from(mock_init, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_init.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_init.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, tmpdir.basename, 1, ('rsa', 2048), None, '/tmp/otherproject', None, None, None)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'init', '--shared-ca', 'development'])
+@mock.patch('gimmecert.cli.init')
+def test_init_command_uses_shared_ca_name_as_default_ca_base_name(mock_init, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_init.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_init.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'development', 1, ('rsa', 2048), None, None, 'development', None, None)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'subca', '-k', 'ecdsa:secp384r1', 'worker1'])
+@mock.patch('gimmecert.cli.subca')
+def test_subca_command_invoked_with_correct_parameters(mock_subca, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_subca.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    key_specification = ('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP384R1)
+
+    mock_subca.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'worker1', key_specification, None, None, None)
+
+
+@pytest.mark.parametrize("value, expected_duration", [
+    ("0", datetime.timedelta(0)),
+    ("30", datetime.timedelta(seconds=30)),
+    ("30s", datetime.timedelta(seconds=30)),
+    ("15m", datetime.timedelta(minutes=15)),
+    ("2H", datetime.timedelta(hours=2)),
+    ("7d", datetime.timedelta(days=7)),
+    ("2w", datetime.timedelta(weeks=2)),
+])
+def test_duration_parses_valid_durations(value, expected_duration):
+    assert gimmecert.cli.duration(value) == expected_duration
+
+
+@pytest.mark.parametrize("value", ["", "m", "-5m", "1.5h", "1y", "15 minutes"])
+def test_duration_raises_exception_for_invalid_durations(value):
+    with pytest.raises(ValueError):
+        gimmecert.cli.duration(value)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'server', '--validity', '15m', '--backdate', '30s', 'myserver'])
+@mock.patch('gimmecert.cli.server')
+def test_server_command_invoked_with_correct_parameters_with_validity(mock_server, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_server.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_server.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'myserver', [], None, None, None,
+                                        datetime.timedelta(minutes=15), datetime.timedelta(seconds=30))
+
+
+@mock.patch('sys.argv', ['gimmecert', 'subca', '--validity', '30d', '--backdate', '1m', 'worker1'])
+@mock.patch('gimmecert.cli.subca')
+def test_subca_command_invoked_with_correct_parameters_with_validity(mock_subca, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_subca.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_subca.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'worker1', None, None,
+                                       datetime.timedelta(days=30), datetime.timedelta(minutes=1))
+
+
+@mock.patch('sys.argv', ['gimmecert', 'reissue', 'server', 'myserver'])
+@mock.patch('gimmecert.cli.reissue')
+def test_reissue_command_invoked_with_correct_parameters_no_options(mock_reissue, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_reissue.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_reissue.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'server', 'myserver', None, None, 0, 1)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'reissue', '--validity', '15m', '--backdate', '30s', '--interval', '5m', '--count', '0', 'client', 'myclient'])
+@mock.patch('gimmecert.cli.reissue')
+def test_reissue_command_invoked_with_correct_parameters_with_options(mock_reissue, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_reissue.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_reissue.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', 'myclient',
+                                         datetime.timedelta(minutes=15), datetime.timedelta(seconds=30), 300, None)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'bench', 'issuance'])
+@mock.patch('gimmecert.cli.bench')
+def test_bench_command_invoked_with_correct_parameters_no_options(mock_bench):
+    mock_bench.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_bench.assert_called_once_with(sys.stdout, sys.stderr, 'issuance', None, 100, None, 'text')
+
+
+@mock.patch('sys.argv', ['gimmecert', 'bench', '-k', 'ecdsa:secp384r1', '-n', '10', 'issuance'])
+@mock.patch('gimmecert.cli.bench')
+def test_bench_command_invoked_with_correct_parameters_with_options(mock_bench):
+    mock_bench.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_bench.assert_called_once_with(sys.stdout, sys.stderr, 'issuance', ('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP384R1), 10,
+                                       None, 'text')
+
+
+@mock.patch('sys.argv', ['gimmecert', 'bench', '-j', '4', '-f', 'json', 'keys'])
+@mock.patch('gimmecert.cli.bench')
+def test_bench_command_invoked_with_correct_parameters_for_keys(mock_bench):
+    mock_bench.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_bench.assert_called_once_with(sys.stdout, sys.stderr, 'keys', None, 100, 4, 'json')
+
+
+@mock.patch('sys.argv', ['gimmecert', 'issue', '--profile', 'email', 'alice@example.com', 'alice@example.org'])
+@mock.patch('gimmecert.cli.issue')
+def test_issue_command_invoked_with_correct_parameters_no_options(mock_issue, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_issue.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_issue.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'email', 'alice@example.com', ['alice@example.org'], None, None, None,
+                                       None, None)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'issue', '-p', 'signing', '-k', 'rsa:3072', '--validity', '30d', '--backdate', '1m', 'mysigner'])
+@mock.patch('gimmecert.cli.issue')
+def test_issue_command_invoked_with_correct_parameters_with_options(mock_issue, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_issue.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_issue.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'signing', 'mysigner', [], None, ('rsa', 3072), None,
+                                       datetime.timedelta(days=30), datetime.timedelta(minutes=1))
+
+
+@mock.patch('sys.argv', ['gimmecert', 'renew', '-u', 'myservice.local,ip:10.0.0.1,uri:spiffe://example.com/myserver', 'server', 'myserver'])
+@mock.patch('gimmecert.cli.renew')
+def test_renew_command_invoked_with_correct_parameters_with_prefixed_subject_alternative_names(mock_renew, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_renew.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_renew.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'server', 'myserver', False, None,
+                                       ['myservice.local', 'ip:10.0.0.1', 'uri:spiffe://example.com/myserver'], None, None, None, None)
+
+
+@pytest.mark.parametrize("name", ["myserver.local", "ip:10.0.0.1", "uri:spiffe://example.com/myserver", "email:ops@example.com"])
+def test_subject_alternative_name_returns_valid_names(name):
+    assert gimmecert.cli.subject_alternative_name(name) == name
+
+
+@pytest.mark.parametrize("name", ["ip:10.0.0.300", "ip:", "email:"])
+def test_subject_alternative_name_raises_exception_for_invalid_names(name):
+    with pytest.raises(ValueError):
+        gimmecert.cli.subject_alternative_name(name)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'metrics'])
+@mock.patch('gimmecert.cli.metrics')
+def test_metrics_command_invoked_with_correct_parameters_no_options(mock_metrics, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_metrics.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_metrics.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, None)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'metrics', '--textfile', 'gimmecert.prom'])
+@mock.patch('gimmecert.cli.metrics')
+def test_metrics_command_invoked_with_correct_parameters_with_textfile(mock_metrics, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_metrics.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_metrics.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'gimmecert.prom')
+
+
+@mock.patch('sys.argv', ['gimmecert', 'renew', '--plan', 'server', 'myserver'])
+@mock.patch('gimmecert.cli.renew_plan')
+def test_renew_plan_command_invoked_with_correct_parameters_no_options(mock_renew_plan, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_renew_plan.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_renew_plan.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'server', 'myserver', False, None)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'renew', '-P', '-p', '-k', 'ecdsa:secp384r1', 'client', 'myclient'])
+@mock.patch('gimmecert.cli.renew_plan')
+def test_renew_plan_command_invoked_with_correct_parameters_with_options(mock_renew_plan, tmpdir):
+    # This should ensure we don't accidentally create artifacts
+    # outside of test directory.
+    tmpdir.chdir()
+
+    mock_renew_plan.return_value = gimmecert.commands.ExitCode.SUCCESS
+
+    gimmecert.cli.main()
+
+    mock_renew_plan.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'client', 'myclient', True,
+                                            ('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP384R1))
+
+
+@mock.patch('sys.argv', ['gimmecert', 'pool', 'daemon'])
+@mock.patch('gimmecert.cli.pool')
+def test_pool_command_invoked_with_correct_parameters_no_options(mock_pool, tmpdir):
+    mock_pool.return_value = gimmecert.commands.ExitCode.SUCCESS
+    tmpdir.chdir()
+
+    gimmecert.cli.main()
+
+    mock_pool.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'daemon', None, 10, 50, None, 5.0, False)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'pool', 'daemon', '-k', 'rsa:2048', '-k', 'ecdsa:secp256r1', '-l', '5', '-H', '20', '-j', '2', '-n', '1', '-1'])
+@mock.patch('gimmecert.cli.pool')
+def test_pool_command_invoked_with_correct_parameters_with_options(mock_pool, tmpdir):
+    mock_pool.return_value = gimmecert.commands.ExitCode.SUCCESS
+    tmpdir.chdir()
+
+    gimmecert.cli.main()
+
+    mock_pool.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'daemon',
+                                      [('rsa', 2048), ('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)], 5, 20, 2, 1.0, True)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'client', '--reuse-key-from', 'server/myserver', 'myclient'])
+@mock.patch('gimmecert.cli.client')
+def test_client_command_invoked_with_correct_parameters_with_reuse_key_from(mock_client, tmpdir):
+    mock_client.return_value = gimmecert.commands.ExitCode.SUCCESS
+    tmpdir.chdir()
+
+    gimmecert.cli.main()
+
+    mock_client.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'myclient', None, None, None, None, None, ('server', 'myserver'))
+
+
+@pytest.mark.parametrize("reference, expected", [
+    ("server/myserver", ("server", "myserver")),
+    ("client/my client", ("client", "my client")),
+])
+def test_entity_reference_returns_entity_type_and_name(reference, expected):
+    assert gimmecert.cli.entity_reference(reference) == expected
+
+
+@pytest.mark.parametrize("reference", ["myserver", "subca/myca", "server/", "server/..", "client/a/b"])
+def test_entity_reference_raises_exception_for_invalid_reference(reference):
+    with pytest.raises(ValueError):
+        gimmecert.cli.entity_reference(reference)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'client', '--count', '100', '--name-template', 'loadclient-{n:06d}'])
+@mock.patch('gimmecert.cli.client_bulk')
+def test_client_bulk_command_invoked_with_correct_parameters(mock_client_bulk, tmpdir):
+    mock_client_bulk.return_value = gimmecert.commands.ExitCode.SUCCESS
+    tmpdir.chdir()
+
+    gimmecert.cli.main()
+
+    mock_client_bulk.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'loadclient-{n:06d}', 100, None, None, None, None, None,
+                                             False, None)
+
+
+@mock.patch('sys.argv', ['gimmecert', 'client', '-N', '5', '-T', 'c{n}', '-r', 'server/myserver', '-j', '3', '-o', 'c.tar', '-A'])
+@mock.patch('gimmecert.cli.client_bulk')
+def test_client_bulk_command_invoked_with_correct_parameters_with_options(mock_client_bulk, tmpdir):
+    mock_client_bulk.return_value = gimmecert.commands.ExitCode.SUCCESS
+    tmpdir.chdir()
+
+    gimmecert.cli.main()
+
+    mock_client_bulk.assert_called_once_with(sys.stdout, sys.stderr, tmpdir.strpath, 'c{n}', 5, None, mock.ANY, None, None,
+                                             ('server', 'myserver'), True, 3)
+
+
+@pytest.mark.parametrize("template", ["client{n}", "loadclient-{n:06d}", "{n}"])
+def test_name_template_returns_valid_template(template):
+    assert gimmecert.cli.name_template(template) == template
+
+
+@pytest.mark.parametrize("template", ["client", "client{x}", "client{0}", "client{n:s}", "client/{n}", "client{", "{n}/.."])
+def test_name_template_raises_exception_for_invalid_template(template):
+    with pytest.raises(ValueError):
+        gimmecert.cli.name_template(template)
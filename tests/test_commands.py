@@ -19,15 +19,26 @@
 #
 
 import argparse
+import collections
+import datetime
 import io
+import json
 import os
+import re
 import sys
+import tarfile
+import threading
 
+import cryptography.hazmat.primitives.serialization.pkcs12
 import cryptography.x509
 from cryptography.hazmat.primitives.asymmetric import ec
 
 import gimmecert.commands
 import gimmecert.crypto
+import gimmecert.metrics
+import gimmecert.ocsp
+import gimmecert.storage
+import gimmecert.utils
 
 import pytest
 from unittest import mock
@@ -901,6 +912,24 @@ def test_status_reports_no_client_certificates_were_issued(tmpdir):
         "Missing message about no client certificates being issued:\n%s" % stdout
 
 
+def test_status_output_does_not_depend_on_number_of_jobs(sample_project_directory):
+    outputs = []
+
+    for jobs in [None, 1, 4]:
+        stdout_stream = io.StringIO()
+        stderr_stream = io.StringIO()
+
+        status_code = gimmecert.commands.status(stdout_stream, stderr_stream, sample_project_directory.strpath, jobs)
+
+        assert status_code == gimmecert.commands.ExitCode.SUCCESS
+        assert stderr_stream.getvalue() == ""
+
+        outputs.append(stdout_stream.getvalue())
+
+    assert outputs[0] == outputs[1] == outputs[2]
+    assert outputs[0].index("CN=server-with-csr-1\n") < outputs[0].index("CN=server-with-privkey-2\n") < outputs[0].index("CN=client-with-csr-1\n")
+
+
 @pytest.mark.parametrize("subject_dn_line", [
     "CN=My Project Level 1 CA [END ENTITY ISSUING CA]",
     "CN=myserver",
@@ -1615,3 +1644,1557 @@ def test_renew_generates_new_private_key_with_same_key_specification_as_old_one(
 
     assert private_key_after_issuance != private_key_after_renewal
     assert key_specification_after_renewal == key_specification
+
+
+def test_export_p12_reports_error_if_directory_is_not_initialised(tmpdir):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.export_p12(stdout_stream, stderr_stream, tmpdir.strpath, 'server', ['myserver'], None)
+
+    assert "No CA hierarchy has been initialised yet" in stderr_stream.getvalue()
+    assert stdout_stream.getvalue() == ""
+    assert status_code == gimmecert.commands.ExitCode.ERROR_NOT_INITIALISED
+
+
+def test_export_p12_reports_error_if_entity_does_not_exist(gctmpdir):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver1', None, None, None)
+
+    status_code = gimmecert.commands.export_p12(stdout_stream, stderr_stream, gctmpdir.strpath, 'server', ['myserver1', 'myserver2'], None)
+
+    assert "No existing certificate found for server myserver2" in stderr_stream.getvalue()
+    assert stdout_stream.getvalue() == ""
+    assert status_code == gimmecert.commands.ExitCode.ERROR_UNKNOWN_ENTITY
+    assert not gctmpdir.join('.gimmecert', 'server', 'myserver1.p12').check()
+
+
+def test_export_p12_outputs_bundle_with_private_key_certificate_and_ca_chain(tmpdir):
+    gimmecert.commands.init(io.StringIO(), io.StringIO(), tmpdir.strpath, tmpdir.basename, 2, ("ecdsa", ec.SECP256R1))
+    gimmecert.commands.client(io.StringIO(), io.StringIO(), tmpdir.strpath, 'myclient', None, None)
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.export_p12(stdout_stream, io.StringIO(), tmpdir.strpath, 'client', ['myclient'], None)
+
+    pkcs12_bundle = tmpdir.join('.gimmecert', 'client', 'myclient.p12').read_binary()
+    private_key, certificate, ca_chain = cryptography.hazmat.primitives.serialization.pkcs12.load_key_and_certificates(
+        pkcs12_bundle, None, cryptography.hazmat.backends.default_backend())
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "Client PKCS#12 bundle: .gimmecert/client/myclient.p12" in stdout_stream.getvalue()
+    expected_private_key = gimmecert.storage.read_private_key(tmpdir.join('.gimmecert', 'client', 'myclient.key.pem').strpath)
+    assert private_key.private_numbers() == expected_private_key.private_numbers()
+    assert certificate == gimmecert.storage.read_certificate(tmpdir.join('.gimmecert', 'client', 'myclient.cert.pem').strpath)
+    assert ca_chain == [gimmecert.storage.read_certificate(tmpdir.join('.gimmecert', 'ca', 'level%d.cert.pem' % level).strpath) for level in (2, 1)]
+
+
+def test_export_p12_uses_password_if_specified(gctmpdir):
+    gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver', None, None, None)
+
+    gimmecert.commands.export_p12(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'server', ['myserver'], 'mypassword')
+
+    pkcs12_bundle = gctmpdir.join('.gimmecert', 'server', 'myserver.p12').read_binary()
+    _, certificate, _ = cryptography.hazmat.primitives.serialization.pkcs12.load_key_and_certificates(
+        pkcs12_bundle, b'mypassword', cryptography.hazmat.backends.default_backend())
+
+    assert certificate == gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'server', 'myserver.cert.pem').strpath)
+
+
+def test_export_p12_exports_all_entities_of_type_if_no_names_are_specified(sample_project_directory):
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.export_p12(stdout_stream, io.StringIO(), sample_project_directory.strpath, 'server', None, None)
+
+    stdout = stdout_stream.getvalue()
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "Server PKCS#12 bundle (no private key): .gimmecert/server/server-with-csr-1.p12" in stdout
+    assert "Server PKCS#12 bundle (no private key): .gimmecert/server/server-with-csr-2.p12" in stdout
+    assert "Server PKCS#12 bundle: .gimmecert/server/server-with-privkey-1.p12" in stdout
+    assert "Server PKCS#12 bundle: .gimmecert/server/server-with-privkey-2.p12" in stdout
+    assert not sample_project_directory.join('.gimmecert', 'client', 'client-with-privkey-1.p12').check()
+
+
+def test_export_p12_reports_no_issued_certificates(gctmpdir):
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.export_p12(stdout_stream, io.StringIO(), gctmpdir.strpath, 'client', None, None)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "No client certificates have been issued." in stdout_stream.getvalue()
+
+
+def test_sync_reports_error_if_directory_is_not_initialised(tmpdir):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.sync(stdout_stream, stderr_stream, tmpdir.strpath, tmpdir.join('target').strpath, '{type}/{name}/{kind}.pem')
+
+    assert "No CA hierarchy has been initialised yet" in stderr_stream.getvalue()
+    assert stdout_stream.getvalue() == ""
+    assert status_code == gimmecert.commands.ExitCode.ERROR_NOT_INITIALISED
+
+
+def test_sync_copies_all_artefacts_using_layout(sample_project_directory):
+    target_dir = sample_project_directory.join('target')
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.sync(stdout_stream, io.StringIO(), sample_project_directory.strpath, target_dir.strpath, '{type}/{name}/{kind}.pem')
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "16 updated, 0 unchanged, 0 removed" in stdout_stream.getvalue()
+
+    for entity_type in ['server', 'client']:
+        for i in [1, 2]:
+            privkey_name = '%s-with-privkey-%d' % (entity_type, i)
+            csr_name = '%s-with-csr-%d' % (entity_type, i)
+            source_dir = sample_project_directory.join('.gimmecert', entity_type)
+
+            assert target_dir.join(entity_type, privkey_name, 'key.pem').read() == source_dir.join('%s.key.pem' % privkey_name).read()
+            assert target_dir.join(entity_type, privkey_name, 'cert.pem').read() == source_dir.join('%s.cert.pem' % privkey_name).read()
+            assert target_dir.join(entity_type, csr_name, 'csr.pem').read() == source_dir.join('%s.csr.pem' % csr_name).read()
+            assert target_dir.join(entity_type, csr_name, 'cert.pem').read() == source_dir.join('%s.cert.pem' % csr_name).read()
+
+
+def test_sync_rewrites_only_changed_artefacts(sample_project_directory):
+    target_dir = sample_project_directory.join('target')
+    layout = '{name}.{kind}.pem'
+
+    gimmecert.commands.sync(io.StringIO(), io.StringIO(), sample_project_directory.strpath, target_dir.strpath, layout)
+    inodes_before = {f: os.stat(target_dir.join(f).strpath).st_ino for f in os.listdir(target_dir.strpath)}
+
+    gimmecert.commands.renew(io.StringIO(), io.StringIO(), sample_project_directory.strpath, 'server', 'server-with-privkey-1', False, None, None, None)
+
+    stdout_stream = io.StringIO()
+    gimmecert.commands.sync(stdout_stream, io.StringIO(), sample_project_directory.strpath, target_dir.strpath, layout)
+    inodes_after = {f: os.stat(target_dir.join(f).strpath).st_ino for f in os.listdir(target_dir.strpath)}
+
+    stdout = stdout_stream.getvalue()
+    changed = sorted(f for f in inodes_after if inodes_before[f] != inodes_after[f])
+
+    assert "1 updated, 15 unchanged, 0 removed" in stdout
+    assert "Updated: server-with-privkey-1.cert.pem" in stdout
+    assert changed == ['.gimmecert-sync.json', 'server-with-privkey-1.cert.pem']
+    assert target_dir.join('server-with-privkey-1.cert.pem').read() == \
+        sample_project_directory.join('.gimmecert', 'server', 'server-with-privkey-1.cert.pem').read()
+
+
+def test_sync_does_not_rewrite_artefact_touched_without_content_change(sample_project_directory):
+    target_dir = sample_project_directory.join('target')
+    layout = '{name}.{kind}.pem'
+    source_file = sample_project_directory.join('.gimmecert', 'client', 'client-with-privkey-1.cert.pem')
+
+    gimmecert.commands.sync(io.StringIO(), io.StringIO(), sample_project_directory.strpath, target_dir.strpath, layout)
+    inode_before = os.stat(target_dir.join('client-with-privkey-1.cert.pem').strpath).st_ino
+
+    os.utime(source_file.strpath, ns=(0, 0))
+
+    stdout_stream = io.StringIO()
+    gimmecert.commands.sync(stdout_stream, io.StringIO(), sample_project_directory.strpath, target_dir.strpath, layout)
+    inode_after = os.stat(target_dir.join('client-with-privkey-1.cert.pem').strpath).st_ino
+
+    assert "0 updated, 16 unchanged, 0 removed" in stdout_stream.getvalue()
+    assert inode_before == inode_after
+
+
+def test_sync_restores_missing_target_artefacts(sample_project_directory):
+    target_dir = sample_project_directory.join('target')
+    layout = '{name}.{kind}.pem'
+
+    gimmecert.commands.sync(io.StringIO(), io.StringIO(), sample_project_directory.strpath, target_dir.strpath, layout)
+    target_dir.join('client-with-csr-1.csr.pem').remove()
+
+    stdout_stream = io.StringIO()
+    gimmecert.commands.sync(stdout_stream, io.StringIO(), sample_project_directory.strpath, target_dir.strpath, layout)
+
+    assert "Updated: client-with-csr-1.csr.pem" in stdout_stream.getvalue()
+    assert target_dir.join('client-with-csr-1.csr.pem').read() == sample_project_directory.join('.gimmecert', 'client', 'client-with-csr-1.csr.pem').read()
+
+
+def test_sync_removes_artefacts_no_longer_present_in_project(sample_project_directory):
+    target_dir = sample_project_directory.join('target')
+    layout = '{type}/{name}/{kind}.pem'
+
+    gimmecert.commands.sync(io.StringIO(), io.StringIO(), sample_project_directory.strpath, target_dir.strpath, layout)
+
+    gimmecert.commands.renew(io.StringIO(), io.StringIO(), sample_project_directory.strpath, 'server', 'server-with-csr-1', True, None, None, None)
+
+    stdout_stream = io.StringIO()
+    gimmecert.commands.sync(stdout_stream, io.StringIO(), sample_project_directory.strpath, target_dir.strpath, layout)
+    stdout = stdout_stream.getvalue()
+
+    assert "2 updated, 14 unchanged, 1 removed" in stdout
+    assert "Removed: server/server-with-csr-1/csr.pem" in stdout
+    assert not target_dir.join('server', 'server-with-csr-1', 'csr.pem').check()
+    assert target_dir.join('server', 'server-with-csr-1', 'key.pem').check()
+
+
+def test_sync_copies_artefacts_issued_using_custom_profiles(gctmpdir):
+    gctmpdir.join('.gimmecert', 'profiles.json').write(json.dumps({'code-signing': {'key_usages': ['digital_signature']}}))
+    gimmecert.commands.issue(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'code-signing', 'mysigner', [], None, None)
+    target_dir = gctmpdir.join('target')
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.sync(stdout_stream, io.StringIO(), gctmpdir.strpath, target_dir.strpath, '{type}/{name}/{kind}.pem')
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "2 updated, 0 unchanged, 0 removed" in stdout_stream.getvalue()
+    assert target_dir.join('code-signing', 'mysigner', 'key.pem').read() == gctmpdir.join('.gimmecert', 'code-signing', 'mysigner.key.pem').read()
+    assert target_dir.join('code-signing', 'mysigner', 'cert.pem').read() == gctmpdir.join('.gimmecert', 'code-signing', 'mysigner.cert.pem').read()
+
+
+def test_sync_prunes_directories_left_empty_after_removing_artefacts(sample_project_directory):
+    target_dir = sample_project_directory.join('target')
+    layout = '{type}/{name}/{kind}.pem'
+
+    gimmecert.commands.sync(io.StringIO(), io.StringIO(), sample_project_directory.strpath, target_dir.strpath, layout)
+
+    gimmecert.commands.revoke(io.StringIO(), io.StringIO(), sample_project_directory.strpath, 'server', 'server-with-privkey-1', True)
+
+    stdout_stream = io.StringIO()
+    gimmecert.commands.sync(stdout_stream, io.StringIO(), sample_project_directory.strpath, target_dir.strpath, layout)
+
+    assert "0 updated, 14 unchanged, 2 removed" in stdout_stream.getvalue()
+    assert not target_dir.join('server', 'server-with-privkey-1').check()
+    assert target_dir.join('server').check(dir=1)
+    assert target_dir.check(dir=1)
+
+
+def test_watch_reports_error_if_directory_is_not_initialised(tmpdir):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.watch(stdout_stream, stderr_stream, tmpdir.strpath, tmpdir.strpath, 'server', 1, True)
+
+    assert "must be initialised" in stderr_stream.getvalue()
+    assert stdout_stream.getvalue() == ""
+    assert status_code == gimmecert.commands.ExitCode.ERROR_NOT_INITIALISED
+
+
+def test_watch_reports_error_if_inbox_does_not_exist(gctmpdir):
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.watch(io.StringIO(), stderr_stream, gctmpdir.strpath, gctmpdir.join('inbox').strpath, 'server', 1, True)
+
+    assert "Inbox directory does not exist" in stderr_stream.getvalue()
+    assert status_code == gimmecert.commands.ExitCode.ERROR_ARGUMENTS
+
+
+@pytest.mark.parametrize("entity_type, extended_key_usage", [
+    ("server", cryptography.x509.oid.ExtendedKeyUsageOID.SERVER_AUTH),
+    ("client", cryptography.x509.oid.ExtendedKeyUsageOID.CLIENT_AUTH),
+])
+def test_watch_issues_certificates_for_pending_csrs(gctmpdir, entity_type, extended_key_usage):
+    inbox_dir = gctmpdir.ensure('inbox', dir=True)
+    issuer_certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'ca', 'level1.cert.pem').strpath)
+    private_keys = {}
+
+    for name in ['myentity1', 'myentity2']:
+        private_keys[name] = gimmecert.crypto.KeyGenerator('ecdsa', ec.SECP256R1)()
+        gimmecert.storage.write_csr(gimmecert.crypto.generate_csr('ignored', private_keys[name]), inbox_dir.join('%s.csr.pem' % name).strpath)
+
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.watch(stdout_stream, io.StringIO(), gctmpdir.strpath, inbox_dir.strpath, entity_type, 1, True)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+
+    for name in ['myentity1', 'myentity2']:
+        certificate = gimmecert.storage.read_certificate(inbox_dir.join('%s.cert.pem' % name).strpath)
+
+        assert "certificate issued: %s" % inbox_dir.join('%s.cert.pem' % name).strpath in stdout_stream.getvalue()
+        assert certificate.subject == gimmecert.crypto.get_dn(name)
+        assert certificate.issuer == issuer_certificate.subject
+        assert certificate.public_key().public_numbers() == private_keys[name].public_key().public_numbers()
+        assert certificate.extensions.get_extension_for_class(cryptography.x509.ExtendedKeyUsage).value == \
+            cryptography.x509.ExtendedKeyUsage([extended_key_usage])
+
+
+def test_watch_signs_certificates_using_worker_processes(gctmpdir):
+    inbox_dir = gctmpdir.ensure('inbox', dir=True)
+    issuer_certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'ca', 'level1.cert.pem').strpath)
+    names = ['myclient%d' % n for n in range(1, 21)]
+    private_key = gimmecert.crypto.KeyGenerator('ecdsa', ec.SECP256R1)()
+
+    for name in names:
+        gimmecert.storage.write_csr(gimmecert.crypto.generate_csr(name, private_key), inbox_dir.join('%s.csr.pem' % name).strpath)
+
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.watch(stdout_stream, io.StringIO(), gctmpdir.strpath, inbox_dir.strpath, 'client', 1, True, 2)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert stdout_stream.getvalue().count("Client certificate issued:") == len(names)
+
+    for name in names:
+        certificate = gimmecert.storage.read_certificate(inbox_dir.join('%s.cert.pem' % name).strpath)
+
+        assert certificate.subject == gimmecert.crypto.get_dn(name)
+        assert gimmecert.crypto.verify_certificate_signature(certificate, issuer_certificate)
+
+
+def test_watch_does_not_reissue_certificates_for_processed_csrs(gctmpdir, key_with_csr):
+    inbox_dir = gctmpdir.ensure('inbox', dir=True)
+    inbox_dir.join('myserver.csr.pem').write(key_with_csr.csr_pem)
+
+    gimmecert.commands.watch(io.StringIO(), io.StringIO(), gctmpdir.strpath, inbox_dir.strpath, 'server', 1, True)
+    certificate_before = inbox_dir.join('myserver.cert.pem').read()
+
+    stdout_stream = io.StringIO()
+    gimmecert.commands.watch(stdout_stream, io.StringIO(), gctmpdir.strpath, inbox_dir.strpath, 'server', 1, True)
+    certificate_after = inbox_dir.join('myserver.cert.pem').read()
+
+    assert stdout_stream.getvalue() == ""
+    assert certificate_before == certificate_after
+
+
+def test_watch_skips_csrs_removed_while_processing_inbox(gctmpdir, key_with_csr):
+    inbox_dir = gctmpdir.ensure('inbox', dir=True)
+    inbox_dir.join('myclient.csr.pem').write(key_with_csr.csr_pem)
+    stderr_stream = io.StringIO()
+
+    # Simulate CSR being removed between directory scan and processing.
+    with mock.patch('gimmecert.watch.get_pending_csr_names') as mock_get_pending_csr_names:
+        mock_get_pending_csr_names.return_value = ['removed', 'myclient']
+
+        status_code = gimmecert.commands.watch(io.StringIO(), stderr_stream, gctmpdir.strpath, inbox_dir.strpath, 'client', 1, True)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert stderr_stream.getvalue() == ""
+    assert inbox_dir.join('myclient.cert.pem').check()
+    assert not inbox_dir.join('removed.cert.pem').check()
+
+
+def test_watch_reports_invalid_csrs_once(gctmpdir, key_with_csr):
+    inbox_dir = gctmpdir.ensure('inbox', dir=True)
+    inbox_dir.join('invalid.csr.pem').write('not a csr')
+    inbox_dir.join('myclient.csr.pem').write(key_with_csr.csr_pem)
+    stderr_stream = io.StringIO()
+
+    with mock.patch('gimmecert.watch.get_directory_watcher') as mock_get_directory_watcher:
+        mock_get_directory_watcher.return_value.wait.side_effect = [True, True, KeyboardInterrupt]
+
+        status_code = gimmecert.commands.watch(io.StringIO(), stderr_stream, gctmpdir.strpath, inbox_dir.strpath, 'client', 1, False)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert stderr_stream.getvalue().count("Failed to read CSR: %s" % inbox_dir.join('invalid.csr.pem').strpath) == 1
+    assert inbox_dir.join('myclient.cert.pem').check()
+    assert not inbox_dir.join('invalid.cert.pem').check()
+    mock_get_directory_watcher.return_value.close.assert_called_once_with()
+
+
+def test_watch_processes_csrs_on_detected_changes_until_interrupted(gctmpdir, key_with_csr):
+    inbox_dir = gctmpdir.ensure('inbox', dir=True)
+    stdout_stream = io.StringIO()
+
+    # Simulate arrival of CSR while waiting for changes in inbox.
+    wait_results = iter([False, True, KeyboardInterrupt])
+
+    def wait():
+        result = next(wait_results)
+        if result is KeyboardInterrupt:
+            raise KeyboardInterrupt()
+        elif result:
+            inbox_dir.join('myserver.csr.pem').write(key_with_csr.csr_pem)
+        return result
+
+    with mock.patch('gimmecert.watch.get_directory_watcher') as mock_get_directory_watcher:
+        mock_get_directory_watcher.return_value.wait.side_effect = wait
+
+        status_code = gimmecert.commands.watch(stdout_stream, io.StringIO(), gctmpdir.strpath, inbox_dir.strpath, 'server', 1, False)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "Watching %s for server CSRs" % inbox_dir.strpath in stdout_stream.getvalue()
+    assert "Server certificate issued: %s" % inbox_dir.join('myserver.cert.pem').strpath in stdout_stream.getvalue()
+
+
+def test_revoke_reports_error_if_directory_is_not_initialised(tmpdir):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.revoke(stdout_stream, stderr_stream, tmpdir.strpath, 'server', 'myserver')
+
+    assert "No CA hierarchy has been initialised yet" in stderr_stream.getvalue()
+    assert stdout_stream.getvalue() == ""
+    assert status_code == gimmecert.commands.ExitCode.ERROR_NOT_INITIALISED
+
+
+def test_revoke_reports_error_if_entity_does_not_exist(gctmpdir):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.revoke(stdout_stream, stderr_stream, gctmpdir.strpath, 'client', 'myclient')
+
+    assert "No existing certificate found for client myclient" in stderr_stream.getvalue()
+    assert stdout_stream.getvalue() == ""
+    assert status_code == gimmecert.commands.ExitCode.ERROR_UNKNOWN_ENTITY
+
+
+def test_revoke_records_serial_number_and_keeps_artefacts(sample_project_directory):
+    server_dir = sample_project_directory.join('.gimmecert', 'server')
+    certificate = gimmecert.storage.read_certificate(server_dir.join('server-with-privkey-1.cert.pem').strpath)
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.revoke(stdout_stream, io.StringIO(), sample_project_directory.strpath, 'server', 'server-with-privkey-1')
+
+    revocations = gimmecert.storage.read_revocations(sample_project_directory.join('.gimmecert', 'crl', 'revocations.log').strpath)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "Revoked certificate for server server-with-privkey-1 (serial number %x)" % certificate.serial_number in stdout_stream.getvalue()
+    assert "Removed artefacts" not in stdout_stream.getvalue()
+    assert [(r[0], r[2], r[3]) for r in revocations] == [(certificate.serial_number, 'server', 'server-with-privkey-1')]
+    assert server_dir.join('server-with-privkey-1.key.pem').check()
+    assert server_dir.join('server-with-privkey-1.cert.pem').check()
+
+
+def test_revoke_removes_artefacts_if_requested(sample_project_directory):
+    server_dir = sample_project_directory.join('.gimmecert', 'server')
+    certificate = gimmecert.storage.read_certificate(server_dir.join('server-with-privkey-1.cert.pem').strpath)
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.revoke(stdout_stream, io.StringIO(), sample_project_directory.strpath, 'server', 'server-with-privkey-1', True)
+
+    revoked_dir = sample_project_directory.join('.gimmecert', 'crl', 'revoked')
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "Removed artefacts of server server-with-privkey-1." in stdout_stream.getvalue()
+    assert not server_dir.join('server-with-privkey-1.key.pem').check()
+    assert not server_dir.join('server-with-privkey-1.cert.pem').check()
+    assert server_dir.join('server-with-privkey-2.cert.pem').check()
+    assert revoked_dir.join('%x.cert.pem' % certificate.serial_number).check()
+
+
+def test_revoke_does_not_record_already_revoked_certificate_again(sample_project_directory):
+    gimmecert.commands.revoke(io.StringIO(), io.StringIO(), sample_project_directory.strpath, 'client', 'client-with-csr-1')
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.revoke(stdout_stream, io.StringIO(), sample_project_directory.strpath, 'client', 'client-with-csr-1', True)
+
+    revocations = gimmecert.storage.read_revocations(sample_project_directory.join('.gimmecert', 'crl', 'revocations.log').strpath)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "has already been revoked" in stdout_stream.getvalue()
+    assert len(revocations) == 1
+    assert not sample_project_directory.join('.gimmecert', 'client', 'client-with-csr-1.cert.pem').check()
+
+
+def test_revoke_allows_issuing_new_certificate_with_same_name(gctmpdir):
+    gimmecert.commands.client(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myclient', None, None)
+    gimmecert.commands.revoke(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'client', 'myclient', True)
+
+    status_code = gimmecert.commands.client(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myclient', None, None)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+
+
+def test_crl_reports_error_if_directory_is_not_initialised(tmpdir):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.crl(stdout_stream, stderr_stream, tmpdir.strpath, False)
+
+    assert "No CA hierarchy has been initialised yet" in stderr_stream.getvalue()
+    assert stdout_stream.getvalue() == ""
+    assert status_code == gimmecert.commands.ExitCode.ERROR_NOT_INITIALISED
+
+
+def test_crl_reports_error_if_delta_crl_is_requested_without_full_crl(gctmpdir):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.crl(stdout_stream, stderr_stream, gctmpdir.strpath, True)
+
+    assert "Full CRL must be issued first" in stderr_stream.getvalue()
+    assert stdout_stream.getvalue() == ""
+    assert status_code == gimmecert.commands.ExitCode.ERROR_ARGUMENTS
+
+
+def test_crl_issues_empty_full_crl_if_nothing_was_revoked(gctmpdir):
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.crl(stdout_stream, io.StringIO(), gctmpdir.strpath, False)
+
+    issuer_certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'ca', 'level1.cert.pem').strpath)
+    crl = cryptography.x509.load_pem_x509_crl(gctmpdir.join('.gimmecert', 'crl', 'crl-full.pem').read_binary(),
+                                              cryptography.hazmat.backends.default_backend())
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "Full CRL number 1 issued with 0 revoked certificates." in stdout_stream.getvalue()
+    assert ".gimmecert/crl/crl-full.pem" in stdout_stream.getvalue()
+    assert crl.is_signature_valid(issuer_certificate.public_key())
+    assert len(crl) == 0
+
+
+def test_crl_issues_delta_crls_with_certificates_revoked_since_full_crl(tmpdir):
+    gimmecert.commands.init(io.StringIO(), io.StringIO(), tmpdir.strpath, tmpdir.basename, 2, ("ecdsa", ec.SECP256R1))
+    serial_numbers = {}
+    for name in ['myclient1', 'myclient2', 'myclient3']:
+        gimmecert.commands.client(io.StringIO(), io.StringIO(), tmpdir.strpath, name, None, None)
+        serial_numbers[name] = gimmecert.storage.read_certificate(tmpdir.join('.gimmecert', 'client', '%s.cert.pem' % name).strpath).serial_number
+
+    def load_crl(name):
+        return cryptography.x509.load_pem_x509_crl(tmpdir.join('.gimmecert', 'crl', name).read_binary(), cryptography.hazmat.backends.default_backend())
+
+    gimmecert.commands.revoke(io.StringIO(), io.StringIO(), tmpdir.strpath, 'client', 'myclient1')
+    gimmecert.commands.crl(io.StringIO(), io.StringIO(), tmpdir.strpath, False)
+
+    gimmecert.commands.revoke(io.StringIO(), io.StringIO(), tmpdir.strpath, 'client', 'myclient2')
+    gimmecert.commands.crl(io.StringIO(), io.StringIO(), tmpdir.strpath, True)
+    first_delta_crl = load_crl('crl-delta.pem')
+
+    gimmecert.commands.revoke(io.StringIO(), io.StringIO(), tmpdir.strpath, 'client', 'myclient3')
+    stdout_stream = io.StringIO()
+    status_code = gimmecert.commands.crl(stdout_stream, io.StringIO(), tmpdir.strpath, True)
+    second_delta_crl = load_crl('crl-delta.pem')
+
+    full_crl = load_crl('crl-full.pem')
+    issuer_certificate = gimmecert.storage.read_certificate(tmpdir.join('.gimmecert', 'ca', 'level2.cert.pem').strpath)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "Delta CRL number 3 (base CRL number 1) issued with 2 revoked certificates." in stdout_stream.getvalue()
+    assert full_crl.issuer == issuer_certificate.subject
+    assert second_delta_crl.is_signature_valid(issuer_certificate.public_key())
+    assert [r.serial_number for r in full_crl] == [serial_numbers['myclient1']]
+    assert [r.serial_number for r in first_delta_crl] == [serial_numbers['myclient2']]
+    assert [r.serial_number for r in second_delta_crl] == [serial_numbers['myclient2'], serial_numbers['myclient3']]
+    assert second_delta_crl.extensions.get_extension_for_class(cryptography.x509.DeltaCRLIndicator).value.crl_number == 1
+    assert second_delta_crl.extensions.get_extension_for_class(cryptography.x509.CRLNumber).value.crl_number == 3
+
+
+def test_crl_full_crl_includes_all_revoked_certificates_and_resets_delta_base(gctmpdir):
+    for name in ['myserver1', 'myserver2']:
+        gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, name, None, None, None)
+
+    gimmecert.commands.revoke(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'server', 'myserver1')
+    gimmecert.commands.crl(io.StringIO(), io.StringIO(), gctmpdir.strpath, False)
+    gimmecert.commands.revoke(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'server', 'myserver2')
+    gimmecert.commands.crl(io.StringIO(), io.StringIO(), gctmpdir.strpath, False)
+
+    stdout_stream = io.StringIO()
+    gimmecert.commands.crl(stdout_stream, io.StringIO(), gctmpdir.strpath, True)
+
+    full_crl = cryptography.x509.load_pem_x509_crl(gctmpdir.join('.gimmecert', 'crl', 'crl-full.pem').read_binary(),
+                                                   cryptography.hazmat.backends.default_backend())
+
+    assert len(full_crl) == 2
+    assert "Delta CRL number 3 (base CRL number 2) issued with 0 revoked certificates." in stdout_stream.getvalue()
+
+
+def test_revoke_archives_revoked_certificate(gctmpdir):
+    gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver', None, None, None)
+    certificate = gctmpdir.join('.gimmecert', 'server', 'myserver.cert.pem').read()
+    serial_number = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'server', 'myserver.cert.pem').strpath).serial_number
+
+    gimmecert.commands.revoke(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'server', 'myserver')
+
+    assert gctmpdir.join('.gimmecert', 'crl', 'revoked', '%x.cert.pem' % serial_number).read() == certificate
+
+
+def test_ocsp_serve_reports_error_if_directory_is_not_initialised(tmpdir):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.ocsp_serve(stdout_stream, stderr_stream, tmpdir.strpath, '127.0.0.1', 0, 60)
+
+    assert "No CA hierarchy has been initialised yet" in stderr_stream.getvalue()
+    assert stdout_stream.getvalue() == ""
+    assert status_code == gimmecert.commands.ExitCode.ERROR_NOT_INITIALISED
+
+
+@mock.patch('gimmecert.ocsp.ThreadingHTTPServer.serve_forever')
+def test_ocsp_serve_serves_responses_until_interrupted(mock_serve_forever, sample_project_directory):
+    mock_serve_forever.side_effect = KeyboardInterrupt
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.ocsp_serve(stdout_stream, io.StringIO(), sample_project_directory.strpath, '127.0.0.1', 0, 60)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "Serving OCSP responses for 8 certificates on http://127.0.0.1:" in stdout_stream.getvalue()
+    mock_serve_forever.assert_called_once_with()
+
+
+def test_ocsp_serve_keeps_refreshing_responses_after_refresh_failure(sample_project_directory):
+    refresh_calls = []
+    refreshed_after_failure = threading.Event()
+    original_refresh = gimmecert.ocsp.OCSPResponder.refresh
+
+    def refresh(responder):
+        refresh_calls.append(responder)
+        if len(refresh_calls) == 2:
+            raise FileNotFoundError("myserver.cert.pem")
+        original_refresh(responder)
+        if len(refresh_calls) > 2:
+            refreshed_after_failure.set()
+
+    def serve_forever(http_server):
+        refreshed_after_failure.wait(10)
+        raise KeyboardInterrupt
+
+    stderr_stream = io.StringIO()
+
+    with mock.patch.object(gimmecert.ocsp.OCSPResponder, 'refresh', refresh), \
+            mock.patch.object(gimmecert.ocsp.ThreadingHTTPServer, 'serve_forever', serve_forever):
+        status_code = gimmecert.commands.ocsp_serve(io.StringIO(), stderr_stream, sample_project_directory.strpath, '127.0.0.1', 0, 0.01)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert refreshed_after_failure.is_set()
+    assert "Failed to refresh OCSP responses: myserver.cert.pem" in stderr_stream.getvalue()
+
+
+def test_verify_reports_error_if_directory_is_not_initialised(tmpdir):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.verify(stdout_stream, stderr_stream, tmpdir.strpath, None, None, 'text', 1)
+
+    assert "No CA hierarchy has been initialised yet" in stderr_stream.getvalue()
+    assert stdout_stream.getvalue() == ""
+    assert status_code == gimmecert.commands.ExitCode.ERROR_NOT_INITIALISED
+
+
+def test_verify_reports_error_for_unknown_entity(sample_project_directory):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.verify(stdout_stream, stderr_stream, sample_project_directory.strpath,
+                                            'server', ['server-with-privkey-1', 'unknown'], 'text', 1)
+
+    assert stderr_stream.getvalue() == "Cannot verify certificate. No existing certificate found for server unknown.\n"
+    assert stdout_stream.getvalue() == ""
+    assert status_code == gimmecert.commands.ExitCode.ERROR_UNKNOWN_ENTITY
+
+
+@pytest.mark.parametrize("jobs", [1, 2, None])
+def test_verify_succeeds_for_valid_project(sample_project_directory, jobs):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.verify(stdout_stream, stderr_stream, sample_project_directory.strpath, None, None, 'text', jobs)
+
+    # CA certificate, 4 server, and 4 client certificates.
+    assert stdout_stream.getvalue() == "Verified 9 certificates, no problems found.\n"
+    assert stderr_stream.getvalue() == ""
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_verify_reports_problems(sample_project_directory, jobs):
+    server_directory = sample_project_directory.join('.gimmecert', 'server')
+    client_directory = sample_project_directory.join('.gimmecert', 'client')
+    server_directory.join('server-with-privkey-2.key.pem').write(server_directory.join('server-with-privkey-1.key.pem').read())
+    client_directory.join('client-with-csr-1.cert.pem').write("garbage")
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.verify(stdout_stream, io.StringIO(), sample_project_directory.strpath, None, None, 'text', jobs)
+
+    assert stdout_stream.getvalue() == """\
+Verified 9 certificates, 2 problems found:
+
+server server-with-privkey-2 [private-key]: Private key does not match the certificate public key.
+client client-with-csr-1 [certificate]: Certificate could not be parsed.
+"""
+    assert status_code == gimmecert.commands.ExitCode.ERROR_VERIFICATION_FAILED
+
+
+def test_verify_reports_certificates_issued_by_different_ca(gctmpdir, tmpdir_factory):
+    other_project_directory = tmpdir_factory.mktemp('other')
+    gimmecert.commands.init(io.StringIO(), io.StringIO(), other_project_directory.strpath, gctmpdir.basename, 1, ("rsa", 2048))
+    gimmecert.commands.client(io.StringIO(), io.StringIO(), other_project_directory.strpath, 'myclient', None, None)
+    for extension in ['key.pem', 'cert.pem']:
+        artefact = other_project_directory.join('.gimmecert', 'client', 'myclient.%s' % extension).read()
+        gctmpdir.join('.gimmecert', 'client', 'myclient.%s' % extension).write(artefact)
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.verify(stdout_stream, io.StringIO(), gctmpdir.strpath, 'client', ['myclient'], 'json', 1)
+
+    assert json.loads(stdout_stream.getvalue()) == {
+        "verified": 2,
+        "failures": [
+            {
+                "entity_type": "client",
+                "entity_name": "myclient",
+                "check": "signature",
+                "message": "Certificate has not been signed by CN=%s Level 1 CA." % gctmpdir.basename,
+            },
+        ],
+    }
+    assert status_code == gimmecert.commands.ExitCode.ERROR_VERIFICATION_FAILED
+
+
+def test_verify_reports_expired_certificates(sample_project_directory):
+    stdout_stream = io.StringIO()
+
+    with freeze_time(datetime.datetime.utcnow() + datetime.timedelta(days=400)):
+        status_code = gimmecert.commands.verify(stdout_stream, io.StringIO(), sample_project_directory.strpath, 'client', None, 'json', 1)
+
+    report = json.loads(stdout_stream.getvalue())
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_VERIFICATION_FAILED
+    assert report["verified"] == 5
+    assert [(f["entity_type"], f["entity_name"], f["check"]) for f in report["failures"]] == [
+        ("ca", "level1", "validity"),
+        ("client", "client-with-csr-1", "validity"),
+        ("client", "client-with-csr-2", "validity"),
+        ("client", "client-with-privkey-1", "validity"),
+        ("client", "client-with-privkey-2", "validity"),
+    ]
+
+
+def read_archive(stream):
+    """
+    Helper function for reading content of tar archive written to a
+    stream.
+
+    :param stream: Stream containing tar archive.
+    :type stream: io.BytesIO
+
+    :returns: Mapping between member names and their content. Ordered by member position within the archive.
+    :rtype: dict[str, bytes]
+    """
+
+    stream.seek(0)
+
+    with tarfile.open(fileobj=stream) as tar:
+        return collections.OrderedDict((member.name, tar.extractfile(member).read()) for member in tar.getmembers())
+
+
+def test_init_streams_artefacts_into_archive(tmpdir):
+    output_archive = io.BytesIO()
+
+    status_code = gimmecert.commands.init(io.StringIO(), io.StringIO(), tmpdir.strpath, 'My Project', 2, ('ecdsa', ec.SECP256R1), output_archive)
+
+    archive = read_archive(output_archive)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert list(archive.keys()) == ['ca/level1.key.pem', 'ca/level1.cert.pem', 'ca/level2.key.pem', 'ca/level2.cert.pem', 'ca/chain-full.cert.pem']
+    for name, content in archive.items():
+        assert tmpdir.join('.gimmecert', name).read_binary() == content
+
+
+@pytest.mark.parametrize("entity_type", ["server", "client"])
+def test_issuing_streams_artefacts_and_ca_chain_into_archive(gctmpdir, entity_type):
+    output_archive = io.BytesIO()
+    stdout_stream = io.StringIO()
+
+    if entity_type == "server":
+        status_code = gimmecert.commands.server(stdout_stream, io.StringIO(), gctmpdir.strpath, 'myentity', None, None, None, output_archive)
+    else:
+        status_code = gimmecert.commands.client(stdout_stream, io.StringIO(), gctmpdir.strpath, 'myentity', None, None, output_archive)
+
+    archive = read_archive(output_archive)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "certificate issued" in stdout_stream.getvalue()
+    assert list(archive.keys()) == ['%s/myentity.key.pem' % entity_type, '%s/myentity.cert.pem' % entity_type, 'ca/chain-full.cert.pem']
+    for name, content in archive.items():
+        assert gctmpdir.join('.gimmecert', name).read_binary() == content
+
+
+def test_issuing_with_csr_streams_csr_into_archive(gctmpdir, key_with_csr):
+    output_archive = io.BytesIO()
+
+    gimmecert.commands.client(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myclient', key_with_csr.csr_path, None, output_archive)
+
+    archive = read_archive(output_archive)
+
+    assert list(archive.keys()) == ['client/myclient.csr.pem', 'client/myclient.cert.pem', 'ca/chain-full.cert.pem']
+    assert archive['client/myclient.csr.pem'] == key_with_csr.csr_pem.encode()
+
+
+def test_issuing_does_not_produce_archive_on_error(gctmpdir):
+    gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver', None, None, None)
+    output_archive = io.BytesIO()
+
+    status_code = gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver', None, None, None, output_archive)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_CERTIFICATE_ALREADY_ISSUED
+    assert output_archive.getvalue() == b""
+
+
+def test_renew_streams_only_changed_artefacts_and_ca_chain_into_archive(gctmpdir):
+    gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver', None, None, None)
+    output_archive = io.BytesIO()
+
+    status_code = gimmecert.commands.renew(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'server', 'myserver', False, None, None, None, output_archive)
+
+    archive = read_archive(output_archive)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert list(archive.keys()) == ['server/myserver.cert.pem', 'ca/chain-full.cert.pem']
+    assert archive['server/myserver.cert.pem'] == gctmpdir.join('.gimmecert', 'server', 'myserver.cert.pem').read_binary()
+
+
+def test_export_p12_streams_bundles_into_archive(sample_project_directory):
+    output_archive = io.BytesIO()
+
+    status_code = gimmecert.commands.export_p12(io.StringIO(), io.StringIO(), sample_project_directory.strpath, 'client', None, None, output_archive)
+
+    archive = read_archive(output_archive)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert list(archive.keys()) == ['client/client-with-csr-1.p12', 'client/client-with-csr-2.p12',
+                                    'client/client-with-privkey-1.p12', 'client/client-with-privkey-2.p12']
+    for name, content in archive.items():
+        assert sample_project_directory.join('.gimmecert', name).read_binary() == content
+
+
+def test_init_with_ca_from_reuses_ca_hierarchy_of_other_project(gctmpdir, tmpdir):
+    project_directory = tmpdir.mkdir('project')
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.init(stdout_stream, io.StringIO(), project_directory.strpath, 'My Project', 3, ('rsa', 2048), None, gctmpdir.strpath)
+
+    stdout = stdout_stream.getvalue()
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "CA hierarchy from %s used by project" % gctmpdir.strpath in stdout
+    assert "CA Level 1 certificate: .gimmecert/ca/level1.cert.pem" in stdout
+    assert "CA Level 2" not in stdout
+    assert project_directory.join('.gimmecert', 'ca').islink()
+    assert project_directory.join('.gimmecert', 'ca', 'level1.key.pem').read() == gctmpdir.join('.gimmecert', 'ca', 'level1.key.pem').read()
+    assert not project_directory.join('.gimmecert', 'ca', 'level2.key.pem').check()
+
+
+def test_init_with_ca_from_issues_certificates_using_shared_ca_hierarchy(gctmpdir, tmpdir):
+    project_directory = tmpdir.mkdir('project')
+    gimmecert.commands.init(io.StringIO(), io.StringIO(), project_directory.strpath, 'My Project', 1, ('rsa', 2048), None, gctmpdir.strpath)
+
+    status_code = gimmecert.commands.server(io.StringIO(), io.StringIO(), project_directory.strpath, 'myserver', None, None, None)
+
+    certificate = gimmecert.storage.read_certificate(project_directory.join('.gimmecert', 'server', 'myserver.cert.pem').strpath)
+    issuer_certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'ca', 'level1.cert.pem').strpath)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert gimmecert.crypto.verify_certificate_signature(certificate, issuer_certificate)
+    assert not gctmpdir.join('.gimmecert', 'server', 'myserver.cert.pem').check()
+
+
+def test_init_with_ca_from_reports_error_if_other_project_is_not_initialised(tmpdir):
+    project_directory = tmpdir.mkdir('project')
+    other_project_directory = tmpdir.mkdir('other')
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.init(io.StringIO(), stderr_stream, project_directory.strpath, 'My Project', 1, ('rsa', 2048), None,
+                                          other_project_directory.strpath)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_ARGUMENTS
+    assert stderr_stream.getvalue() == "No CA hierarchy has been initialised in %s.\n" % other_project_directory.strpath
+    assert not project_directory.join('.gimmecert').check()
+
+
+def test_init_with_shared_ca_generates_shared_ca_hierarchy_on_first_use_only(tmpdir, monkeypatch):
+    monkeypatch.setenv('XDG_DATA_HOME', tmpdir.join('data').strpath)
+    first_stdout_stream = io.StringIO()
+    second_stdout_stream = io.StringIO()
+
+    first_status_code = gimmecert.commands.init(first_stdout_stream, io.StringIO(), tmpdir.mkdir('first').strpath, 'development', 2, ('rsa', 2048),
+                                                None, None, 'development')
+    second_status_code = gimmecert.commands.init(second_stdout_stream, io.StringIO(), tmpdir.mkdir('second').strpath, 'development', 2, ('rsa', 2048),
+                                                 None, None, 'development')
+
+    shared_ca_directory = tmpdir.join('data', 'gimmecert', 'development', '.gimmecert', 'ca')
+
+    assert first_status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert second_status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "Shared CA hierarchy development initialised" in first_stdout_stream.getvalue()
+    assert "Shared CA hierarchy development initialised" not in second_stdout_stream.getvalue()
+    assert "CA Level 2 certificate: .gimmecert/ca/level2.cert.pem" in second_stdout_stream.getvalue()
+    for project_name in ['first', 'second']:
+        assert tmpdir.join(project_name, '.gimmecert', 'ca').realpath() == shared_ca_directory.realpath()
+
+
+def test_init_raises_exception_if_both_ca_from_and_shared_ca_are_passed_in(gctmpdir, tmpdir):
+    with pytest.raises(gimmecert.commands.InvalidCommandInvocation):
+        gimmecert.commands.init(io.StringIO(), io.StringIO(), tmpdir.mkdir('project').strpath, 'My Project', 1, ('rsa', 2048), None,
+                                gctmpdir.strpath, 'development')
+
+
+def test_subca_issues_sub_ca_artefacts(gctmpdir):
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.subca(stdout_stream, io.StringIO(), gctmpdir.strpath, 'worker1', None)
+
+    subca_directory = gctmpdir.join('.gimmecert', 'subca', 'worker1')
+    ca_certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'ca', 'level1.cert.pem').strpath)
+    subca_certificate = gimmecert.storage.read_certificate(subca_directory.join('level2.cert.pem').strpath)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "Sub-CA private key: .gimmecert/subca/worker1/level2.key.pem" in stdout_stream.getvalue()
+    assert "Sub-CA certificate: .gimmecert/subca/worker1/level2.cert.pem" in stdout_stream.getvalue()
+    assert subca_directory.join('level1.cert.pem').read() == gctmpdir.join('.gimmecert', 'ca', 'level1.cert.pem').read()
+    assert not subca_directory.join('level1.key.pem').check()
+    assert subca_directory.join('level2.key.pem').check(file=1)
+    assert subca_directory.join('chain-full.cert.pem').check(file=1)
+    assert subca_certificate.subject == gimmecert.crypto.get_dn('worker1 Level 2 CA')
+    assert gimmecert.crypto.verify_certificate_signature(subca_certificate, ca_certificate)
+
+
+def test_subca_uses_passed_in_key_specification(gctmpdir):
+    gimmecert.commands.subca(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'worker1', ('ecdsa', ec.SECP256R1))
+
+    subca_certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'subca', 'worker1', 'level2.cert.pem').strpath)
+
+    assert gimmecert.crypto.key_specification_from_public_key(subca_certificate.public_key()) == ('ecdsa', ec.SECP256R1)
+
+
+def test_subca_can_be_used_as_issuing_ca_by_another_project(gctmpdir, tmpdir):
+    gimmecert.commands.subca(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'worker1', None)
+    project_directory = tmpdir.mkdir('project')
+    init_stdout_stream = io.StringIO()
+
+    init_status_code = gimmecert.commands.init(init_stdout_stream, io.StringIO(), project_directory.strpath, 'My Project', 1, ('rsa', 2048), None,
+                                               gctmpdir.join('.gimmecert', 'subca', 'worker1').strpath)
+    server_status_code = gimmecert.commands.server(io.StringIO(), io.StringIO(), project_directory.strpath, 'myserver', None, None, None)
+    verify_status_code = gimmecert.commands.verify(io.StringIO(), io.StringIO(), project_directory.strpath, None, [], 'text', 1)
+
+    certificate = gimmecert.storage.read_certificate(project_directory.join('.gimmecert', 'server', 'myserver.cert.pem').strpath)
+
+    assert init_status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "CA Level 1 private key" not in init_stdout_stream.getvalue()
+    assert "CA Level 2 private key: .gimmecert/ca/level2.key.pem" in init_stdout_stream.getvalue()
+    assert server_status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert verify_status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert certificate.issuer == gimmecert.crypto.get_dn('worker1 Level 2 CA')
+
+
+def test_subca_reports_error_if_directory_is_not_initialised(tmpdir):
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.subca(io.StringIO(), stderr_stream, tmpdir.strpath, 'worker1', None)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_NOT_INITIALISED
+    assert "must be initialised" in stderr_stream.getvalue()
+
+
+def test_subca_does_not_overwrite_existing_sub_ca(gctmpdir):
+    gimmecert.commands.subca(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'worker1', None)
+    private_key = gctmpdir.join('.gimmecert', 'subca', 'worker1', 'level2.key.pem').read()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.subca(io.StringIO(), stderr_stream, gctmpdir.strpath, 'worker1', None)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_CERTIFICATE_ALREADY_ISSUED
+    assert stderr_stream.getvalue() == "Refusing to overwrite existing data. Sub-CA worker1 has already been issued.\n"
+    assert gctmpdir.join('.gimmecert', 'subca', 'worker1', 'level2.key.pem').read() == private_key
+
+
+def test_subca_streams_artefacts_into_archive(gctmpdir):
+    output_archive = io.BytesIO()
+
+    status_code = gimmecert.commands.subca(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'worker1', None, output_archive)
+
+    archive = read_archive(output_archive)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert list(archive.keys()) == ['subca/worker1/level1.cert.pem', 'subca/worker1/level2.key.pem', 'subca/worker1/level2.cert.pem',
+                                    'subca/worker1/chain-full.cert.pem']
+    for name, content in archive.items():
+        assert gctmpdir.join('.gimmecert', name).read_binary() == content
+
+
+@pytest.mark.parametrize("entity_type", ["server", "client"])
+def test_issuing_uses_passed_in_validity_and_backdate(gctmpdir, entity_type):
+    validity, backdate = datetime.timedelta(minutes=15), datetime.timedelta(seconds=30)
+
+    if entity_type == "server":
+        status_code = gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myentity', None, None, None, None, validity, backdate)
+    else:
+        status_code = gimmecert.commands.client(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myentity', None, None, None, validity, backdate)
+
+    certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', entity_type, 'myentity.cert.pem').strpath)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert certificate.not_valid_after - certificate.not_valid_before == validity + backdate
+
+
+def test_subca_uses_passed_in_validity_and_backdate(gctmpdir):
+    validity, backdate = datetime.timedelta(days=30), datetime.timedelta(minutes=1)
+
+    status_code = gimmecert.commands.subca(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'worker1', None, None, validity, backdate)
+
+    certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'subca', 'worker1', 'level2.cert.pem').strpath)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert certificate.not_valid_after - certificate.not_valid_before == validity + backdate
+
+
+def test_init_uses_passed_in_validity_and_backdate_for_ca_hierarchy(tmpdir):
+    validity, backdate = datetime.timedelta(days=7), datetime.timedelta(0)
+
+    gimmecert.commands.init(io.StringIO(), io.StringIO(), tmpdir.strpath, 'My Project', 2, ('ecdsa', ec.SECP256R1), None, None, None, validity, backdate)
+
+    for level in [1, 2]:
+        certificate = gimmecert.storage.read_certificate(tmpdir.join('.gimmecert', 'ca', 'level%d.cert.pem' % level).strpath)
+        assert certificate.not_valid_after - certificate.not_valid_before == validity
+
+
+def test_renew_uses_passed_in_validity_and_backdate(gctmpdir):
+    gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver', None, None, None)
+    validity, backdate = datetime.timedelta(hours=1), datetime.timedelta(minutes=1)
+
+    status_code = gimmecert.commands.renew(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'server', 'myserver', False, None, None, None, None,
+                                           validity, backdate)
+
+    certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'server', 'myserver.cert.pem').strpath)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert certificate.not_valid_after - certificate.not_valid_before == validity + backdate
+
+
+def test_reissue_reissues_certificate_requested_number_of_times(gctmpdir):
+    gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver', ['service.local'], None, None)
+    private_key = gctmpdir.join('.gimmecert', 'server', 'myserver.key.pem').read()
+    old_certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'server', 'myserver.cert.pem').strpath)
+    stdout_stream = io.StringIO()
+
+    with mock.patch('gimmecert.crypto.CertificateReissuer.__call__', autospec=True,
+                    side_effect=gimmecert.crypto.CertificateReissuer.__call__) as mock_reissue:
+        status_code = gimmecert.commands.reissue(stdout_stream, io.StringIO(), gctmpdir.strpath, 'server', 'myserver',
+                                                 datetime.timedelta(minutes=15), datetime.timedelta(seconds=30), 0, 3)
+
+    certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'server', 'myserver.cert.pem').strpath)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert mock_reissue.call_count == 3
+    assert "Reissued certificate for server myserver 3 times." in stdout_stream.getvalue()
+    assert "Server certificate: .gimmecert/server/myserver.cert.pem (valid until" in stdout_stream.getvalue()
+    assert certificate.serial_number != old_certificate.serial_number
+    assert list(certificate.extensions) == list(old_certificate.extensions)
+    assert certificate.not_valid_after - certificate.not_valid_before == datetime.timedelta(minutes=15, seconds=30)
+    assert gctmpdir.join('.gimmecert', 'server', 'myserver.key.pem').read() == private_key
+
+
+def test_reissue_keeps_reissuing_until_interrupted(gctmpdir):
+    gimmecert.commands.client(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myclient', None, None)
+    stdout_stream = io.StringIO()
+
+    with mock.patch('time.sleep', side_effect=[None, KeyboardInterrupt]) as mock_sleep:
+        status_code = gimmecert.commands.reissue(stdout_stream, io.StringIO(), gctmpdir.strpath, 'client', 'myclient', None, None, 60, None)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert mock_sleep.call_args_list == [mock.call(60), mock.call(60)]
+    assert "Press Ctrl-C to stop." in stdout_stream.getvalue()
+    assert "Reissued certificate for client myclient 2 times." in stdout_stream.getvalue()
+
+
+def test_reissue_reports_error_for_unknown_entity(gctmpdir):
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.reissue(io.StringIO(), stderr_stream, gctmpdir.strpath, 'server', 'myserver', None, None, 0, 1)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_UNKNOWN_ENTITY
+    assert stderr_stream.getvalue() == "Cannot reissue certificate. No existing certificate found for server myserver.\n"
+
+
+def test_reissue_reports_error_if_directory_is_not_initialised(tmpdir):
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.reissue(io.StringIO(), stderr_stream, tmpdir.strpath, 'server', 'myserver', None, None, 0, 1)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_NOT_INITIALISED
+    assert "No CA hierarchy has been initialised yet" in stderr_stream.getvalue()
+
+
+def test_renew_plan_reports_error_if_directory_is_not_initialised(tmpdir):
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.renew_plan(io.StringIO(), stderr_stream, tmpdir.strpath, 'server', 'myserver', False, None)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_NOT_INITIALISED
+    assert "No CA hierarchy has been initialised yet" in stderr_stream.getvalue()
+
+
+def test_renew_plan_reports_error_for_unknown_entity(sample_project_directory):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.renew_plan(stdout_stream, stderr_stream, sample_project_directory.strpath, 'server', 'myserver', False, None)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_UNKNOWN_ENTITY
+    assert stdout_stream.getvalue() == ""
+    assert stderr_stream.getvalue() == "Cannot renew certificate. No existing certificate found for server myserver.\n"
+
+
+def test_renew_plan_raises_exception_for_key_specification_without_new_private_key(sample_project_directory):
+    with pytest.raises(gimmecert.commands.InvalidCommandInvocation):
+        gimmecert.commands.renew_plan(io.StringIO(), io.StringIO(), sample_project_directory.strpath, 'server', 'server-with-privkey-1', False,
+                                      ('ecdsa', ec.SECP256R1))
+
+
+@mock.patch('gimmecert.benchmark.estimate_key_generation', return_value=0.5)
+@mock.patch('gimmecert.benchmark.estimate_renewal', return_value=0.002)
+def test_renew_plan_reports_new_private_key_and_estimates_duration(mock_estimate_renewal, mock_estimate_key_generation, gctmpdir):
+    gimmecert.commands.client(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myclient', None, ('rsa', 1024))
+    private_key = gctmpdir.join('.gimmecert', 'client', 'myclient.key.pem').read()
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.renew_plan(stdout_stream, stderr_stream, gctmpdir.strpath, 'client', 'myclient', True, ('ecdsa', ec.SECP256R1))
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert stderr_stream.getvalue() == ""
+    assert stdout_stream.getvalue() == (
+        "Renewal plan for client myclient: new private key (1024-bit RSA -> secp256r1 ECDSA)\n"
+        "Certificate signing: 2.00ms\n"
+        "Private key generation: 500.00ms\n"
+        "Estimated duration: 502.00ms\n"
+    )
+    mock_estimate_key_generation.assert_called_once_with(('ecdsa', ec.SECP256R1))
+
+    # Private key must not be touched.
+    assert gctmpdir.join('.gimmecert', 'client', 'myclient.key.pem').read() == private_key
+
+
+@mock.patch('gimmecert.benchmark.estimate_key_generation', return_value=0.5)
+@mock.patch('gimmecert.benchmark.estimate_renewal', return_value=0.002)
+def test_renew_plan_with_new_private_key_preserves_key_algorithm(mock_estimate_renewal, mock_estimate_key_generation, sample_project_directory):
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.renew_plan(stdout_stream, io.StringIO(), sample_project_directory.strpath, 'server', 'server-with-csr-1', True, None)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "Renewal plan for server server-with-csr-1: new private key (2048-bit RSA -> 2048-bit RSA)\n" in stdout_stream.getvalue()
+    mock_estimate_key_generation.assert_called_once_with(('rsa', 2048))
+
+
+@pytest.mark.parametrize("entity_name, expected_action", [
+    ('client-with-csr-1', 'keep CSR (2048-bit RSA)'),
+    ('client-with-privkey-1', 'keep private key (2048-bit RSA)'),
+])
+def test_renew_plan_reports_kept_private_key_or_csr(sample_project_directory, entity_name, expected_action):
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.renew_plan(stdout_stream, io.StringIO(), sample_project_directory.strpath, 'client', entity_name, False, None)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "Renewal plan for client %s: %s\n" % (entity_name, expected_action) in stdout_stream.getvalue()
+    assert re.search(r"^Certificate signing: [0-9.]+ms$", stdout_stream.getvalue(), re.MULTILINE)
+    assert "Private key generation" not in stdout_stream.getvalue()
+
+
+def test_bench_reports_issuance_overhead_for_all_profiles():
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.bench(stdout_stream, io.StringIO(), 'issuance', ('ecdsa', ec.SECP256R1), 5)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "secp256r1 ECDSA issuing CA, 5 certificates per measurement" in stdout_stream.getvalue()
+
+    for profile_name in ['server', 'client', 'server-client']:
+        assert re.search(r"^%s +[0-9.]+ ms +[0-9.]+ ms +-?[0-9.]+ ms \(-?[0-9.]+%%\)$" % profile_name, stdout_stream.getvalue(), re.MULTILINE)
+
+
+def test_bench_reports_key_generation_and_signing_throughput():
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.bench(stdout_stream, io.StringIO(), 'keys', ('ecdsa', ec.SECP256R1), 3, 2)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "using 1 and 2 worker process(es)" in stdout_stream.getvalue()
+    assert re.search(r"^Key specification +Keys/s \(1\) +Keys/s \(2\) +Signatures/s \(1\) +Signatures/s \(2\)$", stdout_stream.getvalue(), re.MULTILINE)
+    assert re.search(r"^ecdsa:secp256r1 +[0-9.]+ +[0-9.]+ +[0-9.]+ +[0-9.]+$", stdout_stream.getvalue(), re.MULTILINE)
+
+
+def test_bench_outputs_key_generation_and_signing_throughput_as_json():
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.bench(stdout_stream, io.StringIO(), 'keys', ('ecdsa', ec.SECP256R1), 3, 2, 'json')
+
+    report = json.loads(stdout_stream.getvalue())
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert report['jobs'] == 2
+    assert len(report['results']) == 1
+    assert report['results'][0]['key_specification'] == 'ecdsa:secp256r1'
+    assert report['results'][0]['keys_per_second']['single'] > 0
+    assert report['results'][0]['keys_per_second']['parallel'] > 0
+    assert report['results'][0]['signatures_per_second']['single'] > 0
+    assert report['results'][0]['signatures_per_second']['parallel'] > 0
+
+
+def test_bench_outputs_issuance_overhead_as_json():
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.bench(stdout_stream, io.StringIO(), 'issuance', ('ecdsa', ec.SECP256R1), 2, output_format='json')
+
+    report = json.loads(stdout_stream.getvalue())
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert report['key_specification'] == 'ecdsa:secp256r1'
+    assert [result['profile'] for result in report['results']] == ['server', 'client', 'server-client']
+
+
+def test_issue_reports_success_and_issues_certificate_using_custom_profile(gctmpdir):
+    gctmpdir.join('.gimmecert', 'profiles.json').write(json.dumps({
+        'code-signing': {
+            'key_usages': ['digital_signature'],
+            'extended_key_usages': ['code_signing'],
+        },
+    }))
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.issue(stdout_stream, stderr_stream, gctmpdir.strpath, 'code-signing', 'mysigner', [], None, None)
+
+    certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'code-signing', 'mysigner.cert.pem').strpath)
+    extended_key_usage = certificate.extensions.get_extension_for_class(cryptography.x509.ExtendedKeyUsage).value
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert stderr_stream.getvalue() == ""
+    assert stdout_stream.getvalue() == """Certificate issued using profile code-signing.
+Private key: .gimmecert/code-signing/mysigner.key.pem
+Certificate: .gimmecert/code-signing/mysigner.cert.pem
+"""
+    assert list(extended_key_usage) == [cryptography.x509.oid.ExtendedKeyUsageOID.CODE_SIGNING]
+    assert gctmpdir.join('.gimmecert', 'code-signing', 'mysigner.key.pem').check(file=1)
+
+
+def test_issue_uses_public_key_from_csr(gctmpdir, key_with_csr):
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.issue(stdout_stream, io.StringIO(), gctmpdir.strpath, 'server-client', 'mynode', ['mynode.local'],
+                                           key_with_csr.csr_path, None)
+
+    certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'server-client', 'mynode.cert.pem').strpath)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "CSR: .gimmecert/server-client/mynode.csr.pem" in stdout_stream.getvalue()
+    assert gimmecert.crypto.public_keys_match(certificate.public_key(), key_with_csr.private_key.public_key())
+    assert gimmecert.utils.get_dns_names(certificate) == ['mynode', 'mynode.local']
+    assert not gctmpdir.join('.gimmecert', 'server-client', 'mynode.key.pem').check()
+
+
+def test_issue_reports_error_for_unknown_profile(gctmpdir):
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.issue(io.StringIO(), stderr_stream, gctmpdir.strpath, 'code-signing', 'mysigner', [], None, None)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_ARGUMENTS
+    assert stderr_stream.getvalue() == "Unknown profile: code-signing.\n"
+
+
+def test_issue_errors_out_if_certificate_already_issued(gctmpdir):
+    gimmecert.commands.issue(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'server-client', 'mynode', [], None, None)
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.issue(io.StringIO(), stderr_stream, gctmpdir.strpath, 'server-client', 'mynode', [], None, None)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_CERTIFICATE_ALREADY_ISSUED
+    assert stderr_stream.getvalue() == "Refusing to overwrite existing data. Certificate has already been issued for server-client mynode.\n"
+
+
+def test_issue_reports_error_if_directory_is_not_initialised(tmpdir):
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.issue(io.StringIO(), stderr_stream, tmpdir.strpath, 'server-client', 'mynode', [], None, None)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_NOT_INITIALISED
+    assert "CA hierarchy must be initialised prior to issuing certificates" in stderr_stream.getvalue()
+
+
+def test_server_and_status_support_ip_uri_and_email_subject_alternative_names(gctmpdir):
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver',
+                                            ['myserver.local', 'ip:10.0.0.1', 'ip:2001:db8::1', 'uri:spiffe://example.com/myserver', 'email:ops@example.com'],
+                                            None, None)
+    gimmecert.commands.status(stdout_stream, io.StringIO(), gctmpdir.strpath)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "    DNS: myserver, myserver.local\n" in stdout_stream.getvalue()
+    assert "    IP: 10.0.0.1, 2001:db8::1\n" in stdout_stream.getvalue()
+    assert "    URI: spiffe://example.com/myserver\n" in stdout_stream.getvalue()
+    assert "    E-mail: ops@example.com\n" in stdout_stream.getvalue()
+
+
+def test_server_reports_error_for_invalid_subject_alternative_names(gctmpdir):
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.server(io.StringIO(), stderr_stream, gctmpdir.strpath, 'myserver', ['ip:10.0.0.300'], None, None)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_ARGUMENTS
+    assert stderr_stream.getvalue() == "Invalid IP address: '10.0.0.300'\n"
+    assert not gctmpdir.join('.gimmecert', 'server', 'myserver.key.pem').check()
+
+
+def test_renew_replaces_dns_names_with_prefixed_names(gctmpdir):
+    gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver', ['myservice.local'], None, None)
+
+    status_code = gimmecert.commands.renew(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'server', 'myserver', False, None,
+                                           ['ip:10.0.0.2', 'uri:spiffe://example.com/myserver'], None)
+
+    certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'server', 'myserver.cert.pem').strpath)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert gimmecert.utils.get_subject_alternative_names(certificate, 'dns') == ['myserver']
+    assert gimmecert.utils.get_subject_alternative_names(certificate, 'ip') == ['10.0.0.2']
+    assert gimmecert.utils.get_subject_alternative_names(certificate, 'uri') == ['spiffe://example.com/myserver']
+
+
+def test_renew_reports_error_for_invalid_subject_alternative_names(gctmpdir):
+    gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver', [], None, None)
+    old_private_key = gctmpdir.join('.gimmecert', 'server', 'myserver.key.pem').read()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.renew(io.StringIO(), stderr_stream, gctmpdir.strpath, 'server', 'myserver', True, None, ['ip:myserver'], None)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_ARGUMENTS
+    assert stderr_stream.getvalue() == "Invalid IP address: 'myserver'\n"
+    assert gctmpdir.join('.gimmecert', 'server', 'myserver.key.pem').read() == old_private_key
+
+
+def test_metrics_reports_error_if_directory_is_not_initialised(tmpdir):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.metrics(stdout_stream, stderr_stream, tmpdir.strpath, None)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_NOT_INITIALISED
+    assert stdout_stream.getvalue() == ""
+    assert "No CA hierarchy has been initialised yet" in stderr_stream.getvalue()
+
+
+def test_metrics_outputs_metrics_to_standard_output(tmpdir):
+    with freeze_time('2018-01-01 00:15:00'):
+        gimmecert.commands.init(io.StringIO(), io.StringIO(), tmpdir.strpath, tmpdir.basename, 1, ("rsa", 1024))
+        gimmecert.commands.server(io.StringIO(), io.StringIO(), tmpdir.strpath, 'myserver', None, None, ('ecdsa', ec.SECP256R1))
+
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.metrics(stdout_stream, stderr_stream, tmpdir.strpath, None)
+
+    stdout = stdout_stream.getvalue()
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert stderr_stream.getvalue() == ""
+    assert 'gimmecert_certificate_not_after_timestamp_seconds{type="server",name="myserver"} 1546301700\n' in stdout
+    assert 'gimmecert_certificates{type="server",key_algorithm="secp256r1 ECDSA"} 1\n' in stdout
+
+
+def test_metrics_writes_metrics_into_textfile(gctmpdir):
+    gimmecert.commands.client(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myclient', None, None)
+    textfile = gctmpdir.join('textfile', 'gimmecert.prom')
+
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.metrics(stdout_stream, stderr_stream, gctmpdir.strpath, textfile.strpath)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert stdout_stream.getvalue() == ""
+    assert stderr_stream.getvalue() == ""
+    assert textfile.read() == gimmecert.metrics.collect_metrics(gctmpdir.strpath)
+    assert os.listdir(textfile.dirname) == ['gimmecert.prom']
+
+
+def test_pool_reports_error_if_directory_is_not_initialised(tmpdir):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.pool(stdout_stream, stderr_stream, tmpdir.strpath, 'daemon', None, 1, 2, 1, 1.0, True)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_NOT_INITIALISED
+    assert "must be initialised" in stderr_stream.getvalue()
+    assert stdout_stream.getvalue() == ""
+
+
+def test_pool_run_once_fills_pools_for_passed_in_key_specifications(gctmpdir):
+    stdout_stream = io.StringIO()
+    key_specifications = [('ecdsa', ec.SECP256R1), ('ecdsa', ec.SECP384R1)]
+
+    status_code = gimmecert.commands.pool(stdout_stream, io.StringIO(), gctmpdir.strpath, 'daemon', key_specifications, 2, 3, 2, 1.0, True)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "Generated 3 secp256r1 ECDSA private key(s), pool level is 3." in stdout_stream.getvalue()
+    assert "Generated 3 secp384r1 ECDSA private key(s), pool level is 3." in stdout_stream.getvalue()
+    assert len(gctmpdir.join('.gimmecert', 'pool', 'ecdsa-secp256r1').listdir()) == 3
+    assert len(gctmpdir.join('.gimmecert', 'pool', 'ecdsa-secp384r1').listdir()) == 3
+
+
+def test_pool_run_once_defaults_to_ca_hierarchy_key_specification(tmpdir):
+    gimmecert.commands.init(io.StringIO(), io.StringIO(), tmpdir.strpath, tmpdir.basename, 1, ('ecdsa', ec.SECP256R1))
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.pool(stdout_stream, io.StringIO(), tmpdir.strpath, 'daemon', None, 1, 2, 1, 1.0, True)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert len(tmpdir.join('.gimmecert', 'pool', 'ecdsa-secp256r1').listdir()) == 2
+
+
+def test_pool_keeps_pools_filled_until_interrupted(gctmpdir):
+    stdout_stream = io.StringIO()
+
+    with mock.patch('time.sleep', side_effect=[None, KeyboardInterrupt]) as mock_sleep:
+        status_code = gimmecert.commands.pool(stdout_stream, io.StringIO(), gctmpdir.strpath, 'daemon', [('ecdsa', ec.SECP256R1)], 1, 2, 1, 3.0,
+                                              False)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "Keeping key pool filled with secp256r1 ECDSA keys (1-2 keys per pool, checking every 3 seconds)." in stdout_stream.getvalue()
+    assert stdout_stream.getvalue().count("Generated") == 1
+    assert mock_sleep.call_count == 2
+    mock_sleep.assert_called_with(3.0)
+
+
+def test_server_uses_private_key_from_pool(gctmpdir):
+    gimmecert.commands.pool(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'daemon', None, 1, 1, 1, 1.0, True)
+    pool_directory = gctmpdir.join('.gimmecert', 'pool').listdir()[0]
+    pooled_key = pool_directory.listdir()[0].read()
+
+    status_code = gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver', None, None, None)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert gctmpdir.join('.gimmecert', 'server', 'myserver.key.pem').read() == pooled_key
+    assert pool_directory.listdir() == []
+
+
+def test_client_reuses_private_key_of_existing_entity(gctmpdir):
+    gimmecert.commands.client(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myclient1', None, None)
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.client(stdout_stream, io.StringIO(), gctmpdir.strpath, 'myclient2', None, None, reuse_key_from=('client', 'myclient1'))
+
+    private_key_file = gctmpdir.join('.gimmecert', 'client', 'myclient2.key.pem')
+    certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'client', 'myclient2.cert.pem').strpath)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert "Client private key: .gimmecert/client/myclient2.key.pem (shared with client myclient1)" in stdout_stream.getvalue()
+    assert os.path.samefile(private_key_file.strpath, gctmpdir.join('.gimmecert', 'client', 'myclient1.key.pem').strpath)
+    assert gimmecert.crypto.public_keys_match(gimmecert.storage.read_private_key(private_key_file.strpath).public_key(), certificate.public_key())
+
+
+def test_client_reports_error_if_entity_to_reuse_private_key_from_does_not_exist(gctmpdir):
+    stdout_stream = io.StringIO()
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.client(stdout_stream, stderr_stream, gctmpdir.strpath, 'myclient', None, None, reuse_key_from=('server', 'myserver'))
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_UNKNOWN_ENTITY
+    assert stderr_stream.getvalue() == "Cannot reuse private key. No existing certificate found for server myserver.\n"
+    assert stdout_stream.getvalue() == ""
+    assert not gctmpdir.join('.gimmecert', 'client', 'myclient.cert.pem').check()
+
+
+def test_client_reports_error_if_entity_to_reuse_private_key_from_has_no_private_key(gctmpdir, key_with_csr):
+    gctmpdir.join('server.csr.pem').write(key_with_csr.csr_pem)
+    gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver', None, gctmpdir.join('server.csr.pem').strpath, None)
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.client(io.StringIO(), stderr_stream, gctmpdir.strpath, 'myclient', None, None, reuse_key_from=('server', 'myserver'))
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_ARGUMENTS
+    assert "Cannot reuse private key of server myserver" in stderr_stream.getvalue()
+
+
+def test_client_bulk_reports_error_if_directory_is_not_initialised(tmpdir):
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.client_bulk(io.StringIO(), stderr_stream, tmpdir.strpath, 'myclient-{n}', 2, None)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_NOT_INITIALISED
+    assert "must be initialised" in stderr_stream.getvalue()
+
+
+def test_client_bulk_issues_client_certificates_using_name_template(gctmpdir):
+    stdout_stream = io.StringIO()
+
+    status_code = gimmecert.commands.client_bulk(stdout_stream, io.StringIO(), gctmpdir.strpath, 'loadclient-{n:03d}', 12, ('ecdsa', ec.SECP256R1),
+                                                 jobs=2)
+
+    client_directory = gctmpdir.join('.gimmecert', 'client')
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert stdout_stream.getvalue() == ("12 client certificates issued.\n"
+                                        "Client private keys: .gimmecert/client/loadclient-{n:03d}.key.pem\n"
+                                        "Client certificates: .gimmecert/client/loadclient-{n:03d}.cert.pem\n")
+    assert sorted(f.basename for f in client_directory.listdir()) == sorted(['loadclient-%03d.%s.pem' % (n, kind)
+                                                                            for n in range(1, 13) for kind in ['key', 'cert']])
+
+    for n in range(1, 13):
+        private_key = gimmecert.storage.read_private_key(client_directory.join('loadclient-%03d.key.pem' % n).strpath)
+        certificate = gimmecert.storage.read_certificate(client_directory.join('loadclient-%03d.cert.pem' % n).strpath)
+
+        assert isinstance(private_key.curve, ec.SECP256R1)
+        assert gimmecert.crypto.public_keys_match(private_key.public_key(), certificate.public_key())
+        assert certificate.subject == gimmecert.crypto.get_dn('loadclient-%03d' % n)
+
+
+def test_client_bulk_takes_private_keys_from_key_pool(gctmpdir):
+    gimmecert.commands.pool(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'daemon', [('ecdsa', ec.SECP256R1)], 3, 3, 1, 1, True)
+    pooled_private_keys = [gimmecert.storage.read_private_key(f.strpath) for f in gctmpdir.join('.gimmecert', 'pool', 'ecdsa-secp256r1').listdir()]
+
+    status_code = gimmecert.commands.client_bulk(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myclient-{n}', 5, ('ecdsa', ec.SECP256R1))
+
+    private_keys = [gimmecert.storage.read_private_key(gctmpdir.join('.gimmecert', 'client', 'myclient-%d.key.pem' % n).strpath)
+                    for n in range(1, 6)]
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert gctmpdir.join('.gimmecert', 'pool', 'ecdsa-secp256r1').listdir() == []
+    assert sum(1 for private_key in private_keys
+               if any(gimmecert.crypto.public_keys_match(private_key.public_key(), pooled_private_key.public_key())
+                      for pooled_private_key in pooled_private_keys)) == 3
+
+
+def test_client_bulk_refuses_to_overwrite_existing_clients(gctmpdir):
+    gimmecert.commands.client(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myclient-2', None, None)
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.client_bulk(io.StringIO(), stderr_stream, gctmpdir.strpath, 'myclient-{n}', 3, None)
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_CERTIFICATE_ALREADY_ISSUED
+    assert stderr_stream.getvalue() == "Refusing to overwrite existing data. Certificate has already been issued for client myclient-2.\n"
+    assert not gctmpdir.join('.gimmecert', 'client', 'myclient-1.cert.pem').check()
+
+
+def test_client_bulk_writes_artefacts_only_into_output_archive(gctmpdir):
+    stdout_stream = io.StringIO()
+    archive_stream = io.BytesIO()
+
+    status_code = gimmecert.commands.client_bulk(stdout_stream, io.StringIO(), gctmpdir.strpath, 'myclient-{n}', 2, ('ecdsa', ec.SECP256R1),
+                                                 archive_stream, archive_only=True)
+
+    archive_stream.seek(0)
+    with tarfile.open(fileobj=archive_stream) as tar:
+        names = tar.getnames()
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert stdout_stream.getvalue() == "2 client certificates issued into output archive.\n"
+    assert names == ['client/myclient-1.key.pem', 'client/myclient-1.cert.pem', 'client/myclient-2.key.pem', 'client/myclient-2.cert.pem',
+                     'ca/chain-full.cert.pem']
+    assert gctmpdir.join('.gimmecert', 'client').listdir() == []
+
+
+def test_client_bulk_reuses_private_key_of_existing_entity(gctmpdir):
+    gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver', None, None, None)
+    server_private_key_path = gctmpdir.join('.gimmecert', 'server', 'myserver.key.pem').strpath
+    archive_stream = io.BytesIO()
+
+    status_code = gimmecert.commands.client_bulk(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myclient-{n}', 2, None, archive_stream,
+                                                 reuse_key_from=('server', 'myserver'))
+
+    archive_stream.seek(0)
+    with tarfile.open(fileobj=archive_stream) as tar:
+        archived_private_key = tar.extractfile('client/myclient-2.key.pem').read()
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert archived_private_key == gctmpdir.join('.gimmecert', 'server', 'myserver.key.pem').read_binary()
+
+    for n in [1, 2]:
+        certificate = gimmecert.storage.read_certificate(gctmpdir.join('.gimmecert', 'client', 'myclient-%d.cert.pem' % n).strpath)
+        private_key_path = gctmpdir.join('.gimmecert', 'client', 'myclient-%d.key.pem' % n).strpath
+
+        assert os.path.samefile(private_key_path, server_private_key_path)
+        assert gimmecert.crypto.public_keys_match(gimmecert.storage.read_private_key(private_key_path).public_key(), certificate.public_key())
+
+
+def test_client_bulk_reports_error_if_entity_to_reuse_private_key_from_does_not_exist(gctmpdir):
+    stderr_stream = io.StringIO()
+
+    status_code = gimmecert.commands.client_bulk(io.StringIO(), stderr_stream, gctmpdir.strpath, 'myclient-{n}', 2, None,
+                                                 reuse_key_from=('client', 'missing'))
+
+    assert status_code == gimmecert.commands.ExitCode.ERROR_UNKNOWN_ENTITY
+    assert stderr_stream.getvalue() == "Cannot reuse private key. No existing certificate found for client missing.\n"
+    assert gctmpdir.join('.gimmecert', 'client').listdir() == []
@@ -20,13 +20,16 @@
 
 
 import datetime
+import ipaddress
 
 import cryptography.hazmat.primitives.asymmetric.ec
 import cryptography.hazmat.primitives.asymmetric.rsa
+import cryptography.hazmat.primitives.serialization.pkcs12
 import cryptography.x509
 from dateutil.relativedelta import relativedelta
 
 import gimmecert.crypto
+import gimmecert.utils
 
 import pytest
 from freezegun import freeze_time
@@ -71,6 +74,14 @@ def test_get_validity_range_drops_microseconds():
     assert not_after.microsecond == 0
 
 
+@freeze_time('2018-01-01 00:15:00')
+def test_get_validity_range_uses_passed_in_validity_and_backdate():
+    not_before, not_after = gimmecert.crypto.get_validity_range(datetime.timedelta(minutes=15), datetime.timedelta(seconds=30))
+
+    assert not_before == datetime.datetime(2018, 1, 1, 0, 14, 30)
+    assert not_after == datetime.datetime(2018, 1, 1, 0, 30, 0)
+
+
 def test_issue_certificate_returns_certificate():
 
     issuer_dn = gimmecert.crypto.get_dn('My test 1')
@@ -723,3 +734,344 @@ def test_key_specification_raises_exception_for_invalid_public_key():
         gimmecert.crypto.key_specification_from_public_key(public_key)
 
     assert str(e_info.value) == "Unsupported public key instance passed-in: \"not_a_public_key_instance\" (<class 'str'>)"
+
+
+def test_serialize_pkcs12_without_password_produces_unencrypted_bundle():
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    ca_hierarchy = gimmecert.crypto.generate_ca_hierarchy('My Project', 2, key_generator)
+    private_key = key_generator()
+    certificate = gimmecert.crypto.issue_client_certificate('myclient', private_key.public_key(), ca_hierarchy[-1][0], ca_hierarchy[-1][1])
+    ca_chain = [ca_hierarchy[1][1], ca_hierarchy[0][1]]
+
+    pkcs12_bundle = gimmecert.crypto.serialize_pkcs12('myclient', private_key, certificate, ca_chain)
+
+    bundle_private_key, bundle_certificate, bundle_ca_chain = cryptography.hazmat.primitives.serialization.pkcs12.load_key_and_certificates(
+        pkcs12_bundle, None, cryptography.hazmat.backends.default_backend())
+
+    assert bundle_private_key.private_numbers() == private_key.private_numbers()
+    assert bundle_certificate == certificate
+    assert bundle_ca_chain == ca_chain
+
+
+def test_serialize_pkcs12_with_password_produces_encrypted_bundle():
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    ca_hierarchy = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, key_generator)
+    private_key = key_generator()
+    certificate = gimmecert.crypto.issue_server_certificate('myserver', private_key.public_key(), ca_hierarchy[-1][0], ca_hierarchy[-1][1])
+
+    pkcs12_bundle = gimmecert.crypto.serialize_pkcs12('myserver', private_key, certificate, [ca_hierarchy[0][1]], 'mypassword')
+
+    with pytest.raises(ValueError):
+        cryptography.hazmat.primitives.serialization.pkcs12.load_key_and_certificates(pkcs12_bundle, None, cryptography.hazmat.backends.default_backend())
+
+    _, bundle_certificate, _ = cryptography.hazmat.primitives.serialization.pkcs12.load_key_and_certificates(
+        pkcs12_bundle, b'mypassword', cryptography.hazmat.backends.default_backend())
+
+    assert bundle_certificate == certificate
+
+
+def test_serialize_pkcs12_without_private_key():
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    ca_hierarchy = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, key_generator)
+    private_key = key_generator()
+    certificate = gimmecert.crypto.issue_client_certificate('myclient', private_key.public_key(), ca_hierarchy[-1][0], ca_hierarchy[-1][1])
+
+    pkcs12_bundle = gimmecert.crypto.serialize_pkcs12('myclient', None, certificate, [ca_hierarchy[0][1]])
+
+    bundle_private_key, _, bundle_certificates = cryptography.hazmat.primitives.serialization.pkcs12.load_key_and_certificates(
+        pkcs12_bundle, None, cryptography.hazmat.backends.default_backend())
+
+    # Without private key, the certificate cannot be matched, and it
+    # is treated as one of additional certificates.
+    assert bundle_private_key is None
+    assert certificate in bundle_certificates
+
+
+def test_issue_crl_returns_full_crl_with_revoked_certificates():
+    ca_hierarchy = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, gimmecert.crypto.KeyGenerator('rsa', 2048))
+    issuer_private_key, issuer_certificate = ca_hierarchy[0]
+    last_update = datetime.datetime(2018, 1, 1, 0, 0, 0)
+    next_update = datetime.datetime(2018, 1, 8, 0, 0, 0)
+    revoked_certificates = [(1234, datetime.datetime(2017, 12, 1, 0, 0, 0)), (5678, datetime.datetime(2017, 12, 2, 0, 0, 0))]
+
+    crl = gimmecert.crypto.issue_crl(revoked_certificates, issuer_private_key, issuer_certificate, 3, last_update, next_update)
+
+    assert isinstance(crl, cryptography.x509.CertificateRevocationList)
+    assert crl.is_signature_valid(issuer_certificate.public_key())
+    assert crl.issuer == issuer_certificate.subject
+    assert crl.last_update == last_update
+    assert crl.next_update == next_update
+    assert crl.extensions.get_extension_for_class(cryptography.x509.CRLNumber).value.crl_number == 3
+    assert [(r.serial_number, r.revocation_date) for r in crl] == revoked_certificates
+
+    with pytest.raises(cryptography.x509.ExtensionNotFound):
+        crl.extensions.get_extension_for_class(cryptography.x509.DeltaCRLIndicator)
+
+
+def test_issue_crl_returns_delta_crl_if_base_crl_number_is_passed_in():
+    ca_hierarchy = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, gimmecert.crypto.KeyGenerator('rsa', 2048))
+    issuer_private_key, issuer_certificate = ca_hierarchy[0]
+    last_update = datetime.datetime(2018, 1, 1, 0, 0, 0)
+    next_update = datetime.datetime(2018, 1, 2, 0, 0, 0)
+
+    crl = gimmecert.crypto.issue_crl([], issuer_private_key, issuer_certificate, 5, last_update, next_update, 3)
+
+    delta_crl_indicator = crl.extensions.get_extension_for_class(cryptography.x509.DeltaCRLIndicator)
+
+    assert delta_crl_indicator.critical is True
+    assert delta_crl_indicator.value.crl_number == 3
+    assert crl.extensions.get_extension_for_class(cryptography.x509.CRLNumber).value.crl_number == 5
+    assert len(crl) == 0
+
+
+@pytest.mark.parametrize("key_specification", [
+    ("rsa", 2048),
+    ("ecdsa", cryptography.hazmat.primitives.asymmetric.ec.SECP256R1),
+])
+def test_verify_certificate_signature_returns_true_for_certificate_signed_by_issuer(key_specification):
+    key_generator = gimmecert.crypto.KeyGenerator(*key_specification)
+    ca_hierarchy = gimmecert.crypto.generate_ca_hierarchy('My Project', 2, key_generator)
+    certificate = gimmecert.crypto.issue_client_certificate('myclient', key_generator().public_key(), ca_hierarchy[-1][0], ca_hierarchy[-1][1])
+
+    assert gimmecert.crypto.verify_certificate_signature(certificate, ca_hierarchy[-1][1]) is True
+    assert gimmecert.crypto.verify_certificate_signature(ca_hierarchy[1][1], ca_hierarchy[0][1]) is True
+    assert gimmecert.crypto.verify_certificate_signature(ca_hierarchy[0][1], ca_hierarchy[0][1]) is True
+
+
+def test_verify_certificate_signature_returns_false_for_certificate_not_signed_by_issuer():
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    ca_hierarchy = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, key_generator)
+    other_ca_hierarchy = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, key_generator)
+    certificate = gimmecert.crypto.issue_client_certificate('myclient', key_generator().public_key(), ca_hierarchy[0][0], ca_hierarchy[0][1])
+
+    # Same naming, but different key.
+    assert gimmecert.crypto.verify_certificate_signature(certificate, other_ca_hierarchy[0][1]) is False
+
+
+def test_verify_certificate_signature_returns_false_for_issuer_naming_mismatch():
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    ca_hierarchy = gimmecert.crypto.generate_ca_hierarchy('My Project', 2, key_generator)
+    certificate = gimmecert.crypto.issue_client_certificate('myclient', key_generator().public_key(), ca_hierarchy[-1][0], ca_hierarchy[-1][1])
+
+    assert gimmecert.crypto.verify_certificate_signature(certificate, ca_hierarchy[0][1]) is False
+
+
+def test_public_keys_match():
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    private_key1 = key_generator()
+    private_key2 = key_generator()
+
+    assert gimmecert.crypto.public_keys_match(private_key1.public_key(), private_key1.public_key()) is True
+    assert gimmecert.crypto.public_keys_match(private_key1.public_key(), private_key2.public_key()) is False
+
+
+def test_issue_sub_ca_certificate():
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    issuer_private_key, issuer_certificate = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, key_generator)[0]
+    private_key = key_generator()
+
+    certificate = gimmecert.crypto.issue_sub_ca_certificate('worker1 Level 2 CA', private_key.public_key(), issuer_private_key, issuer_certificate)
+
+    assert certificate.subject == gimmecert.crypto.get_dn('worker1 Level 2 CA')
+    assert certificate.issuer == issuer_certificate.subject
+    assert certificate.extensions.get_extension_for_class(cryptography.x509.BasicConstraints).value.ca is True
+    assert certificate.not_valid_after <= issuer_certificate.not_valid_after
+    assert gimmecert.crypto.verify_certificate_signature(certificate, issuer_certificate)
+
+
+@freeze_time('2018-01-01 00:15:00')
+def test_issue_sub_ca_certificate_uses_passed_in_validity_and_backdate():
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    issuer_private_key, issuer_certificate = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, key_generator)[0]
+    private_key = key_generator()
+
+    certificate = gimmecert.crypto.issue_sub_ca_certificate('worker1 Level 2 CA', private_key.public_key(), issuer_private_key, issuer_certificate,
+                                                            datetime.timedelta(days=30), datetime.timedelta(0))
+
+    assert certificate.not_valid_before == datetime.datetime(2018, 1, 1, 0, 15, 0)
+    assert certificate.not_valid_after == datetime.datetime(2018, 1, 31, 0, 15, 0)
+
+
+@freeze_time('2018-01-01 00:15:00')
+def test_issue_sub_ca_certificate_validity_does_not_exceed_issuer_validity():
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    issuer_private_key, issuer_certificate = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, key_generator)[0]
+    private_key = key_generator()
+
+    certificate = gimmecert.crypto.issue_sub_ca_certificate('worker1 Level 2 CA', private_key.public_key(), issuer_private_key, issuer_certificate,
+                                                            datetime.timedelta(days=730), datetime.timedelta(days=1))
+
+    assert certificate.not_valid_before == issuer_certificate.not_valid_before
+    assert certificate.not_valid_after == issuer_certificate.not_valid_after
+
+
+@freeze_time('2018-01-01 00:15:00')
+def test_issue_client_certificate_uses_passed_in_validity_and_backdate():
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    issuer_private_key, issuer_certificate = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, key_generator)[0]
+    private_key = key_generator()
+
+    certificate = gimmecert.crypto.issue_client_certificate('myclient', private_key.public_key(), issuer_private_key, issuer_certificate,
+                                                            datetime.timedelta(minutes=5), datetime.timedelta(0))
+
+    assert certificate.not_valid_before == datetime.datetime(2018, 1, 1, 0, 15, 0)
+    assert certificate.not_valid_after == datetime.datetime(2018, 1, 1, 0, 20, 0)
+
+
+def test_certificate_reissuer_preserves_naming_extensions_and_public_key():
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    issuer_private_key, issuer_certificate = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, key_generator)[0]
+    private_key = key_generator()
+    certificate = gimmecert.crypto.issue_server_certificate('myserver', private_key.public_key(), issuer_private_key, issuer_certificate,
+                                                            ['service.local'])
+
+    reissue = gimmecert.crypto.CertificateReissuer(certificate, private_key.public_key(), issuer_private_key, issuer_certificate,
+                                                   datetime.timedelta(minutes=15), datetime.timedelta(seconds=30))
+    first_certificate = reissue()
+    second_certificate = reissue()
+
+    for new_certificate in [first_certificate, second_certificate]:
+        assert new_certificate.subject == certificate.subject
+        assert new_certificate.issuer == certificate.issuer
+        assert list(new_certificate.extensions) == list(certificate.extensions)
+        assert gimmecert.crypto.public_keys_match(new_certificate.public_key(), private_key.public_key())
+        assert new_certificate.not_valid_after - new_certificate.not_valid_before == datetime.timedelta(minutes=15, seconds=30)
+        assert gimmecert.crypto.verify_certificate_signature(new_certificate, issuer_certificate)
+
+    assert len({certificate.serial_number, first_certificate.serial_number, second_certificate.serial_number}) == 3
+
+
+def test_certificate_reissuer_does_not_exceed_ca_validity():
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    issuer_private_key, issuer_certificate = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, key_generator, datetime.timedelta(hours=1))[0]
+    private_key = key_generator()
+    certificate = gimmecert.crypto.issue_client_certificate('myclient', private_key.public_key(), issuer_private_key, issuer_certificate)
+
+    reissue = gimmecert.crypto.CertificateReissuer(certificate, private_key.public_key(), issuer_private_key, issuer_certificate,
+                                                   datetime.timedelta(days=1), datetime.timedelta(days=1))
+    new_certificate = reissue()
+
+    assert new_certificate.not_valid_before == issuer_certificate.not_valid_before
+    assert new_certificate.not_valid_after == issuer_certificate.not_valid_after
+
+
+@pytest.mark.parametrize("profile, expected_extended_key_usages, expected_extensions_count", [
+    (gimmecert.crypto.SERVER_PROFILE, [cryptography.x509.oid.ExtendedKeyUsageOID.SERVER_AUTH], 4),
+    (gimmecert.crypto.CLIENT_PROFILE, [cryptography.x509.oid.ExtendedKeyUsageOID.CLIENT_AUTH], 3),
+    (gimmecert.crypto.SERVER_CLIENT_PROFILE, [cryptography.x509.oid.ExtendedKeyUsageOID.SERVER_AUTH,
+                                              cryptography.x509.oid.ExtendedKeyUsageOID.CLIENT_AUTH], 4),
+])
+def test_certificate_issuer_issues_certificates_according_to_profile(profile, expected_extended_key_usages, expected_extensions_count):
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    issuer_private_key, issuer_certificate = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, key_generator)[0]
+    private_key = key_generator()
+
+    issue = gimmecert.crypto.CertificateIssuer(profile, issuer_private_key, issuer_certificate)
+    first_certificate = issue('myentity1', private_key.public_key(), ['service.local'])
+    second_certificate = issue('myentity2', private_key.public_key())
+
+    for name, certificate in [('myentity1', first_certificate), ('myentity2', second_certificate)]:
+        assert certificate.subject == gimmecert.crypto.get_dn(name)
+        assert certificate.issuer == issuer_certificate.subject
+        assert len(certificate.extensions) == expected_extensions_count
+        assert certificate.extensions.get_extension_for_class(cryptography.x509.BasicConstraints).value.ca is False
+        assert list(certificate.extensions.get_extension_for_class(cryptography.x509.ExtendedKeyUsage).value) == expected_extended_key_usages
+        assert gimmecert.crypto.verify_certificate_signature(certificate, issuer_certificate)
+
+    if profile.subject_alternative_name_type:
+        assert gimmecert.utils.get_dns_names(first_certificate) == ['myentity1', 'service.local']
+        assert gimmecert.utils.get_dns_names(second_certificate) == ['myentity2']
+
+    assert first_certificate.serial_number != second_certificate.serial_number
+
+
+def test_certificate_issuer_applies_validity_and_does_not_exceed_ca_validity():
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    private_key = key_generator()
+
+    with freeze_time('2018-01-01 00:15:00'):
+        issuer_private_key, issuer_certificate = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, key_generator, datetime.timedelta(hours=1))[0]
+
+        issue = gimmecert.crypto.CertificateIssuer(gimmecert.crypto.CLIENT_PROFILE, issuer_private_key, issuer_certificate,
+                                                   datetime.timedelta(minutes=5), datetime.timedelta(0))
+        certificate = issue('myclient', private_key.public_key())
+
+        assert certificate.not_valid_before == datetime.datetime(2018, 1, 1, 0, 15, 0)
+        assert certificate.not_valid_after == datetime.datetime(2018, 1, 1, 0, 20, 0)
+
+    with freeze_time('2018-01-01 01:10:00'):
+        certificate = issue('myclient', private_key.public_key())
+
+        assert certificate.not_valid_before == datetime.datetime(2018, 1, 1, 1, 10, 0)
+        assert certificate.not_valid_after == issuer_certificate.not_valid_after
+
+
+def test_certificate_issuer_produces_signing_parameters_matching_issued_certificates():
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    public_key = key_generator().public_key()
+
+    with freeze_time('2018-01-01 00:15:00'):
+        issuer_private_key, issuer_certificate = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, key_generator)[0]
+        issuer = gimmecert.crypto.CertificateIssuer(gimmecert.crypto.SERVER_PROFILE, issuer_private_key, issuer_certificate)
+
+        subject_dn, signing_public_key, extensions, not_before, not_after = issuer.get_signing_parameters('myserver', public_key, ['service.local'])
+        certificate = issuer('myserver', public_key, ['service.local'])
+
+    assert subject_dn == certificate.subject
+    assert signing_public_key is public_key
+    assert [(extension.value, extension.critical) for extension in certificate.extensions] == extensions
+    assert not_before == certificate.not_valid_before
+    assert not_after == certificate.not_valid_after
+
+
+def test_issuance_profile_rejects_unknown_key_usages():
+    with pytest.raises(ValueError) as e_info:
+        gimmecert.crypto.IssuanceProfile('custom', ['digital_signature', 'time_travel'], [])
+
+    assert "time_travel" in str(e_info.value)
+
+
+def test_issuance_profile_omits_extended_key_usage_if_none_specified():
+    profile = gimmecert.crypto.IssuanceProfile('custom', ['digital_signature', 'content_commitment'], [])
+
+    assert [type(extension) for extension, _ in profile.extensions] == [cryptography.x509.BasicConstraints, cryptography.x509.KeyUsage]
+    assert profile.extensions[1][0].content_commitment is True
+    assert profile.extensions[1][0].key_encipherment is False
+
+
+@pytest.mark.parametrize("name, default_type, expected_general_name", [
+    ('myserver.example.com', 'dns', cryptography.x509.DNSName('myserver.example.com')),
+    ('dns:myserver.example.com', 'email', cryptography.x509.DNSName('myserver.example.com')),
+    ('ip:192.168.1.1', 'dns', cryptography.x509.IPAddress(ipaddress.ip_address('192.168.1.1'))),
+    ('IP:2001:db8::1', 'dns', cryptography.x509.IPAddress(ipaddress.ip_address('2001:db8::1'))),
+    ('uri:spiffe://example.com/ns/default/sa/myservice', 'dns',
+     cryptography.x509.UniformResourceIdentifier('spiffe://example.com/ns/default/sa/myservice')),
+    ('email:ops@example.com', 'dns', cryptography.x509.RFC822Name('ops@example.com')),
+    ('ops@example.com', 'email', cryptography.x509.RFC822Name('ops@example.com')),
+])
+def test_get_general_name_returns_general_name_of_correct_type(name, default_type, expected_general_name):
+    assert gimmecert.crypto.get_general_name(name, default_type) == expected_general_name
+
+
+@pytest.mark.parametrize("name", ['ip:192.168.1.300', 'ip:myserver', 'ip:', 'uri:', ''])
+def test_get_general_name_raises_exception_for_invalid_name(name):
+    with pytest.raises(ValueError):
+        gimmecert.crypto.get_general_name(name)
+
+
+def test_issue_server_certificate_incorporates_prefixed_subject_alternative_names():
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    issuer_private_key, issuer_certificate = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, key_generator)[0]
+    private_key = key_generator()
+
+    certificate = gimmecert.crypto.issue_server_certificate('myserver', private_key.public_key(), issuer_private_key, issuer_certificate,
+                                                            ['myservice.local', 'ip:10.0.0.1', 'uri:spiffe://example.com/myserver'])
+
+    subject_alternative_name = certificate.extensions.get_extension_for_class(cryptography.x509.SubjectAlternativeName).value
+
+    assert list(subject_alternative_name) == [
+        cryptography.x509.DNSName('myserver'),
+        cryptography.x509.DNSName('myservice.local'),
+        cryptography.x509.IPAddress(ipaddress.ip_address('10.0.0.1')),
+        cryptography.x509.UniformResourceIdentifier('spiffe://example.com/myserver'),
+    ]
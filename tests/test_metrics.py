@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import datetime
+import io
+
+from cryptography.hazmat.primitives.asymmetric import ec
+
+import gimmecert.commands
+import gimmecert.metrics
+
+import pytest
+from freezegun import freeze_time
+
+
+@pytest.mark.parametrize("value, escaped_value", [
+    ("myserver", "myserver"),
+    ('my"server', 'my\\"server'),
+    ("my\\server", "my\\\\server"),
+    ("my\nserver", "my\\nserver"),
+])
+def test_escape_label_value(value, escaped_value):
+    assert gimmecert.metrics.escape_label_value(value) == escaped_value
+
+
+def test_format_sample():
+    sample = gimmecert.metrics.format_sample('gimmecert_certificates', [('type', 'server'), ('key_algorithm', '2048-bit RSA')], 3)
+
+    assert sample == 'gimmecert_certificates{type="server",key_algorithm="2048-bit RSA"} 3'
+
+
+def test_get_timestamp():
+    assert gimmecert.metrics.get_timestamp(datetime.datetime(2018, 1, 1, 0, 15, 0)) == 1514765700
+
+
+def test_collect_metrics_produces_metrics_for_entities_and_ca_hierarchy(tmpdir):
+    with freeze_time('2018-01-01 00:15:00'):
+        gimmecert.commands.init(io.StringIO(), io.StringIO(), tmpdir.strpath, 'My Project', 2, ('rsa', 1024))
+        gimmecert.commands.server(io.StringIO(), io.StringIO(), tmpdir.strpath, 'myserver1', None, None, None)
+        gimmecert.commands.server(io.StringIO(), io.StringIO(), tmpdir.strpath, 'myserver2', None, None, ('ecdsa', ec.SECP256R1))
+        gimmecert.commands.client(io.StringIO(), io.StringIO(), tmpdir.strpath, 'myclient', None, None)
+
+    metrics = gimmecert.metrics.collect_metrics(tmpdir.strpath)
+
+    # Timestamp for 2019-01-01 00:15:00 UTC.
+    assert metrics.splitlines() == [
+        '# HELP gimmecert_certificate_not_after_timestamp_seconds End of certificate validity, as Unix timestamp.',
+        '# TYPE gimmecert_certificate_not_after_timestamp_seconds gauge',
+        'gimmecert_certificate_not_after_timestamp_seconds{type="server",name="myserver1"} 1546301700',
+        'gimmecert_certificate_not_after_timestamp_seconds{type="server",name="myserver2"} 1546301700',
+        'gimmecert_certificate_not_after_timestamp_seconds{type="client",name="myclient"} 1546301700',
+        '# HELP gimmecert_certificates Number of issued certificates.',
+        '# TYPE gimmecert_certificates gauge',
+        'gimmecert_certificates{type="client",key_algorithm="1024-bit RSA"} 1',
+        'gimmecert_certificates{type="server",key_algorithm="1024-bit RSA"} 1',
+        'gimmecert_certificates{type="server",key_algorithm="secp256r1 ECDSA"} 1',
+        '# HELP gimmecert_ca_not_after_timestamp_seconds End of CA certificate validity, as Unix timestamp.',
+        '# TYPE gimmecert_ca_not_after_timestamp_seconds gauge',
+        'gimmecert_ca_not_after_timestamp_seconds{level="1",subject="CN=My Project Level 1 CA"} 1546301700',
+        'gimmecert_ca_not_after_timestamp_seconds{level="2",subject="CN=My Project Level 2 CA"} 1546301700',
+    ]
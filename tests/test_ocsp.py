@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import base64
+import io
+import threading
+import urllib.request
+
+import cryptography.hazmat.primitives.asymmetric.padding
+import cryptography.hazmat.primitives.hashes
+import cryptography.hazmat.primitives.serialization
+import cryptography.x509.ocsp
+
+import gimmecert.commands
+import gimmecert.ocsp
+import gimmecert.storage
+
+import pytest
+from unittest import mock
+
+
+def build_request(project_directory, certificate_path, algorithm=None):
+    """
+    Helper function for building OCSP request in DER format for
+    designated certificate.
+    """
+
+    certificate = gimmecert.storage.read_certificate(certificate_path)
+    issuer_certificate = gimmecert.storage.read_ca_hierarchy(project_directory.join('.gimmecert', 'ca').strpath)[-1][1]
+
+    builder = cryptography.x509.ocsp.OCSPRequestBuilder()
+    builder = builder.add_certificate(certificate, issuer_certificate, algorithm or cryptography.hazmat.primitives.hashes.SHA1())
+
+    return builder.build().public_bytes(cryptography.hazmat.primitives.serialization.Encoding.DER)
+
+
+def test_ocsp_responder_returns_good_status_for_issued_certificate(sample_project_directory):
+    certificate_path = sample_project_directory.join('.gimmecert', 'server', 'server-with-privkey-1.cert.pem').strpath
+    issuer_certificate = gimmecert.storage.read_certificate(sample_project_directory.join('.gimmecert', 'ca', 'level1.cert.pem').strpath)
+    responder = gimmecert.ocsp.OCSPResponder(sample_project_directory.strpath, 60)
+
+    response = cryptography.x509.ocsp.load_der_ocsp_response(responder.respond(build_request(sample_project_directory, certificate_path)))
+
+    assert len(responder) == 8
+    assert response.response_status == cryptography.x509.ocsp.OCSPResponseStatus.SUCCESSFUL
+    assert response.certificate_status == cryptography.x509.ocsp.OCSPCertStatus.GOOD
+    assert response.serial_number == gimmecert.storage.read_certificate(certificate_path).serial_number
+    assert (response.next_update - response.this_update).total_seconds() == 120
+    issuer_certificate.public_key().verify(response.signature, response.tbs_response_bytes,
+                                           cryptography.hazmat.primitives.asymmetric.padding.PKCS1v15(), response.signature_hash_algorithm)
+
+
+def test_ocsp_responder_returns_revoked_status_for_revoked_certificate(sample_project_directory):
+    certificate_path = sample_project_directory.join('.gimmecert', 'client', 'client-with-csr-1.cert.pem').strpath
+    request = build_request(sample_project_directory, certificate_path)
+    gimmecert.commands.revoke(io.StringIO(), io.StringIO(), sample_project_directory.strpath, 'client', 'client-with-csr-1')
+    revocation_date = gimmecert.storage.read_revocations(sample_project_directory.join('.gimmecert', 'crl', 'revocations.log').strpath)[0][1]
+
+    responder = gimmecert.ocsp.OCSPResponder(sample_project_directory.strpath, 60)
+    response = cryptography.x509.ocsp.load_der_ocsp_response(responder.respond(request))
+
+    assert response.certificate_status == cryptography.x509.ocsp.OCSPCertStatus.REVOKED
+    assert response.revocation_time == revocation_date
+
+
+def test_ocsp_responder_returns_precomputed_response(sample_project_directory):
+    certificate_path = sample_project_directory.join('.gimmecert', 'server', 'server-with-csr-1.cert.pem').strpath
+    request = build_request(sample_project_directory, certificate_path)
+    responder = gimmecert.ocsp.OCSPResponder(sample_project_directory.strpath, 60)
+
+    assert responder.respond(request) is responder.respond(request)
+
+
+def test_ocsp_responder_supports_other_hash_algorithms(sample_project_directory):
+    certificate_path = sample_project_directory.join('.gimmecert', 'server', 'server-with-csr-1.cert.pem').strpath
+    request = build_request(sample_project_directory, certificate_path, cryptography.hazmat.primitives.hashes.SHA256())
+    responder = gimmecert.ocsp.OCSPResponder(sample_project_directory.strpath, 60)
+
+    response = cryptography.x509.ocsp.load_der_ocsp_response(responder.respond(request))
+
+    assert response.certificate_status == cryptography.x509.ocsp.OCSPCertStatus.GOOD
+    assert isinstance(response.hash_algorithm, cryptography.hazmat.primitives.hashes.SHA256)
+    assert responder.respond(request) is responder.respond(request)
+
+
+def test_ocsp_responder_returns_unauthorized_for_unknown_certificate(sample_project_directory, tmpdir_factory):
+    other_project_directory = tmpdir_factory.mktemp('other')
+    gimmecert.commands.init(io.StringIO(), io.StringIO(), other_project_directory.strpath, 'Other', 1, ("rsa", 2048))
+    gimmecert.commands.server(io.StringIO(), io.StringIO(), other_project_directory.strpath, 'myserver', None, None, None)
+    request = build_request(other_project_directory, other_project_directory.join('.gimmecert', 'server', 'myserver.cert.pem').strpath)
+
+    responder = gimmecert.ocsp.OCSPResponder(sample_project_directory.strpath, 60)
+    response = cryptography.x509.ocsp.load_der_ocsp_response(responder.respond(request))
+
+    assert response.response_status == cryptography.x509.ocsp.OCSPResponseStatus.UNAUTHORIZED
+
+
+def test_ocsp_responder_returns_malformed_request_for_invalid_request(gctmpdir):
+    responder = gimmecert.ocsp.OCSPResponder(gctmpdir.strpath, 60)
+
+    response = cryptography.x509.ocsp.load_der_ocsp_response(responder.respond(b'not a request'))
+
+    assert response.response_status == cryptography.x509.ocsp.OCSPResponseStatus.MALFORMED_REQUEST
+
+
+def test_ocsp_responder_refresh_picks_up_new_certificates(gctmpdir):
+    responder = gimmecert.ocsp.OCSPResponder(gctmpdir.strpath, 60)
+    gimmecert.commands.client(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myclient', None, None)
+    request = build_request(gctmpdir, gctmpdir.join('.gimmecert', 'client', 'myclient.cert.pem').strpath)
+
+    response_before = cryptography.x509.ocsp.load_der_ocsp_response(responder.respond(request))
+    responder.refresh()
+    response_after = cryptography.x509.ocsp.load_der_ocsp_response(responder.respond(request))
+
+    assert response_before.response_status == cryptography.x509.ocsp.OCSPResponseStatus.UNAUTHORIZED
+    assert response_after.certificate_status == cryptography.x509.ocsp.OCSPCertStatus.GOOD
+
+
+def test_ocsp_responder_keeps_previous_responses_until_refresh_completes(gctmpdir):
+    gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver', None, None, None)
+    request = build_request(gctmpdir, gctmpdir.join('.gimmecert', 'server', 'myserver.cert.pem').strpath)
+    responder = gimmecert.ocsp.OCSPResponder(gctmpdir.strpath, 60)
+    response_before = responder.respond(request)
+
+    gimmecert.commands.revoke(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'server', 'myserver')
+    gimmecert.commands.client(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myclient', None, None)
+
+    with mock.patch.object(responder, '_build_response', side_effect=ValueError("signing failed")):
+        with pytest.raises(ValueError):
+            responder.refresh()
+
+    assert len(responder) == 1
+    assert responder.respond(request) == response_before
+
+
+def test_ocsp_responder_refresh_replaces_responses_for_revoked_certificates(gctmpdir):
+    gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver', None, None, None)
+    request = build_request(gctmpdir, gctmpdir.join('.gimmecert', 'server', 'myserver.cert.pem').strpath)
+    responder = gimmecert.ocsp.OCSPResponder(gctmpdir.strpath, 60)
+
+    gimmecert.commands.revoke(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'server', 'myserver')
+    responder.refresh()
+    response = cryptography.x509.ocsp.load_der_ocsp_response(responder.respond(request))
+
+    assert response.certificate_status == cryptography.x509.ocsp.OCSPCertStatus.REVOKED
+
+
+@pytest.mark.parametrize("method", ["GET", "POST"])
+def test_request_handler_serves_ocsp_responses(gctmpdir, method):
+    gimmecert.commands.server(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'myserver', None, None, None)
+    request = build_request(gctmpdir, gctmpdir.join('.gimmecert', 'server', 'myserver.cert.pem').strpath)
+    responder = gimmecert.ocsp.OCSPResponder(gctmpdir.strpath, 60)
+
+    http_server = gimmecert.ocsp.ThreadingHTTPServer(('127.0.0.1', 0), gimmecert.ocsp.get_request_handler(responder))
+    server_thread = threading.Thread(target=http_server.serve_forever)
+    server_thread.start()
+
+    try:
+        url = 'http://127.0.0.1:%d/' % http_server.server_address[1]
+        if method == "GET":
+            http_request = urllib.request.Request(url + base64.b64encode(request).decode())
+        else:
+            http_request = urllib.request.Request(url, data=request, headers={'Content-Type': 'application/ocsp-request'})
+
+        with urllib.request.urlopen(http_request) as http_response:
+            content_type = http_response.headers['Content-Type']
+            response = cryptography.x509.ocsp.load_der_ocsp_response(http_response.read())
+    finally:
+        http_server.shutdown()
+        http_server.server_close()
+        server_thread.join()
+
+    assert content_type == 'application/ocsp-response'
+    assert response.certificate_status == cryptography.x509.ocsp.OCSPCertStatus.GOOD
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import gimmecert.crypto
+import gimmecert.pool
+
+from cryptography.hazmat.primitives.asymmetric import ec
+
+
+def test_get_pool_name():
+    assert gimmecert.pool.get_pool_name(('rsa', 2048)) == 'rsa-2048'
+    assert gimmecert.pool.get_pool_name(('ecdsa', ec.SECP384R1)) == 'ecdsa-secp384r1'
+
+
+def test_key_pool_level_is_zero_if_pool_does_not_exist(tmpdir):
+    pool = gimmecert.pool.KeyPool(tmpdir.join('pool').strpath)
+
+    assert pool.level(('ecdsa', ec.SECP256R1)) == 0
+
+
+def test_key_pool_take_returns_none_if_pool_is_empty(tmpdir):
+    pool = gimmecert.pool.KeyPool(tmpdir.join('pool').strpath)
+
+    assert pool.take(('ecdsa', ec.SECP256R1)) is None
+
+
+def test_key_pool_hands_out_added_keys_only_once(tmpdir):
+    pool = gimmecert.pool.KeyPool(tmpdir.join('pool').strpath)
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', ec.SECP256R1)
+    private_key1, private_key2 = key_generator(), key_generator()
+
+    pool.add(private_key1, ('ecdsa', ec.SECP256R1))
+    pool.add(private_key2, ('ecdsa', ec.SECP256R1))
+
+    assert pool.level(('ecdsa', ec.SECP256R1)) == 2
+    assert pool.level(('ecdsa', ec.SECP384R1)) == 0
+
+    taken = [pool.take(('ecdsa', ec.SECP256R1)), pool.take(('ecdsa', ec.SECP256R1))]
+
+    assert sorted(key.private_numbers().private_value for key in taken) == sorted([private_key1.private_numbers().private_value,
+                                                                                  private_key2.private_numbers().private_value])
+    assert pool.take(('ecdsa', ec.SECP256R1)) is None
+    assert pool.level(('ecdsa', ec.SECP256R1)) == 0
+    assert tmpdir.join('pool', 'ecdsa-secp256r1').listdir() == []
+
+
+def test_key_pool_ignores_partially_written_keys(tmpdir):
+    pool = gimmecert.pool.KeyPool(tmpdir.join('pool').strpath)
+    tmpdir.join('pool', 'ecdsa-secp256r1').ensure(dir=True).join('.gimmecert-abc123').write('partial')
+
+    assert pool.level(('ecdsa', ec.SECP256R1)) == 0
+    assert pool.take(('ecdsa', ec.SECP256R1)) is None
+
+
+def test_refill_fills_pools_below_low_watermark_up_to_high_watermark(tmpdir):
+    pool = gimmecert.pool.KeyPool(tmpdir.join('pool').strpath)
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', ec.SECP256R1)
+
+    for _ in range(3):
+        pool.add(key_generator(), ('ecdsa', ec.SECP256R1))
+
+    generated = gimmecert.pool.refill(pool, [('ecdsa', ec.SECP256R1), ('ecdsa', ec.SECP384R1)], 2, 4, 2)
+
+    assert generated == [(('ecdsa', ec.SECP384R1), 4)]
+    assert pool.level(('ecdsa', ec.SECP256R1)) == 3
+    assert pool.level(('ecdsa', ec.SECP384R1)) == 4
+    assert isinstance(pool.take(('ecdsa', ec.SECP384R1)).curve, ec.SECP384R1)
+
+
+def test_refill_does_nothing_if_pools_are_filled(tmpdir):
+    pool = gimmecert.pool.KeyPool(tmpdir.join('pool').strpath)
+    pool.add(gimmecert.crypto.KeyGenerator('ecdsa', ec.SECP256R1)(), ('ecdsa', ec.SECP256R1))
+
+    assert gimmecert.pool.refill(pool, [('ecdsa', ec.SECP256R1)], 1, 4, 2) == []
+    assert pool.level(('ecdsa', ec.SECP256R1)) == 1
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import datetime
+import json
+
+import cryptography.x509
+from cryptography.hazmat.primitives.asymmetric import ec
+
+import gimmecert.crypto
+import gimmecert.profiles
+
+import pytest
+
+
+def test_parse_profile_returns_issuance_profile():
+    profile = gimmecert.profiles.parse_profile('code-signing', {
+        'key_usages': ['digital_signature'],
+        'extended_key_usages': ['code_signing', '1.2.3.4'],
+        'subject_alternative_names': 'email',
+        'validity': '90d',
+        'key_specification': 'ecdsa:secp384r1',
+    })
+
+    extended_key_usage = profile.extensions[2][0]
+
+    assert profile.name == 'code-signing'
+    assert list(extended_key_usage) == [cryptography.x509.oid.ExtendedKeyUsageOID.CODE_SIGNING, cryptography.x509.ObjectIdentifier('1.2.3.4')]
+    assert profile.subject_alternative_name_type == 'email'
+    assert profile.validity == datetime.timedelta(days=90)
+    assert profile.key_specification == ('ecdsa', ec.SECP384R1)
+
+
+@pytest.mark.parametrize("name, definition, expected_error", [
+    ('server', {'key_usages': []}, "Profile name is reserved: server"),
+    ('ca', {'key_usages': []}, "Profile name is reserved: ca"),
+    ('my/profile', {'key_usages': []}, "Invalid profile name"),
+    ('custom', [], "definition must be an object"),
+    ('custom', {'key_usages': [], 'colour': 'blue'}, "unknown option(s): colour"),
+    ('custom', {}, "key_usages must be specified"),
+    ('custom', {'key_usages': ['mind_reading']}, "Unknown key usage(s): mind_reading"),
+    ('custom', {'key_usages': [], 'extended_key_usages': ['mind_reading']}, "Profile custom:"),
+    ('custom', {'key_usages': [], 'subject_alternative_names': 'x400'}, "Unknown subject alternative name type: x400"),
+    ('custom', {'key_usages': [], 'validity': 'forever'}, "Invalid duration: 'forever'"),
+    ('custom', {'key_usages': [], 'key_specification': 'dsa:1024'}, "Invalid key specification: 'dsa:1024'"),
+])
+def test_parse_profile_raises_exception_for_invalid_profile(name, definition, expected_error):
+    with pytest.raises(ValueError) as e_info:
+        gimmecert.profiles.parse_profile(name, definition)
+
+    assert expected_error in str(e_info.value)
+
+
+@pytest.mark.parametrize("content", ["not json", "[]"])
+def test_parse_profiles_raises_exception_for_invalid_configuration(content):
+    with pytest.raises(ValueError):
+        gimmecert.profiles.parse_profiles(content)
+
+
+def test_get_entity_types_returns_entity_directories_without_reserved_ones(tmpdir):
+    for name in ['ca', 'cache', 'client', 'code-signing', 'crl', 'pool', 'server', 'subca']:
+        tmpdir.join('.gimmecert', name).ensure(dir=True)
+    tmpdir.join('.gimmecert', 'profiles.json').write('{}')
+
+    assert gimmecert.profiles.get_entity_types(tmpdir.strpath) == ['client', 'code-signing', 'server']
+
+
+def test_load_profiles_returns_empty_mapping_if_configuration_does_not_exist(tmpdir):
+    assert gimmecert.profiles.load_profiles(tmpdir.join('profiles.json').strpath) == {}
+
+
+def test_load_profiles_caches_compiled_profiles_until_configuration_changes(tmpdir):
+    profiles_file = tmpdir.join('profiles.json')
+    profiles_file.write(json.dumps({'signing': {'key_usages': ['digital_signature']}}))
+
+    profiles1 = gimmecert.profiles.load_profiles(profiles_file.strpath)
+    profiles2 = gimmecert.profiles.load_profiles(profiles_file.strpath)
+
+    profiles_file.write(json.dumps({'signing': {'key_usages': ['digital_signature']}, 'email': {'key_usages': ['key_encipherment']}}))
+    profiles3 = gimmecert.profiles.load_profiles(profiles_file.strpath)
+
+    assert profiles1 is profiles2
+    assert isinstance(profiles1['signing'], gimmecert.crypto.IssuanceProfile)
+    assert sorted(profiles3) == ['email', 'signing']
@@ -0,0 +1,568 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import datetime
+import io
+import json
+import tarfile
+
+import cryptography.x509
+from cryptography.hazmat.primitives.asymmetric import ec
+
+import gimmecert
+import gimmecert.commands
+import gimmecert.crypto
+import gimmecert.project
+import gimmecert.storage
+import gimmecert.utils
+
+import pytest
+from unittest import mock
+
+
+def test_project_is_available_from_package():
+    assert gimmecert.Project is gimmecert.project.Project
+
+
+def test_initialise_sets_up_project(tmpdir):
+    project = gimmecert.project.Project.initialise(tmpdir.strpath, 'My Project', 2, ('ecdsa', ec.SECP256R1))
+
+    assert gimmecert.storage.is_initialised(tmpdir.strpath)
+    assert len(project.ca_hierarchy) == 2
+    assert project.issuer_certificate.subject == gimmecert.crypto.get_dn('My Project Level 2 CA')
+    assert project.key_specification == ('ecdsa', ec.SECP256R1)
+    assert tmpdir.join('.gimmecert', 'ca', 'level2.cert.pem').read() == gimmecert.utils.certificate_to_pem(project.issuer_certificate)
+    assert tmpdir.join('.gimmecert', 'ca', 'chain-full.cert.pem').check(file=1)
+
+
+def test_initialise_uses_project_directory_name_as_default_ca_base_name(tmpdir):
+    project = gimmecert.project.Project.initialise(tmpdir.strpath, key_specification=('ecdsa', ec.SECP256R1))
+
+    assert project.issuer_certificate.subject == gimmecert.crypto.get_dn('%s Level 1 CA' % tmpdir.basename)
+
+
+def test_initialise_raises_exception_if_project_is_already_initialised(gctmpdir):
+    with pytest.raises(gimmecert.project.ProjectAlreadyInitialised):
+        gimmecert.project.Project.initialise(gctmpdir.strpath)
+
+
+def test_initialise_with_ca_from_uses_ca_hierarchy_of_other_project(gctmpdir, tmpdir):
+    other_project = gimmecert.project.Project(gctmpdir.strpath)
+
+    project = gimmecert.project.Project.initialise(tmpdir.mkdir('project').strpath, 'My Project', 2, ca_from=gctmpdir.strpath)
+
+    assert len(project.ca_hierarchy) == 1
+    assert project.issuer_certificate == other_project.issuer_certificate
+    assert project.key_specification == other_project.key_specification
+
+
+def test_initialise_with_ca_from_raises_exception_if_other_project_is_not_initialised(tmpdir):
+    with pytest.raises(gimmecert.project.ProjectNotInitialised):
+        gimmecert.project.Project.initialise(tmpdir.mkdir('project').strpath, ca_from=tmpdir.mkdir('other').strpath)
+
+    assert not tmpdir.join('project', '.gimmecert').check()
+
+
+def test_issue_subca_returns_sub_ca_hierarchy(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+
+    subca_hierarchy = project.issue_subca('worker1')
+
+    assert len(subca_hierarchy) == 2
+    assert subca_hierarchy[0] == (None, project.issuer_certificate)
+    assert subca_hierarchy[1][1].issuer == project.issuer_certificate.subject
+    assert gimmecert.crypto.public_keys_match(subca_hierarchy[1][0].public_key(), subca_hierarchy[1][1].public_key())
+    assert gimmecert.storage.read_ca_hierarchy(gctmpdir.join('.gimmecert', 'subca', 'worker1').strpath)[1][1] == subca_hierarchy[1][1]
+
+
+def test_issue_subca_raises_exception_if_sub_ca_has_already_been_issued(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    project.issue_subca('worker1')
+
+    with pytest.raises(gimmecert.project.CertificateAlreadyIssued):
+        project.issue_subca('worker1')
+
+
+def test_ephemeral_project_issues_subca_in_memory():
+    project = gimmecert.project.Project.ephemeral(key_specification=('ecdsa', ec.SECP256R1))
+
+    subca_hierarchy = project.issue_subca('worker1')
+
+    assert project.storage.read('subca/worker1/level2.cert.pem') == subca_hierarchy[1][1]
+
+
+def test_issue_server_uses_passed_in_validity(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+
+    entity = project.issue_server('myserver', validity=datetime.timedelta(minutes=15), backdate=datetime.timedelta(seconds=30))
+
+    assert entity.certificate.not_valid_after - entity.certificate.not_valid_before == datetime.timedelta(minutes=15, seconds=30)
+
+
+def test_get_reissuer_reissues_and_stores_certificate(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    entity = project.issue_client('myclient')
+    old_certificate = entity.certificate
+
+    reissue = project.get_reissuer('client', 'myclient', datetime.timedelta(minutes=15))
+    reissued_entity = reissue()
+
+    assert reissued_entity.certificate.serial_number != old_certificate.serial_number
+    assert reissued_entity.certificate.subject == old_certificate.subject
+    assert gimmecert.crypto.public_keys_match(reissued_entity.private_key.public_key(), entity.private_key.public_key())
+    assert gctmpdir.join('.gimmecert', 'client', 'myclient.cert.pem').read() == gimmecert.utils.certificate_to_pem(reissued_entity.certificate)
+
+
+def test_get_reissuer_raises_exception_for_unknown_entity(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+
+    with pytest.raises(gimmecert.project.UnknownEntity):
+        project.get_reissuer('server', 'myserver')
+
+
+def test_project_raises_exception_if_project_is_not_initialised(tmpdir):
+    with pytest.raises(gimmecert.project.ProjectNotInitialised):
+        gimmecert.project.Project(tmpdir.strpath)
+
+
+def test_project_reads_ca_hierarchy_only_once(gctmpdir):
+    with mock.patch('gimmecert.storage.read_ca_hierarchy', wraps=gimmecert.storage.read_ca_hierarchy) as mock_read_ca_hierarchy:
+        project = gimmecert.project.Project(gctmpdir.strpath)
+
+        for i in range(3):
+            project.issue_server('myserver%d' % i)
+            project.issue_client('myclient%d' % i)
+        project.renew('server', 'myserver0')
+
+    assert mock_read_ca_hierarchy.call_count == 1
+
+
+def test_issue_server_returns_entity_with_generated_private_key(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+
+    entity = project.issue_server('myserver', ['myserver.example.com'])
+
+    assert entity.entity_type == 'server'
+    assert entity.name == 'myserver'
+    assert entity.csr is None
+    assert gimmecert.crypto.public_keys_match(entity.private_key.public_key(), entity.certificate.public_key())
+    assert gimmecert.utils.get_dns_names(entity.certificate) == ['myserver', 'myserver.example.com']
+    assert gimmecert.crypto.verify_certificate_signature(entity.certificate, project.issuer_certificate)
+    assert entity.certificate_path == gctmpdir.join('.gimmecert', 'server', 'myserver.cert.pem').strpath
+    assert gimmecert.storage.read_certificate(entity.certificate_path) == entity.certificate
+    assert gimmecert.storage.read_private_key(entity.private_key_path).private_numbers() == entity.private_key.private_numbers()
+
+
+def test_issue_server_uses_public_key_from_csr(gctmpdir, key_with_csr):
+    private_key, csr = key_with_csr.private_key, key_with_csr.csr
+    project = gimmecert.project.Project(gctmpdir.strpath)
+
+    entity = project.issue_server('myserver', csr=csr)
+
+    assert entity.private_key is None
+    assert entity.csr == csr
+    assert gimmecert.crypto.public_keys_match(private_key.public_key(), entity.certificate.public_key())
+    assert gimmecert.storage.read_csr(entity.csr_path) == csr
+    assert not gctmpdir.join('.gimmecert', 'server', 'myserver.key.pem').check()
+
+
+def test_issue_client_uses_passed_in_key_specification(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+
+    entity = project.issue_client('myclient', key_specification=('ecdsa', ec.SECP384R1))
+
+    assert isinstance(entity.private_key, ec.EllipticCurvePrivateKey)
+    assert isinstance(entity.certificate.public_key().curve, ec.SECP384R1)
+    assert entity.certificate.subject == gimmecert.crypto.get_dn('myclient')
+    assert entity.certificate_path == gctmpdir.join('.gimmecert', 'client', 'myclient.cert.pem').strpath
+
+
+def test_issue_client_takes_private_key_from_key_pool(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    private_key = gimmecert.crypto.KeyGenerator('ecdsa', ec.SECP384R1)()
+    project.key_pool.add(private_key, ('ecdsa', ec.SECP384R1))
+
+    entity = project.issue_client('myclient', key_specification=('ecdsa', ec.SECP384R1))
+
+    assert entity.private_key.private_numbers() == private_key.private_numbers()
+    assert gimmecert.crypto.public_keys_match(private_key.public_key(), entity.certificate.public_key())
+    assert project.key_pool.level(('ecdsa', ec.SECP384R1)) == 0
+
+
+def test_issue_client_generates_private_key_if_key_pool_has_no_matching_keys(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    project.key_pool.add(gimmecert.crypto.KeyGenerator('ecdsa', ec.SECP256R1)(), ('ecdsa', ec.SECP256R1))
+
+    entity = project.issue_client('myclient', key_specification=('ecdsa', ec.SECP384R1))
+
+    assert isinstance(entity.private_key.curve, ec.SECP384R1)
+    assert project.key_pool.level(('ecdsa', ec.SECP256R1)) == 1
+
+
+def test_issue_client_reuses_private_key_of_existing_entity(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    server = project.issue_server('myserver')
+
+    with mock.patch('gimmecert.crypto.KeyGenerator') as mock_key_generator:
+        entity = project.issue_client('myclient', reuse_key_from=('server', 'myserver'))
+
+    assert not mock_key_generator.called
+    assert entity.private_key.private_numbers() == server.private_key.private_numbers()
+    assert gimmecert.crypto.public_keys_match(server.private_key.public_key(), entity.certificate.public_key())
+    assert entity.certificate.subject == gimmecert.crypto.get_dn('myclient')
+    assert project.get_artefacts('client') == {'myclient': {'key', 'cert'}}
+
+
+def test_issue_client_reuses_private_key_in_ephemeral_project():
+    project = gimmecert.project.Project.ephemeral(key_specification=('ecdsa', ec.SECP256R1))
+    first = project.issue_client('myclient1')
+
+    entity = project.issue_client('myclient2', reuse_key_from=('client', 'myclient1'))
+
+    assert entity.private_key is first.private_key
+    assert gimmecert.crypto.public_keys_match(first.private_key.public_key(), entity.certificate.public_key())
+
+
+def test_issue_client_raises_exception_if_entity_to_reuse_private_key_from_does_not_exist(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+
+    with pytest.raises(gimmecert.project.UnknownEntity):
+        project.issue_client('myclient', reuse_key_from=('server', 'myserver'))
+
+    assert not gctmpdir.join('.gimmecert', 'client', 'myclient.cert.pem').check()
+
+
+def test_issue_client_raises_exception_if_entity_to_reuse_private_key_from_has_no_private_key(gctmpdir, key_with_csr):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    project.issue_server('myserver', csr=key_with_csr.csr)
+
+    with pytest.raises(ValueError) as e_info:
+        project.issue_client('myclient', reuse_key_from=('server', 'myserver'))
+
+    assert "issued using a CSR" in str(e_info.value)
+    assert not gctmpdir.join('.gimmecert', 'client', 'myclient.cert.pem').check()
+
+
+def test_issue_client_raises_exception_if_reusing_private_key_with_key_specification(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    project.issue_server('myserver')
+
+    with pytest.raises(ValueError):
+        project.issue_client('myclient', key_specification=('rsa', 2048), reuse_key_from=('server', 'myserver'))
+
+
+def test_ephemeral_project_has_no_key_pool():
+    project = gimmecert.project.Project.ephemeral(key_specification=('ecdsa', ec.SECP256R1))
+
+    assert project.key_pool is None
+    assert project.issue_client('myclient').private_key is not None
+
+
+@pytest.mark.parametrize("entity_type", ["server", "client"])
+def test_issue_raises_exception_if_certificate_is_already_issued(gctmpdir, entity_type):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    issue = project.issue_server if entity_type == "server" else project.issue_client
+    issue('myentity')
+    certificate = gctmpdir.join('.gimmecert', entity_type, 'myentity.cert.pem').read()
+
+    with pytest.raises(gimmecert.project.CertificateAlreadyIssued):
+        issue('myentity')
+
+    assert gctmpdir.join('.gimmecert', entity_type, 'myentity.cert.pem').read() == certificate
+
+
+def test_get_artefacts_scans_storage_once_and_tracks_issued_entities(gctmpdir, key_with_csr):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    project.issue_server('myserver1')
+
+    with mock.patch('gimmecert.storage.scan_entity_artefacts', wraps=gimmecert.storage.scan_entity_artefacts) as mock_scan_entity_artefacts:
+        assert project.get_artefacts('server') == {'myserver1': {'key', 'cert'}}
+
+        with mock.patch('os.path.exists') as mock_exists:
+            project.issue_server('myserver2', csr=key_with_csr.csr)
+            with pytest.raises(gimmecert.project.CertificateAlreadyIssued):
+                project.issue_server('myserver1')
+
+            mock_exists.assert_not_called()
+
+        project.renew('server', 'myserver2', new_private_key=True)
+
+        assert project.get_artefacts('server') == {'myserver1': {'key', 'cert'}, 'myserver2': {'key', 'cert'}}
+        assert mock_scan_entity_artefacts.call_count == 1
+
+    assert gimmecert.storage.scan_entity_artefacts(gctmpdir.join('.gimmecert', 'server').strpath) == project.get_artefacts('server')
+
+
+def test_get_entity_raises_exception_for_unknown_entity(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+
+    with pytest.raises(gimmecert.project.UnknownEntity):
+        project.get_entity('server', 'myserver')
+
+    with pytest.raises(gimmecert.project.UnknownEntity):
+        project.renew('server', 'myserver')
+
+
+def test_get_entity_reads_private_key_on_first_access(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    issued_entity = project.issue_client('myclient')
+
+    with mock.patch('gimmecert.storage.read_private_key', wraps=gimmecert.storage.read_private_key) as mock_read_private_key:
+        entity = project.get_entity('client', 'myclient')
+
+        assert mock_read_private_key.call_count == 0
+        assert entity.certificate == issued_entity.certificate
+        assert entity.private_key.private_numbers() == issued_entity.private_key.private_numbers()
+        assert entity.private_key is entity.private_key
+        assert mock_read_private_key.call_count == 1
+
+
+def test_renew_preserves_private_key_and_naming(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    old_entity = project.issue_server('myserver', ['myserver.example.com'])
+
+    entity = project.renew('server', 'myserver')
+
+    assert entity.certificate != old_entity.certificate
+    assert entity.certificate.subject == old_entity.certificate.subject
+    assert list(entity.certificate.extensions) == list(old_entity.certificate.extensions)
+    assert entity.private_key.private_numbers() == old_entity.private_key.private_numbers()
+    assert gimmecert.storage.read_certificate(entity.certificate_path) == entity.certificate
+
+
+def test_renew_replaces_csr_with_new_private_key(gctmpdir, key_with_csr):
+    csr = key_with_csr.csr
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    project.issue_client('myclient', csr=csr)
+
+    entity = project.renew('client', 'myclient', new_private_key=True, key_specification=('ecdsa', ec.SECP256R1))
+
+    assert entity.csr is None
+    assert not gctmpdir.join('.gimmecert', 'client', 'myclient.csr.pem').check()
+    assert isinstance(entity.private_key, ec.EllipticCurvePrivateKey)
+    assert gimmecert.crypto.public_keys_match(entity.private_key.public_key(), entity.certificate.public_key())
+
+
+def test_renew_takes_new_private_key_from_key_pool(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    project.issue_client('myclient', key_specification=('ecdsa', ec.SECP256R1))
+    private_key = gimmecert.crypto.KeyGenerator('ecdsa', ec.SECP256R1)()
+    project.key_pool.add(private_key, ('ecdsa', ec.SECP256R1))
+
+    entity = project.renew('client', 'myclient', new_private_key=True)
+
+    assert entity.private_key.private_numbers() == private_key.private_numbers()
+    assert project.key_pool.level(('ecdsa', ec.SECP256R1)) == 0
+
+
+def test_renew_replaces_private_key_with_csr(gctmpdir, key_with_csr):
+    private_key, csr = key_with_csr.private_key, key_with_csr.csr
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    project.issue_client('myclient')
+
+    entity = project.renew('client', 'myclient', csr=csr)
+
+    assert entity.private_key is None
+    assert not gctmpdir.join('.gimmecert', 'client', 'myclient.key.pem').check()
+    assert entity.csr == csr
+    assert gimmecert.crypto.public_keys_match(private_key.public_key(), entity.certificate.public_key())
+
+
+def test_renew_updates_dns_names(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    project.issue_server('myserver', ['wrong.example.com'])
+
+    entity = project.renew('server', 'myserver', dns_names=['right.example.com'])
+
+    assert gimmecert.utils.get_dns_names(entity.certificate) == ['myserver', 'right.example.com']
+
+
+@pytest.mark.parametrize("entity_type, parameters", [
+    ("server", {"new_private_key": True, "csr": "dummy"}),
+    ("client", {"dns_names": ["myclient.example.com"]}),
+])
+def test_renew_raises_exception_for_conflicting_parameters(gctmpdir, entity_type, parameters):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+
+    with pytest.raises(ValueError):
+        project.renew(entity_type, 'myentity', **parameters)
+
+
+def test_status_returns_ca_hierarchy_and_entities(sample_project_directory):
+    project = gimmecert.project.Project(sample_project_directory.strpath)
+
+    status = project.status()
+
+    assert status.ca_certificates == [certificate for _, certificate in project.ca_hierarchy]
+    assert status.key_specification == project.key_specification
+    assert [e.name for e in status.servers] == ['server-with-csr-1', 'server-with-csr-2', 'server-with-privkey-1', 'server-with-privkey-2']
+    assert [e.name for e in status.clients] == ['client-with-csr-1', 'client-with-csr-2', 'client-with-privkey-1', 'client-with-privkey-2']
+    assert all(isinstance(e.certificate, cryptography.x509.Certificate) for e in status.servers + status.clients)
+    assert status.servers[0].private_key is None
+    assert status.servers[0].csr is not None
+
+
+def test_entity_get_validity_status(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    entity = project.issue_client('myclient')
+    one_second = datetime.timedelta(seconds=1)
+
+    assert entity.get_validity_status() == "valid"
+    assert entity.get_validity_status(entity.certificate.not_valid_before - one_second) == "not-valid-yet"
+    assert entity.get_validity_status(entity.certificate.not_valid_after + one_second) == "expired"
+
+
+def test_project_interoperates_with_commands(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+    project.issue_server('myserver')
+
+    status_code = gimmecert.commands.renew(io.StringIO(), io.StringIO(), gctmpdir.strpath, 'server', 'myserver', True, None, None, None)
+
+    assert status_code == gimmecert.commands.ExitCode.SUCCESS
+    assert project.get_entity('server', 'myserver').certificate == gimmecert.storage.read_certificate(
+        gctmpdir.join('.gimmecert', 'server', 'myserver.cert.pem').strpath)
+
+
+def test_ephemeral_project_does_not_perform_filesystem_operations(key_with_csr):
+    csr = key_with_csr.csr
+
+    with mock.patch('builtins.open', side_effect=AssertionError("Filesystem accessed.")), \
+            mock.patch('os.mkdir', side_effect=AssertionError("Filesystem accessed.")):
+        project = gimmecert.project.Project.ephemeral('My Project', 2, ('ecdsa', ec.SECP256R1))
+        server = project.issue_server('myserver', ['myserver.example.com'])
+        client = project.issue_client('myclient', csr=csr)
+        renewed_server = project.renew('server', 'myserver', new_private_key=True)
+        status = project.status()
+
+    assert project.directory is None
+    assert project.issuer_certificate.subject == gimmecert.crypto.get_dn('My Project Level 2 CA')
+    assert gimmecert.crypto.verify_certificate_signature(server.certificate, project.issuer_certificate)
+    assert gimmecert.crypto.verify_certificate_signature(client.certificate, project.issuer_certificate)
+    assert server.certificate_path is None
+    assert server.private_key_path is None
+    assert client.private_key is None
+    assert client.csr is csr
+    assert renewed_server.private_key is not server.private_key
+    assert [e.name for e in status.servers] == ['myserver']
+    assert [e.name for e in status.clients] == ['myclient']
+    assert status.servers[0].certificate is renewed_server.certificate
+
+
+def test_ephemeral_projects_are_independent():
+    project1 = gimmecert.project.Project.ephemeral(key_specification=('ecdsa', ec.SECP256R1))
+    project2 = gimmecert.project.Project.ephemeral(key_specification=('ecdsa', ec.SECP256R1))
+
+    project1.issue_client('myclient')
+
+    assert project1.issuer_certificate.subject == gimmecert.crypto.get_dn('Gimmecert Level 1 CA')
+    assert project2.status().clients == []
+    assert not gimmecert.crypto.public_keys_match(project1.issuer_certificate.public_key(), project2.issuer_certificate.public_key())
+
+
+def test_ephemeral_project_streams_artefacts_into_archive():
+    stream = io.BytesIO()
+    archive = gimmecert.storage.TarArchive(stream)
+
+    project = gimmecert.project.Project.ephemeral(ca_hierarchy_depth=2, key_specification=('ecdsa', ec.SECP256R1), archive=archive)
+    project.issue_client('myclient')
+    archive.close()
+
+    stream.seek(0)
+    with tarfile.open(fileobj=stream) as tar:
+        names = tar.getnames()
+
+    assert names == ['ca/level1.key.pem', 'ca/level1.cert.pem', 'ca/level2.key.pem', 'ca/level2.cert.pem', 'ca/chain-full.cert.pem',
+                     'client/myclient.key.pem', 'client/myclient.cert.pem']
+
+
+def test_project_reuses_certificate_issuers_for_same_profile_and_validity():
+    project = gimmecert.project.Project.ephemeral(key_specification=('ecdsa', ec.SECP256R1))
+
+    with mock.patch('gimmecert.crypto.CertificateIssuer', autospec=True, side_effect=gimmecert.crypto.CertificateIssuer) as mock_issuer:
+        project.issue_server('myserver1')
+        project.issue_server('myserver2', ['service.local'])
+        project.issue_client('myclient1')
+        project.issue_client('myclient2')
+        project.issue_client('myclient3', validity=datetime.timedelta(hours=1))
+
+    assert mock_issuer.call_count == 3
+    assert project.get_issuer(gimmecert.crypto.SERVER_PROFILE) is project.get_issuer(gimmecert.crypto.SERVER_PROFILE)
+    assert project.get_issuer(gimmecert.crypto.SERVER_PROFILE) is not project.get_issuer(gimmecert.crypto.SERVER_CLIENT_PROFILE)
+    assert gimmecert.utils.get_dns_names(project.get_entity('server', 'myserver2').certificate) == ['myserver2', 'service.local']
+
+
+def test_issue_uses_builtin_and_custom_profiles(gctmpdir):
+    gctmpdir.join('.gimmecert', 'profiles.json').write(json.dumps({
+        'email': {
+            'key_usages': ['digital_signature', 'key_encipherment'],
+            'extended_key_usages': ['email_protection'],
+            'subject_alternative_names': 'email',
+            'validity': '30d',
+            'key_specification': 'ecdsa:secp384r1',
+        },
+    }))
+    project = gimmecert.project.Project(gctmpdir.strpath)
+
+    node = project.issue('server-client', 'mynode', ['mynode.local'])
+    person = project.issue('email', 'alice@example.com')
+
+    assert node.entity_type == 'server-client'
+    assert node.certificate_path == gctmpdir.join('.gimmecert', 'server-client', 'mynode.cert.pem').strpath
+    assert gimmecert.utils.get_dns_names(node.certificate) == ['mynode', 'mynode.local']
+
+    extensions = person.certificate.extensions
+    assert person.certificate_path == gctmpdir.join('.gimmecert', 'email', 'alice@example.com.cert.pem').strpath
+    assert list(extensions.get_extension_for_class(cryptography.x509.ExtendedKeyUsage).value) == [
+        cryptography.x509.oid.ExtendedKeyUsageOID.EMAIL_PROTECTION]
+    assert extensions.get_extension_for_class(cryptography.x509.SubjectAlternativeName).value.get_values_for_type(cryptography.x509.RFC822Name) == [
+        'alice@example.com']
+    assert person.certificate.not_valid_after - person.certificate.not_valid_before == datetime.timedelta(days=30, minutes=15)
+    assert isinstance(person.private_key.curve, ec.SECP384R1)
+    assert project.get_entity('email', 'alice@example.com').certificate == person.certificate
+
+    with pytest.raises(gimmecert.project.CertificateAlreadyIssued):
+        project.issue('email', 'alice@example.com')
+
+
+def test_get_profile_raises_exception_for_unknown_or_invalid_profiles(gctmpdir):
+    project = gimmecert.project.Project(gctmpdir.strpath)
+
+    with pytest.raises(gimmecert.project.UnknownProfile):
+        project.get_profile('email')
+
+    gctmpdir.join('.gimmecert', 'profiles.json').write('{"email": {}}')
+
+    with pytest.raises(gimmecert.project.InvalidProfileConfiguration) as e_info:
+        project.get_profile('email')
+
+    assert "key_usages must be specified" in str(e_info.value)
+
+
+def test_ephemeral_project_supports_builtin_profiles_only():
+    project = gimmecert.project.Project.ephemeral(key_specification=('ecdsa', ec.SECP256R1))
+
+    node = project.issue('server-client', 'mynode')
+
+    assert node.certificate_path is None
+    assert project.get_profile('server-client') is gimmecert.crypto.SERVER_CLIENT_PROFILE
+
+    with pytest.raises(gimmecert.project.UnknownProfile):
+        project.get_profile('email')
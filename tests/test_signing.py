@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import multiprocessing
+
+import cryptography.hazmat.primitives.serialization
+import cryptography.x509
+from cryptography.hazmat.primitives.asymmetric import ec
+
+import gimmecert.crypto
+import gimmecert.signing
+import gimmecert.utils
+
+from unittest import mock
+
+
+def get_issuer():
+    return gimmecert.crypto.generate_ca_hierarchy('My Project', 1, gimmecert.crypto.KeyGenerator('ecdsa', ec.SECP256R1))[-1]
+
+
+def test_use_worker_processes_requires_enough_work_for_every_worker():
+    assert gimmecert.signing.use_worker_processes(20, 2)
+    assert not gimmecert.signing.use_worker_processes(19, 2)
+    assert not gimmecert.signing.use_worker_processes(1000, 1)
+
+
+def test_split_into_batches_keeps_batches_within_limits():
+    assert [len(batch) for batch in gimmecert.signing.split_into_batches(list(range(25)), 2)] == [10, 10, 5]
+    assert [len(batch) for batch in gimmecert.signing.split_into_batches(list(range(1000)), 2)] == [100] * 10
+    assert gimmecert.signing.split_into_batches([], 2) == []
+
+
+def test_sign_batch_signs_serialised_requests_using_worker_signing_key():
+    issuer_private_key, issuer_certificate = get_issuer()
+    public_key = gimmecert.crypto.KeyGenerator('ecdsa', ec.SECP384R1)().public_key()
+    issuer = gimmecert.crypto.CertificateIssuer(gimmecert.crypto.CLIENT_PROFILE, issuer_private_key, issuer_certificate)
+
+    subject_dn, _, extensions, not_before, not_after = issuer.get_signing_parameters('myclient', public_key)
+    public_key_der = public_key.public_bytes(cryptography.hazmat.primitives.serialization.Encoding.DER,
+                                             cryptography.hazmat.primitives.serialization.PublicFormat.SubjectPublicKeyInfo)
+
+    gimmecert.signing.initialise_worker(gimmecert.utils.private_key_to_pem(issuer_private_key).encode(), issuer_certificate.subject)
+    certificates_der = gimmecert.signing.sign_batch([(subject_dn, public_key_der, extensions, not_before, not_after)])
+
+    assert len(certificates_der) == 1
+
+    certificate = cryptography.x509.load_der_x509_certificate(certificates_der[0])
+
+    assert certificate.subject == gimmecert.crypto.get_dn('myclient')
+    assert certificate.issuer == issuer_certificate.subject
+    assert certificate.not_valid_before == not_before
+    assert certificate.not_valid_after == not_after
+    assert gimmecert.crypto.public_keys_match(certificate.public_key(), public_key)
+    assert gimmecert.crypto.verify_certificate_signature(certificate, issuer_certificate)
+    assert certificate.extensions.get_extension_for_class(cryptography.x509.ExtendedKeyUsage).value == \
+        cryptography.x509.ExtendedKeyUsage([cryptography.x509.oid.ExtendedKeyUsageOID.CLIENT_AUTH])
+
+
+@mock.patch('multiprocessing.Pool')
+def test_signing_pool_signs_in_calling_process_without_enough_work(mock_pool):
+    issuer_private_key, issuer_certificate = get_issuer()
+    public_key = gimmecert.crypto.KeyGenerator('ecdsa', ec.SECP256R1)().public_key()
+    issuer = gimmecert.crypto.CertificateIssuer(gimmecert.crypto.SERVER_PROFILE, issuer_private_key, issuer_certificate)
+
+    with gimmecert.signing.SigningPool(issuer_private_key, issuer_certificate, jobs=2) as signing_pool:
+        certificates = signing_pool.sign([issuer.get_signing_parameters('myserver%d' % n, public_key) for n in range(1, 11)])
+
+    mock_pool.assert_not_called()
+    assert [certificate.subject for certificate in certificates] == [gimmecert.crypto.get_dn('myserver%d' % n) for n in range(1, 11)]
+    assert gimmecert.utils.get_dns_names(certificates[0]) == ['myserver1']
+    assert all(gimmecert.crypto.verify_certificate_signature(certificate, issuer_certificate) for certificate in certificates)
+
+
+def test_signing_pool_produces_certificates_in_order_using_worker_processes():
+    issuer_private_key, issuer_certificate = get_issuer()
+    issuer = gimmecert.crypto.CertificateIssuer(gimmecert.crypto.CLIENT_PROFILE, issuer_private_key, issuer_certificate)
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', ec.SECP256R1)
+    public_keys = [key_generator().public_key() for _ in range(30)]
+    names = ['myclient%d' % n for n in range(1, 31)]
+
+    with mock.patch('multiprocessing.Pool', wraps=multiprocessing.Pool) as mock_pool:
+        with gimmecert.signing.SigningPool(issuer_private_key, issuer_certificate, jobs=2) as signing_pool:
+            requests = [issuer.get_signing_parameters(name, public_key) for name, public_key in zip(names, public_keys)]
+            certificates = signing_pool.sign(requests)
+            more_certificates = signing_pool.sign(requests)
+
+    # Worker processes are started (and set-up with the issuing CA private key) only once.
+    mock_pool.assert_called_once_with(2, gimmecert.signing.initialise_worker,
+                                      (gimmecert.utils.private_key_to_pem(issuer_private_key).encode(), issuer_certificate.subject))
+    assert [certificate.subject for certificate in certificates] == [gimmecert.crypto.get_dn(name) for name in names]
+    assert all(gimmecert.crypto.public_keys_match(certificate.public_key(), public_key) for certificate, public_key in zip(certificates, public_keys))
+    assert all(gimmecert.crypto.verify_certificate_signature(certificate, issuer_certificate) for certificate in certificates)
+    assert len({certificate.serial_number for certificate in certificates + more_certificates}) == 60
+
+
+def test_signing_pool_returns_empty_list_for_no_requests():
+    issuer_private_key, issuer_certificate = get_issuer()
+
+    with gimmecert.signing.SigningPool(issuer_private_key, issuer_certificate) as signing_pool:
+        assert signing_pool.sign([]) == []
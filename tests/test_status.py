@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import os
+import time
+from unittest import mock
+
+import gimmecert.status
+import gimmecert.storage
+import gimmecert.utils
+
+import pytest
+
+
+def age_certificates(project_directory, seconds=3600):
+    """
+    Sets modification time of all entity certificates in the past, so
+    they are eligible for caching.
+
+    :param project_directory: Path to project directory.
+    :type project_directory: py.path.local
+
+    :param seconds: How many seconds in the past to set the modification time to.
+    :type seconds: int
+    """
+
+    timestamp = time.time() - seconds
+
+    for certificate_file in project_directory.join('.gimmecert').visit('*.cert.pem'):
+        os.utime(certificate_file.strpath, (timestamp, timestamp))
+
+
+def test_summarise_certificate_returns_status_fields(sample_project_directory):
+    certificate_path = sample_project_directory.join('.gimmecert', 'server', 'server-with-privkey-1.cert.pem').strpath
+    certificate = gimmecert.storage.read_certificate(certificate_path)
+
+    subject, not_valid_before, not_valid_after, subject_alternative_names, key_algorithm = gimmecert.status.summarise_certificate(certificate_path)
+
+    assert subject == gimmecert.utils.dn_to_str(certificate.subject)
+    assert not_valid_before == certificate.not_valid_before
+    assert not_valid_after == certificate.not_valid_after
+    assert subject_alternative_names == {'dns': ['server-with-privkey-1'], 'ip': [], 'uri': [], 'email': []}
+    assert key_algorithm == "2048-bit RSA"
+
+
+def test_get_entity_record_detects_private_key_and_csr(sample_project_directory):
+    with_private_key = gimmecert.status.get_entity_record(sample_project_directory.strpath, 'client', 'client-with-privkey-1')
+    with_csr = gimmecert.status.get_entity_record(sample_project_directory.strpath, 'client', 'client-with-csr-1')
+
+    assert with_private_key.private_key_file == 'client/client-with-privkey-1.key.pem'
+    assert with_private_key.csr_file is None
+    assert with_private_key.certificate_file == 'client/client-with-privkey-1.cert.pem'
+
+    assert with_csr.private_key_file is None
+    assert with_csr.csr_file == 'client/client-with-csr-1.csr.pem'
+    assert with_csr.certificate_file == 'client/client-with-csr-1.cert.pem'
+
+
+def test_get_entity_record_uses_passed_in_artefacts(sample_project_directory):
+    with mock.patch('os.path.exists') as mock_exists:
+        record = gimmecert.status.get_entity_record(sample_project_directory.strpath, 'client', 'client-with-privkey-1', artefacts={'csr', 'cert'})
+
+    mock_exists.assert_not_called()
+    assert record.private_key_file is None
+    assert record.csr_file == 'client/client-with-privkey-1.csr.pem'
+
+
+@pytest.mark.parametrize("jobs", [None, 1, 3])
+def test_collect_entity_records_returns_sorted_records(sample_project_directory, jobs):
+    records = gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server', 'client'], jobs)
+
+    assert [(record.entity_type, record.name) for record in records] == [
+        ('server', 'server-with-csr-1'),
+        ('server', 'server-with-csr-2'),
+        ('server', 'server-with-privkey-1'),
+        ('server', 'server-with-privkey-2'),
+        ('client', 'client-with-csr-1'),
+        ('client', 'client-with-csr-2'),
+        ('client', 'client-with-privkey-1'),
+        ('client', 'client-with-privkey-2'),
+    ]
+
+
+def test_collect_entity_records_returns_empty_list_for_empty_project(gctmpdir):
+    assert gimmecert.status.collect_entity_records(gctmpdir.strpath, ['server', 'client']) == []
+
+
+def test_collect_entity_records_creates_status_cache(sample_project_directory):
+    age_certificates(sample_project_directory)
+
+    gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server', 'client'])
+
+    status_cache = gimmecert.storage.read_status_cache(sample_project_directory.join('.gimmecert', 'cache', 'status.json').strpath)
+
+    assert status_cache['version'] == gimmecert.status.STATUS_CACHE_VERSION
+    assert sorted(status_cache['entries']) == [
+        'client/client-with-csr-1.cert.pem',
+        'client/client-with-csr-2.cert.pem',
+        'client/client-with-privkey-1.cert.pem',
+        'client/client-with-privkey-2.cert.pem',
+        'server/server-with-csr-1.cert.pem',
+        'server/server-with-csr-2.cert.pem',
+        'server/server-with-privkey-1.cert.pem',
+        'server/server-with-privkey-2.cert.pem',
+    ]
+
+
+def test_collect_entity_records_does_not_cache_recently_modified_certificates(sample_project_directory):
+    gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server', 'client'])
+
+    assert not sample_project_directory.join('.gimmecert', 'cache', 'status.json').check()
+
+
+def test_collect_entity_records_does_not_use_cache_if_disabled(sample_project_directory):
+    age_certificates(sample_project_directory)
+
+    gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server', 'client'], use_cache=False)
+
+    assert not sample_project_directory.join('.gimmecert', 'cache', 'status.json').check()
+
+
+def test_collect_entity_records_returns_same_records_with_warm_cache(sample_project_directory):
+    age_certificates(sample_project_directory)
+
+    uncached = gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server', 'client'], use_cache=False)
+    gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server', 'client'])
+    cached = gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server', 'client'])
+
+    assert [vars(record) for record in cached] == [vars(record) for record in uncached]
+
+
+def test_collect_entity_records_does_not_parse_unchanged_certificates(sample_project_directory):
+    age_certificates(sample_project_directory)
+    gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server', 'client'])
+
+    with mock.patch('gimmecert.status.summarise_certificate') as mock_summarise_certificate:
+        gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server', 'client'])
+
+    mock_summarise_certificate.assert_not_called()
+
+
+def test_collect_entity_records_parses_changed_certificates(sample_project_directory):
+    age_certificates(sample_project_directory)
+    gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server', 'client'])
+
+    # Replace certificate with a different one.
+    certificate_dir = sample_project_directory.join('.gimmecert', 'server')
+    certificate_dir.join('server-with-csr-1.cert.pem').write(certificate_dir.join('server-with-privkey-1.cert.pem').read())
+    age_certificates(sample_project_directory, 60)
+
+    records = gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server'])
+
+    assert records[0].name == 'server-with-csr-1'
+    assert records[0].subject == 'CN=server-with-privkey-1'
+
+
+def test_collect_entity_records_drops_removed_certificates_from_cache(sample_project_directory):
+    age_certificates(sample_project_directory)
+    gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server', 'client'])
+
+    sample_project_directory.join('.gimmecert', 'client', 'client-with-csr-1.cert.pem').remove()
+    gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server', 'client'])
+
+    status_cache = gimmecert.storage.read_status_cache(sample_project_directory.join('.gimmecert', 'cache', 'status.json').strpath)
+
+    assert 'client/client-with-csr-1.cert.pem' not in status_cache['entries']
+    assert 'client/client-with-csr-2.cert.pem' in status_cache['entries']
+
+
+def test_collect_entity_records_keeps_cache_entries_for_entity_types_not_scanned(sample_project_directory):
+    age_certificates(sample_project_directory)
+    gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server', 'client'])
+
+    sample_project_directory.join('.gimmecert', 'server', 'server-with-csr-1.cert.pem').remove()
+    gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server'])
+
+    status_cache = gimmecert.storage.read_status_cache(sample_project_directory.join('.gimmecert', 'cache', 'status.json').strpath)
+
+    assert 'server/server-with-csr-1.cert.pem' not in status_cache['entries']
+    assert 'server/server-with-csr-2.cert.pem' in status_cache['entries']
+    assert 'client/client-with-csr-1.cert.pem' in status_cache['entries']
+    assert 'client/client-with-privkey-1.cert.pem' in status_cache['entries']
+
+
+@pytest.mark.parametrize("content", [
+    "not json",
+    '{"version": 0, "entries": {"server/server-with-csr-1.cert.pem": {}}}',
+    '[]',
+])
+def test_collect_entity_records_ignores_invalid_status_cache(sample_project_directory, content):
+    age_certificates(sample_project_directory)
+    sample_project_directory.join('.gimmecert', 'cache', 'status.json').write(content, ensure=True)
+
+    records = gimmecert.status.collect_entity_records(sample_project_directory.strpath, ['server'])
+
+    assert [record.subject for record in records] == ['CN=server-with-csr-1', 'CN=server-with-csr-2', 'CN=server-with-privkey-1', 'CN=server-with-privkey-2']
@@ -18,8 +18,11 @@
 # Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import datetime
 import os
 import io
+import stat
+import tarfile
 
 import cryptography
 
@@ -29,6 +32,7 @@ import gimmecert.storage
 import gimmecert.utils
 
 import pytest
+from unittest import mock
 
 
 def test_initialise_storage(tmpdir):
@@ -42,6 +46,31 @@ def test_initialise_storage(tmpdir):
     assert os.path.exists(tmpdir.join('.gimmecert', 'client').strpath)
 
 
+def test_initialise_storage_with_ca_directory_links_ca_directory(tmpdir):
+    ca_directory = tmpdir.mkdir('shared-ca')
+    project_directory = tmpdir.mkdir('project')
+
+    gimmecert.storage.initialise_storage(project_directory.strpath, ca_directory.strpath)
+
+    assert project_directory.join('.gimmecert', 'ca').islink()
+    assert project_directory.join('.gimmecert', 'ca').realpath() == ca_directory.realpath()
+    assert os.path.exists(project_directory.join('.gimmecert', 'server').strpath)
+    assert os.path.exists(project_directory.join('.gimmecert', 'client').strpath)
+
+
+def test_get_ca_store_directory_uses_xdg_data_home(tmpdir, monkeypatch):
+    monkeypatch.setenv('XDG_DATA_HOME', tmpdir.strpath)
+
+    assert gimmecert.storage.get_ca_store_directory() == tmpdir.join('gimmecert').strpath
+
+
+def test_get_ca_store_directory_defaults_to_local_share_in_home_directory(tmpdir, monkeypatch):
+    monkeypatch.delenv('XDG_DATA_HOME', raising=False)
+    monkeypatch.setenv('HOME', tmpdir.strpath)
+
+    assert gimmecert.storage.get_ca_store_directory() == tmpdir.join('.local', 'share', 'gimmecert').strpath
+
+
 @pytest.mark.parametrize("key_specification, key_type_representation", [
     [("rsa", 2048), "RSA"],
     [("ecdsa", cryptography.hazmat.primitives.asymmetric.ec.SECP192R1), "EC"],
@@ -217,3 +246,345 @@ def test_read_csr(tmpdir):
 
     assert isinstance(csr, cryptography.x509.CertificateSigningRequest)
     assert csr == original_csr
+
+
+def test_write_pkcs12(tmpdir):
+    pkcs12_file = tmpdir.join('test.p12')
+
+    gimmecert.storage.write_pkcs12(b'\x30\x82bundle', pkcs12_file.strpath)
+
+    assert pkcs12_file.read_binary() == b'\x30\x82bundle'
+    assert stat.S_IMODE(os.stat(pkcs12_file.strpath).st_mode) == 0o600
+
+
+def test_write_pkcs12_restricts_permissions_of_existing_file(tmpdir):
+    pkcs12_file = tmpdir.join('test.p12')
+    pkcs12_file.write_binary(b'old')
+    os.chmod(pkcs12_file.strpath, 0o644)
+
+    gimmecert.storage.write_pkcs12(b'\x30\x82bundle', pkcs12_file.strpath)
+
+    assert pkcs12_file.read_binary() == b'\x30\x82bundle'
+    assert stat.S_IMODE(os.stat(pkcs12_file.strpath).st_mode) == 0o600
+
+
+def test_write_file_atomically_creates_parent_directories_and_writes_content(tmpdir):
+    target_file = tmpdir.join('subdir1', 'subdir2', 'myfile.pem')
+
+    gimmecert.storage.write_file_atomically(b'mycontent', target_file.strpath)
+
+    assert target_file.read_binary() == b'mycontent'
+
+
+def test_write_file_atomically_replaces_existing_file_without_leaving_temporary_files(tmpdir):
+    target_file = tmpdir.join('myfile.pem')
+    target_file.write_binary(b'oldcontent')
+
+    gimmecert.storage.write_file_atomically(b'newcontent', target_file.strpath)
+
+    assert target_file.read_binary() == b'newcontent'
+    assert os.listdir(tmpdir.strpath) == ['myfile.pem']
+
+
+def test_read_sync_manifest_returns_empty_manifest_if_file_does_not_exist(tmpdir):
+    manifest = gimmecert.storage.read_sync_manifest(tmpdir.join('manifest.json').strpath)
+
+    assert manifest == {}
+
+
+def test_write_sync_manifest_produces_manifest_readable_with_read_sync_manifest(tmpdir):
+    manifest_file = tmpdir.join('manifest.json')
+    manifest = {
+        'server/myserver/cert.pem': {'sha256': 'abcdef', 'mtime_ns': 1, 'size': 2},
+    }
+
+    gimmecert.storage.write_sync_manifest(manifest, manifest_file.strpath)
+
+    assert gimmecert.storage.read_sync_manifest(manifest_file.strpath) == manifest
+
+
+def test_read_status_cache_returns_empty_cache_if_file_does_not_exist(tmpdir):
+    assert gimmecert.storage.read_status_cache(tmpdir.join('cache', 'status.json').strpath) == {}
+
+
+def test_write_status_cache_produces_cache_readable_with_read_status_cache(tmpdir):
+    status_cache_file = tmpdir.join('cache', 'status.json')
+    status_cache = {'version': 1, 'entries': {'server/myserver.cert.pem': {'subject': 'CN=myserver'}}}
+
+    gimmecert.storage.write_status_cache(status_cache, status_cache_file.strpath)
+
+    assert gimmecert.storage.read_status_cache(status_cache_file.strpath) == status_cache
+
+
+def test_read_revocations_returns_empty_list_if_journal_does_not_exist(tmpdir):
+    assert gimmecert.storage.read_revocations(tmpdir.join('revocations.log').strpath) == []
+
+
+def test_append_revocation_produces_journal_readable_with_read_revocations(tmpdir):
+    journal_file = tmpdir.join('revocations.log')
+
+    gimmecert.storage.append_revocation(journal_file.strpath, 0xabcdef, datetime.datetime(2018, 1, 1, 12, 30, 15), 'server', 'myserver')
+    gimmecert.storage.append_revocation(journal_file.strpath, 0x123456, datetime.datetime(2018, 1, 2, 0, 0, 0), 'client', 'my client')
+
+    assert journal_file.read() == "abcdef 2018-01-01T12:30:15 server myserver\n123456 2018-01-02T00:00:00 client my client\n"
+    assert gimmecert.storage.read_revocations(journal_file.strpath) == [
+        (0xabcdef, datetime.datetime(2018, 1, 1, 12, 30, 15), 'server', 'myserver'),
+        (0x123456, datetime.datetime(2018, 1, 2, 0, 0, 0), 'client', 'my client'),
+    ]
+
+
+def test_read_crl_state_returns_initial_state_if_file_does_not_exist(tmpdir):
+    crl_state = gimmecert.storage.read_crl_state(tmpdir.join('state.json').strpath)
+
+    assert crl_state == {'crl_number': 0, 'base_crl_number': None, 'base_revocation_count': 0}
+
+
+def test_write_crl_state_produces_state_readable_with_read_crl_state(tmpdir):
+    crl_state_file = tmpdir.join('state.json')
+    crl_state = {'crl_number': 5, 'base_crl_number': 3, 'base_revocation_count': 10}
+
+    gimmecert.storage.write_crl_state(crl_state, crl_state_file.strpath)
+
+    assert gimmecert.storage.read_crl_state(crl_state_file.strpath) == crl_state
+
+
+def test_write_crl(tmpdir):
+    crl_file = tmpdir.join('crl.pem')
+    private_key, certificate = gimmecert.crypto.generate_ca_hierarchy('My Project', 1, gimmecert.crypto.KeyGenerator('rsa', 2048))[0]
+    now = datetime.datetime.utcnow()
+    crl = gimmecert.crypto.issue_crl([(1234, now)], private_key, certificate, 1, now, now + datetime.timedelta(days=1))
+
+    gimmecert.storage.write_crl(crl, crl_file.strpath)
+
+    crl_file_content = crl_file.read()
+
+    assert crl_file_content.startswith('-----BEGIN X509 CRL-----')
+    assert crl_file_content.endswith('-----END X509 CRL-----\n')
+
+
+@pytest.fixture(params=["filesystem", "memory"])
+def storage(request, tmpdir):
+    """
+    Parametrised fixture providing instances of all storage backends.
+    """
+
+    if request.param == "filesystem":
+        return gimmecert.storage.FilesystemStorage(tmpdir.strpath)
+
+    return gimmecert.storage.MemoryStorage()
+
+
+def test_storage_initialise(storage):
+    assert not storage.is_initialised()
+
+    storage.initialise()
+
+    assert storage.is_initialised()
+
+
+def test_storage_writes_and_reads_artefacts(storage, key_with_csr):
+    storage.initialise()
+    ca_hierarchy = gimmecert.crypto.generate_ca_hierarchy('My Project', 2, gimmecert.crypto.KeyGenerator('rsa', 2048))
+    for level, (private_key, certificate) in enumerate(ca_hierarchy, 1):
+        storage.write(private_key, 'ca/level%d.key.pem' % level)
+        storage.write(certificate, 'ca/level%d.cert.pem' % level)
+    storage.write([certificate for _, certificate in ca_hierarchy], 'ca/chain-full.cert.pem')
+    storage.write(key_with_csr.csr, 'client/myclient.csr.pem')
+    storage.write(key_with_csr.private_key, 'server/myserver.key.pem')
+
+    assert storage.exists('client/myclient.csr.pem')
+    assert not storage.exists('client/myclient.key.pem')
+    assert storage.read('client/myclient.csr.pem') == key_with_csr.csr
+    assert storage.read('server/myserver.key.pem').private_numbers() == key_with_csr.private_key.private_numbers()
+    assert storage.read('ca/level2.cert.pem') == ca_hierarchy[1][1]
+    assert [c for _, c in storage.read_ca_hierarchy()] == [c for _, c in ca_hierarchy]
+    assert storage.list('client', '.csr.pem') == ['myclient']
+    assert storage.list('server', '.csr.pem') == []
+
+    storage.remove('client/myclient.csr.pem')
+
+    assert not storage.exists('client/myclient.csr.pem')
+    assert storage.list('client', '.csr.pem') == []
+
+
+def test_storage_scan_discovers_entity_artefacts(storage, key_with_csr):
+    storage.initialise()
+    storage.write(key_with_csr.private_key, 'server/myserver1.key.pem')
+    storage.write(key_with_csr.csr, 'server/myserver2.csr.pem')
+    storage.write(key_with_csr.csr, 'client/myclient.csr.pem')
+
+    assert storage.scan('server') == {'myserver1': {'key'}, 'myserver2': {'csr'}}
+    assert storage.scan('client') == {'myclient': {'csr'}}
+
+
+def test_storage_link_makes_artefact_available_under_another_name(storage, key_with_csr):
+    storage.initialise()
+    storage.write(key_with_csr.private_key, 'server/myserver.key.pem')
+
+    storage.link('server/myserver.key.pem', 'client/myclient.key.pem')
+
+    assert storage.exists('client/myclient.key.pem')
+    assert storage.read('client/myclient.key.pem').private_numbers() == key_with_csr.private_key.private_numbers()
+
+    storage.remove('server/myserver.key.pem')
+
+    assert storage.read('client/myclient.key.pem').private_numbers() == key_with_csr.private_key.private_numbers()
+
+
+def test_filesystem_storage_link_uses_hard_link(tmpdir, key_with_csr):
+    storage = gimmecert.storage.FilesystemStorage(tmpdir.strpath)
+    storage.initialise()
+    storage.write(key_with_csr.private_key, 'server/myserver.key.pem')
+
+    storage.link('server/myserver.key.pem', 'client/myclient.key.pem')
+
+    assert os.path.samefile(storage.get_path('server/myserver.key.pem'), storage.get_path('client/myclient.key.pem'))
+    assert not os.path.islink(storage.get_path('client/myclient.key.pem'))
+
+
+def test_filesystem_storage_link_falls_back_to_relative_symbolic_link(tmpdir, key_with_csr):
+    storage = gimmecert.storage.FilesystemStorage(tmpdir.strpath)
+    storage.initialise()
+    storage.write(key_with_csr.private_key, 'server/myserver.key.pem')
+
+    with mock.patch('os.link', side_effect=OSError("Hard links are not supported")):
+        storage.link('server/myserver.key.pem', 'client/myclient.key.pem')
+
+    assert os.readlink(storage.get_path('client/myclient.key.pem')) == os.path.join(os.pardir, 'server', 'myserver.key.pem')
+    assert storage.read('client/myclient.key.pem').private_numbers() == key_with_csr.private_key.private_numbers()
+
+
+def test_filesystem_storage_write_does_not_modify_linked_private_key(tmpdir, key_with_csr):
+    storage = gimmecert.storage.FilesystemStorage(tmpdir.strpath)
+    storage.initialise()
+    storage.write(key_with_csr.private_key, 'server/myserver.key.pem')
+    storage.link('server/myserver.key.pem', 'client/myclient.key.pem')
+    new_private_key = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)()
+
+    storage.write(new_private_key, 'client/myclient.key.pem')
+
+    assert storage.read('server/myserver.key.pem').private_numbers() == key_with_csr.private_key.private_numbers()
+    assert storage.read('client/myclient.key.pem').private_numbers() == new_private_key.private_numbers()
+
+
+def test_scan_entity_artefacts_maps_entities_to_artefact_kinds(tmpdir):
+    tmpdir.join('myserver1.key.pem').write('')
+    tmpdir.join('myserver1.cert.pem').write('')
+    tmpdir.join('myserver2.csr.pem').write('')
+    tmpdir.join('myserver2.cert.pem').write('')
+    tmpdir.join('myserver3.p12').write('')
+
+    assert gimmecert.storage.scan_entity_artefacts(tmpdir.strpath) == {
+        'myserver1': {'key', 'cert'},
+        'myserver2': {'csr', 'cert'},
+    }
+
+
+def test_scan_entity_artefacts_returns_empty_mapping_if_directory_does_not_exist(tmpdir):
+    assert gimmecert.storage.scan_entity_artefacts(tmpdir.join('missing').strpath) == {}
+
+
+def test_filesystem_storage_get_path(tmpdir):
+    storage = gimmecert.storage.FilesystemStorage(tmpdir.strpath)
+
+    assert storage.get_path('server/myserver.cert.pem') == tmpdir.join('.gimmecert', 'server', 'myserver.cert.pem').strpath
+
+
+def test_memory_storage_get_path():
+    assert gimmecert.storage.MemoryStorage().get_path('server/myserver.cert.pem') is None
+
+
+def test_artefact_to_pem_serialises_artefacts(key_with_csr):
+    ca_hierarchy = gimmecert.crypto.generate_ca_hierarchy('My Project', 2, gimmecert.crypto.KeyGenerator('rsa', 2048))
+    chain = [certificate for _, certificate in ca_hierarchy]
+
+    assert gimmecert.storage.artefact_to_pem(key_with_csr.private_key, 'server/myserver.key.pem') == key_with_csr.private_key_pem
+    assert gimmecert.storage.artefact_to_pem(key_with_csr.csr, 'server/myserver.csr.pem') == key_with_csr.csr_pem
+    assert gimmecert.storage.artefact_to_pem(chain[0], 'ca/level1.cert.pem') == gimmecert.utils.certificate_to_pem(chain[0])
+    assert gimmecert.storage.artefact_to_pem(chain, 'ca/chain-full.cert.pem') == "\n".join(gimmecert.utils.certificate_to_pem(c) for c in chain)
+
+
+def test_tar_archive_streams_files_into_archive(key_with_csr):
+    stream = io.BytesIO()
+
+    archive = gimmecert.storage.TarArchive(stream)
+    archive.add(b'bundle', 'client/myclient.p12')
+    archive.add_artefact(key_with_csr.private_key, 'client/myclient.key.pem')
+    archive.add_artefact(key_with_csr.csr, 'client/myclient.csr.pem')
+    archive.close()
+
+    stream.seek(0)
+    with tarfile.open(fileobj=stream) as tar:
+        members = tar.getmembers()
+        contents = {m.name: tar.extractfile(m).read() for m in members}
+
+    assert [(m.name, m.mode) for m in members] == [
+        ('client/myclient.p12', 0o600),
+        ('client/myclient.key.pem', 0o600),
+        ('client/myclient.csr.pem', 0o644),
+    ]
+    assert contents['client/myclient.p12'] == b'bundle'
+    assert contents['client/myclient.key.pem'] == key_with_csr.private_key_pem.encode()
+    assert contents['client/myclient.csr.pem'] == key_with_csr.csr_pem.encode()
+    assert not stream.closed
+
+
+def test_archiving_storage_writes_artefacts_into_storage_and_archive(key_with_csr):
+    stream = io.BytesIO()
+    archive = gimmecert.storage.TarArchive(stream)
+    memory_storage = gimmecert.storage.MemoryStorage()
+    memory_storage.initialise()
+    storage = gimmecert.storage.ArchivingStorage(memory_storage, archive)
+
+    storage.write(key_with_csr.csr, 'client/myclient.csr.pem')
+    archive.close()
+
+    stream.seek(0)
+    with tarfile.open(fileobj=stream) as tar:
+        assert tar.getnames() == ['client/myclient.csr.pem']
+
+    assert storage.exists('client/myclient.csr.pem')
+    assert memory_storage.read('client/myclient.csr.pem') == key_with_csr.csr
+    assert storage.list('client', '.csr.pem') == ['myclient']
+
+
+def test_archiving_storage_adds_linked_artefacts_into_archive(key_with_csr):
+    stream = io.BytesIO()
+    archive = gimmecert.storage.TarArchive(stream)
+    memory_storage = gimmecert.storage.MemoryStorage()
+    memory_storage.initialise()
+    memory_storage.write(key_with_csr.private_key, 'server/myserver.key.pem')
+    storage = gimmecert.storage.ArchivingStorage(memory_storage, archive)
+
+    storage.link('server/myserver.key.pem', 'client/myclient.key.pem')
+    archive.close()
+
+    stream.seek(0)
+    with tarfile.open(fileobj=stream) as tar:
+        assert tar.getnames() == ['client/myclient.key.pem']
+        assert tar.extractfile('client/myclient.key.pem').read() == key_with_csr.private_key_pem.encode()
+
+    assert memory_storage.exists('client/myclient.key.pem')
+
+
+def test_read_ca_hierarchy_allows_missing_parent_ca_private_keys(tmpdir):
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    ca_hierarchy = gimmecert.crypto.generate_ca_hierarchy('My Project', 2, key_generator)
+    gimmecert.storage.write_certificate(ca_hierarchy[0][1], tmpdir.join('level1.cert.pem').strpath)
+    gimmecert.storage.write_private_key(ca_hierarchy[1][0], tmpdir.join('level2.key.pem').strpath)
+    gimmecert.storage.write_certificate(ca_hierarchy[1][1], tmpdir.join('level2.cert.pem').strpath)
+
+    read_hierarchy = gimmecert.storage.read_ca_hierarchy(tmpdir.strpath)
+
+    assert len(read_hierarchy) == 2
+    assert read_hierarchy[0] == (None, ca_hierarchy[0][1])
+    assert read_hierarchy[1][1] == ca_hierarchy[1][1]
+    assert read_hierarchy[1][0] is not None
+
+
+def test_get_ca_directory(gctmpdir, tmpdir):
+    ca_directory = gctmpdir.join('.gimmecert', 'ca')
+
+    assert gimmecert.storage.get_ca_directory(gctmpdir.strpath) == ca_directory.strpath
+    assert gimmecert.storage.get_ca_directory(ca_directory.strpath) == ca_directory.strpath
+    assert gimmecert.storage.get_ca_directory(tmpdir.mkdir('empty').strpath) is None
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import datetime
+
+import cryptography.hazmat.primitives.asymmetric.ec
+import cryptography.hazmat.primitives.serialization
+
+import gimmecert.crypto
+import gimmecert.utils
+import gimmecert.verify
+
+import pytest
+
+
+@pytest.fixture
+def sample_entity():
+    """
+    Generates CA hierarchy and a client entity for testing the
+    verification.
+
+    :returns: CA hierarchy, client private key, and client certificate.
+    :rtype: (list[(cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey, cryptography.x509.Certificate)],
+             cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePrivateKey, cryptography.x509.Certificate)
+    """
+
+    key_generator = gimmecert.crypto.KeyGenerator('ecdsa', cryptography.hazmat.primitives.asymmetric.ec.SECP256R1)
+    ca_hierarchy = gimmecert.crypto.generate_ca_hierarchy('My Project', 2, key_generator)
+    private_key = key_generator()
+    certificate = gimmecert.crypto.issue_client_certificate('myclient', private_key.public_key(), ca_hierarchy[-1][0], ca_hierarchy[-1][1])
+
+    return ca_hierarchy, private_key, certificate
+
+
+def test_verify_certificate_returns_empty_list_for_valid_certificate(sample_entity):
+    ca_hierarchy, private_key, certificate = sample_entity
+
+    assert gimmecert.verify.verify_certificate(certificate, ca_hierarchy[-1][1], private_key, datetime.datetime.utcnow()) == []
+    assert gimmecert.verify.verify_certificate(certificate, ca_hierarchy[-1][1], None, datetime.datetime.utcnow()) == []
+
+
+def test_verify_certificate_reports_all_failures(sample_entity):
+    ca_hierarchy, _, certificate = sample_entity
+    now = certificate.not_valid_after + datetime.timedelta(seconds=1)
+
+    failures = gimmecert.verify.verify_certificate(certificate, ca_hierarchy[0][1], ca_hierarchy[0][0], now)
+
+    assert [check for check, _ in failures] == ["signature", "validity", "private-key"]
+    assert failures[0][1] == "Certificate has not been signed by CN=My Project Level 1 CA."
+    assert "Certificate has expired" in failures[1][1]
+
+
+def test_verify_certificate_reports_certificate_not_valid_yet(sample_entity):
+    ca_hierarchy, private_key, certificate = sample_entity
+    now = certificate.not_valid_before - datetime.timedelta(seconds=1)
+
+    failures = gimmecert.verify.verify_certificate(certificate, ca_hierarchy[-1][1], private_key, now)
+
+    assert len(failures) == 1
+    assert failures[0][0] == "validity"
+    assert "Certificate is not valid yet" in failures[0][1]
+
+
+def test_verify_entity_verifies_serialised_artefacts(sample_entity):
+    ca_hierarchy, private_key, certificate = sample_entity
+    certificate_pem = gimmecert.utils.certificate_to_pem(certificate).encode()
+    issuer_certificate_pem = gimmecert.utils.certificate_to_pem(ca_hierarchy[0][1]).encode()
+    private_key_pem = private_key.private_bytes(
+        encoding=cryptography.hazmat.primitives.serialization.Encoding.PEM,
+        format=cryptography.hazmat.primitives.serialization.PrivateFormat.TraditionalOpenSSL,
+        encryption_algorithm=cryptography.hazmat.primitives.serialization.NoEncryption()
+    )
+
+    failures = gimmecert.verify.verify_entity('client', 'myclient', certificate_pem, private_key_pem, issuer_certificate_pem, datetime.datetime.utcnow())
+
+    assert failures == [{
+        "entity_type": "client",
+        "entity_name": "myclient",
+        "check": "signature",
+        "message": "Certificate has not been signed by CN=My Project Level 1 CA.",
+    }]
+
+
+def test_verify_entity_reports_unparseable_artefacts(sample_entity):
+    ca_hierarchy, _, certificate = sample_entity
+    certificate_pem = gimmecert.utils.certificate_to_pem(certificate).encode()
+    issuer_certificate_pem = gimmecert.utils.certificate_to_pem(ca_hierarchy[-1][1]).encode()
+    now = datetime.datetime.utcnow()
+
+    certificate_failures = gimmecert.verify.verify_entity('client', 'myclient', b'garbage', None, issuer_certificate_pem, now)
+    private_key_failures = gimmecert.verify.verify_entity('client', 'myclient', certificate_pem, b'garbage', issuer_certificate_pem, now)
+
+    assert [f["check"] for f in certificate_failures] == ["certificate"]
+    assert [f["check"] for f in private_key_failures] == ["private-key"]
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2018 Branko Majic
+#
+# This file is part of Gimmecert.
+#
+# Gimmecert is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Gimmecert is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# Gimmecert.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import os
+import threading
+import time
+
+import gimmecert.watch
+
+import pytest
+from unittest import mock
+
+
+def test_get_pending_csr_names_returns_csrs_without_certificates(tmpdir):
+    tmpdir.join('myserver1.csr.pem').write('csr')
+    tmpdir.join('myserver2.csr.pem').write('csr')
+    tmpdir.join('myserver2.cert.pem').write('cert')
+    tmpdir.join('myserver3.cert.pem').write('cert')
+    tmpdir.join('unrelated.txt').write('text')
+
+    assert gimmecert.watch.get_pending_csr_names(tmpdir.strpath) == ['myserver1']
+
+
+def test_get_pending_csr_names_returns_csrs_newer_than_certificates(tmpdir):
+    tmpdir.join('myserver1.csr.pem').write('csr')
+    tmpdir.join('myserver1.cert.pem').write('cert')
+    tmpdir.join('myserver2.csr.pem').write('csr')
+    tmpdir.join('myserver2.cert.pem').write('cert')
+
+    os.utime(tmpdir.join('myserver1.cert.pem').strpath, ns=(1000, 1000))
+
+    assert gimmecert.watch.get_pending_csr_names(tmpdir.strpath) == ['myserver1']
+
+
+def test_get_pending_csr_names_skips_files_removed_during_scan(tmpdir):
+    tmpdir.join('myserver1.csr.pem').write('csr')
+    tmpdir.join('myserver2.csr.pem').write('csr')
+    tmpdir.join('myserver2.cert.pem').write('cert')
+    tmpdir.join('myserver3.csr.pem').write('csr')
+    tmpdir.join('myserver3.cert.pem').write('cert')
+
+    os.utime(tmpdir.join('myserver3.cert.pem').strpath, ns=(1000, 1000))
+
+    scandir = os.scandir
+
+    def scandir_and_remove(path):
+        entries = list(scandir(path))
+        tmpdir.join('myserver1.csr.pem').remove()
+        tmpdir.join('myserver3.cert.pem').remove()
+        return iter(entries)
+
+    with mock.patch('gimmecert.watch.os.scandir', scandir_and_remove):
+        pending_csr_names = gimmecert.watch.get_pending_csr_names(tmpdir.strpath)
+
+    assert pending_csr_names == ['myserver3']
+
+
+def test_polling_watcher_waits_for_interval(tmpdir):
+    watcher = gimmecert.watch.PollingWatcher(tmpdir.strpath, 0.1)
+
+    start = time.monotonic()
+    changed = watcher.wait()
+    watcher.close()
+
+    assert changed is True
+    assert time.monotonic() - start >= 0.1
+
+
+def test_inotify_watcher_times_out_if_there_are_no_changes(tmpdir):
+    watcher = gimmecert.watch.InotifyWatcher(tmpdir.strpath, 0.1)
+
+    changed = watcher.wait()
+    watcher.close()
+
+    assert changed is False
+
+
+def test_inotify_watcher_detects_written_files(tmpdir):
+    watcher = gimmecert.watch.InotifyWatcher(tmpdir.strpath, 5)
+
+    def write_files():
+        time.sleep(0.1)
+        for i in range(10):
+            tmpdir.join('myserver%d.csr.pem' % i).write('csr')
+
+    writer = threading.Thread(target=write_files)
+    writer.start()
+
+    start = time.monotonic()
+    changed = watcher.wait()
+    writer.join()
+    watcher.close()
+
+    assert changed is True
+    assert time.monotonic() - start < 5
+
+
+def test_inotify_watcher_raises_exception_for_missing_directory(tmpdir):
+    with pytest.raises(OSError):
+        gimmecert.watch.InotifyWatcher(tmpdir.join('missing').strpath, 1)
+
+
+def test_get_directory_watcher_returns_inotify_watcher_if_available(tmpdir):
+    watcher = gimmecert.watch.get_directory_watcher(tmpdir.strpath, 1)
+    watcher.close()
+
+    assert isinstance(watcher, gimmecert.watch.InotifyWatcher)
+
+
+@mock.patch('gimmecert.watch.InotifyWatcher')
+def test_get_directory_watcher_falls_back_to_polling_watcher(mock_inotify_watcher, tmpdir):
+    mock_inotify_watcher.side_effect = OSError("Inotify is not supported on this platform.")
+
+    watcher = gimmecert.watch.get_directory_watcher(tmpdir.strpath, 1)
+
+    assert isinstance(watcher, gimmecert.watch.PollingWatcher)